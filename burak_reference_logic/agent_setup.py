@@ -1,5 +1,5 @@
 import logging
-from typing import Awaitable, Callable, List
+from typing import Awaitable, Callable, List, Optional
 
 from beam_ai_core.executor.errors import RateLimitExceededError
 from beam_ai_core.tracing.langfuse import TraceConfig
@@ -7,26 +7,32 @@ from beam_ai_core.tracing.langfuse import TraceConfig
 from app.lib.modules.agents.agent_setup.models.agent_setup import (
     AgentGraphCreationState,
     AgentSetupSession,
-    AgentSetupStage,
     AgentSetupStatus,
 )
-from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_generation_handler import (
-    generate_agent_graph,
+from app.lib.modules.agents.agent_setup.session_store.session_event_log import (
+    SessionEventLog,
+    SessionEventRecorder,
 )
-from app.lib.modules.agents.agent_setup.stages.sop_generation.sop_generation_handler import (
-    generate_agent_sop,
-)
-from app.lib.modules.agents.agent_setup.stages.tool_generation.tool_generation_handler import (
-    generate_agent_tools,
-)
-from app.lib.modules.agents.agent_setup.stages.tool_matching.tool_matching_handler import (
-    select_agent_tools,
+from app.lib.modules.agents.agent_setup.stages.stage_scheduler import (
+    clear_finished_stages,
+    get_pending_stages,
+    get_runnable_stages,
+    run_concurrent_stages,
+    run_stage,
 )
 from app.lib.modules.agents.agent_setup.utils.agent_setup_utils import (
     initialize_agent_setup,
     set_failed_agent_setup_state,
     set_trace_ids,
 )
+from app.lib.modules.agents.agent_setup.utils.cancellation import (
+    CancelToken,
+    SetupCancelledError,
+)
+from app.lib.modules.agents.agent_setup.utils.model_construction import (
+    trusted_construct,
+)
+from app.lib.modules.agents.agent_setup.utils.stage_deadlines import deadline_scope
 from app.lib.modules.graphs.graph_task_executor.models.node_interrupt import (
     NodeInterrupt,
 )
@@ -45,8 +51,11 @@ async def setup_agent(
     streaming_handlers: List[Callable],
     trace_config: TraceConfig,
     on_exit: Callable[[AgentSetupSession], Awaitable[None]] = None,
+    event_log: Optional[SessionEventLog] = None,
+    deadline: Optional[float] = None,
+    cancel_token: Optional[CancelToken] = None,
 ) -> AgentSetupSession:
-    # Main Entry Function
+    # Main Entry Function, the optional Deadline in Seconds bounds all Stages of this Run
     if agent_setup.status in TERMINAL_TASK_STATES:
         raise ValueError(
             "Agent Setup Status is already in Terminal State, Cannot Proceed"
@@ -74,11 +83,14 @@ async def setup_agent(
         #     trace_config=trace_config,
         # )
 
-        agent_setup_state = AgentGraphCreationState(
+        # NOTE: Built from the already validated Session, so Validation is skipped
+        agent_setup_state = trusted_construct(
+            AgentGraphCreationState,
             agent_setup_session=agent_setup,
             agent_memory=None,
             streaming_handlers=streaming_handlers,
             trace_config=trace_config,
+            cancel_token=cancel_token or CancelToken(),
         )
 
     except Exception as agent_setup_exc:
@@ -86,38 +98,76 @@ async def setup_agent(
             "Something went wrong while starting Agent Graph Creation process..."
         )
         raise agent_setup_exc
-    # Execute Graph until it Stops via Node Interrupt (Completed/Failed/UserInput & Consent)
-    try:
-        while agent_setup_state.agent_setup_session.status not in TERMINAL_TASK_STATES:
-            agent_setup_state = await run_setup_stage(
-                agent_setup_state=agent_setup_state
-            )
-
-    # Handle Terminal States
-    except NodeInterrupt as node_interrupt:
-        session_status = agent_setup_state.agent_setup_session.status
-
-        match session_status:
-            case AgentSetupStatus.FAILED:
-                logger.error("Agent Setup & Graph Creation Failed")
-                raise node_interrupt
-
-            case AgentSetupStatus.USER_INPUT_REQUIRED:
-                logger.warning("User Input Required")
-
-    # Handle Errors & Exceptions
-    except RateLimitExceededError:
-        agent_setup = set_failed_agent_setup_state(
-            "Rate Limit Exceeded", agent_setup=agent_setup
-        )
-        raise
 
-    except Exception as agent_setup_exc:
-        agent_setup = set_failed_agent_setup_state(
-            f"Something went wrong while executing the Graph: {agent_setup_exc}",
-            agent_setup=agent_setup,
-        )
-        raise agent_setup_exc
+    # NOTE: Optional Event Log, records every Stage Transition & Output of the Session
+    event_recorder = (
+        SessionEventRecorder(event_log=event_log, agent_setup=agent_setup)
+        if event_log
+        else None
+    )
+    if event_recorder:
+        await event_recorder.record_session_created()
+
+    # NOTE: Stage Deadlines never extend the Deadline of the whole Run
+    with deadline_scope(deadline):
+        # Execute Graph until it Stops via Node Interrupt (Completed/Failed/UserInput & Consent)
+        try:
+            while agent_setup_state.agent_setup_session.status not in TERMINAL_TASK_STATES:
+                # NOTE: Cancelled Sessions stop before starting the next Stage
+                agent_setup_state.cancel_token.raise_if_cancelled()
+
+                if event_recorder:
+                    await event_recorder.record_stages_started(
+                        [
+                            definition.stage
+                            for definition in get_pending_stages(
+                                agent_setup_state.agent_setup_session.setup_state
+                            )
+                        ]
+                    )
+
+                try:
+                    agent_setup_state = await run_setup_stage(
+                        agent_setup_state=agent_setup_state
+                    )
+                finally:
+                    if event_recorder:
+                        await event_recorder.record_changes()
+
+        # Handle Terminal States
+        except NodeInterrupt as node_interrupt:
+            session_status = agent_setup_state.agent_setup_session.status
+
+            match session_status:
+                case AgentSetupStatus.FAILED:
+                    logger.error("Agent Setup & Graph Creation Failed")
+                    raise node_interrupt
+
+                case AgentSetupStatus.USER_INPUT_REQUIRED:
+                    logger.warning("User Input Required")
+
+        # Cancelled Runs keep their Session State, the next Stage is resumed by a newer Run
+        except SetupCancelledError as cancelled_exc:
+            logger.warning(f"Agent Setup cancelled: {cancelled_exc}")
+            raise
+
+        # Handle Errors & Exceptions
+        except RateLimitExceededError:
+            agent_setup = set_failed_agent_setup_state(
+                "Rate Limit Exceeded", agent_setup=agent_setup
+            )
+            if event_recorder:
+                await event_recorder.record_changes()
+            raise
+
+        except Exception as agent_setup_exc:
+            agent_setup = set_failed_agent_setup_state(
+                f"Something went wrong while executing the Graph: {agent_setup_exc}",
+                agent_setup=agent_setup,
+            )
+            if event_recorder:
+                await event_recorder.record_changes()
+            raise agent_setup_exc
 
     return agent_setup_state.agent_setup_session
 
@@ -130,16 +180,22 @@ async def run_setup_stage(agent_setup_state: AgentGraphCreationState):
     logger.info(f"Agent Setup State: {agent_setup_state.agent_setup_session.status}")
 
     try:
-        match agent_setup_state.agent_setup_session.setup_state.next.value:
-
-            case AgentSetupStage.SOP_GENERATION.value:
-                agent_setup_state = await generate_agent_sop(agent_setup_state)
-            case AgentSetupStage.GRAPH_GENERATION.value:
-                agent_setup_state = await generate_agent_graph(agent_setup_state)
-            case AgentSetupStage.TOOL_MATCHING.value:
-                agent_setup_state = await select_agent_tools(agent_setup_state)
-            case AgentSetupStage.TOOL_GENERATION.value:
-                agent_setup_state = await generate_agent_tools(agent_setup_state)
+        # NOTE: Independent Stages (e.g. Tool Matching & Tool Generation) run Concurrently
+        stage_definitions = get_runnable_stages(
+            agent_setup_state.agent_setup_session.setup_state.next
+        )
+
+        if len(stage_definitions) == 1:
+            # NOTE: Finished Stages only apply to the Resume of the interrupted Batch
+            clear_finished_stages(agent_setup_state.agent_setup_session.setup_state)
+            agent_setup_state = await run_stage(
+                stage_definitions[0], agent_setup_state
+            )
+        elif stage_definitions:
+            agent_setup_state = await run_concurrent_stages(
+                agent_setup_state=agent_setup_state,
+                stage_definitions=stage_definitions,
+            )
 
         return agent_setup_state
 
@@ -1,7 +1,10 @@
 # TODO: Implement AgentSetupManager
+import asyncio
+import contextlib
 import logging
 from functools import partial
 from typing import Any, Dict, Optional
+from uuid import uuid4
 
 from beam_ai_core.tracing.langfuse import TraceConfig
 from pydantic import BaseModel
@@ -13,8 +16,28 @@ from app.lib.modules.agents.agent_setup.models.agent_setup import (
     AgentSetupSession,
     AgentSetupStatus,
 )
-from app.lib.modules.graphs.graph_task_executor.graph_executor import (
-    TERMINAL_TASK_STATES,
+from app.lib.modules.agents.agent_setup.session_store.session_event_log import (
+    SessionEventLog,
+)
+from app.lib.modules.agents.agent_setup.session_store.session_recovery import (
+    SessionRecoverySweeper,
+)
+from app.lib.modules.agents.agent_setup.session_store.session_store import (
+    AgentSetupSessionStore,
+    SessionLeaseError,
+)
+from app.lib.modules.agents.agent_setup.utils.admission_control import (
+    AdmissionController,
+    AdmissionDeferredError,
+    estimate_setup_cost,
+)
+from app.lib.modules.agents.agent_setup.utils.cancellation import (
+    CancelToken,
+    run_cancellable,
+)
+from app.lib.modules.agents.agent_setup.utils.job_transport import JobTransport
+from app.lib.modules.agents.agent_setup.utils.update_publisher import (
+    SessionUpdatePublisher,
 )
 
 logger = logging.getLogger("app")
@@ -42,6 +65,223 @@ class AgentSetupManager:
     MAX_PARALLEL_JOBS = 1000
     QUEUE_MAX_RETRIES = 5
     TRACE_NAME = "AgentSetup"
+    SESSION_LEASE_SECONDS = 300
+    # Deadline of a single Run, Stage Budgets are capped by the Time remaining
+    RUN_DEADLINE_SECONDS = 3600
+
+    # NOTE: Optional Session Store for Session Lookups & Crash Recovery
+    session_store: Optional[AgentSetupSessionStore] = None
+    worker_id: str = f"agent-setup-worker-{uuid4()}"
+    session_recovery: Optional[SessionRecoverySweeper] = None
+    # NOTE: Optional Event Log for Audits & Replays of Session Transitions
+    event_log: Optional[SessionEventLog] = None
+    # NOTE: Optional Admission Control against a global LLM Token Budget
+    admission_controller: Optional[AdmissionController] = None
+    # NOTE: Optional Coalescing of Session Updates, otherwise every Update is published
+    update_publisher: Optional[SessionUpdatePublisher] = None
+    # NOTE: Optional batched Job Publishing, otherwise every Job is published on its own
+    job_transport: Optional[JobTransport] = None
+
+    def __init__(self):
+        # NOTE: Cancel Tokens of the running Setup Runs of the Worker, by Session Id
+        self.active_runs: Dict[str, CancelToken] = {}
+        # NOTE: Lease Owner of the Run holding the Session Lease, every Run leases as its own
+        # Owner, so a superseded Run can not renew, overwrite or release the Lease of the newer Run
+        self.lease_owners: Dict[str, str] = {}
+        # NOTE: Requeues of deferred Runs, waiting for the Token Budget, by Session Id
+        self.deferred_requeues: Dict[str, asyncio.Task] = {}
+        # NOTE: Closing the Manager requeues the deferred Runs at once, instead of dropping them
+        self._closing = asyncio.Event()
+
+    def set_session_store(
+        self, session_store: AgentSetupSessionStore, enable_recovery: bool = True
+    ) -> None:
+        """Persists Sessions in the Store & re-enqueues Sessions of crashed Workers."""
+        self.session_store = session_store
+
+        if enable_recovery:
+            self.session_recovery = SessionRecoverySweeper(
+                session_store=session_store,
+                requeue_session=self.requeue_session,
+                owner=self.worker_id,
+                lease_seconds=self.SESSION_LEASE_SECONDS,
+            )
+            self.session_recovery.start()
+
+    def set_event_log(self, event_log: SessionEventLog) -> None:
+        """Records the Stage Transitions & Outputs of every Session as Events."""
+        self.event_log = event_log
+
+    def set_admission_controller(self, admission_controller: AdmissionController) -> None:
+        """Admits Runs only within the Token Budget, deferring or shedding the others."""
+        self.admission_controller = admission_controller
+
+    def set_update_publisher(
+        self,
+        debounce_seconds: float = 0.5,
+        max_delay: float = 2.0,
+        send_diffs: bool = False,
+    ) -> None:
+        """Coalesces Session Updates per Session, terminal States are published at once."""
+        self.update_publisher = SessionUpdatePublisher(
+            publish=self.publish_task_update,
+            debounce_seconds=debounce_seconds,
+            max_delay=max_delay,
+            send_diffs=send_diffs,
+        )
+
+    def set_job_transport(self, job_transport: JobTransport) -> None:
+        """Publishes the Jobs of all Sessions in pipelined Batches of the Transport."""
+        self.job_transport = job_transport
+
+    async def dispatch_job(
+        self, job: Job, session_id: Optional[str] = None, **publish_options: Any
+    ) -> Optional[asyncio.Future]:
+        """
+        Publishes a Job, through the Job Transport if one is set.
+
+        With a Job Transport the Job is only buffered and the pending Delivery is returned,
+        Jobs of the same Session are delivered in the Order they were dispatched. Callers
+        await the Delivery where a lost Job can not be recovered, its Failure is raised then.
+        """
+        if self.job_transport:
+            return self.job_transport.publish(
+                job, ordering_key=session_id, **publish_options
+            )
+
+        await self.publish_job(job=job, **publish_options)
+
+        return None
+
+    def cancel_session(
+        self, session_id: str, reason: str = "Agent Setup Session cancelled"
+    ) -> bool:
+        """Cancels the running Setup Run of a Session, returns False if none is running."""
+        cancel_token = self.active_runs.get(session_id)
+        if cancel_token is None:
+            return False
+
+        cancel_token.cancel(reason)
+
+        return True
+
+    async def requeue_session(self, task: AgentSetupSession) -> None:
+        """Submits a Session as a new Agent Setup Job to continue from its next Stage."""
+        requeue_job = Job(
+            target="agent-setup",
+            path="agent-setup",
+            data=JobData(task=task.model_dump(mode="json")).model_dump_json(),
+        )
+
+        delivery = await self.dispatch_job(requeue_job, session_id=task.id)
+        if delivery:
+            await delivery
+
+    def _defer_session(self, task: AgentSetupSession, retry_after: float) -> None:
+        # NOTE: Only the latest deferred Run of a Session is requeued
+        deferred_requeue = self.deferred_requeues.pop(task.id, None)
+        if deferred_requeue:
+            deferred_requeue.cancel()
+
+        self.deferred_requeues[task.id] = asyncio.ensure_future(
+            self._requeue_after(task, retry_after)
+        )
+
+    async def _requeue_after(self, task: AgentSetupSession, retry_after: float) -> None:
+        try:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._closing.wait(), timeout=retry_after)
+            await self.requeue_session(task)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Task Manager || Failed to requeue deferred Agent Setup Session {task.id}: {e}")
+        finally:
+            if self.deferred_requeues.get(task.id) is asyncio.current_task():
+                del self.deferred_requeues[task.id]
+
+    def _new_lease_owner(self) -> str:
+        return f"{self.worker_id}/{uuid4()}"
+
+    async def _session_heartbeat(self, task: AgentSetupSession, lease_owner: str) -> None:
+        while True:
+            await asyncio.sleep(self.SESSION_LEASE_SECONDS / 3)
+
+            if not await self.session_store.renew_lease(
+                task.id, lease_owner, self.SESSION_LEASE_SECONDS
+            ):
+                logger.warning(f"Lost Lease for Agent Setup Session: {task.id}")
+                return
+
+    async def _start_session_lease(
+        self, task: AgentSetupSession, lease_owner: str
+    ) -> Optional[asyncio.Task]:
+        if not self.session_store:
+            return None
+
+        # NOTE: The Lease of a superseded Run of this Worker is handed over to the newer Run
+        await self._release_superseded_lease(task.id)
+
+        # NOTE: The Lease is acquired before the Session is written, so a Session run by
+        # another Worker is neither overwritten nor executed twice
+        if not await self._acquire_session_lease(task, lease_owner):
+            raise SessionLeaseError(
+                f"Agent Setup Session {task.id} is leased by another Worker"
+            )
+
+        self.lease_owners[task.id] = lease_owner
+        await self.session_store.save_session(task)
+
+        return asyncio.ensure_future(self._session_heartbeat(task, lease_owner))
+
+    async def _release_superseded_lease(self, session_id: str) -> None:
+        superseded_owner = self.lease_owners.pop(session_id, None)
+        if superseded_owner:
+            await self.session_store.release_lease(session_id, superseded_owner)
+
+    async def _acquire_session_lease(self, task: AgentSetupSession, lease_owner: str) -> bool:
+        if await self.session_store.acquire_lease(
+            task.id, lease_owner, self.SESSION_LEASE_SECONDS
+        ):
+            return True
+
+        # New Sessions are stored first, as the Lease is kept on the stored Session
+        if await self.session_store.get_session(task.id) is not None:
+            return False
+
+        await self.session_store.save_session(task)
+
+        return await self.session_store.acquire_lease(
+            task.id, lease_owner, self.SESSION_LEASE_SECONDS
+        )
+
+    async def _finish_session_lease(
+        self, task: AgentSetupSession, heartbeat: asyncio.Task, lease_owner: str
+    ) -> None:
+        heartbeat.cancel()
+
+        if self.lease_owners.get(task.id) == lease_owner:
+            del self.lease_owners[task.id]
+
+        await self.session_store.save_session(task)
+        await self.session_store.release_lease(task.id, lease_owner)
+
+    async def close(self) -> None:
+        """Publishes the deferred Runs, pending Session Updates & buffered Jobs on Shutdown."""
+        self._closing.set()
+
+        if self.session_recovery:
+            self.session_recovery.stop()
+
+        if self.deferred_requeues:
+            await asyncio.gather(*self.deferred_requeues.values(), return_exceptions=True)
+
+        # NOTE: Session Updates are published as Jobs, so the Transport is closed last
+        if self.update_publisher:
+            await self.update_publisher.close()
+
+        if self.job_transport:
+            await self.job_transport.close()
 
     async def parse_job_data(self, job: Job) -> AgentSetupSession:
         """Parse job data into an AgentSetupSession."""
@@ -87,7 +327,11 @@ class AgentSetupManager:
         )
 
         # Publish to Redis Queue using the event listener
-        await self.publish_job(job=job)
+        delivery = await self.dispatch_job(job, session_id=task.id)
+
+        # NOTE: The last Job of a Session is awaited, so a failed Delivery reaches the Caller
+        if delivery and job.endJob:
+            await delivery
 
     async def run_once(
         self,
@@ -109,9 +353,42 @@ class AgentSetupManager:
             **kwargs: Additional parameters (for compatibility with base class)
 
         Returns:
-            The updated graph task after execution
+            The updated graph task after execution, or the unchanged task if the Job was
+            deferred by the Admission Control and is requeued after the Retry Delay
+
+        Raises:
+            AdmissionDeferredError: The Token Budget is exhausted for a Run without Job
+            AdmissionRejectedError: The Job is shed by the Admission Control
+            SetupCancelledError: The Run was cancelled or superseded by a newer Run
+            SessionLeaseError: The Session is executed by another Worker
         """
+        # NOTE: A newer Run of the Session (e.g. an edited Process) supersedes the running one,
+        # also while it is still waiting for Admission or for its deferred Requeue
+        if self.cancel_session(task.id, reason="Superseded by a newer Run of the Session"):
+            logger.info(f"Task Manager || Superseded running Agent Setup Session: {task.id}")
+        deferred_requeue = self.deferred_requeues.pop(task.id, None)
+        if deferred_requeue:
+            deferred_requeue.cancel()
+
+        cancel_token = CancelToken()
+        self.active_runs[task.id] = cancel_token
+
+        lease_owner = self._new_lease_owner()
+        session_heartbeat: Optional[asyncio.Task] = None
+
         try:
+            # NOTE: Admission is decided before the Session is leased, so shed Jobs leave no Lease behind
+            if self.admission_controller:
+                cost_estimate = estimate_setup_cost(task)
+                logger.info(
+                    f"Task Manager || Estimated {cost_estimate.llm_calls} LLM Calls & {cost_estimate.total_tokens} Tokens for Agent Setup Session: {task.id}"
+                )
+                await run_cancellable(
+                    self.admission_controller.admit(cost_estimate), cancel_token
+                )
+
+            session_heartbeat = await self._start_session_lease(task, lease_owner)
+
             agent_setup_session = await setup_agent(
                 agent_setup=task,
                 streaming_handlers=[self.graph_streaming_handler],
@@ -121,19 +398,60 @@ class AgentSetupManager:
                     if enable_notifications
                     else None
                 ),
+                event_log=self.event_log,
+                deadline=self.RUN_DEADLINE_SECONDS,
+                cancel_token=cancel_token,
             )
 
             return agent_setup_session
+        except AdmissionDeferredError as e:
+            if job is None:
+                raise
+
+            logger.info(
+                f"Task Manager || Deferred Agent Setup Session {task.id} for {e.retry_after:.0f}s: {e}"
+            )
+            self._defer_session(task, e.retry_after)
+
+            return task
         except Exception as e:
             logger.error(f"Task Manager || Error Running Agent Setup Session: {e}")
             raise e
+        finally:
+            # NOTE: A superseded Run leaves the Session & its Lease to the newer Run
+            if self.active_runs.get(task.id) is not cancel_token:
+                if session_heartbeat:
+                    session_heartbeat.cancel()
+            else:
+                del self.active_runs[task.id]
+
+                if session_heartbeat:
+                    await self._finish_session_lease(task, session_heartbeat, lease_owner)
+                elif self.session_store:
+                    # The Lease handed over by a superseded Run is released, if never taken over
+                    await self._release_superseded_lease(task.id)
 
     async def handle_task_failure(self, task: AgentSetupSession, job: Job) -> None:
         """Handle task execution failure."""
         logger.info("Handling Task Failure for Agent Setup...")
+        # NOTE: A superseded Run must not overwrite the State of the newer Run
+        if task.id in self.active_runs:
+            logger.info(f"Skipping Failure of superseded Agent Setup Session: {task.id}")
+            return
+
+        # NOTE: Only the Lease Owner writes the Session, another Worker may be running it
+        lease_owner = self._new_lease_owner()
+        if self.session_store and not await self._acquire_session_lease(task, lease_owner):
+            logger.info(f"Skipping Failure of Agent Setup Session leased by another Worker: {task.id}")
+            return
+
         # Set Task Status to Failed
         task.status = AgentSetupStatus.FAILED
 
+        if self.session_store:
+            await self.session_store.save_session(task)
+            await self.session_store.release_lease(task.id, lease_owner)
+
         # Send Beam Platform Notifications for Failed Task State Updates
         await self.update_task_state(task=task, job=job)
 
@@ -146,20 +464,28 @@ class AgentSetupManager:
         """Update the Agent Setup State in Beam API."""
         # NOTE: Update Agent Setup States on Beam API
         logger.info("Updating Agent Setup Session on Beam API...")
-        logger.info(f"Agent Setup Status: {task.task_status}")
+        logger.info(f"Agent Setup Status: {task.status}")
+
+        if self.update_publisher:
+            await self.update_publisher.submit(task)
+            return
+
+        await self.publish_task_update({"task": task.model_dump()})
+
+    async def publish_task_update(self, update: Dict[str, Any]) -> None:
+        """Publishes an Agent Setup Update Job for the Beam API."""
         logger.info("Dispatching Agent Setup Update Job for Beam API")
 
         #  Update Job
         update_job = Job(
             target="beam-api",
             path="agent-setup-updates",
-            data={
-                "task": task.model_dump(),
-            },
+            data=update,
         )
 
         # Publish to Job Channel with Beam API Target
-        await self.publish_job(job=update_job, clear_from_cache=False)
+        session_id = update["task"]["id"] if "task" in update else update["task_id"]
+        await self.dispatch_job(update_job, session_id=session_id, clear_from_cache=False)
 
     async def graph_streaming_handler(chunk: Dict[str, Any]):
         logger.debug("Processing Graph Streaming Chunk....\n****************\n")
@@ -176,13 +502,17 @@ class AgentSetupManager:
         **kwargs,
     ) -> AgentSetupSession:
         """Runs Agent Setup until it is completed or hits a terminal state"""
-        while task.task_status not in TERMINAL_TASK_STATES:
+        agent_setup_session = task
+        while task.status not in TERMINAL_JOB_STATES:
             try:
                 agent_setup_session = await self.run_once(
                     task=task,
                     trace_config=trace_config,
                     enable_notifications=enable_notifications,
                 )
+            except AdmissionDeferredError as e:
+                # NOTE: Runs without Job wait out the Deferral, instead of being requeued
+                await asyncio.sleep(e.retry_after)
             except Exception as e:
                 logger.error(f"Error Running Agent Setup Session: {e}")
                 raise
@@ -5,6 +5,10 @@ from beam_ai_core.tracing.langfuse import TraceConfig
 from pydantic import BaseModel, ConfigDict, Field
 
 from app.lib.modules.agents.agent.agent import Agent
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_layout import (
+    GraphLayout,
+)
+from app.lib.modules.agents.agent_setup.utils.cancellation import CancelToken
 from app.lib.modules.graphs.agent_graph.graph_creation.strategies.multi_node.generate_graph_pydantic import (
     GeneratedGraph,
 )
@@ -45,6 +49,12 @@ class AgentSetupStageMetadata(BaseModel):
 class AgentSetupState(BaseModel):
     next: AgentSetupStage
     stages: List[AgentSetupStageMetadata] = Field(default_factory=list)
+    # NOTE: Stages of an interrupted concurrent Batch which finished while a Sibling failed,
+    # the Resume only runs the unfinished Stages of the Batch
+    finished_stages: List[AgentSetupStage] = Field(default_factory=list)
+    # Next Stage & Status set by the last Stage of the interrupted Batch, if it finished
+    finished_next: Optional[AgentSetupStage] = None
+    finished_status: Optional[AgentSetupStatus] = None
 
 
 class AgentGraphTool(BaseModel):
@@ -86,6 +96,8 @@ class AgentSetupSession(BaseModel):
     agent_sop: Optional[str] = None
     # Generated Agent Graph
     generated_graph: Optional[GeneratedGraph] = None
+    # Node Coordinates of the Generated Graph, computed server-side
+    graph_layout: Optional[GraphLayout] = None
     agent_graph: Optional[AgentGraph] = None
 
     # Selected Tools by Node
@@ -108,6 +120,8 @@ class AgentGraphCreationState(BaseModel):
         default_factory=list
     )
     trace_config: TraceConfig
+    # Cancels the running Stages, if the Session is abandoned or superseded
+    cancel_token: CancelToken = Field(default_factory=CancelToken)
 
-    # Allow AgentMemory / TraceConfig type to be Non-Pydantic
+    # Allow AgentMemory / TraceConfig / CancelToken type to be Non-Pydantic
     model_config = ConfigDict(arbitrary_types_allowed=True)
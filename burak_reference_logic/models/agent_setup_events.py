@@ -0,0 +1,27 @@
+from enum import Enum
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+from app.lib.modules.agents.agent_setup.models.agent_setup import AgentSetupStage
+
+
+class AgentSetupEventType(Enum):
+    SESSION_CREATED = "SESSION_CREATED"
+    STAGE_STARTED = "STAGE_STARTED"
+    STAGE_FINISHED = "STAGE_FINISHED"
+    STAGE_FAILED = "STAGE_FAILED"
+    SOP_PRODUCED = "SOP_PRODUCED"
+    GRAPH_PRODUCED = "GRAPH_PRODUCED"
+    TOOLS_ATTACHED = "TOOLS_ATTACHED"
+
+
+class AgentSetupEvent(BaseModel):
+    session_id: str
+    # Position of the Event in the Session Log, starting at 1
+    sequence: int = 0
+    event_type: AgentSetupEventType
+    stage: Optional[AgentSetupStage] = None
+    timestamp: str
+    # Event Data, large Outputs (SOP, Graph, Tools) are only stored on their own Event
+    payload: Dict[str, Any] = Field(default_factory=dict)
@@ -0,0 +1,370 @@
+import asyncio
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.lib.modules.agents.agent_setup.models.agent_setup import (
+    AgentGraphTool,
+    AgentSetupSession,
+    AgentSetupStage,
+    AgentSetupStageMetadata,
+    AgentSetupState,
+    AgentSetupStatus,
+)
+from app.lib.modules.agents.agent_setup.models.agent_setup_events import (
+    AgentSetupEvent,
+    AgentSetupEventType,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_layout import (
+    GraphLayout,
+)
+from app.lib.modules.graphs.agent_graph.graph_creation.strategies.multi_node.generate_graph_pydantic import (
+    GeneratedGraph,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agent_setup_events (
+    session_id TEXT NOT NULL,
+    sequence INTEGER NOT NULL,
+    event_type TEXT NOT NULL,
+    stage TEXT,
+    timestamp TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (session_id, sequence)
+);
+CREATE TABLE IF NOT EXISTS agent_setup_snapshots (
+    session_id TEXT NOT NULL,
+    sequence INTEGER NOT NULL,
+    session TEXT NOT NULL,
+    PRIMARY KEY (session_id, sequence)
+);
+"""
+
+# Session Outputs and the Event recording them
+OUTPUT_EVENT_TYPES = {
+    "agent_sop": AgentSetupEventType.SOP_PRODUCED,
+    "generated_graph": AgentSetupEventType.GRAPH_PRODUCED,
+    "graph_layout": AgentSetupEventType.GRAPH_PRODUCED,
+    "integration_tools": AgentSetupEventType.TOOLS_ATTACHED,
+    "custom_tools": AgentSetupEventType.TOOLS_ATTACHED,
+}
+
+# Fields of the Setup State needed to resume an interrupted concurrent Batch
+RESUME_STATE_FIELDS = {"finished_stages", "finished_next", "finished_status"}
+
+
+def apply_event(
+    agent_setup: Optional[AgentSetupSession],
+    event: AgentSetupEvent,
+    max_session_stages: Optional[int] = None,
+) -> Optional[AgentSetupSession]:
+    """Applies a single Event to the Session State, returns the updated Session."""
+    payload = event.payload
+
+    match event.event_type:
+        case AgentSetupEventType.SESSION_CREATED:
+            return AgentSetupSession.model_validate(payload["session"])
+
+        case AgentSetupEventType.STAGE_STARTED:
+            agent_setup.status = AgentSetupStatus.IN_PROGRESS
+            agent_setup.start_time = agent_setup.start_time or event.timestamp
+            if not agent_setup.setup_state:
+                agent_setup.setup_state = AgentSetupState(next=event.stage)
+
+        case AgentSetupEventType.STAGE_FINISHED | AgentSetupEventType.STAGE_FAILED:
+            agent_setup.setup_state.stages.append(
+                AgentSetupStageMetadata(
+                    stage=event.stage,
+                    success=event.event_type == AgentSetupEventType.STAGE_FINISHED,
+                    timestamp=event.timestamp,
+                    output=payload["output"],
+                )
+            )
+            agent_setup.setup_state.next = AgentSetupStage(payload["next_stage"])
+            agent_setup.status = AgentSetupStatus(payload["status"])
+            agent_setup.end_time = payload.get("end_time")
+            # Finished Stages of an interrupted Batch, recorded with the Stage Results
+            resume_state = AgentSetupState.model_validate(
+                {"next": payload["next_stage"], **payload.get("resume", {})}
+            )
+            for resume_field in RESUME_STATE_FIELDS:
+                setattr(agent_setup.setup_state, resume_field, getattr(resume_state, resume_field))
+            trim_stage_history(agent_setup, max_session_stages)
+
+        case AgentSetupEventType.SOP_PRODUCED:
+            agent_setup.agent_sop = payload["agent_sop"]
+
+        case AgentSetupEventType.GRAPH_PRODUCED:
+            # NOTE: The Graph & its Layout are recorded as separate Events
+            if "generated_graph" in payload:
+                agent_setup.generated_graph = (
+                    GeneratedGraph.model_validate(payload["generated_graph"])
+                    if payload["generated_graph"]
+                    else None
+                )
+            if "graph_layout" in payload:
+                agent_setup.graph_layout = (
+                    GraphLayout.model_validate(payload["graph_layout"])
+                    if payload["graph_layout"]
+                    else None
+                )
+
+        case AgentSetupEventType.TOOLS_ATTACHED:
+            setattr(
+                agent_setup,
+                payload["field"],
+                [AgentGraphTool.model_validate(tool) for tool in payload["tools"]],
+            )
+
+    return agent_setup
+
+
+def trim_stage_history(
+    agent_setup: AgentSetupSession, max_session_stages: Optional[int]
+) -> None:
+    # NOTE: The full Stage History is kept in the Event Log, the Session only keeps the latest Stages
+    if max_session_stages is None or not agent_setup.setup_state:
+        return
+
+    overflow = len(agent_setup.setup_state.stages) - max_session_stages
+    if overflow > 0:
+        del agent_setup.setup_state.stages[:overflow]
+
+
+class SessionEventLog:
+    """
+    Append-only Event Log of Agent Setup Sessions, backed by SQLite.
+
+    Every N Events a Snapshot of the Session is stored, so the current State is rebuilt
+    from the latest Snapshot and the few Events after it. Events are never deleted and
+    can be replayed for Audits, so Sessions only keep their latest Stages. Queries run in
+    a Worker Thread, never on the Event Loop.
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        snapshot_every: int = 20,
+        keep_snapshots: int = 2,
+        max_session_stages: int = 20,
+    ):
+        self.snapshot_every = snapshot_every
+        self.keep_snapshots = keep_snapshots
+        self.max_session_stages = max_session_stages
+
+        # NOTE: Reentrant, Snapshots are taken within the Append holding the Lock
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(database_path, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+        self._connection.commit()
+
+    async def append(
+        self,
+        session_id: str,
+        event_type: AgentSetupEventType,
+        stage: Optional[AgentSetupStage] = None,
+        payload: Optional[Dict[str, Any]] = None,
+    ) -> AgentSetupEvent:
+        event = AgentSetupEvent(
+            session_id=session_id,
+            event_type=event_type,
+            stage=stage,
+            timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            payload=payload or {},
+        )
+
+        return await asyncio.to_thread(self._append, event)
+
+    async def list_events(
+        self, session_id: str, after_sequence: int = 0, until_sequence: Optional[int] = None
+    ) -> List[AgentSetupEvent]:
+        return await asyncio.to_thread(
+            self._list_events, session_id, after_sequence, until_sequence
+        )
+
+    async def rebuild_session(
+        self, session_id: str, until_sequence: Optional[int] = None
+    ) -> Optional[AgentSetupSession]:
+        """Rebuilds the Session State from the latest Snapshot and the following Events."""
+        return await asyncio.to_thread(self._rebuild_session, session_id, until_sequence)
+
+    def _append(self, event: AgentSetupEvent) -> AgentSetupEvent:
+        session_id = event.session_id
+
+        with self._lock:
+            (event.sequence,) = self._connection.execute(
+                "SELECT COALESCE(MAX(sequence), 0) + 1 FROM agent_setup_events WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+            self._connection.execute(
+                "INSERT INTO agent_setup_events VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    session_id,
+                    event.sequence,
+                    event.event_type.value,
+                    event.stage.value if event.stage else None,
+                    event.timestamp,
+                    json.dumps(event.payload, default=str),
+                ),
+            )
+
+            # The Snapshot is committed with its Event, no concurrent Append can interleave
+            if event.sequence % self.snapshot_every == 0:
+                self._take_snapshot(session_id, event.sequence)
+
+            self._connection.commit()
+
+        return event
+
+    def _list_events(
+        self, session_id: str, after_sequence: int = 0, until_sequence: Optional[int] = None
+    ) -> List[AgentSetupEvent]:
+        with self._lock:
+            rows = self._connection.execute(
+                """
+                SELECT sequence, event_type, stage, timestamp, payload FROM agent_setup_events
+                WHERE session_id = ? AND sequence > ? AND sequence <= ?
+                ORDER BY sequence
+                """,
+                (session_id, after_sequence, until_sequence or 2**62),
+            ).fetchall()
+
+        return [
+            AgentSetupEvent(
+                session_id=session_id,
+                sequence=sequence,
+                event_type=AgentSetupEventType(event_type),
+                stage=AgentSetupStage(stage) if stage else None,
+                timestamp=timestamp,
+                payload=json.loads(payload),
+            )
+            for sequence, event_type, stage, timestamp, payload in rows
+        ]
+
+    def _rebuild_session(
+        self, session_id: str, until_sequence: Optional[int] = None
+    ) -> Optional[AgentSetupSession]:
+        with self._lock:
+            snapshot = self._connection.execute(
+                """
+                SELECT sequence, session FROM agent_setup_snapshots
+                WHERE session_id = ? AND sequence <= ?
+                ORDER BY sequence DESC LIMIT 1
+                """,
+                (session_id, until_sequence or 2**62),
+            ).fetchone()
+
+        agent_setup, snapshot_sequence = None, 0
+        if snapshot:
+            snapshot_sequence = snapshot[0]
+            agent_setup = AgentSetupSession.model_validate_json(snapshot[1])
+
+        for event in self._list_events(session_id, snapshot_sequence, until_sequence):
+            agent_setup = apply_event(agent_setup, event, self.max_session_stages)
+
+        return agent_setup
+
+    def _take_snapshot(self, session_id: str, sequence: int) -> None:
+        """Snapshots the Session at the given Event, called by ``_append`` holding the Lock."""
+        # NOTE: Only the Events after the previous Snapshot are replayed
+        agent_setup = self._rebuild_session(session_id, until_sequence=sequence)
+        if not agent_setup:
+            return
+
+        self._connection.execute(
+            "INSERT OR REPLACE INTO agent_setup_snapshots VALUES (?, ?, ?)",
+            (session_id, sequence, agent_setup.model_dump_json()),
+        )
+        # NOTE: Compaction, only the latest Snapshots are kept
+        self._connection.execute(
+            """
+            DELETE FROM agent_setup_snapshots WHERE session_id = ? AND sequence NOT IN (
+                SELECT sequence FROM agent_setup_snapshots WHERE session_id = ?
+                ORDER BY sequence DESC LIMIT ?
+            )
+            """,
+            (session_id, session_id, self.keep_snapshots),
+        )
+
+
+class SessionEventRecorder:
+    """Records the Changes of a running Agent Setup Session as Events."""
+
+    def __init__(self, event_log: SessionEventLog, agent_setup: AgentSetupSession):
+        self.event_log = event_log
+        self.agent_setup = agent_setup
+
+        self._recorded_stages = (
+            len(agent_setup.setup_state.stages) if agent_setup.setup_state else 0
+        )
+        self._recorded_outputs = {
+            output_field: getattr(agent_setup, output_field)
+            for output_field in OUTPUT_EVENT_TYPES
+        }
+
+    async def record_session_created(self) -> None:
+        if await self.event_log.list_events(self.agent_setup.id, until_sequence=1):
+            return
+
+        await self.event_log.append(
+            self.agent_setup.id,
+            AgentSetupEventType.SESSION_CREATED,
+            payload={"session": self.agent_setup.model_dump(mode="json")},
+        )
+
+    async def record_stages_started(self, stages: List[AgentSetupStage]) -> None:
+        for stage in stages:
+            await self.event_log.append(
+                self.agent_setup.id, AgentSetupEventType.STAGE_STARTED, stage=stage
+            )
+
+    async def record_changes(self) -> None:
+        agent_setup = self.agent_setup
+
+        # Outputs are recorded before the Stage Result, as the Stage produced them
+        for output_field, event_type in OUTPUT_EVENT_TYPES.items():
+            output = getattr(agent_setup, output_field)
+            if output is self._recorded_outputs[output_field]:
+                continue
+
+            self._recorded_outputs[output_field] = output
+
+            if event_type == AgentSetupEventType.TOOLS_ATTACHED:
+                payload = {
+                    "field": output_field,
+                    "tools": [tool.model_dump(mode="json") for tool in output],
+                }
+            elif event_type == AgentSetupEventType.GRAPH_PRODUCED:
+                payload = {output_field: output.model_dump(mode="json") if output else None}
+            else:
+                payload = {output_field: output}
+
+            await self.event_log.append(agent_setup.id, event_type, payload=payload)
+
+        if not agent_setup.setup_state:
+            return
+
+        for stage_metadata in agent_setup.setup_state.stages[self._recorded_stages :]:
+            await self.event_log.append(
+                agent_setup.id,
+                (
+                    AgentSetupEventType.STAGE_FINISHED
+                    if stage_metadata.success
+                    else AgentSetupEventType.STAGE_FAILED
+                ),
+                stage=stage_metadata.stage,
+                payload={
+                    "output": stage_metadata.output,
+                    "next_stage": agent_setup.setup_state.next.value,
+                    "status": agent_setup.status.value,
+                    "end_time": agent_setup.end_time,
+                    "resume": agent_setup.setup_state.model_dump(
+                        mode="json", include=RESUME_STATE_FIELDS
+                    ),
+                },
+            )
+
+        trim_stage_history(agent_setup, self.event_log.max_session_stages)
+        self._recorded_stages = len(agent_setup.setup_state.stages)
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+from app.lib.modules.agents.agent_setup.models.agent_setup import (
+    AgentSetupSession,
+    AgentSetupStatus,
+)
+from app.lib.modules.agents.agent_setup.session_store.session_store import (
+    AgentSetupSessionStore,
+)
+
+logger = logging.getLogger("app")
+
+# Sessions in these States were interrupted while a Worker held the Lease
+RECOVERABLE_SESSION_STATES = [
+    AgentSetupStatus.QUEUED,
+    AgentSetupStatus.IN_PROGRESS,
+]
+
+
+class SessionRecoverySweeper:
+    """Re-enqueues Agent Setup Sessions whose Worker stopped renewing the Lease."""
+
+    def __init__(
+        self,
+        session_store: AgentSetupSessionStore,
+        requeue_session: Callable[[AgentSetupSession], Awaitable[None]],
+        owner: str,
+        sweep_interval: float = 60.0,
+        lease_seconds: float = 300.0,
+    ):
+        self.session_store = session_store
+        self.requeue_session = requeue_session
+        self.owner = owner
+        self.sweep_interval = sweep_interval
+        self.lease_seconds = lease_seconds
+
+        self._sweeper_task: Optional[asyncio.Task] = None
+
+    async def sweep_once(self) -> int:
+        recovered_sessions = 0
+
+        for expired_lease in await self.session_store.list_expired_leases():
+            # Taking over the Lease ensures only one Sweeper re-enqueues the Session
+            if not await self.session_store.acquire_lease(
+                expired_lease.session_id, self.owner, self.lease_seconds
+            ):
+                continue
+
+            try:
+                agent_setup = await self.session_store.get_session(
+                    expired_lease.session_id
+                )
+
+                if agent_setup and agent_setup.status in RECOVERABLE_SESSION_STATES:
+                    logger.warning(
+                        f"Recovering Agent Setup Session {agent_setup.id} at Stage {agent_setup.setup_state.next if agent_setup.setup_state else None}, Lease of {expired_lease.owner} expired"
+                    )
+                    await self.requeue_session(agent_setup)
+                    recovered_sessions += 1
+
+            except Exception as recovery_exc:
+                logger.error(
+                    f"Failed to recover Agent Setup Session {expired_lease.session_id}: {recovery_exc}"
+                )
+                # NOTE: The Lease is marked expired again, so the next Sweep retries the Session
+                await self.session_store.renew_lease(
+                    expired_lease.session_id, self.owner, lease_seconds=0
+                )
+                continue
+
+            # NOTE: Only released once the Session is requeued, the new Run takes the Lease
+            await self.session_store.release_lease(expired_lease.session_id, self.owner)
+
+        return recovered_sessions
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sweep_once()
+            except Exception as sweep_exc:
+                logger.error(f"Agent Setup Session Recovery Sweep failed: {sweep_exc}")
+
+            await asyncio.sleep(self.sweep_interval)
+
+    def start(self) -> None:
+        if self._sweeper_task is None or self._sweeper_task.done():
+            self._sweeper_task = asyncio.ensure_future(self._run())
+
+    def stop(self) -> None:
+        if self._sweeper_task:
+            self._sweeper_task.cancel()
+            self._sweeper_task = None
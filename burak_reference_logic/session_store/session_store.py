@@ -0,0 +1,68 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from app.lib.modules.agents.agent_setup.models.agent_setup import (
+    AgentSetupSession,
+    AgentSetupStage,
+    AgentSetupStatus,
+)
+
+
+class SessionLeaseError(Exception):
+    """The Session is leased by another Worker, which is still executing it."""
+
+
+class AgentSetupSessionLease(BaseModel):
+    session_id: str
+    # Worker currently executing the Session
+    owner: str
+    # Unix Timestamp after which the Session is considered abandoned
+    expires_at: float
+
+
+class AgentSetupSessionStore(ABC):
+    """
+    Backend Interface for persisting Agent Setup Sessions.
+
+    Sessions are indexed by Status, User, Workspace and next Setup Stage. A Lease marks
+    the Worker executing a Session, expired Leases are picked up by the Recovery Sweeper.
+    """
+
+    @abstractmethod
+    async def save_session(self, agent_setup: AgentSetupSession) -> None:
+        pass
+
+    @abstractmethod
+    async def get_session(self, session_id: str) -> Optional[AgentSetupSession]:
+        pass
+
+    @abstractmethod
+    async def list_sessions(
+        self,
+        status: Optional[AgentSetupStatus] = None,
+        user_id: Optional[str] = None,
+        workspace_id: Optional[str] = None,
+        next_stage: Optional[AgentSetupStage] = None,
+        limit: int = 100,
+    ) -> List[AgentSetupSession]:
+        pass
+
+    @abstractmethod
+    async def acquire_lease(
+        self, session_id: str, owner: str, lease_seconds: float
+    ) -> bool:
+        """Acquires the Lease if the Session is not leased by another Worker."""
+
+    @abstractmethod
+    async def renew_lease(self, session_id: str, owner: str, lease_seconds: float) -> bool:
+        """Heartbeat of the Lease Owner, returns False if the Lease was lost."""
+
+    @abstractmethod
+    async def release_lease(self, session_id: str, owner: str) -> None:
+        pass
+
+    @abstractmethod
+    async def list_expired_leases(self, limit: int = 100) -> List[AgentSetupSessionLease]:
+        pass
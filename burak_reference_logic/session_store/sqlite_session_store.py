@@ -0,0 +1,186 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from app.lib.modules.agents.agent_setup.models.agent_setup import (
+    AgentSetupSession,
+    AgentSetupStage,
+    AgentSetupStatus,
+)
+from app.lib.modules.agents.agent_setup.session_store.session_store import (
+    AgentSetupSessionLease,
+    AgentSetupSessionStore,
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agent_setup_sessions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    workspace_id TEXT,
+    status TEXT NOT NULL,
+    next_stage TEXT,
+    session TEXT NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_agent_setup_sessions_status
+    ON agent_setup_sessions (status);
+CREATE INDEX IF NOT EXISTS idx_agent_setup_sessions_user_id
+    ON agent_setup_sessions (user_id, status);
+CREATE INDEX IF NOT EXISTS idx_agent_setup_sessions_workspace_id
+    ON agent_setup_sessions (workspace_id, status);
+CREATE INDEX IF NOT EXISTS idx_agent_setup_sessions_next_stage
+    ON agent_setup_sessions (next_stage, status);
+CREATE INDEX IF NOT EXISTS idx_agent_setup_sessions_lease_expires_at
+    ON agent_setup_sessions (lease_expires_at)
+    WHERE lease_expires_at IS NOT NULL;
+"""
+
+
+class SQLiteSessionStore(AgentSetupSessionStore):
+    """
+    Local SQLite Backend of the Agent Setup Session Store.
+
+    Queries run in a Worker Thread, so Commits never block the Event Loop.
+    """
+
+    def __init__(self, database_path: str):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(database_path, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+        self._connection.commit()
+
+    async def _execute(self, query: str, parameters: tuple = ()) -> int:
+        return await asyncio.to_thread(self._execute_sync, query, parameters)
+
+    async def _fetch_all(self, query: str, parameters: tuple = ()) -> List[tuple]:
+        return await asyncio.to_thread(self._fetch_all_sync, query, parameters)
+
+    def _execute_sync(self, query: str, parameters: tuple) -> int:
+        with self._lock:
+            cursor = self._connection.execute(query, parameters)
+            self._connection.commit()
+
+            return cursor.rowcount
+
+    def _fetch_all_sync(self, query: str, parameters: tuple) -> List[tuple]:
+        with self._lock:
+            return self._connection.execute(query, parameters).fetchall()
+
+    async def save_session(self, agent_setup: AgentSetupSession) -> None:
+        next_stage = (
+            agent_setup.setup_state.next.value if agent_setup.setup_state else None
+        )
+
+        # NOTE: Lease Columns are left untouched, they are owned by the Lease Methods
+        await self._execute(
+            """
+            INSERT INTO agent_setup_sessions
+                (id, user_id, workspace_id, status, next_stage, session, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                user_id = excluded.user_id,
+                workspace_id = excluded.workspace_id,
+                status = excluded.status,
+                next_stage = excluded.next_stage,
+                session = excluded.session,
+                updated_at = excluded.updated_at
+            """,
+            (
+                agent_setup.id,
+                agent_setup.user_id,
+                agent_setup.agent.config.workspace_id,
+                agent_setup.status.value,
+                next_stage,
+                agent_setup.model_dump_json(),
+                datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            ),
+        )
+
+    async def get_session(self, session_id: str) -> Optional[AgentSetupSession]:
+        rows = await self._fetch_all(
+            "SELECT session FROM agent_setup_sessions WHERE id = ?", (session_id,)
+        )
+
+        return AgentSetupSession.model_validate_json(rows[0][0]) if rows else None
+
+    async def list_sessions(
+        self,
+        status: Optional[AgentSetupStatus] = None,
+        user_id: Optional[str] = None,
+        workspace_id: Optional[str] = None,
+        next_stage: Optional[AgentSetupStage] = None,
+        limit: int = 100,
+    ) -> List[AgentSetupSession]:
+        filters = {
+            "status": status.value if status else None,
+            "user_id": user_id,
+            "workspace_id": workspace_id,
+            "next_stage": next_stage.value if next_stage else None,
+        }
+        conditions = [f"{column} = ?" for column, value in filters.items() if value]
+        parameters = tuple(value for value in filters.values() if value)
+
+        query = "SELECT session FROM agent_setup_sessions"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY updated_at DESC LIMIT ?"
+
+        rows = await self._fetch_all(query, parameters + (limit,))
+
+        return [AgentSetupSession.model_validate_json(row[0]) for row in rows]
+
+    async def acquire_lease(
+        self, session_id: str, owner: str, lease_seconds: float
+    ) -> bool:
+        now = time.time()
+        updated_rows = await self._execute(
+            """
+            UPDATE agent_setup_sessions
+            SET lease_owner = ?, lease_expires_at = ?
+            WHERE id = ?
+                AND (lease_owner IS NULL OR lease_owner = ? OR lease_expires_at < ?)
+            """,
+            (owner, now + lease_seconds, session_id, owner, now),
+        )
+
+        return updated_rows == 1
+
+    async def renew_lease(self, session_id: str, owner: str, lease_seconds: float) -> bool:
+        updated_rows = await self._execute(
+            """
+            UPDATE agent_setup_sessions SET lease_expires_at = ?
+            WHERE id = ? AND lease_owner = ?
+            """,
+            (time.time() + lease_seconds, session_id, owner),
+        )
+
+        return updated_rows == 1
+
+    async def release_lease(self, session_id: str, owner: str) -> None:
+        await self._execute(
+            """
+            UPDATE agent_setup_sessions SET lease_owner = NULL, lease_expires_at = NULL
+            WHERE id = ? AND lease_owner = ?
+            """,
+            (session_id, owner),
+        )
+
+    async def list_expired_leases(self, limit: int = 100) -> List[AgentSetupSessionLease]:
+        rows = await self._fetch_all(
+            """
+            SELECT id, lease_owner, lease_expires_at FROM agent_setup_sessions
+            WHERE lease_expires_at IS NOT NULL AND lease_expires_at < ?
+            ORDER BY lease_expires_at LIMIT ?
+            """,
+            (time.time(), limit),
+        )
+
+        return [
+            AgentSetupSessionLease(session_id=session_id, owner=owner, expires_at=expires_at)
+            for session_id, owner, expires_at in rows
+        ]
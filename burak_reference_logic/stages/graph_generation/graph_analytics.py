@@ -0,0 +1,350 @@
+"""
+Fleet-scale Graph Analytics
+
+Summarizes thousands of stored Agent Graphs for periodic Audits. Graph Files or
+Records are streamed in Batches to a Process Pool, each Worker parses & summarizes
+its Batch & the Rows are written to a columnar Summary Table (Parquet if pyarrow is
+installed, otherwise CSV) as the Batches complete. Memory stays bounded by the
+number of in-flight Batches, not by the Fleet Size.
+"""
+
+import csv
+import json
+import logging
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from pydantic import BaseModel
+
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_structure import (
+    GraphStructure,
+    build_graph_structure,
+    count_graph_elements,
+    is_agent_graph,
+    is_generated_graph,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_validation import (
+    ValidationSeverity,
+    validate_graph_structure,
+)
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - optional Dependency
+    pyarrow = None
+
+logger = logging.getLogger("app")
+
+SUMMARY_COLUMNS = [
+    "source",
+    "graph_id",
+    "name",
+    "graph_format",
+    "node_count",
+    "edge_count",
+    "entry_count",
+    "exit_count",
+    "max_depth",
+    "complexity_ratio",
+    "max_out_degree",
+    "max_in_degree",
+    "mean_degree",
+    "branch_nodes",
+    "merge_nodes",
+    "has_cycles",
+    "validation_score",
+    "validation_errors",
+    "validation_warnings",
+    # JSON encoded Node Type Counts, the Set of Types differs between Graphs
+    "node_types",
+    "error",
+]
+
+PARQUET_TYPES = {
+    "node_count": "int64",
+    "edge_count": "int64",
+    "entry_count": "int64",
+    "exit_count": "int64",
+    "max_depth": "int64",
+    "complexity_ratio": "float64",
+    "max_out_degree": "int64",
+    "max_in_degree": "int64",
+    "mean_degree": "float64",
+    "branch_nodes": "int64",
+    "merge_nodes": "int64",
+    "has_cycles": "bool",
+    "validation_score": "int64",
+    "validation_errors": "int64",
+    "validation_warnings": "int64",
+}
+
+
+class GraphAnalyticsReport(BaseModel):
+    output_path: str
+    graph_count: int = 0
+    # Graphs which could not be parsed or have an unknown Format
+    failed_count: int = 0
+    duration_seconds: float = 0.0
+
+
+def summarize_graph(graph: Dict[str, Any], source: str = "") -> Dict[str, Any]:
+    """Flat Summary Row of a single Graph, see SUMMARY_COLUMNS."""
+    summary_row: Dict[str, Any] = dict.fromkeys(SUMMARY_COLUMNS)
+    summary_row["source"] = source
+
+    structure = build_graph_structure(graph)
+    if structure is None:
+        summary_row["error"] = (
+            "Generated Graph without Step Links"
+            if is_generated_graph(graph)
+            else "Unknown Graph Format"
+        )
+        return summary_row
+
+    graph_info = graph["graph"] if isinstance(graph.get("graph"), dict) else graph
+    # NOTE: Same Counts as the Complexity of generate_graph_summary, over the valid Edges
+    graph_counts = count_graph_elements(
+        [structure.nodes[node_id] for node_id in structure.node_ids], structure.edge_count
+    )
+    out_degrees = [len(structure.successors[node_id]) for node_id in structure.node_ids]
+    in_degrees = [len(structure.predecessors[node_id]) for node_id in structure.node_ids]
+    node_count, edge_count = graph_counts["total_nodes"], graph_counts["total_edges"]
+    max_depth, has_cycles = _longest_path(structure)
+
+    validation_result = validate_graph_structure(structure)
+    severities = Counter(issue.severity for issue in validation_result.issues)
+
+    summary_row.update(
+        {
+            "graph_id": graph_info.get("graph_id") or graph_info.get("id"),
+            "name": graph_info.get("name") or graph_info.get("process_name"),
+            "graph_format": "agent_graph" if is_agent_graph(graph) else "display_graph",
+            "node_count": node_count,
+            "edge_count": edge_count,
+            "entry_count": len(structure.entry_nodes),
+            "exit_count": len(structure.exit_nodes),
+            "max_depth": max_depth,
+            "complexity_ratio": graph_counts["complexity_ratio"],
+            "max_out_degree": max(out_degrees, default=0),
+            "max_in_degree": max(in_degrees, default=0),
+            "mean_degree": 2 * edge_count / max(node_count, 1),
+            "branch_nodes": sum(1 for degree in out_degrees if degree > 1),
+            "merge_nodes": sum(1 for degree in in_degrees if degree > 1),
+            "has_cycles": has_cycles,
+            "validation_score": validation_result.score,
+            "validation_errors": severities[ValidationSeverity.ERROR],
+            "validation_warnings": severities[ValidationSeverity.WARNING],
+            "node_types": json.dumps(graph_counts["node_types"]),
+        }
+    )
+
+    return summary_row
+
+
+def summarize_graph_files(
+    paths: Iterable[Union[str, Path]],
+    output_path: Union[str, Path],
+    max_workers: Optional[int] = None,
+    batch_size: int = 256,
+) -> GraphAnalyticsReport:
+    """
+    Summarizes Graph Files (``.json`` with one Graph, ``.jsonl`` with one Graph per Line).
+
+    Only the Paths are sent to the Workers, Files are read & parsed in the Workers.
+    """
+    return _run_summary_batches(
+        batches=_batched((str(path) for path in paths), batch_size),
+        summarize_batch=_summarize_file_batch,
+        output_path=output_path,
+        max_workers=max_workers,
+    )
+
+
+def summarize_graph_records(
+    records: Iterable[Dict[str, Any]],
+    output_path: Union[str, Path],
+    max_workers: Optional[int] = None,
+    batch_size: int = 256,
+) -> GraphAnalyticsReport:
+    """Summarizes Graph Dicts, e.g. streamed from the Database Cursor of stored Graphs."""
+    return _run_summary_batches(
+        batches=_batched(records, batch_size),
+        summarize_batch=_summarize_record_batch,
+        output_path=output_path,
+        max_workers=max_workers,
+    )
+
+
+def _run_summary_batches(
+    batches: Iterator[List[Any]],
+    summarize_batch: Callable[[List[Any]], List[Dict[str, Any]]],
+    output_path: Union[str, Path],
+    max_workers: Optional[int],
+) -> GraphAnalyticsReport:
+    start_time = time.perf_counter()
+    max_workers = max_workers or os.cpu_count() or 1
+
+    summary_writer = GraphSummaryWriter(output_path)
+    report = GraphAnalyticsReport(output_path=str(summary_writer.output_path))
+
+    def write_rows(summary_rows: List[Dict[str, Any]]) -> None:
+        summary_writer.write(summary_rows)
+        report.graph_count += len(summary_rows)
+        report.failed_count += sum(1 for row in summary_rows if row["error"])
+
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            # NOTE: Bounded Submission, the Batch Iterator is consumed as Workers free up
+            pending: Deque[Future] = deque()
+
+            for batch in batches:
+                pending.append(executor.submit(summarize_batch, batch))
+
+                if len(pending) >= 2 * max_workers:
+                    write_rows(pending.popleft().result())
+
+            while pending:
+                write_rows(pending.popleft().result())
+    finally:
+        summary_writer.close()
+
+    report.duration_seconds = time.perf_counter() - start_time
+    logger.info(
+        f"Graph Analytics: {report.graph_count} Graphs summarized in {report.duration_seconds:.1f}s, {report.failed_count} failed"
+    )
+
+    return report
+
+
+class GraphSummaryWriter:
+    """Appends Summary Rows to a Parquet File (one Row Group per Batch) or a CSV File."""
+
+    def __init__(self, output_path: Union[str, Path]):
+        self.output_path = Path(output_path)
+
+        if self.output_path.suffix == ".parquet" and pyarrow is None:
+            logger.warning("pyarrow is not installed, writing the Graph Summary as CSV")
+            self.output_path = self.output_path.with_suffix(".csv")
+
+        self._parquet_writer = None
+        self._csv_file = None
+        self._csv_writer = None
+
+        if self.output_path.suffix == ".parquet":
+            self._schema = pyarrow.schema(
+                [
+                    (column, getattr(pyarrow, PARQUET_TYPES.get(column, "string"))())
+                    for column in SUMMARY_COLUMNS
+                ]
+            )
+            self._parquet_writer = pyarrow.parquet.ParquetWriter(
+                str(self.output_path), self._schema
+            )
+        else:
+            self._csv_file = open(self.output_path, "w", newline="", encoding="utf-8")
+            self._csv_writer = csv.DictWriter(self._csv_file, fieldnames=SUMMARY_COLUMNS)
+            self._csv_writer.writeheader()
+
+    def write(self, summary_rows: List[Dict[str, Any]]) -> None:
+        if not summary_rows:
+            return
+
+        if self._parquet_writer:
+            self._parquet_writer.write_table(
+                pyarrow.Table.from_pylist(summary_rows, schema=self._schema)
+            )
+        else:
+            self._csv_writer.writerows(summary_rows)
+
+    def close(self) -> None:
+        if self._parquet_writer:
+            self._parquet_writer.close()
+        if self._csv_file:
+            self._csv_file.close()
+
+
+def _summarize_file_batch(paths: List[str]) -> List[Dict[str, Any]]:
+    summary_rows = []
+
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as graph_file:
+                if path.endswith(".jsonl"):
+                    for line_number, line in enumerate(graph_file, start=1):
+                        if line.strip():
+                            summary_rows.append(
+                                _summarize_safely(json.loads(line), f"{path}:{line_number}")
+                            )
+                else:
+                    summary_rows.append(_summarize_safely(json.load(graph_file), path))
+
+        except (OSError, ValueError) as graph_file_exc:
+            summary_rows.append(_failed_row(path, f"Invalid Graph File: {graph_file_exc}"))
+
+    return summary_rows
+
+
+def _summarize_record_batch(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        _summarize_safely(record, str(record.get("id") or record.get("graph_id") or ""))
+        for record in records
+    ]
+
+
+def _summarize_safely(graph: Any, source: str) -> Dict[str, Any]:
+    if not isinstance(graph, dict):
+        return _failed_row(source, "Unknown Graph Format")
+
+    try:
+        return summarize_graph(graph, source=source)
+    except Exception as summary_exc:
+        # NOTE: One malformed Graph must not abort the whole Audit
+        return _failed_row(source, f"Graph Summary failed: {summary_exc}")
+
+
+def _failed_row(source: str, error: str) -> Dict[str, Any]:
+    summary_row: Dict[str, Any] = dict.fromkeys(SUMMARY_COLUMNS)
+    summary_row.update({"source": source, "error": error})
+    return summary_row
+
+
+def _longest_path(structure: GraphStructure) -> Tuple[int, bool]:
+    """Longest Path in Nodes over the acyclic Part of the Graph, O(V+E), and whether Cycles exist."""
+    in_degree = {
+        node_id: len(predecessors) for node_id, predecessors in structure.predecessors.items()
+    }
+    depth = dict.fromkeys(structure.node_ids, 1)
+    queue = [node_id for node_id, degree in in_degree.items() if degree == 0]
+
+    for node_id in queue:
+        for successor_id in structure.successors[node_id]:
+            depth[successor_id] = max(depth[successor_id], depth[node_id] + 1)
+            in_degree[successor_id] -= 1
+            if in_degree[successor_id] == 0:
+                queue.append(successor_id)
+
+    # Nodes on a Cycle never reach an In-Degree of 0
+    return max(depth.values(), default=0), len(queue) < len(structure.node_ids)
+
+
+def _batched(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
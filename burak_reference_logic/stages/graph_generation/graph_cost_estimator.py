@@ -0,0 +1,439 @@
+"""
+Static Latency & Cost Estimation of Workflow Graphs
+
+Estimates how long one Execution of a generated Graph takes & how many LLM Calls it
+makes, before the Agent goes live. Every Node gets a Latency Distribution (Mean & p95,
+modelled as Log-normal) & an LLM Call Count by its Tool Type, Action Type or Display
+Node Type. Distributions are combined over the Graph in one Pass:
+
+- Conditional Edges (Edge ``condition``, ``condition``/``branchName`` of nested Agent
+  Graph Nodes, Decision Nodes) are exclusive Branches, weighted by their Probability
+- Unconditional Fan-outs run in parallel, the slowest Branch is the Critical Path
+- Loops are counted once, their Back Edges are ignored
+
+The Estimate is linear in the Graph Size, cheap enough to recompute on every Edit.
+"""
+
+import logging
+import math
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_structure import (
+    GraphStructure,
+    build_graph_structure,
+    get_graph_nodes,
+    is_agent_graph,
+)
+
+logger = logging.getLogger("app")
+
+# z-Score of the 95th Percentile of the Standard Normal Distribution
+P95_Z_SCORE = 1.6449
+
+
+class NodeCostProfile(BaseModel):
+    latency_seconds: float = 0.0
+    latency_p95_seconds: float = 0.0
+    llm_calls: float = 0.0
+    cost_usd: float = 0.0
+
+
+# NOTE: Human Waiting Time is not part of the Estimate, it is not Capacity bound
+NODE_TYPE_PROFILES = {
+    "trigger": NodeCostProfile(),
+    "end": NodeCostProfile(),
+    "merge": NodeCostProfile(latency_seconds=0.05, latency_p95_seconds=0.1),
+    "human_loop": NodeCostProfile(latency_seconds=0.5, latency_p95_seconds=1.0),
+    "process": NodeCostProfile(
+        latency_seconds=3.0, latency_p95_seconds=8.0, llm_calls=1, cost_usd=0.01
+    ),
+    "decision": NodeCostProfile(
+        latency_seconds=2.0, latency_p95_seconds=5.0, llm_calls=1, cost_usd=0.005
+    ),
+    "tool": NodeCostProfile(
+        latency_seconds=2.5, latency_p95_seconds=7.0, llm_calls=1, cost_usd=0.008
+    ),
+    "ai_agent": NodeCostProfile(
+        latency_seconds=12.0, latency_p95_seconds=35.0, llm_calls=4, cost_usd=0.05
+    ),
+}
+
+# Integration Tools call an external API after the LLM filled their Parameters
+TOOL_TYPE_PROFILES = {
+    "integration": NodeCostProfile(
+        latency_seconds=2.5, latency_p95_seconds=7.0, llm_calls=1, cost_usd=0.008
+    ),
+    "prompt": NodeCostProfile(
+        latency_seconds=4.0, latency_p95_seconds=12.0, llm_calls=1, cost_usd=0.015
+    ),
+}
+
+# Action Types with a Profile differing from their Tool Type
+ACTION_TYPE_PROFILES = {
+    "classification": NodeCostProfile(
+        latency_seconds=1.5, latency_p95_seconds=4.0, llm_calls=1, cost_usd=0.004
+    ),
+    "extraction": NodeCostProfile(
+        latency_seconds=3.0, latency_p95_seconds=9.0, llm_calls=1, cost_usd=0.012
+    ),
+    "generation": NodeCostProfile(
+        latency_seconds=6.0, latency_p95_seconds=18.0, llm_calls=1, cost_usd=0.025
+    ),
+    "summarization": NodeCostProfile(
+        latency_seconds=5.0, latency_p95_seconds=14.0, llm_calls=1, cost_usd=0.02
+    ),
+}
+
+DEFAULT_NODE_TYPE = "process"
+
+
+class LatencyDistribution(BaseModel):
+    # First two Moments, Sums & Mixtures of Distributions are combined on them
+    mean: float = 0.0
+    variance: float = 0.0
+
+    @property
+    def p95(self) -> float:
+        return _log_normal_p95(self.mean, self.variance)
+
+
+class GraphCostEstimate(BaseModel):
+    expected_latency_seconds: float = 0.0
+    p95_latency_seconds: float = 0.0
+    expected_llm_calls: float = 0.0
+    expected_cost_usd: float = 0.0
+    # Slowest Path from an Entry to an Exit Node by expected Latency
+    critical_path: List[str] = Field(default_factory=list)
+    # Probability that a Node runs in one Execution
+    execution_probabilities: Dict[str, float] = Field(default_factory=dict)
+    # Loops are estimated with a single Iteration
+    has_cycles: bool = False
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Rounded Figures for the Graph Summary."""
+        return {
+            "expected_latency_seconds": round(self.expected_latency_seconds, 2),
+            "p95_latency_seconds": round(self.p95_latency_seconds, 2),
+            "expected_llm_calls": round(self.expected_llm_calls, 2),
+            "expected_cost_usd": round(self.expected_cost_usd, 4),
+            "critical_path": self.critical_path,
+            "has_cycles": self.has_cycles,
+        }
+
+
+def estimate_graph_cost(
+    graph: Dict[str, Any], tools: Optional[Iterable[Any]] = None
+) -> Optional[GraphCostEstimate]:
+    """
+    Estimates Latency, LLM Calls & Cost of one Execution of a Graph.
+
+    ``tools`` are the AgentGraphTools selected for the Graph, their ``tool_type`` &
+    ``action_type`` refine the Profiles of their Nodes. Returns None for unknown
+    Graph Formats.
+    """
+    structure = build_graph_structure(graph)
+    if structure is None:
+        return None
+
+    agent_graph = is_agent_graph(graph)
+    node_profiles = {
+        node_id: get_node_cost_profile(structure.nodes[node_id], agent_graph)
+        for node_id in structure.node_ids
+    }
+    for tool in tools or []:
+        if tool.node_id in node_profiles:
+            node_profiles[tool.node_id] = _get_tool_profile(tool.tool_type, tool.action_type)
+
+    return estimate_structure_cost(structure, node_profiles, _get_branch_weights(graph))
+
+
+def get_node_cost_profile(node: Dict[str, Any], agent_graph: bool = False) -> NodeCostProfile:
+    """Profile of a Node by Tool Type & Action Type, otherwise by its Display Node Type."""
+    tool_type = node.get("tool_type") or node.get("tool_category")
+    if tool_type or node.get("action_type"):
+        return _get_tool_profile(tool_type, node.get("action_type"))
+
+    if agent_graph:
+        if node.get("isEntryNode") and not node.get("toolConfiguration"):
+            return NODE_TYPE_PROFILES["trigger"]
+
+        # NOTE: Nested Agent Graph Nodes run a Tool if configured, otherwise a Prompt
+        original_tool = (node.get("toolConfiguration") or {}).get("originalTool")
+        return TOOL_TYPE_PROFILES["integration" if original_tool else "prompt"]
+
+    return NODE_TYPE_PROFILES.get(
+        node.get("type", DEFAULT_NODE_TYPE), NODE_TYPE_PROFILES[DEFAULT_NODE_TYPE]
+    )
+
+
+def estimate_structure_cost(
+    structure: GraphStructure,
+    node_profiles: Dict[str, NodeCostProfile],
+    branch_weights: Optional[Dict[Tuple[str, str], Optional[float]]] = None,
+) -> GraphCostEstimate:
+    """
+    Combines the Node Profiles over the Graph.
+
+    ``branch_weights`` holds the Probability of every conditional Edge, None for
+    conditional Edges without a known Probability. Edges not in it are unconditional.
+    """
+    branch_weights = branch_weights or {}
+    topological_order, back_edges = _acyclic_order(structure)
+    estimate = GraphCostEstimate(has_cycles=bool(back_edges))
+    if not topological_order:
+        return estimate
+
+    successors = {
+        node_id: [
+            successor_id
+            for successor_id in structure.successors[node_id]
+            if (node_id, successor_id) not in back_edges
+        ]
+        for node_id in topological_order
+    }
+    exclusive_nodes = {
+        node_id
+        for node_id in topological_order
+        if _is_exclusive(node_id, successors[node_id], structure, branch_weights)
+    }
+    edge_probabilities = {
+        node_id: _get_edge_probabilities(
+            node_id, successors[node_id], node_id in exclusive_nodes, branch_weights
+        )
+        for node_id in topological_order
+    }
+
+    # Forward Pass: Probability that a Node runs, Entries are alternative Triggers
+    entry_nodes = [node_id for node_id in structure.entry_nodes if node_id in successors]
+    probabilities = dict.fromkeys(topological_order, 0.0)
+    for entry_id in entry_nodes:
+        probabilities[entry_id] = 1 / len(entry_nodes)
+
+    for node_id in topological_order:
+        for successor_id, edge_probability in edge_probabilities[node_id].items():
+            # NOTE: Parallel Branches merging again run the Merge Node only once, the
+            # Sum is exact for exclusive Branches & an upper Bound for parallel ones
+            probabilities[successor_id] = min(
+                1.0, probabilities[successor_id] + probabilities[node_id] * edge_probability
+            )
+
+    # Backward Pass: Latency from the Start of a Node to the End of the Execution
+    remaining: Dict[str, LatencyDistribution] = {}
+    critical_successor: Dict[str, Optional[str]] = {}
+    for node_id in reversed(topological_order):
+        node_latency = _get_latency_distribution(node_profiles[node_id])
+        successor_latency, critical_successor[node_id] = _combine_successors(
+            remaining, edge_probabilities[node_id], node_id in exclusive_nodes
+        )
+        remaining[node_id] = LatencyDistribution(
+            mean=node_latency.mean + successor_latency.mean,
+            variance=node_latency.variance + successor_latency.variance,
+        )
+
+    total_latency, critical_entry = _combine_successors(
+        remaining, {entry_id: 1 / len(entry_nodes) for entry_id in entry_nodes}, True
+    )
+
+    estimate.expected_latency_seconds = total_latency.mean
+    estimate.p95_latency_seconds = total_latency.p95
+    estimate.expected_llm_calls = sum(
+        probabilities[node_id] * node_profiles[node_id].llm_calls for node_id in topological_order
+    )
+    estimate.expected_cost_usd = sum(
+        probabilities[node_id] * node_profiles[node_id].cost_usd for node_id in topological_order
+    )
+    estimate.execution_probabilities = probabilities
+
+    node_id = critical_entry
+    while node_id is not None:
+        estimate.critical_path.append(node_id)
+        node_id = critical_successor[node_id]
+
+    return estimate
+
+
+def _get_tool_profile(tool_type: Optional[str], action_type: Optional[str]) -> NodeCostProfile:
+    action_profile = ACTION_TYPE_PROFILES.get((action_type or "").strip().lower())
+    if action_profile is not None:
+        return action_profile
+
+    return TOOL_TYPE_PROFILES.get(tool_type or "", TOOL_TYPE_PROFILES["prompt"])
+
+
+def _get_branch_weights(graph: Dict[str, Any]) -> Dict[Tuple[str, str], Optional[float]]:
+    nodes = get_graph_nodes(graph) or []
+    branch_weights: Dict[Tuple[str, str], Optional[float]] = {}
+
+    if is_agent_graph(graph):
+        # NOTE: Agent Graphs keep the Branch Condition on the Child Node
+        conditions = {
+            node.get("id"): node.get("condition") or node.get("branchName") for node in nodes
+        }
+        for node in nodes:
+            for child_id in node.get("nodes") or []:
+                if conditions.get(child_id):
+                    branch_weights[(node.get("id"), child_id)] = _get_probability(
+                        conditions[child_id]
+                    )
+        return branch_weights
+
+    display_graph = graph["graph"] if isinstance(graph.get("graph"), dict) else graph
+    for edge in display_graph.get("edges") or []:
+        if _is_conditional(edge.get("condition")):
+            branch_weights[(edge.get("from"), edge.get("to"))] = _get_probability(
+                edge["condition"]
+            )
+
+    return branch_weights
+
+
+def _is_conditional(condition: Any) -> bool:
+    if isinstance(condition, dict):
+        return condition.get("type", "conditional") != "always" and bool(
+            condition.get("description") or condition.get("probability") is not None
+        )
+
+    return bool(condition)
+
+
+def _get_probability(condition: Any) -> Optional[float]:
+    probability = condition.get("probability") if isinstance(condition, dict) else None
+    if isinstance(probability, (int, float)) and 0 <= probability <= 1:
+        return float(probability)
+
+    return None
+
+
+def _is_exclusive(
+    node_id: str,
+    successor_ids: List[str],
+    structure: GraphStructure,
+    branch_weights: Dict[Tuple[str, str], Optional[float]],
+) -> bool:
+    if len(successor_ids) < 2:
+        return False
+
+    return structure.nodes[node_id].get("type") == "decision" or any(
+        (node_id, successor_id) in branch_weights for successor_id in successor_ids
+    )
+
+
+def _get_edge_probabilities(
+    node_id: str,
+    successor_ids: List[str],
+    exclusive: bool,
+    branch_weights: Dict[Tuple[str, str], Optional[float]],
+) -> Dict[str, float]:
+    """Probability per Successor, summing to 1 for exclusive Branches & 1 each for parallel ones."""
+    if not exclusive:
+        return dict.fromkeys(successor_ids, 1.0)
+
+    # NOTE: Branches without a Probability share the Remainder of the known ones
+    known_weights = {
+        successor_id: branch_weights[(node_id, successor_id)]
+        for successor_id in successor_ids
+        if branch_weights.get((node_id, successor_id)) is not None
+    }
+    unknown_ids = [
+        successor_id for successor_id in successor_ids if successor_id not in known_weights
+    ]
+    known_total = sum(known_weights.values())
+    remainder = max(1.0 - known_total, 0.0)
+
+    weights = dict(known_weights)
+    for successor_id in unknown_ids:
+        weights[successor_id] = remainder / len(unknown_ids)
+
+    total_weight = sum(weights.values())
+    if total_weight <= 0:
+        return dict.fromkeys(successor_ids, 1 / len(successor_ids))
+
+    return {
+        successor_id: weights[successor_id] / total_weight for successor_id in successor_ids
+    }
+
+
+def _combine_successors(
+    remaining: Dict[str, LatencyDistribution],
+    edge_probabilities: Dict[str, float],
+    exclusive: bool,
+) -> Tuple[LatencyDistribution, Optional[str]]:
+    if not edge_probabilities:
+        return LatencyDistribution(), None
+
+    critical_id = max(edge_probabilities, key=lambda successor_id: remaining[successor_id].mean)
+    if not exclusive:
+        # NOTE: Parallel Branches are approximated by their slowest Branch
+        return remaining[critical_id], critical_id
+
+    # Mixture of the Branch Distributions, weighted by the Branch Probabilities
+    total_probability = sum(edge_probabilities.values())
+    mean = sum(
+        probability * remaining[successor_id].mean
+        for successor_id, probability in edge_probabilities.items()
+    ) / total_probability
+    second_moment = sum(
+        probability * (remaining[successor_id].variance + remaining[successor_id].mean ** 2)
+        for successor_id, probability in edge_probabilities.items()
+    ) / total_probability
+
+    return LatencyDistribution(mean=mean, variance=max(second_moment - mean**2, 0.0)), critical_id
+
+
+def _get_latency_distribution(profile: NodeCostProfile) -> LatencyDistribution:
+    """Fits a Log-normal Distribution to the Mean & p95 of a Profile."""
+    mean = profile.latency_seconds
+    if mean <= 0:
+        return LatencyDistribution()
+
+    # p95 / Mean = exp(z * sigma - sigma^2 / 2), solved for the smaller sigma
+    ratio = max(profile.latency_p95_seconds / mean, 1.0)
+    discriminant = max(P95_Z_SCORE**2 - 2 * math.log(ratio), 0.0)
+    sigma = P95_Z_SCORE - math.sqrt(discriminant)
+
+    return LatencyDistribution(mean=mean, variance=mean**2 * (math.exp(sigma**2) - 1))
+
+
+def _log_normal_p95(mean: float, variance: float) -> float:
+    if mean <= 0:
+        return 0.0
+
+    sigma_squared = math.log(1 + variance / mean**2)
+    mu = math.log(mean) - sigma_squared / 2
+
+    return math.exp(mu + P95_Z_SCORE * math.sqrt(sigma_squared))
+
+
+def _acyclic_order(structure: GraphStructure) -> Tuple[List[str], Set[Tuple[str, str]]]:
+    """Topological Order of the Nodes reachable from the Entries & the Back Edges of Loops."""
+    visited: Set[str] = set()
+    on_stack: Set[str] = set()
+    back_edges: Set[Tuple[str, str]] = set()
+    postorder: List[str] = []
+
+    for entry_id in structure.entry_nodes:
+        if entry_id in visited:
+            continue
+
+        visited.add(entry_id)
+        on_stack.add(entry_id)
+        stack = [(entry_id, iter(structure.successors[entry_id]))]
+
+        while stack:
+            node_id, successor_iterator = stack[-1]
+            successor_id = next(successor_iterator, None)
+
+            if successor_id is None:
+                postorder.append(node_id)
+                on_stack.discard(node_id)
+                stack.pop()
+            elif successor_id in on_stack:
+                back_edges.add((node_id, successor_id))
+            elif successor_id not in visited:
+                visited.add(successor_id)
+                on_stack.add(successor_id)
+                stack.append((successor_id, iter(structure.successors[successor_id])))
+
+    return postorder[::-1], back_edges
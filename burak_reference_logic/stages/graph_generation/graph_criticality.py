@@ -0,0 +1,181 @@
+"""
+Structural Criticality of Workflow Graphs
+
+Replaces the ``performance.criticality`` Field guessed by the LLM with a Property of
+the Graph itself. A Node is structurally critical when every Path from the Entry
+Nodes to the Exit Nodes passes through it, i.e. it dominates all reachable Exit
+Nodes. The Blast Radius of a Node is the Number of Nodes which can only be reached
+through it (its Dominator Subtree), these Nodes never run if the Node fails.
+
+Dominator & Post-Dominator Trees are computed once per Graph in near linear Time,
+so Graphs with thousands of Nodes are analysed in Milliseconds.
+"""
+
+import logging
+import math
+from enum import Enum
+from typing import Any, Dict, List, Optional, Set
+
+from pydantic import BaseModel, Field
+
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_dominators import (
+    build_dominator_tree,
+    compute_immediate_dominators,
+    compute_immediate_post_dominators,
+    compute_subtree_sizes,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_structure import (
+    GraphStructure,
+    build_graph_structure,
+)
+
+logger = logging.getLogger("app")
+
+# Nodes cutting off at least this Share of the Graph are highly critical
+HIGH_BLAST_RADIUS_RATIO = 0.2
+MIN_HIGH_BLAST_RADIUS = 2
+
+
+class CriticalityLevel(Enum):
+    CRITICAL = "critical"
+    HIGH = "high"
+    NORMAL = "normal"
+
+
+class NodeCriticality(BaseModel):
+    node_id: str
+    level: CriticalityLevel = CriticalityLevel.NORMAL
+    # Every Entry to Exit Path passes through the Node
+    is_structurally_critical: bool = False
+    # Nodes which are only reachable through the Node
+    blast_radius: int = 0
+    # Nodes which only reach an Exit Node through the Node
+    post_dominated_count: int = 0
+
+
+class GraphCriticality(BaseModel):
+    nodes: Dict[str, NodeCriticality] = Field(default_factory=dict)
+    # Critical & highly critical Nodes in Graph Order
+    critical_nodes: List[str] = Field(default_factory=list)
+
+    def get_levels(self) -> Dict[str, str]:
+        """Criticality Level Values per Node, as used by the Mermaid Styling."""
+        return {node_id: node.level.value for node_id, node in self.nodes.items()}
+
+
+def analyze_graph_criticality(graph: Dict[str, Any]) -> Optional[GraphCriticality]:
+    """Criticality of every Node of a Graph, None for unknown Graph Formats."""
+    structure = build_graph_structure(graph)
+    if structure is None:
+        return None
+
+    return analyze_structure_criticality(structure)
+
+
+def analyze_structure_criticality(structure: GraphStructure) -> GraphCriticality:
+    immediate_dominators = compute_immediate_dominators(structure)
+    immediate_post_dominators = compute_immediate_post_dominators(structure)
+
+    blast_radii = compute_subtree_sizes(build_dominator_tree(immediate_dominators))
+    post_dominated_counts = compute_subtree_sizes(
+        build_dominator_tree(immediate_post_dominators)
+    )
+    # NOTE: Entry & Exit Nodes lie on every Path by Definition and are not flagged
+    boundary_nodes = set(structure.entry_nodes) | set(structure.exit_nodes)
+    structurally_critical = (
+        _find_nodes_on_every_path(structure, immediate_dominators) - boundary_nodes
+    )
+
+    high_blast_radius = max(
+        MIN_HIGH_BLAST_RADIUS, math.ceil(HIGH_BLAST_RADIUS_RATIO * len(structure.node_ids))
+    )
+
+    criticality = GraphCriticality()
+    for node_id in structure.node_ids:
+        # NOTE: Subtree Sizes include the Node itself, unreachable Nodes have no Subtree
+        blast_radius = max(blast_radii.get(node_id, 1) - 1, 0)
+
+        if node_id in boundary_nodes:
+            level = CriticalityLevel.NORMAL
+        elif node_id in structurally_critical:
+            level = CriticalityLevel.CRITICAL
+        elif blast_radius >= high_blast_radius:
+            level = CriticalityLevel.HIGH
+        else:
+            level = CriticalityLevel.NORMAL
+
+        criticality.nodes[node_id] = NodeCriticality(
+            node_id=node_id,
+            level=level,
+            is_structurally_critical=node_id in structurally_critical,
+            blast_radius=blast_radius,
+            post_dominated_count=max(post_dominated_counts.get(node_id, 1) - 1, 0),
+        )
+        if level != CriticalityLevel.NORMAL:
+            criticality.critical_nodes.append(node_id)
+
+    return criticality
+
+
+def _find_nodes_on_every_path(
+    structure: GraphStructure, immediate_dominators: Dict[str, Optional[str]]
+) -> Set[str]:
+    reachable_exits = [
+        node_id for node_id in structure.exit_nodes if node_id in immediate_dominators
+    ]
+    if not reachable_exits:
+        return set()
+
+    depths = _dominator_depths(immediate_dominators)
+
+    # The Nodes on every Path are the Dominators of the common Dominator of all Exits
+    common_dominator: Optional[str] = reachable_exits[0]
+    for exit_id in reachable_exits[1:]:
+        common_dominator = _common_dominator(
+            immediate_dominators, depths, common_dominator, exit_id
+        )
+        if common_dominator is None:
+            return set()
+
+    path_nodes = set()
+    node_id = common_dominator
+    while node_id is not None:
+        path_nodes.add(node_id)
+        node_id = immediate_dominators[node_id]
+
+    return path_nodes
+
+
+def _dominator_depths(immediate_dominators: Dict[str, Optional[str]]) -> Dict[str, int]:
+    depths: Dict[str, int] = {}
+
+    for node_id in immediate_dominators:
+        chain = []
+        while node_id is not None and node_id not in depths:
+            chain.append(node_id)
+            node_id = immediate_dominators[node_id]
+
+        depth = -1 if node_id is None else depths[node_id]
+        for chain_node_id in reversed(chain):
+            depth += 1
+            depths[chain_node_id] = depth
+
+    return depths
+
+
+def _common_dominator(
+    immediate_dominators: Dict[str, Optional[str]],
+    depths: Dict[str, int],
+    first: Optional[str],
+    second: Optional[str],
+) -> Optional[str]:
+    while first != second:
+        if first is None or second is None:
+            return None
+
+        if depths[first] >= depths[second]:
+            first = immediate_dominators[first]
+        else:
+            second = immediate_dominators[second]
+
+    return first
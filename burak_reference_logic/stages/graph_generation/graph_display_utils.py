@@ -7,12 +7,39 @@ including improved Mermaid diagram generation with better styling and features.
 
 import base64
 import json
-from typing import Dict, List, Any, Tuple, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 import logging
 
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_cost_estimator import (
+    estimate_graph_cost,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_criticality import (
+    analyze_graph_criticality,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_structure import (
+    count_graph_elements,
+)
+
 logger = logging.getLogger("app")
 
 
+MERMAID_LIVE_URL = "https://mermaid.live/edit#base64:"
+
+MERMAID_LIVE_CONFIG = {
+    "theme": "default",
+    "themeVariables": {
+        "primaryColor": "#4f46e5",
+        "primaryTextColor": "#ffffff",
+        "primaryBorderColor": "#3730a3",
+        "lineColor": "#6b7280",
+        "sectionBkgColor": "#f3f4f6",
+        "altSectionBkgColor": "#e5e7eb",
+        "gridColor": "#d1d5db",
+        "tertiaryColor": "#fef3c7"
+    }
+}
+
+
 def generate_mermaid_live_link(mermaid_graph: str) -> str:
     """
     Generates URL for mermaid.live with enhanced styling and features.
@@ -23,29 +50,42 @@ def generate_mermaid_live_link(mermaid_graph: str) -> str:
     Returns:
         URL for mermaid.live editor
     """
-    _graph_data = {
-        "code": mermaid_graph, 
-        "mermaid": {
-            "theme": "default",
-            "themeVariables": {
-                "primaryColor": "#4f46e5",
-                "primaryTextColor": "#ffffff",
-                "primaryBorderColor": "#3730a3",
-                "lineColor": "#6b7280",
-                "sectionBkgColor": "#f3f4f6",
-                "altSectionBkgColor": "#e5e7eb",
-                "gridColor": "#d1d5db",
-                "tertiaryColor": "#fef3c7"
-            }
-        }
-    }
-    data_json = json.dumps(_graph_data, separators=(",", ":")).encode("utf-8")
+    return "".join(iter_mermaid_live_link([mermaid_graph]))
+
+
+def iter_mermaid_live_link(mermaid_chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Streams the mermaid.live URL for a Mermaid diagram given in chunks.
+    
+    The diagram is JSON-escaped and base64-encoded chunk by chunk, so the full
+    diagram, its JSON document and its base64 encoding are never held in memory.
+    
+    Args:
+        mermaid_chunks: Chunks of the Mermaid diagram definition
+        
+    Returns:
+        Iterator over chunks of the URL for mermaid.live editor
+    """
+    yield MERMAID_LIVE_URL
+
+    # Base64 encodes groups of 3 bytes, the remainder is carried to the next chunk
+    pending_bytes = b""
+
+    def encode(data: str) -> str:
+        nonlocal pending_bytes
+        pending_bytes += data.encode("utf-8")
+        complete_length = len(pending_bytes) - len(pending_bytes) % 3
+        encoded = base64.b64encode(pending_bytes[:complete_length]).decode()
+        pending_bytes = pending_bytes[complete_length:]
+        return encoded
 
-    # Base64 link
-    base64_encoded = base64.b64encode(data_json).decode()
-    base64_url = f"https://mermaid.live/edit#base64:{base64_encoded}"
+    yield encode('{"code":"')
+    for mermaid_chunk in mermaid_chunks:
+        # JSON escaping is per character, so escaped chunks concatenate correctly
+        yield encode(json.dumps(mermaid_chunk)[1:-1])
+    yield encode('","mermaid":' + json.dumps(MERMAID_LIVE_CONFIG, separators=(",", ":")) + "}")
 
-    return base64_url
+    yield base64.b64encode(pending_bytes).decode()
 
 
 def generate_enhanced_mermaid_graph(graph: Dict[str, Any]) -> str:
@@ -59,49 +99,95 @@ def generate_enhanced_mermaid_graph(graph: Dict[str, Any]) -> str:
         Mermaid diagram definition string
     """
     try:
-        nodes = graph.get("nodes", [])
-        edges = graph.get("edges", [])
-        error_flows = graph.get("error_flows", [])
-        
-        # Start the diagram
-        mermaid_lines = [
-            "graph TD",
-            "    %% Enhanced Workflow Graph",
-            f"    %% Graph: {graph.get('name', 'Unnamed')}",
-            f"    %% Version: {graph.get('version', '1.0.0')}",
-            ""
-        ]
-        
-        # Add nodes with enhanced styling
-        node_definitions = _generate_node_definitions(nodes)
-        mermaid_lines.extend(node_definitions)
-        mermaid_lines.append("")
-        
-        # Add edges with conditions
-        edge_definitions = _generate_edge_definitions(edges)
-        mermaid_lines.extend(edge_definitions)
-        mermaid_lines.append("")
-        
-        # Add error flows if present
-        if error_flows:
-            error_flow_definitions = _generate_error_flow_definitions(error_flows, nodes)
-            mermaid_lines.extend(error_flow_definitions)
-            mermaid_lines.append("")
-        
-        # Add styling
-        styling_definitions = _generate_styling_definitions(nodes)
-        mermaid_lines.extend(styling_definitions)
-        
-        return "\n".join(mermaid_lines)
+        return "\n".join(iter_enhanced_mermaid_lines(graph))
         
     except Exception as e:
         logger.error(f"Failed to generate enhanced Mermaid graph: {e}")
         return _generate_fallback_mermaid_graph(graph)
 
 
-def _generate_node_definitions(nodes: List[Dict[str, Any]]) -> List[str]:
+def iter_enhanced_mermaid_lines(
+    graph: Dict[str, Any], node_criticality: Optional[Dict[str, str]] = None
+) -> Iterator[str]:
+    """
+    Generate the lines of an enhanced Mermaid diagram one by one.
+    
+    Nodes are iterated several times (definitions, error flows, styling), so
+    "nodes" may be any re-iterable collection.
+    
+    Args:
+        graph: The workflow graph dictionary
+        node_criticality: Criticality level per node id, analysed from the graph
+            structure if not given
+        
+    Returns:
+        Iterator over the Mermaid diagram lines, without line breaks
+    """
+    nodes = graph.get("nodes", [])
+    edges = graph.get("edges", [])
+    error_flows = graph.get("error_flows", [])
+    
+    if node_criticality is None:
+        node_criticality = get_node_criticality(graph)
+    
+    # Start the diagram
+    yield "graph TD"
+    yield "    %% Enhanced Workflow Graph"
+    yield f"    %% Graph: {graph.get('name', 'Unnamed')}"
+    yield f"    %% Version: {graph.get('version', '1.0.0')}"
+    yield ""
+    
+    # Add nodes with enhanced styling
+    yield from _iter_node_definitions(nodes, node_criticality)
+    yield ""
+    
+    # Add edges with conditions
+    yield from _iter_edge_definitions(edges)
+    yield ""
+    
+    # Add error flows if present
+    if error_flows:
+        yield from _iter_error_flow_definitions(error_flows, nodes)
+        yield ""
+    
+    # Add styling
+    yield from _iter_styling_definitions(nodes, node_criticality)
+
+
+def get_node_criticality(graph: Dict[str, Any]) -> Optional[Dict[str, str]]:
+    """
+    Criticality level per node id from the dominator analysis of the graph.
+    
+    Returns None if the graph structure can not be analysed (e.g. lazily streamed
+    nodes), the manual "performance.criticality" field of the nodes is used then.
+    """
+    try:
+        criticality = analyze_graph_criticality(graph)
+    except Exception as e:
+        logger.warning(f"Failed to analyse graph criticality: {e}")
+        return None
+    
+    return criticality.get_levels() if criticality is not None else None
+
+
+def _get_criticality(node: Dict[str, Any], node_criticality: Optional[Dict[str, str]]) -> str:
+    if node_criticality is not None:
+        return node_criticality.get(node.get("id"), "")
+    
+    return (node.get("performance") or {}).get("criticality", "")
+
+
+def _generate_node_definitions(
+    nodes: List[Dict[str, Any]], node_criticality: Optional[Dict[str, str]] = None
+) -> List[str]:
     """Generate Mermaid node definitions with appropriate shapes and labels."""
-    definitions = ["    %% Node Definitions"]
+    return list(_iter_node_definitions(nodes, node_criticality))
+
+
+def _iter_node_definitions(
+    nodes: Iterable[Dict[str, Any]], node_criticality: Optional[Dict[str, str]] = None
+) -> Iterator[str]:
+    yield "    %% Node Definitions"
     
     for node in nodes:
         node_id = node.get("id", "unknown")
@@ -116,12 +202,11 @@ def _generate_node_definitions(nodes: List[Dict[str, Any]]) -> List[str]:
         
         # Add performance indicators if available
         performance_indicator = ""
-        if "performance" in node:
-            criticality = node["performance"].get("criticality", "")
-            if criticality == "critical":
-                performance_indicator = " ⚡"
-            elif criticality == "high":
-                performance_indicator = " ⭐"
+        criticality = _get_criticality(node, node_criticality)
+        if criticality == "critical":
+            performance_indicator = " ⚡"
+        elif criticality == "high":
+            performance_indicator = " ⭐"
         
         # Add error handling indicator
         error_indicator = ""
@@ -135,14 +220,16 @@ def _generate_node_definitions(nodes: List[Dict[str, Any]]) -> List[str]:
         
         full_label = f"{safe_name}{performance_indicator}{error_indicator}{monitoring_indicator}"
         
-        definitions.append(f"    {node_id}{shape_start}\"{full_label}\"{shape_end}")
-    
-    return definitions
+        yield f"    {node_id}{shape_start}\"{full_label}\"{shape_end}"
 
 
 def _generate_edge_definitions(edges: List[Dict[str, Any]]) -> List[str]:
     """Generate Mermaid edge definitions with conditions and styling."""
-    definitions = ["    %% Edge Definitions"]
+    return list(_iter_edge_definitions(edges))
+
+
+def _iter_edge_definitions(edges: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    yield "    %% Edge Definitions"
     
     for edge in edges:
         from_node = edge.get("from")
@@ -171,17 +258,21 @@ def _generate_edge_definitions(edges: List[Dict[str, Any]]) -> List[str]:
         # Add condition label if present
         if condition_desc and condition_type != "error":
             safe_condition = _escape_mermaid_text(condition_desc[:30])  # Limit length
-            definitions.append(f"    {from_node} {edge_style} {to_node}")
-            definitions.append(f"    {from_node} -.->|{safe_condition}| {to_node}")
+            yield f"    {from_node} {edge_style} {to_node}"
+            yield f"    {from_node} -.->|{safe_condition}| {to_node}"
         else:
-            definitions.append(f"    {from_node} {edge_style} {to_node}")
-    
-    return definitions
+            yield f"    {from_node} {edge_style} {to_node}"
 
 
 def _generate_error_flow_definitions(error_flows: List[Dict[str, Any]], nodes: List[Dict[str, Any]]) -> List[str]:
     """Generate Mermaid definitions for error flows."""
-    definitions = ["    %% Error Flow Definitions"]
+    return list(_iter_error_flow_definitions(error_flows, nodes))
+
+
+def _iter_error_flow_definitions(
+    error_flows: Iterable[Dict[str, Any]], nodes: Iterable[Dict[str, Any]]
+) -> Iterator[str]:
+    yield "    %% Error Flow Definitions"
     
     # Create a lookup for node types
     node_types = {node.get("id"): node.get("type") for node in nodes}
@@ -197,34 +288,33 @@ def _generate_error_flow_definitions(error_flows: List[Dict[str, Any]], nodes: L
         error_handler_id = f"error_handler_{i}"
         error_type = trigger.get("type", "error")
         
-        definitions.append(f"    {error_handler_id}{{\"🚨 {error_type.replace('_', ' ').title()}\"}}")
+        yield f"    {error_handler_id}{{\"🚨 {error_type.replace('_', ' ').title()}\"}}"
         
         # Connect source nodes to error handler
         for source_node in source_nodes:
             if source_node in node_types:
-                definitions.append(f"    {source_node} -.->|error| {error_handler_id}")
+                yield f"    {source_node} -.->|error| {error_handler_id}"
         
         # Connect error handler to recovery path
         if recovery_path:
             first_recovery_node = recovery_path[0]
-            definitions.append(f"    {error_handler_id} -.->|recover| {first_recovery_node}")
-    
-    return definitions
+            yield f"    {error_handler_id} -.->|recover| {first_recovery_node}"
 
 
-def _generate_styling_definitions(nodes: List[Dict[str, Any]]) -> List[str]:
+def _generate_styling_definitions(
+    nodes: List[Dict[str, Any]], node_criticality: Optional[Dict[str, str]] = None
+) -> List[str]:
     """Generate Mermaid styling definitions for different node types."""
-    definitions = ["    %% Styling Definitions"]
+    return list(_iter_styling_definitions(nodes, node_criticality))
+
+
+def _iter_styling_definitions(
+    nodes: Iterable[Dict[str, Any]], node_criticality: Optional[Dict[str, str]] = None
+) -> Iterator[str]:
+    yield "    %% Styling Definitions"
     
-    # Group nodes by type for styling
-    node_types = {}
-    for node in nodes:
-        node_type = node.get("type", "process")
-        node_id = node.get("id")
-        
-        if node_type not in node_types:
-            node_types[node_type] = []
-        node_types[node_type].append(node_id)
+    # NOTE: Nodes are grouped by type with one pass per type, instead of collecting all ids
+    node_types = list(dict.fromkeys(node.get("type", "process") for node in nodes))
     
     # Define colors for each node type
     type_colors = {
@@ -239,25 +329,22 @@ def _generate_styling_definitions(nodes: List[Dict[str, Any]]) -> List[str]:
     }
     
     # Apply styling to nodes
-    for node_type, node_ids in node_types.items():
+    for node_type in node_types:
         if node_type in type_colors:
             color_def = type_colors[node_type]
-            for node_id in node_ids:
-                definitions.append(f"    classDef {node_type}Style {color_def}")
-                definitions.append(f"    class {node_id} {node_type}Style")
+            for node in nodes:
+                if node.get("type", "process") == node_type:
+                    yield f"    classDef {node_type}Style {color_def}"
+                    yield f"    class {node.get('id')} {node_type}Style"
     
     # Add special styling for critical nodes
-    critical_nodes = [
-        node.get("id") for node in nodes 
-        if node.get("performance", {}).get("criticality") == "critical"
-    ]
-    
-    if critical_nodes:
-        definitions.append("    classDef criticalStyle stroke:#dc2626,stroke-width:4px,stroke-dasharray: 5 5")
-        for node_id in critical_nodes:
-            definitions.append(f"    class {node_id} criticalStyle")
-    
-    return definitions
+    has_critical_nodes = False
+    for node in nodes:
+        if _get_criticality(node, node_criticality) == "critical":
+            if not has_critical_nodes:
+                has_critical_nodes = True
+                yield "    classDef criticalStyle stroke:#dc2626,stroke-width:4px,stroke-dasharray: 5 5"
+            yield f"    class {node.get('id')} criticalStyle"
 
 
 def _get_node_shape(node_type: str) -> Tuple[str, str]:
@@ -342,20 +429,9 @@ def generate_graph_summary(graph: Dict[str, Any]) -> Dict[str, Any]:
     edges = graph.get("edges", [])
     error_flows = graph.get("error_flows", [])
     
-    # Count nodes by type
-    node_type_counts = {}
-    for node in nodes:
-        node_type = node.get("type", "unknown")
-        node_type_counts[node_type] = node_type_counts.get(node_type, 0) + 1
-    
     # Calculate complexity metrics
-    complexity_metrics = {
-        "total_nodes": len(nodes),
-        "total_edges": len(edges),
-        "error_flows": len(error_flows),
-        "complexity_ratio": len(edges) / max(len(nodes), 1),
-        "node_types": node_type_counts
-    }
+    complexity_metrics = count_graph_elements(nodes, len(edges))
+    complexity_metrics["error_flows"] = len(error_flows)
     
     # Identify entry and exit points
     entry_points = [node.get("id") for node in nodes if node.get("type") == "trigger"]
@@ -364,13 +440,33 @@ def generate_graph_summary(graph: Dict[str, Any]) -> Dict[str, Any]:
     # Calculate graph depth (longest path)
     max_depth = _calculate_graph_depth(nodes, edges)
     
-    # Identify critical nodes
-    critical_nodes = [
-        node.get("id") for node in nodes 
-        if node.get("performance", {}).get("criticality") in ["critical", "high"]
-    ]
+    # Identify critical nodes from the dominator analysis, the manual field is the fallback
+    try:
+        criticality = analyze_graph_criticality(graph)
+    except Exception as e:
+        logger.warning(f"Failed to analyse graph criticality: {e}")
+        criticality = None
+
+    if criticality is not None:
+        critical_nodes = criticality.critical_nodes
+        blast_radius = {
+            node_id: criticality.nodes[node_id].blast_radius for node_id in critical_nodes
+        }
+    else:
+        critical_nodes = [
+            node.get("id") for node in nodes 
+            if node.get("performance", {}).get("criticality") in ["critical", "high"]
+        ]
+        blast_radius = {}
     
-    return {
+    # Estimate latency and LLM calls of one execution
+    try:
+        cost_estimate = estimate_graph_cost(graph)
+    except Exception as e:
+        logger.warning(f"Failed to estimate graph cost: {e}")
+        cost_estimate = None
+    
+    summary = {
         "graph_info": {
             "id": graph.get("graph_id"),
             "name": graph.get("name"),
@@ -382,7 +478,8 @@ def generate_graph_summary(graph: Dict[str, Any]) -> Dict[str, Any]:
             "entry_points": entry_points,
             "exit_points": exit_points,
             "max_depth": max_depth,
-            "critical_nodes": critical_nodes
+            "critical_nodes": critical_nodes,
+            "blast_radius": blast_radius
         },
         "quality": {
             "has_error_handling": len(error_flows) > 0,
@@ -390,6 +487,12 @@ def generate_graph_summary(graph: Dict[str, Any]) -> Dict[str, Any]:
             "documentation_complete": all(node.get("description") for node in nodes)
         }
     }
+    
+    # The performance section is omitted if the graph can not be estimated
+    if cost_estimate is not None:
+        summary["performance"] = cost_estimate.get_summary()
+    
+    return summary
 
 
 def _calculate_graph_depth(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]) -> int:
@@ -0,0 +1,170 @@
+"""
+Dominator Analysis of Workflow Graphs
+
+A Node D dominates a Node N when every Path from an Entry Node to N passes through D,
+D post-dominates N when every Path from N to an Exit Node passes through D.
+Immediate Dominators are computed with the iterative Algorithm of Cooper, Harvey &
+Kennedy ("A Simple, Fast Dominance Algorithm"), which converges in a few Passes over
+the Reverse Postorder for the nearly structured Graphs generated from SOPs.
+"""
+
+from typing import Dict, List, Optional
+
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_structure import (
+    GraphStructure,
+)
+
+
+def compute_immediate_dominators(
+    structure: GraphStructure, entry_nodes: Optional[List[str]] = None
+) -> Dict[str, Optional[str]]:
+    """
+    Returns the Immediate Dominator of every reachable Node.
+
+    Entry Nodes (and Nodes only dominated by the virtual Root above several Entry
+    Nodes) map to None, unreachable Nodes are not part of the Result.
+    """
+    return _compute_immediate_dominators(
+        node_ids=structure.node_ids,
+        successors=structure.successors,
+        predecessors=structure.predecessors,
+        roots=structure.entry_nodes if entry_nodes is None else entry_nodes,
+    )
+
+
+def compute_immediate_post_dominators(
+    structure: GraphStructure, exit_nodes: Optional[List[str]] = None
+) -> Dict[str, Optional[str]]:
+    """Immediate Post-Dominators, the Dominators of the reversed Graph from the Exit Nodes."""
+    return _compute_immediate_dominators(
+        node_ids=structure.node_ids,
+        successors=structure.predecessors,
+        predecessors=structure.successors,
+        roots=structure.exit_nodes if exit_nodes is None else exit_nodes,
+    )
+
+
+def build_dominator_tree(
+    immediate_dominators: Dict[str, Optional[str]],
+) -> Dict[Optional[str], List[str]]:
+    """Children per Node of the Dominator Tree, the Tree Roots are the Children of None."""
+    dominator_tree: Dict[Optional[str], List[str]] = {None: []}
+
+    for node_id in immediate_dominators:
+        dominator_tree.setdefault(node_id, [])
+    for node_id, dominator_id in immediate_dominators.items():
+        dominator_tree[dominator_id].append(node_id)
+
+    return dominator_tree
+
+
+def compute_subtree_sizes(
+    dominator_tree: Dict[Optional[str], List[str]],
+) -> Dict[str, int]:
+    """Number of Nodes in the Dominator Subtree of every Node, including the Node itself."""
+    preorder: List[str] = []
+    stack = list(dominator_tree[None])
+
+    while stack:
+        node_id = stack.pop()
+        preorder.append(node_id)
+        stack.extend(dominator_tree[node_id])
+
+    subtree_sizes: Dict[str, int] = {}
+    for node_id in reversed(preorder):
+        subtree_sizes[node_id] = 1 + sum(
+            subtree_sizes[child_id] for child_id in dominator_tree[node_id]
+        )
+
+    return subtree_sizes
+
+
+def _compute_immediate_dominators(
+    node_ids: List[str],
+    successors: Dict[str, List[str]],
+    predecessors: Dict[str, List[str]],
+    roots: List[str],
+) -> Dict[str, Optional[str]]:
+    # NOTE: Index 0 is a virtual Root above all Entry Nodes, so several Entries are supported
+    postorder = _postorder(roots, successors)
+    if not postorder:
+        return {}
+
+    postorder_number = {node_id: number + 1 for number, node_id in enumerate(postorder)}
+    root_number = len(postorder) + 1
+    root_set = set(roots)
+
+    # Immediate Dominators by Postorder Number, the virtual Root dominates itself
+    dominators: Dict[int, int] = {root_number: root_number}
+    reverse_postorder = postorder[::-1]
+
+    changed = True
+    while changed:
+        changed = False
+
+        for node_id in reverse_postorder:
+            node_number = postorder_number[node_id]
+
+            processed_predecessors = [
+                postorder_number[predecessor_id]
+                for predecessor_id in predecessors[node_id]
+                if predecessor_id in postorder_number
+                and postorder_number[predecessor_id] in dominators
+            ]
+            if node_id in root_set:
+                processed_predecessors.append(root_number)
+            if not processed_predecessors:
+                continue
+
+            new_dominator = processed_predecessors[0]
+            for predecessor_number in processed_predecessors[1:]:
+                new_dominator = _intersect(dominators, predecessor_number, new_dominator)
+
+            if dominators.get(node_number) != new_dominator:
+                dominators[node_number] = new_dominator
+                changed = True
+
+    return {
+        node_id: (
+            None
+            if dominators[postorder_number[node_id]] == root_number
+            else postorder[dominators[postorder_number[node_id]] - 1]
+        )
+        for node_id in postorder
+    }
+
+
+def _intersect(dominators: Dict[int, int], first: int, second: int) -> int:
+    # Walks up the Dominator Tree, Postorder Numbers grow towards the Root
+    while first != second:
+        while first < second:
+            first = dominators[first]
+        while second < first:
+            second = dominators[second]
+
+    return first
+
+
+def _postorder(roots: List[str], successors: Dict[str, List[str]]) -> List[str]:
+    visited = set()
+    postorder: List[str] = []
+
+    for root in roots:
+        if root in visited:
+            continue
+
+        visited.add(root)
+        stack = [(root, iter(successors[root]))]
+
+        while stack:
+            node_id, successor_iterator = stack[-1]
+            successor_id = next(successor_iterator, None)
+
+            if successor_id is None:
+                postorder.append(node_id)
+                stack.pop()
+            elif successor_id not in visited:
+                visited.add(successor_id)
+                stack.append((successor_id, iter(successors[successor_id])))
+
+    return postorder
@@ -0,0 +1,243 @@
+"""
+Streaming Diagram Export
+
+Generator-based Emitters for Mermaid, Graphviz DOT & GraphML. All Emitters share
+one lazy Node/Edge Traversal over the Display & Agent Graph Formats and yield the
+Diagram in small Text Chunks, which are written incrementally to a File-like Object
+or an async Stream (e.g. a streaming HTTP Response). The full Diagram is never built
+in Memory.
+"""
+
+import inspect
+import logging
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_display_utils import (
+    get_node_criticality,
+    iter_enhanced_mermaid_lines,
+    iter_mermaid_live_link,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_structure import (
+    get_graph_nodes,
+    is_agent_graph,
+)
+
+logger = logging.getLogger("app")
+
+# DOT Shapes per Display Node Type, matching the Mermaid Shapes
+DOT_NODE_SHAPES = {
+    "trigger": "oval",
+    "process": "box",
+    "decision": "diamond",
+    "tool": "component",
+    "ai_agent": "circle",
+    "human_loop": "doublecircle",
+    "merge": "cds",
+    "end": "oval",
+}
+
+
+class DiagramFormat(Enum):
+    MERMAID = "mermaid"
+    DOT = "dot"
+    GRAPHML = "graphml"
+
+
+class _Reiterable:
+    """Re-iterable lazy Collection, each Iteration starts a fresh Generator."""
+
+    def __init__(self, iterator_factory: Callable[[], Iterator[Any]]):
+        self._iterator_factory = iterator_factory
+
+    def __iter__(self) -> Iterator[Any]:
+        return self._iterator_factory()
+
+
+def iter_export_nodes(graph: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Display Node Dicts (``id``, ``name``, ``type``) of both Graph Formats."""
+    nodes = get_graph_nodes(graph) or []
+
+    if not is_agent_graph(graph):
+        yield from nodes
+        return
+
+    for node in nodes:
+        if node.get("id") is None:
+            continue
+
+        original_tool = (node.get("toolConfiguration") or {}).get("originalTool") or {}
+        yield {
+            "id": node["id"],
+            "name": node.get("name") or original_tool.get("toolName") or node["id"],
+            "type": (
+                "trigger"
+                if node.get("isEntryNode")
+                else "end" if node.get("isExitNode") else "process"
+            ),
+        }
+
+
+def iter_export_edges(graph: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Display Edge Dicts (``from``, ``to``, ``condition``) of both Graph Formats."""
+    if not is_agent_graph(graph):
+        display_graph = graph["graph"] if isinstance(graph.get("graph"), dict) else graph
+        yield from display_graph.get("edges") or []
+        return
+
+    nodes = get_graph_nodes(graph) or []
+    # NOTE: Agent Graphs keep the Branch Condition on the Child Node
+    conditions = {node.get("id"): node.get("condition") for node in nodes}
+
+    for node in nodes:
+        for child_id in node.get("nodes") or []:
+            yield {
+                "from": node.get("id"),
+                "to": child_id,
+                "condition": conditions.get(child_id) or {},
+            }
+
+
+def emit_diagram(graph: Dict[str, Any], diagram_format: DiagramFormat) -> Iterator[str]:
+    emitters = {
+        DiagramFormat.MERMAID: emit_mermaid,
+        DiagramFormat.DOT: emit_dot,
+        DiagramFormat.GRAPHML: emit_graphml,
+    }
+    return emitters[diagram_format](graph)
+
+
+def emit_mermaid(graph: Dict[str, Any]) -> Iterator[str]:
+    """Enhanced Mermaid Diagram, identical to ``generate_enhanced_mermaid_graph``."""
+    display_graph = graph["graph"] if isinstance(graph.get("graph"), dict) else graph
+    lazy_graph = {
+        **display_graph,
+        "nodes": _Reiterable(lambda: iter_export_nodes(graph)),
+        "edges": _Reiterable(lambda: iter_export_edges(graph)),
+    }
+
+    # NOTE: The Analysis needs the Graph Structure, it is built from the original Graph
+    node_criticality = get_node_criticality(graph)
+
+    for line_number, line in enumerate(
+        iter_enhanced_mermaid_lines(lazy_graph, node_criticality)
+    ):
+        yield line if line_number == 0 else f"\n{line}"
+
+
+def emit_mermaid_live_link(graph: Dict[str, Any]) -> Iterator[str]:
+    """mermaid.live URL of the Mermaid Diagram, base64-encoded while streaming."""
+    return iter_mermaid_live_link(emit_mermaid(graph))
+
+
+def emit_dot(graph: Dict[str, Any]) -> Iterator[str]:
+    display_graph = graph["graph"] if isinstance(graph.get("graph"), dict) else graph
+    graph_name = display_graph.get("name") or display_graph.get("process_name") or "workflow"
+
+    yield f"digraph {_dot_quote(graph_name)} {{\n"
+    yield "  rankdir=TB;\n"
+    yield '  node [fontname="Helvetica", style=filled, fillcolor="#eef2ff"];\n'
+
+    for node in iter_export_nodes(graph):
+        if node.get("id") is None:
+            continue
+
+        shape = DOT_NODE_SHAPES.get(node.get("type", "process"), "box")
+        label = node.get("name", node["id"])
+        yield f"  {_dot_quote(node['id'])} [label={_dot_quote(label)}, shape={shape}];\n"
+
+    for edge in iter_export_edges(graph):
+        if not edge.get("from") or not edge.get("to"):
+            continue
+
+        condition_label = _condition_label(edge.get("condition"))
+        attributes = f" [label={_dot_quote(condition_label)}]" if condition_label else ""
+        yield f"  {_dot_quote(edge['from'])} -> {_dot_quote(edge['to'])}{attributes};\n"
+
+    yield "}\n"
+
+
+def emit_graphml(graph: Dict[str, Any]) -> Iterator[str]:
+    yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+    yield '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+    yield '  <key id="name" for="node" attr.name="name" attr.type="string"/>\n'
+    yield '  <key id="type" for="node" attr.name="type" attr.type="string"/>\n'
+    yield '  <key id="condition" for="edge" attr.name="condition" attr.type="string"/>\n'
+    yield '  <graph id="workflow" edgedefault="directed">\n'
+
+    for node in iter_export_nodes(graph):
+        if node.get("id") is None:
+            continue
+
+        yield (
+            f"    <node id={quoteattr(str(node['id']))}>"
+            f'<data key="name">{escape(str(node.get("name", node["id"])))}</data>'
+            f'<data key="type">{escape(str(node.get("type", "process")))}</data>'
+            "</node>\n"
+        )
+
+    for edge_number, edge in enumerate(iter_export_edges(graph)):
+        if not edge.get("from") or not edge.get("to"):
+            continue
+
+        condition_label = _condition_label(edge.get("condition"))
+        condition_data = (
+            f'<data key="condition">{escape(condition_label)}</data>' if condition_label else ""
+        )
+        yield (
+            f'    <edge id="e{edge_number}" source={quoteattr(str(edge["from"]))} '
+            f"target={quoteattr(str(edge['to']))}>{condition_data}</edge>\n"
+        )
+
+    yield "  </graph>\n"
+    yield "</graphml>\n"
+
+
+def write_diagram(chunks: Iterable[str], output: Any) -> int:
+    """Writes Diagram Chunks to a File-like Object, returns the Number of written Characters."""
+    written_characters = 0
+
+    for chunk in chunks:
+        output.write(chunk)
+        written_characters += len(chunk)
+
+    return written_characters
+
+
+async def write_diagram_async(
+    chunks: Iterable[str], output: Any, encoding: Optional[str] = "utf-8"
+) -> int:
+    """
+    Writes Diagram Chunks to an async Stream, returns the Number of written Characters.
+
+    Supports asyncio StreamWriters (``write`` & ``drain``) and Streams with an async
+    ``write`` (e.g. ASGI Response Senders wrapped in a Writer). Chunks are encoded to
+    Bytes unless ``encoding`` is None.
+    """
+    written_characters = 0
+
+    for chunk in chunks:
+        write_result = output.write(chunk.encode(encoding) if encoding else chunk)
+        if inspect.isawaitable(write_result):
+            await write_result
+
+        # NOTE: Back Pressure, waits until the Transport Buffer is flushed
+        if hasattr(output, "drain"):
+            await output.drain()
+
+        written_characters += len(chunk)
+
+    return written_characters
+
+
+def _condition_label(condition: Any) -> str:
+    if isinstance(condition, dict):
+        return str(condition.get("description") or "")
+
+    return str(condition) if condition else ""
+
+
+def _dot_quote(text: Any) -> str:
+    escaped = str(text).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
@@ -9,6 +9,22 @@ from app.lib.modules.agents.agent_setup.models.agent_setup import (
 from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_generation import (
     generate_graph,
 )
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_layout import (
+    GraphLayoutConfig,
+    layout_graph_structure,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_structure import (
+    build_graph_structure,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_validation import (
+    validate_graph_structure,
+)
+from app.lib.modules.agents.agent_setup.stages.tool_matching.tool_matching import (
+    classify_tool_categories,
+)
+from app.lib.modules.agents.agent_setup.stages.tool_matching.tool_prefilter import (
+    get_tool_prefilter,
+)
 from app.lib.modules.agents.agent_setup.utils.agent_setup_utils import (
     set_failed_agent_setup_state,
     set_next_agent_setup_state,
@@ -39,6 +55,7 @@ async def generate_agent_graph(agent_setup_state: AgentGraphCreationState):
     try:
 
         # NOTE: Generate Agent Graph from Given Standard Operating Procedure
+        # generate_graph selects its own Model, it takes no LLM Config of an Execution Policy
         generated_agent_graph = await generate_graph(
             agent=agent_setup_session.agent,
             agent_sop=agent_setup_session.agent_sop,
@@ -49,6 +66,31 @@ async def generate_agent_graph(agent_setup_state: AgentGraphCreationState):
 
         agent_setup_session.generated_graph = generated_agent_graph
 
+        # NOTE: Graphs without Step Links have no Structure, no Edges are made up for them
+        graph_structure = build_graph_structure(generated_agent_graph.model_dump())
+        if graph_structure is None:
+            logger.info("Generated Graph declares no Step Links, skipping Graph Validation & Layout")
+            agent_setup_session.graph_layout = None
+        else:
+            # NOTE: Structural Defects are reported, the User fixes them in the Editor
+            validation_result = validate_graph_structure(graph_structure)
+            if validation_result.issues:
+                logger.warning(
+                    f"Graph Validation Score: {validation_result.score}/100, Issues: {[issue.message for issue in validation_result.issues]}"
+                )
+
+            # NOTE: Node Coordinates are computed here, so the Frontend does not lay out large Graphs
+            agent_setup_session.graph_layout = layout_graph_structure(
+                graph_structure, GraphLayoutConfig()
+            )
+
+        # NOTE: Classified before Tool Matching & Tool Generation, which run concurrently on the Split
+        await classify_tool_categories(
+            generated_graph=generated_agent_graph,
+            trace_config=agent_setup_state.trace_config,
+            tool_prefilter=get_tool_prefilter(),
+        )
+
         # Otherwise, Set the Next Stage for Tool Matching
         agent_setup_session = set_next_agent_setup_state(
             output="Graph Generation completed successfully.",
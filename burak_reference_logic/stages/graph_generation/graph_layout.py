@@ -0,0 +1,377 @@
+"""
+Layered Graph Layout
+
+Computes the ``xCoordinate``/``yCoordinate`` of Workflow Graph Nodes server-side with
+a Sugiyama-style Layout, so the Frontend does not have to lay out large Graphs:
+
+1. Cycle Removal: Back Edges of a DFS are reversed
+2. Layer Assignment: Longest Path from the Entry Nodes
+3. Dummy Nodes: Edges spanning several Layers are split into Unit-Length Segments,
+   Edges into the same Target share their Segments
+4. Crossing Reduction: Barycentre Sweeps, keeping the Ordering with the fewest Crossings
+5. Coordinate Assignment: Nodes are pulled towards their Neighbours, keeping the Spacing
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_structure import (
+    GraphStructure,
+    build_graph_structure,
+)
+
+logger = logging.getLogger("app")
+
+
+class GraphLayoutConfig(BaseModel):
+    # Horizontal Distance between Neighbouring Nodes of a Layer
+    node_spacing: int = 250
+    # Vertical Distance between Layers
+    layer_spacing: int = 150
+    # Maximum Down & Up Barycentre Sweeps, stops early without Improvement
+    ordering_sweeps: int = 8
+    coordinate_iterations: int = 2
+
+
+class GraphLayout(BaseModel):
+    # Node Id -> (xCoordinate, yCoordinate)
+    positions: Dict[str, Tuple[int, int]] = Field(default_factory=dict)
+    layer_count: int = 0
+    # Edge Crossings of the final Ordering (including Dummy Segments)
+    crossings: int = 0
+    # Edges reversed to break Cycles (e.g. Retry Loops)
+    reversed_edges: List[Tuple[str, str]] = Field(default_factory=list)
+
+
+def compute_graph_layout(
+    graph: Dict[str, Any], config: Optional[GraphLayoutConfig] = None
+) -> Optional[GraphLayout]:
+    """Computes the Node Coordinates of a Graph, returns None for unknown Graph Formats."""
+    structure = build_graph_structure(graph)
+    if structure is None:
+        return None
+
+    return layout_graph_structure(structure, config or GraphLayoutConfig())
+
+
+def apply_graph_layout(
+    graph: Dict[str, Any], config: Optional[GraphLayoutConfig] = None
+) -> Optional[GraphLayout]:
+    """Computes the Layout & writes ``xCoordinate``/``yCoordinate`` into every Node of the Graph."""
+    structure = build_graph_structure(graph)
+    if structure is None:
+        logger.warning("Graph Layout skipped, unknown Graph Format or Generated Graph without Step Links")
+        return None
+
+    graph_layout = layout_graph_structure(structure, config or GraphLayoutConfig())
+
+    for node_id, (x_coordinate, y_coordinate) in graph_layout.positions.items():
+        structure.nodes[node_id]["xCoordinate"] = x_coordinate
+        structure.nodes[node_id]["yCoordinate"] = y_coordinate
+
+    return graph_layout
+
+
+def layout_graph_structure(
+    structure: GraphStructure, config: GraphLayoutConfig
+) -> GraphLayout:
+    node_ids = structure.node_ids
+    if not node_ids:
+        return GraphLayout()
+
+    node_index = {node_id: index for index, node_id in enumerate(node_ids)}
+    successors = [
+        list(
+            dict.fromkeys(
+                node_index[successor_id]
+                for successor_id in structure.successors[node_id]
+                if successor_id != node_id
+            )
+        )
+        for node_id in node_ids
+    ]
+    entry_indices = [node_index[node_id] for node_id in structure.entry_nodes]
+
+    edges, reversed_edges = _remove_cycles(successors, entry_indices)
+    layers = _assign_layers(len(node_ids), edges)
+    layer_members, upper, lower = _insert_dummy_nodes(layers, edges)
+
+    crossings = _reduce_crossings(layer_members, upper, lower, config.ordering_sweeps)
+    x_coordinates = _assign_coordinates(
+        layer_members, upper, lower, config.node_spacing, config.coordinate_iterations
+    )
+
+    return GraphLayout(
+        positions={
+            node_id: (
+                int(round(x_coordinates[index])),
+                layers[index] * config.layer_spacing,
+            )
+            for index, node_id in enumerate(node_ids)
+        },
+        layer_count=len(layer_members),
+        crossings=crossings,
+        reversed_edges=[
+            (node_ids[source], node_ids[target]) for source, target in reversed_edges
+        ],
+    )
+
+
+def _remove_cycles(
+    successors: List[List[int]], entry_indices: List[int]
+) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+    """Iterative DFS from the Entry Nodes, Back Edges are reversed."""
+    node_count = len(successors)
+    # 0 = unvisited, 1 = on the DFS Stack, 2 = finished
+    state = [0] * node_count
+    edges: List[Tuple[int, int]] = []
+    reversed_edges: List[Tuple[int, int]] = []
+
+    for root in entry_indices + list(range(node_count)):
+        if state[root]:
+            continue
+
+        state[root] = 1
+        stack = [(root, 0)]
+
+        while stack:
+            node, successor_position = stack[-1]
+
+            if successor_position == len(successors[node]):
+                state[node] = 2
+                stack.pop()
+                continue
+
+            stack[-1] = (node, successor_position + 1)
+            successor = successors[node][successor_position]
+
+            if state[successor] == 1:
+                reversed_edges.append((node, successor))
+                edges.append((successor, node))
+                continue
+
+            edges.append((node, successor))
+            if state[successor] == 0:
+                state[successor] = 1
+                stack.append((successor, 0))
+
+    return list(dict.fromkeys(edges)), reversed_edges
+
+
+def _assign_layers(node_count: int, edges: List[Tuple[int, int]]) -> List[int]:
+    """Longest Path Layering over the Topological Order of the acyclic Graph."""
+    outgoing: List[List[int]] = [[] for _ in range(node_count)]
+    in_degree = [0] * node_count
+
+    for source, target in edges:
+        outgoing[source].append(target)
+        in_degree[target] += 1
+
+    layers = [0] * node_count
+    queue = [node for node in range(node_count) if in_degree[node] == 0]
+
+    for node in queue:
+        for target in outgoing[node]:
+            layers[target] = max(layers[target], layers[node] + 1)
+            in_degree[target] -= 1
+            if in_degree[target] == 0:
+                queue.append(target)
+
+    return layers
+
+
+def _insert_dummy_nodes(
+    layers: List[int], edges: List[Tuple[int, int]]
+) -> Tuple[List[List[int]], List[List[int]], List[List[int]]]:
+    """Splits long Edges, returns the Members of each Layer & the Neighbours in the adjacent Layers."""
+    node_layers = list(layers)
+    upper: List[List[int]] = [[] for _ in layers]
+    lower: List[List[int]] = [[] for _ in layers]
+
+    def add_node(layer: int) -> int:
+        node_layers.append(layer)
+        upper.append([])
+        lower.append([])
+        return len(node_layers) - 1
+
+    def connect(upper_node: int, lower_node: int) -> None:
+        lower[upper_node].append(lower_node)
+        upper[lower_node].append(upper_node)
+
+    # NOTE: Long Edges into the same Target share one Dummy Chain (Layer -> Dummy), so many
+    # Nodes feeding a shared Sink (e.g. an Escalation) add one Dummy per Layer, not per Edge
+    target_chains: Dict[int, Dict[int, int]] = {}
+
+    for source, target in edges:
+        chain = target_chains.setdefault(target, {})
+        previous = source
+        for layer in range(layers[source] + 1, layers[target]):
+            if layer in chain:
+                connect(previous, chain[layer])
+                break
+
+            dummy = add_node(layer)
+            chain[layer] = dummy
+            connect(previous, dummy)
+            previous = dummy
+        else:
+            connect(previous, target)
+
+    layer_members: List[List[int]] = [[] for _ in range(max(node_layers) + 1)]
+    for node, layer in enumerate(node_layers):
+        layer_members[layer].append(node)
+
+    return layer_members, upper, lower
+
+
+def _reduce_crossings(
+    layer_members: List[List[int]],
+    upper: List[List[int]],
+    lower: List[List[int]],
+    ordering_sweeps: int,
+) -> int:
+    """Barycentre Sweeps, Layer Members are reordered in place to the best Ordering found."""
+    positions = [0] * len(upper)
+    for members in layer_members:
+        for position, node in enumerate(members):
+            positions[node] = position
+
+    best_crossings = _count_crossings(layer_members, lower, positions)
+    best_ordering = [list(members) for members in layer_members]
+    sweeps_without_improvement = 0
+
+    for _ in range(ordering_sweeps):
+        if best_crossings == 0 or sweeps_without_improvement >= 2:
+            break
+
+        # Downward Sweep orders by the Upper Neighbours, Upward Sweep by the Lower ones
+        for layer in range(1, len(layer_members)):
+            _order_by_barycentre(layer_members[layer], upper, positions)
+        for layer in range(len(layer_members) - 2, -1, -1):
+            _order_by_barycentre(layer_members[layer], lower, positions)
+
+        crossings = _count_crossings(layer_members, lower, positions)
+        if crossings < best_crossings:
+            best_crossings = crossings
+            best_ordering = [list(members) for members in layer_members]
+            sweeps_without_improvement = 0
+        else:
+            sweeps_without_improvement += 1
+
+    layer_members[:] = best_ordering
+    return best_crossings
+
+
+def _order_by_barycentre(
+    members: List[int], neighbours: List[List[int]], positions: List[int]
+) -> None:
+    barycentres = {}
+    for node in members:
+        node_neighbours = neighbours[node]
+        barycentres[node] = (
+            sum(positions[neighbour] for neighbour in node_neighbours)
+            / len(node_neighbours)
+            if node_neighbours
+            # NOTE: Nodes without Neighbours keep their current Position
+            else positions[node]
+        )
+
+    # Stable Sort, Ties keep their previous relative Order
+    members.sort(key=barycentres.__getitem__)
+    for position, node in enumerate(members):
+        positions[node] = position
+
+
+def _count_crossings(
+    layer_members: List[List[int]], lower: List[List[int]], positions: List[int]
+) -> int:
+    """Counts Crossings between all neighbouring Layers in O(E log V) with a Fenwick Tree."""
+    crossings = 0
+
+    for layer in range(len(layer_members) - 1):
+        # Lower Positions of the Edges, ordered by their Upper & then Lower Position
+        lower_positions = [
+            lower_position
+            for node in layer_members[layer]
+            for lower_position in sorted(positions[target] for target in lower[node])
+        ]
+
+        tree_size = len(layer_members[layer + 1])
+        tree = [0] * (tree_size + 1)
+
+        for edge_count, lower_position in enumerate(lower_positions):
+            # Crossings are the previous Edges ending to the right of this one
+            index, ending_before = lower_position + 1, 0
+            while index > 0:
+                ending_before += tree[index]
+                index -= index & -index
+            crossings += edge_count - ending_before
+
+            index = lower_position + 1
+            while index <= tree_size:
+                tree[index] += 1
+                index += index & -index
+
+    return crossings
+
+
+def _assign_coordinates(
+    layer_members: List[List[int]],
+    upper: List[List[int]],
+    lower: List[List[int]],
+    node_spacing: int,
+    coordinate_iterations: int,
+) -> List[float]:
+    x_coordinates = [0.0] * len(upper)
+    widest_layer = max(len(members) for members in layer_members)
+
+    # Layers start centred on the widest Layer
+    for members in layer_members:
+        offset = (widest_layer - len(members)) * node_spacing / 2
+        for position, node in enumerate(members):
+            x_coordinates[node] = offset + position * node_spacing
+
+    for _ in range(coordinate_iterations):
+        for layer in range(1, len(layer_members)):
+            _place_layer(layer_members[layer], upper, x_coordinates, node_spacing)
+        for layer in range(len(layer_members) - 2, -1, -1):
+            _place_layer(layer_members[layer], lower, x_coordinates, node_spacing)
+
+    minimum_x = min(x_coordinates)
+    return [x_coordinate - minimum_x for x_coordinate in x_coordinates]
+
+
+def _place_layer(
+    members: List[int],
+    neighbours: List[List[int]],
+    x_coordinates: List[float],
+    node_spacing: int,
+) -> None:
+    """Moves each Node towards the Mean of its Neighbours, keeping Order & Spacing."""
+    desired = [
+        (
+            sum(x_coordinates[neighbour] for neighbour in neighbours[node])
+            / len(neighbours[node])
+            if neighbours[node]
+            else x_coordinates[node]
+        )
+        for node in members
+    ]
+
+    # NOTE: Mean of the leftmost & rightmost feasible Placement, both keep the Spacing
+    left_placement = list(desired)
+    for position in range(1, len(members)):
+        left_placement[position] = max(
+            left_placement[position], left_placement[position - 1] + node_spacing
+        )
+
+    right_placement = list(desired)
+    for position in range(len(members) - 2, -1, -1):
+        right_placement[position] = min(
+            right_placement[position], right_placement[position + 1] - node_spacing
+        )
+
+    for position, node in enumerate(members):
+        x_coordinates[node] = (left_placement[position] + right_placement[position]) / 2
@@ -0,0 +1,524 @@
+"""
+Level-of-Detail Mermaid Rendering
+
+Large Workflow Graphs can not be rendered by Mermaid in the Browser as one flat
+``graph TD``. Nodes are grouped into Clusters (by SOP Section, by Branch or by
+Dominator Region) and the Overview Diagram shows as many Clusters expanded as
+``subgraph`` Blocks as fit into the Node Budget, the others collapsed into a single
+Node. Each Cluster has its own Diagram, rendered on Demand & again with Level of
+Detail if it exceeds the Budget, so every rendered Diagram stays bounded.
+"""
+
+import logging
+import math
+from collections import Counter
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_display_utils import (
+    _escape_mermaid_text,
+    _generate_edge_definitions,
+    _generate_node_definitions,
+    _generate_styling_definitions,
+    generate_enhanced_mermaid_graph,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_criticality import (
+    analyze_structure_criticality,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_dominators import (
+    build_dominator_tree,
+    compute_immediate_dominators,
+    compute_subtree_sizes,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_structure import (
+    GraphStructure,
+    build_graph_structure,
+    get_graph_nodes,
+    is_agent_graph,
+)
+
+logger = logging.getLogger("app")
+
+DEFAULT_NODE_BUDGET = 100
+# Node Fields holding the SOP Section a Node was generated from
+SECTION_FIELDS = ["sop_section", "section", "phase"]
+UNREACHABLE_CLUSTER = "Unreachable"
+
+
+class ClusterStrategy(Enum):
+    AUTO = "auto"
+    SECTION = "section"
+    BRANCH = "branch"
+    DOMINATOR = "dominator"
+
+
+class MermaidCluster(BaseModel):
+    cluster_id: str
+    label: str
+    node_ids: List[str] = Field(default_factory=list)
+    # Whether the Cluster is shown expanded in the Overview Diagram
+    expanded: bool = False
+
+
+class MermaidLevelOfDetail(BaseModel):
+    strategy: ClusterStrategy
+    node_budget: int
+    overview_diagram: str
+    clusters: List[MermaidCluster] = Field(default_factory=list)
+
+    def get_cluster(self, cluster_id: str) -> Optional[MermaidCluster]:
+        return next(
+            (cluster for cluster in self.clusters if cluster.cluster_id == cluster_id), None
+        )
+
+
+def generate_level_of_detail_mermaid(
+    graph: Dict[str, Any],
+    node_budget: int = DEFAULT_NODE_BUDGET,
+    strategy: ClusterStrategy = ClusterStrategy.AUTO,
+) -> Optional[MermaidLevelOfDetail]:
+    """
+    Generates the Overview Diagram of a Graph within the Node Budget & its Clusters.
+
+    Graphs within the Budget are rendered flat. Returns None for unknown Graph Formats.
+    """
+    structure = build_graph_structure(graph)
+    if structure is None:
+        return None
+
+    strategy = _resolve_strategy(structure, strategy)
+    display_graph = _to_display_graph(graph, structure)
+
+    if len(structure.node_ids) <= node_budget:
+        return MermaidLevelOfDetail(
+            strategy=strategy,
+            node_budget=node_budget,
+            overview_diagram=generate_enhanced_mermaid_graph(display_graph),
+            clusters=[
+                MermaidCluster(
+                    cluster_id="cluster_0",
+                    label=display_graph.get("name") or "Graph",
+                    node_ids=list(structure.node_ids),
+                    expanded=True,
+                )
+            ],
+        )
+
+    clusters = _build_clusters(structure, strategy, node_budget)
+    _select_expanded_clusters(clusters, node_budget)
+
+    return MermaidLevelOfDetail(
+        strategy=strategy,
+        node_budget=node_budget,
+        overview_diagram=_render_overview(
+            display_graph,
+            structure,
+            clusters,
+            analyze_structure_criticality(structure).get_levels(),
+        ),
+        clusters=clusters,
+    )
+
+
+def generate_cluster_mermaid(
+    graph: Dict[str, Any], level_of_detail: MermaidLevelOfDetail, cluster_id: str
+) -> Optional[str]:
+    """
+    Renders the Diagram of a single Cluster on Demand, Edges leaving the Cluster point
+    to collapsed Nodes of the neighbouring Clusters. Clusters above the Node Budget
+    are rendered with Level of Detail again.
+    """
+    cluster = level_of_detail.get_cluster(cluster_id)
+    structure = build_graph_structure(graph)
+    if cluster is None or structure is None:
+        return None
+
+    display_graph = _to_display_graph(graph, structure)
+    cluster_node_ids = set(cluster.node_ids)
+
+    if len(cluster.node_ids) > level_of_detail.node_budget:
+        cluster_graph = {
+            "name": cluster.label,
+            "nodes": [
+                node for node in display_graph["nodes"] if node["id"] in cluster_node_ids
+            ],
+            "edges": [
+                edge
+                for edge in display_graph["edges"]
+                if edge["from"] in cluster_node_ids and edge["to"] in cluster_node_ids
+            ],
+        }
+        return generate_level_of_detail_mermaid(
+            cluster_graph,
+            node_budget=level_of_detail.node_budget,
+            strategy=level_of_detail.strategy,
+        ).overview_diagram
+
+    node_criticality = analyze_structure_criticality(structure).get_levels()
+    cluster_by_node = {
+        node_id: other_cluster
+        for other_cluster in level_of_detail.clusters
+        for node_id in other_cluster.node_ids
+    }
+
+    mermaid_lines = [
+        "graph TD",
+        f"    %% Cluster: {cluster.label}",
+        "",
+        f"    subgraph {cluster.cluster_id}[\"{_escape_mermaid_text(cluster.label)}\"]",
+    ]
+    cluster_nodes = [
+        node for node in display_graph["nodes"] if node["id"] in cluster_node_ids
+    ]
+    mermaid_lines.extend(_indent(_generate_node_definitions(cluster_nodes, node_criticality)))
+    mermaid_lines.append("    end")
+    mermaid_lines.append("")
+
+    internal_edges = [
+        edge
+        for edge in display_graph["edges"]
+        if edge["from"] in cluster_node_ids and edge["to"] in cluster_node_ids
+    ]
+    mermaid_lines.extend(_generate_edge_definitions(internal_edges))
+
+    # NOTE: Neighbouring Clusters are shown collapsed, Edges to them are aggregated
+    external_edges: Counter = Counter()
+    for edge in display_graph["edges"]:
+        source_inside = edge["from"] in cluster_node_ids
+        target_inside = edge["to"] in cluster_node_ids
+        if source_inside == target_inside:
+            continue
+
+        if source_inside and edge["to"] in cluster_by_node:
+            external_edges[(edge["from"], cluster_by_node[edge["to"]].cluster_id)] += 1
+        elif target_inside and edge["from"] in cluster_by_node:
+            external_edges[(cluster_by_node[edge["from"]].cluster_id, edge["to"])] += 1
+
+    neighbour_clusters = {
+        node_id
+        for edge in external_edges
+        for node_id in edge
+        if node_id not in cluster_node_ids
+    }
+    for neighbour_cluster_id in sorted(neighbour_clusters):
+        neighbour_cluster = level_of_detail.get_cluster(neighbour_cluster_id)
+        mermaid_lines.append(_collapsed_cluster_definition(neighbour_cluster))
+    for (source_id, target_id), edge_count in external_edges.items():
+        mermaid_lines.append(_aggregated_edge_definition(source_id, target_id, edge_count))
+
+    mermaid_lines.append("")
+    mermaid_lines.extend(_generate_styling_definitions(cluster_nodes, node_criticality))
+    mermaid_lines.append(
+        "    classDef collapsedStyle fill:#f3f4f6,stroke:#6b7280,stroke-dasharray: 4 4"
+    )
+    for neighbour_cluster_id in sorted(neighbour_clusters):
+        mermaid_lines.append(f"    class {neighbour_cluster_id} collapsedStyle")
+
+    return "\n".join(mermaid_lines)
+
+
+def _resolve_strategy(
+    structure: GraphStructure, strategy: ClusterStrategy
+) -> ClusterStrategy:
+    if strategy != ClusterStrategy.AUTO:
+        return strategy
+
+    nodes = structure.nodes.values()
+    if any(_get_section(node) for node in nodes):
+        return ClusterStrategy.SECTION
+    if any(node.get("branchName") for node in nodes):
+        return ClusterStrategy.BRANCH
+
+    return ClusterStrategy.DOMINATOR
+
+
+def _build_clusters(
+    structure: GraphStructure, strategy: ClusterStrategy, node_budget: int
+) -> List[MermaidCluster]:
+    node_order = _topological_order(structure)
+
+    if strategy == ClusterStrategy.SECTION:
+        cluster_keys = {
+            node_id: _get_section(structure.nodes[node_id]) or "Other"
+            for node_id in node_order
+        }
+    elif strategy == ClusterStrategy.BRANCH:
+        cluster_keys = _branch_cluster_keys(structure)
+    else:
+        cluster_keys = _dominator_cluster_keys(structure, node_budget)
+
+    # Clusters in Order of their first Node, oversized Clusters are split along the Order
+    grouped_node_ids: Dict[str, List[str]] = {}
+    for node_id in node_order:
+        grouped_node_ids.setdefault(
+            cluster_keys.get(node_id, UNREACHABLE_CLUSTER), []
+        ).append(node_id)
+
+    cluster_parts: List[Tuple[str, List[str]]] = []
+    for cluster_key, node_ids in grouped_node_ids.items():
+        part_count = math.ceil(len(node_ids) / node_budget)
+        for part in range(part_count):
+            part_label = (
+                f"{cluster_key} ({part + 1}/{part_count})" if part_count > 1 else cluster_key
+            )
+            cluster_parts.append(
+                (part_label, node_ids[part * node_budget : (part + 1) * node_budget])
+            )
+
+    # NOTE: More Clusters than the Budget allows are packed with their Neighbours
+    group_size = math.ceil(len(cluster_parts) / node_budget)
+    clusters = []
+    for group_start in range(0, len(cluster_parts), group_size):
+        group = cluster_parts[group_start : group_start + group_size]
+        clusters.append(
+            MermaidCluster(
+                cluster_id=f"cluster_{len(clusters)}",
+                label=" + ".join(label for label, _ in group),
+                node_ids=[node_id for _, node_ids in group for node_id in node_ids],
+            )
+        )
+
+    return clusters
+
+
+def _select_expanded_clusters(clusters: List[MermaidCluster], node_budget: int) -> None:
+    # Every collapsed Cluster costs one Node, expanding it costs its Size instead
+    remaining_budget = node_budget - len(clusters)
+
+    for cluster in sorted(clusters, key=lambda cluster: len(cluster.node_ids)):
+        expansion_cost = len(cluster.node_ids) - 1
+        if expansion_cost > remaining_budget:
+            break
+
+        cluster.expanded = True
+        remaining_budget -= expansion_cost
+
+
+def _render_overview(
+    display_graph: Dict[str, Any],
+    structure: GraphStructure,
+    clusters: List[MermaidCluster],
+    node_criticality: Dict[str, str],
+) -> str:
+    display_nodes = {node["id"]: node for node in display_graph["nodes"]}
+    # Expanded Nodes are drawn themselves, collapsed Nodes as their Cluster
+    rendered_id = {
+        node_id: node_id if cluster.expanded else cluster.cluster_id
+        for cluster in clusters
+        for node_id in cluster.node_ids
+    }
+
+    mermaid_lines = [
+        "graph TD",
+        "    %% Level of Detail Overview",
+        f"    %% Graph: {display_graph.get('name', 'Unnamed')}",
+        f"    %% Nodes: {len(structure.node_ids)}, Clusters: {len(clusters)}",
+        "",
+    ]
+
+    expanded_nodes = []
+    for cluster in clusters:
+        if not cluster.expanded:
+            mermaid_lines.append(_collapsed_cluster_definition(cluster))
+            continue
+
+        cluster_nodes = [display_nodes[node_id] for node_id in cluster.node_ids]
+        expanded_nodes.extend(cluster_nodes)
+        mermaid_lines.append(
+            f"    subgraph {cluster.cluster_id}[\"{_escape_mermaid_text(cluster.label)}\"]"
+        )
+        mermaid_lines.extend(
+            _indent(_generate_node_definitions(cluster_nodes, node_criticality))
+        )
+        mermaid_lines.append("    end")
+
+    mermaid_lines.append("")
+
+    detailed_edges = []
+    aggregated_edges: Counter = Counter()
+    for edge in display_graph["edges"]:
+        source_id = rendered_id.get(edge["from"])
+        target_id = rendered_id.get(edge["to"])
+        if source_id is None or target_id is None:
+            continue
+
+        if source_id == edge["from"] and target_id == edge["to"]:
+            detailed_edges.append(edge)
+        elif source_id != target_id:
+            aggregated_edges[(source_id, target_id)] += 1
+
+    mermaid_lines.extend(_generate_edge_definitions(detailed_edges))
+    for (source_id, target_id), edge_count in aggregated_edges.items():
+        mermaid_lines.append(_aggregated_edge_definition(source_id, target_id, edge_count))
+
+    mermaid_lines.append("")
+    mermaid_lines.extend(_generate_styling_definitions(expanded_nodes, node_criticality))
+
+    collapsed_clusters = [cluster for cluster in clusters if not cluster.expanded]
+    if collapsed_clusters:
+        mermaid_lines.append(
+            "    classDef collapsedStyle fill:#f3f4f6,stroke:#6b7280,stroke-dasharray: 4 4"
+        )
+        for cluster in collapsed_clusters:
+            mermaid_lines.append(f"    class {cluster.cluster_id} collapsedStyle")
+
+    return "\n".join(mermaid_lines)
+
+
+def _branch_cluster_keys(structure: GraphStructure) -> Dict[str, str]:
+    """Nodes belong to the Branch they were reached through, the Trunk forms its own Cluster."""
+    if any(node.get("branchName") for node in structure.nodes.values()):
+        cluster_keys = {}
+        # Nodes without a Branch Name inherit the Branch of their Dominator
+        immediate_dominators = compute_immediate_dominators(structure)
+        for node_id in _topological_order(structure):
+            branch_name = structure.nodes[node_id].get("branchName")
+            dominator_id = immediate_dominators.get(node_id)
+            cluster_keys[node_id] = branch_name or (
+                cluster_keys.get(dominator_id, "Main") if dominator_id else "Main"
+            )
+        return cluster_keys
+
+    immediate_dominators = compute_immediate_dominators(structure)
+    cluster_keys = {}
+
+    for node_id in _topological_order(structure):
+        if node_id not in immediate_dominators:
+            continue
+
+        dominator_id = immediate_dominators[node_id]
+        if dominator_id is None:
+            cluster_keys[node_id] = "Main"
+        elif len(structure.successors[dominator_id]) > 1:
+            # NOTE: A Node directly dominated by a Decision starts a new Branch
+            cluster_keys[node_id] = f"Branch {_node_name(structure, node_id)}"
+        else:
+            cluster_keys[node_id] = cluster_keys[dominator_id]
+
+    return cluster_keys
+
+
+def _dominator_cluster_keys(
+    structure: GraphStructure, node_budget: int
+) -> Dict[str, str]:
+    """Maximal Dominator Subtrees within the Budget form a Region, heavier Nodes form Chains."""
+    immediate_dominators = compute_immediate_dominators(structure)
+    dominator_tree = build_dominator_tree(immediate_dominators)
+
+    subtree_sizes = compute_subtree_sizes(dominator_tree)
+
+    cluster_keys: Dict[str, str] = {}
+    for node_id in _dominator_preorder(dominator_tree):
+        dominator_id = immediate_dominators[node_id]
+
+        if dominator_id is not None and subtree_sizes[dominator_id] <= node_budget:
+            # Inside a Region, the whole Subtree belongs to its Region Head
+            cluster_keys[node_id] = cluster_keys[dominator_id]
+        elif subtree_sizes[node_id] <= node_budget:
+            cluster_keys[node_id] = f"Region {_node_name(structure, node_id)}"
+        elif dominator_id is not None and len(
+            [
+                child_id
+                for child_id in dominator_tree[dominator_id]
+                if subtree_sizes[child_id] > node_budget
+            ]
+        ) == 1:
+            # NOTE: A single heavy Child continues the Chain of its Dominator
+            cluster_keys[node_id] = cluster_keys[dominator_id]
+        else:
+            cluster_keys[node_id] = f"Path {_node_name(structure, node_id)}"
+
+    return cluster_keys
+
+
+def _dominator_preorder(dominator_tree: Dict[Optional[str], List[str]]) -> List[str]:
+    preorder: List[str] = []
+    stack = list(reversed(dominator_tree[None]))
+
+    while stack:
+        node_id = stack.pop()
+        preorder.append(node_id)
+        stack.extend(reversed(dominator_tree[node_id]))
+
+    return preorder
+
+
+def _topological_order(structure: GraphStructure) -> List[str]:
+    """Breadth First Order from the Entry Nodes, followed by unreachable Nodes."""
+    visited = set(structure.entry_nodes)
+    order = list(structure.entry_nodes)
+
+    for node_id in order:
+        for successor_id in structure.successors[node_id]:
+            if successor_id not in visited:
+                visited.add(successor_id)
+                order.append(successor_id)
+
+    order.extend(node_id for node_id in structure.node_ids if node_id not in visited)
+    return order
+
+
+def _to_display_graph(graph: Dict[str, Any], structure: GraphStructure) -> Dict[str, Any]:
+    """Agent Graphs are converted to the Display Format used by the Mermaid Helpers."""
+    if not is_agent_graph(graph):
+        display_graph = graph["graph"] if isinstance(graph.get("graph"), dict) else graph
+        return {
+            **display_graph,
+            "nodes": get_graph_nodes(graph),
+            "edges": [
+                edge
+                for edge in display_graph.get("edges") or []
+                if edge.get("from") in structure.nodes and edge.get("to") in structure.nodes
+            ],
+        }
+
+    agent_graph = graph["graph"] if isinstance(graph.get("graph"), dict) else graph
+    return {
+        "name": agent_graph.get("name") or agent_graph.get("process_name"),
+        "nodes": [
+            {
+                "id": node_id,
+                "name": _node_name(structure, node_id),
+                "type": "trigger" if node_id in structure.entry_nodes else "process",
+            }
+            for node_id in structure.node_ids
+        ],
+        "edges": [
+            {
+                "from": node_id,
+                "to": child_id,
+                "condition": structure.nodes[child_id].get("condition") or {},
+            }
+            for node_id in structure.node_ids
+            for child_id in structure.successors[node_id]
+        ],
+    }
+
+
+def _node_name(structure: GraphStructure, node_id: str) -> str:
+    node = structure.nodes[node_id]
+    original_tool = (node.get("toolConfiguration") or {}).get("originalTool") or {}
+
+    return node.get("name") or original_tool.get("toolName") or node_id
+
+
+def _get_section(node: Dict[str, Any]) -> Optional[str]:
+    return next((node[field] for field in SECTION_FIELDS if node.get(field)), None)
+
+
+def _collapsed_cluster_definition(cluster: MermaidCluster) -> str:
+    label = _escape_mermaid_text(cluster.label)
+    return f"    {cluster.cluster_id}[[\"{label} · {len(cluster.node_ids)} nodes\"]]"
+
+
+def _aggregated_edge_definition(source_id: str, target_id: str, edge_count: int) -> str:
+    if edge_count > 1:
+        return f"    {source_id} ==>|{edge_count}| {target_id}"
+
+    return f"    {source_id} --> {target_id}"
+
+
+def _indent(definitions: List[str]) -> List[str]:
+    return [f"    {definition}" for definition in definitions]
@@ -0,0 +1,186 @@
+"""
+Graph Structure Adapter
+
+Reads the Workflow Graph Formats used by the Agent Setup into one adjacency
+Structure, so Layout, Validation & Analytics work on both:
+
+- Display Graphs: ``nodes`` with ``id``/``type`` & ``edges`` with ``from``/``to``
+- Agent Graphs: nested ``nodes`` holding their Child Ids in ``nodes``, with
+  ``isEntryNode``, ``isExitNode`` & ``parentAgentGraphNodeId``
+- Generated Graphs: the dumped ``GeneratedGraph`` of the Graph Generation, a
+  ``workflow_graph`` of Steps with ``node_id``, linked through the ``successors`` &
+  ``branches`` of the Steps. Generated Graphs without any Links have no Structure,
+  the Step Order is not taken for Edges.
+"""
+
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+
+# Fields of Generated Graph Steps holding the Ids of the following Steps
+GENERATED_STEP_LINK_FIELDS = ("successors", "branches")
+
+
+class GraphStructure(BaseModel):
+    node_ids: List[str] = Field(default_factory=list)
+    # Outgoing Edges per Node, only between known Nodes
+    successors: Dict[str, List[str]] = Field(default_factory=dict)
+    predecessors: Dict[str, List[str]] = Field(default_factory=dict)
+    entry_nodes: List[str] = Field(default_factory=list)
+    exit_nodes: List[str] = Field(default_factory=list)
+    # Edges pointing to Node Ids which are not part of the Graph
+    unknown_edges: List[Tuple[str, str]] = Field(default_factory=list)
+    # Source Node Dicts by Id, Layout Results are written back to them
+    nodes: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(successors) for successors in self.successors.values())
+
+
+def count_graph_elements(nodes: List[Dict[str, Any]], edge_count: int) -> Dict[str, Any]:
+    """Node, Edge & Node Type Counts shared by the Graph Summary & the Graph Analytics."""
+    return {
+        "total_nodes": len(nodes),
+        "total_edges": edge_count,
+        "complexity_ratio": edge_count / max(len(nodes), 1),
+        "node_types": dict(Counter(node.get("type", "unknown") for node in nodes)),
+    }
+
+
+def get_graph_nodes(graph: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """Returns the Node Dicts of a Graph, unwrapping persisted ``{"graph": {...}}`` Documents."""
+    if isinstance(graph.get("graph"), dict):
+        graph = graph["graph"]
+
+    nodes = graph.get("workflow_graph") if is_generated_graph(graph) else graph.get("nodes")
+    if not isinstance(nodes, list) or not all(isinstance(node, dict) for node in nodes):
+        return None
+
+    return nodes
+
+
+def is_generated_graph(graph: Dict[str, Any]) -> bool:
+    """Generated Graphs list their Steps under ``workflow_graph``, without an Edge List."""
+    graph = graph["graph"] if isinstance(graph.get("graph"), dict) else graph
+
+    return isinstance(graph.get("workflow_graph"), list)
+
+
+def is_agent_graph(graph: Dict[str, Any]) -> bool:
+    """Agent Graphs link Nodes through Child Id Lists instead of an Edge List."""
+    nodes = get_graph_nodes(graph) or []
+    graph = graph["graph"] if isinstance(graph.get("graph"), dict) else graph
+
+    return "edges" not in graph and any(
+        isinstance(node.get("nodes"), list) for node in nodes
+    )
+
+
+def build_graph_structure(graph: Dict[str, Any]) -> Optional[GraphStructure]:
+    """
+    Builds the Adjacency Structure of a Graph, returns None for unknown Formats &
+    Generated Graphs whose Steps declare no Links.
+    """
+    nodes = get_graph_nodes(graph)
+    if nodes is None:
+        return None
+
+    if is_generated_graph(graph):
+        edges = _get_generated_graph_edges(nodes)
+        if edges is None:
+            return None
+    elif is_agent_graph(graph):
+        edges = [
+            (node["id"], child_id)
+            for node in nodes
+            if node.get("id") is not None
+            for child_id in node.get("nodes") or []
+        ]
+    else:
+        graph = graph["graph"] if isinstance(graph.get("graph"), dict) else graph
+        edges = [
+            (edge.get("from"), edge.get("to"))
+            for edge in graph.get("edges") or []
+            if edge.get("from") and edge.get("to")
+        ]
+
+    structure = GraphStructure()
+
+    for node in nodes:
+        node_id = _get_node_id(node)
+        if node_id is None or node_id in structure.nodes:
+            continue
+
+        structure.node_ids.append(node_id)
+        structure.nodes[node_id] = node
+        structure.successors[node_id] = []
+        structure.predecessors[node_id] = []
+
+    for source_id, target_id in edges:
+        if source_id not in structure.nodes or target_id not in structure.nodes:
+            structure.unknown_edges.append((source_id, target_id))
+            continue
+
+        structure.successors[source_id].append(target_id)
+        structure.predecessors[target_id].append(source_id)
+
+    # NOTE: Explicit Markers take precedence, otherwise Sources start & Sinks end the Graph
+    structure.entry_nodes = _select_nodes(
+        structure, _is_marked_entry_node, structure.predecessors
+    )
+    structure.exit_nodes = _select_nodes(
+        structure, _is_marked_exit_node, structure.successors
+    )
+
+    return structure
+
+
+def _get_generated_graph_edges(
+    steps: List[Dict[str, Any]],
+) -> Optional[List[Tuple[str, str]]]:
+    """Edges of the Step Links, None if no Step declares ``successors`` or ``branches``."""
+    if not any(
+        isinstance(step.get(link_field), list)
+        for step in steps
+        for link_field in GENERATED_STEP_LINK_FIELDS
+    ):
+        return None
+
+    return [
+        (step["node_id"], target_id)
+        for step in steps
+        if step.get("node_id") is not None
+        for link_field in GENERATED_STEP_LINK_FIELDS
+        for link in step.get(link_field) or []
+        # Branches link to their Target Step, optionally with a Condition
+        if (target_id := link.get("node_id") if isinstance(link, dict) else link)
+    ]
+
+
+def _select_nodes(
+    structure: GraphStructure,
+    is_marked: Callable[[Dict[str, Any]], bool],
+    adjacency: Dict[str, List[str]],
+) -> List[str]:
+    marked_nodes = [
+        node_id for node_id in structure.node_ids if is_marked(structure.nodes[node_id])
+    ]
+    if marked_nodes:
+        return marked_nodes
+
+    return [node_id for node_id in structure.node_ids if not adjacency[node_id]]
+
+
+def _is_marked_entry_node(node: Dict[str, Any]) -> bool:
+    return bool(node.get("isEntryNode")) or node.get("type") == "trigger"
+
+
+def _is_marked_exit_node(node: Dict[str, Any]) -> bool:
+    return bool(node.get("isExitNode")) or node.get("type") == "end"
+
+
+def _get_node_id(node: Dict[str, Any]) -> Optional[str]:
+    return node.get("id") if "id" in node else node.get("node_id")
@@ -0,0 +1,222 @@
+"""
+Structural Graph Validation
+
+Checks generated Workflow Graphs for Structural Defects before the User opens them
+in the Editor: unreachable Nodes, Dead Ends, Edges to unknown Nodes, orphan Nodes &
+Entry Nodes which can not reach an Exit. One forward BFS from the Entry Nodes & one
+backward BFS from the Exit Nodes, so Validation is O(V+E) and cheap enough for every
+Graph Generation & for Batch Audits of stored Graphs.
+"""
+
+import logging
+from collections import deque
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from pydantic import BaseModel, Field
+
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_structure import (
+    GraphStructure,
+    build_graph_structure,
+)
+
+logger = logging.getLogger("app")
+
+
+class ValidationSeverity(Enum):
+    ERROR = "ERROR"
+    WARNING = "WARNING"
+    INFO = "INFO"
+
+
+class GraphValidationIssueType(Enum):
+    NO_ENTRY_NODE = "NO_ENTRY_NODE"
+    NO_EXIT_NODE = "NO_EXIT_NODE"
+    UNKNOWN_EDGE_TARGET = "UNKNOWN_EDGE_TARGET"
+    UNKNOWN_PARENT_NODE = "UNKNOWN_PARENT_NODE"
+    UNREACHABLE_NODE = "UNREACHABLE_NODE"
+    ENTRY_CANNOT_REACH_EXIT = "ENTRY_CANNOT_REACH_EXIT"
+    DEAD_END = "DEAD_END"
+    NO_PATH_TO_EXIT = "NO_PATH_TO_EXIT"
+    ORPHAN_NODE = "ORPHAN_NODE"
+
+
+ISSUE_SEVERITIES = {
+    GraphValidationIssueType.NO_ENTRY_NODE: ValidationSeverity.ERROR,
+    GraphValidationIssueType.NO_EXIT_NODE: ValidationSeverity.ERROR,
+    GraphValidationIssueType.UNKNOWN_EDGE_TARGET: ValidationSeverity.ERROR,
+    GraphValidationIssueType.UNKNOWN_PARENT_NODE: ValidationSeverity.ERROR,
+    GraphValidationIssueType.UNREACHABLE_NODE: ValidationSeverity.ERROR,
+    GraphValidationIssueType.ENTRY_CANNOT_REACH_EXIT: ValidationSeverity.ERROR,
+    GraphValidationIssueType.DEAD_END: ValidationSeverity.WARNING,
+    GraphValidationIssueType.NO_PATH_TO_EXIT: ValidationSeverity.WARNING,
+    GraphValidationIssueType.ORPHAN_NODE: ValidationSeverity.WARNING,
+}
+
+# Score Penalty per Issue Severity, the Score starts at 100
+SEVERITY_PENALTIES = {
+    ValidationSeverity.ERROR: 20,
+    ValidationSeverity.WARNING: 5,
+    ValidationSeverity.INFO: 0,
+}
+
+
+class GraphValidationIssue(BaseModel):
+    issue_type: GraphValidationIssueType
+    severity: ValidationSeverity
+    message: str
+    node_id: Optional[str] = None
+    # Target of the Edge for Edge Issues
+    target_id: Optional[str] = None
+
+
+class GraphValidationResult(BaseModel):
+    score: int = 100
+    node_count: int = 0
+    edge_count: int = 0
+    entry_nodes: List[str] = Field(default_factory=list)
+    exit_nodes: List[str] = Field(default_factory=list)
+    issues: List[GraphValidationIssue] = Field(default_factory=list)
+
+    @property
+    def is_valid(self) -> bool:
+        return not any(issue.severity == ValidationSeverity.ERROR for issue in self.issues)
+
+    def get_issues(self, issue_type: GraphValidationIssueType) -> List[GraphValidationIssue]:
+        return [issue for issue in self.issues if issue.issue_type == issue_type]
+
+
+def validate_workflow_graph(graph: Dict[str, Any]) -> Optional[GraphValidationResult]:
+    """Validates the Structure of a Graph Dict, returns None for unknown Graph Formats."""
+    structure = build_graph_structure(graph)
+    if structure is None:
+        return None
+
+    return validate_graph_structure(structure)
+
+
+def validate_workflow_graphs(
+    graphs: Iterable[Dict[str, Any]],
+) -> Iterable[Optional[GraphValidationResult]]:
+    """Lazily validates many Graphs, e.g. for Audits of all stored Agent Graphs."""
+    for graph in graphs:
+        yield validate_workflow_graph(graph)
+
+
+def validate_graph_structure(structure: GraphStructure) -> GraphValidationResult:
+    issues: List[GraphValidationIssue] = []
+
+    def add_issue(
+        issue_type: GraphValidationIssueType,
+        message: str,
+        node_id: Optional[str] = None,
+        target_id: Optional[str] = None,
+    ) -> None:
+        issues.append(
+            GraphValidationIssue(
+                issue_type=issue_type,
+                severity=ISSUE_SEVERITIES[issue_type],
+                message=message,
+                node_id=node_id,
+                target_id=target_id,
+            )
+        )
+
+    if structure.node_ids and not structure.entry_nodes:
+        add_issue(GraphValidationIssueType.NO_ENTRY_NODE, "Graph has no Entry Node")
+    if structure.node_ids and not structure.exit_nodes:
+        add_issue(GraphValidationIssueType.NO_EXIT_NODE, "Graph has no Exit Node")
+
+    for source_id, target_id in structure.unknown_edges:
+        add_issue(
+            GraphValidationIssueType.UNKNOWN_EDGE_TARGET,
+            f"Edge from '{source_id}' points to unknown Node '{target_id}'",
+            node_id=source_id,
+            target_id=target_id,
+        )
+
+    reachable_nodes = _breadth_first_search(structure.entry_nodes, structure.successors)
+    exit_reaching_nodes = _breadth_first_search(
+        structure.exit_nodes, structure.predecessors
+    )
+    exit_nodes = set(structure.exit_nodes)
+    entry_nodes = set(structure.entry_nodes)
+    is_single_node_graph = len(structure.node_ids) == 1
+
+    for node_id in structure.node_ids:
+        node = structure.nodes[node_id]
+        successors = structure.successors[node_id]
+        predecessors = structure.predecessors[node_id]
+
+        parent_id = node.get("parentAgentGraphNodeId")
+        if parent_id and parent_id not in structure.nodes:
+            add_issue(
+                GraphValidationIssueType.UNKNOWN_PARENT_NODE,
+                f"Node '{node_id}' has unknown Parent Node '{parent_id}'",
+                node_id=node_id,
+                target_id=parent_id,
+            )
+
+        # Nodes without any Edge are reported once, not as Entry, Exit & Dead End
+        if not successors and not predecessors and not is_single_node_graph:
+            add_issue(
+                GraphValidationIssueType.ORPHAN_NODE,
+                f"Node '{node_id}' is not connected to any other Node",
+                node_id=node_id,
+            )
+            continue
+
+        if node_id not in reachable_nodes:
+            add_issue(
+                GraphValidationIssueType.UNREACHABLE_NODE,
+                f"Node '{node_id}' can not be reached from any Entry Node",
+                node_id=node_id,
+            )
+
+        if node_id in exit_reaching_nodes:
+            continue
+
+        if node_id in entry_nodes:
+            add_issue(
+                GraphValidationIssueType.ENTRY_CANNOT_REACH_EXIT,
+                f"Entry Node '{node_id}' can not reach any Exit Node",
+                node_id=node_id,
+            )
+        elif not successors and node_id not in exit_nodes:
+            add_issue(
+                GraphValidationIssueType.DEAD_END,
+                f"Node '{node_id}' has no outgoing Edges but is not an Exit Node",
+                node_id=node_id,
+            )
+        else:
+            add_issue(
+                GraphValidationIssueType.NO_PATH_TO_EXIT,
+                f"Node '{node_id}' can not reach any Exit Node",
+                node_id=node_id,
+            )
+
+    score = 100 - sum(SEVERITY_PENALTIES[issue.severity] for issue in issues)
+
+    return GraphValidationResult(
+        score=max(score, 0),
+        node_count=len(structure.node_ids),
+        edge_count=structure.edge_count,
+        entry_nodes=structure.entry_nodes,
+        exit_nodes=structure.exit_nodes,
+        issues=issues,
+    )
+
+
+def _breadth_first_search(
+    start_nodes: List[str], adjacency: Dict[str, List[str]]
+) -> Set[str]:
+    visited = set(start_nodes)
+    queue = deque(start_nodes)
+
+    while queue:
+        for neighbour in adjacency[queue.popleft()]:
+            if neighbour not in visited:
+                visited.add(neighbour)
+                queue.append(neighbour)
+
+    return visited
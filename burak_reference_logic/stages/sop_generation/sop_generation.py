@@ -1,17 +1,26 @@
 import logging
+from typing import Awaitable, Callable, List, Optional
 
 from beam_ai_core.executor.core import execute_step
 from beam_ai_core.executor.pydantic_utils import get_output_format
-from beam_ai_core.llm.llms import LLM, LLMConfig
+from beam_ai_core.llm.llms import LLMConfig
 from beam_ai_core.tracing.langfuse import TraceConfig
 
 from app.lib.modules.agents.agent.agent import Agent
+from app.lib.modules.agents.agent_setup.models.agent_setup import AgentSetupStage
 from app.lib.modules.agents.agent_setup.stages.sop_generation.sop_generation_prompts import (
     sop_generation_prompt,
 )
 from app.lib.modules.agents.agent_setup.stages.sop_generation.sop_generation_pydantic import (
     GeneratedSOP,
 )
+from app.lib.modules.agents.agent_setup.stages.sop_generation.sop_streaming import (
+    SOPStreamHandler,
+)
+from app.lib.modules.agents.agent_setup.utils.llm_execution_policy import (
+    execute_with_policy,
+    get_stage_llm_policy,
+)
 from app.lib.modules.memory_v2.task_memory import AgentTaskMemory
 
 logger = logging.getLogger("app")
@@ -22,26 +31,50 @@ async def generate_sop(
     process_details: str,
     agent_memory: AgentTaskMemory,
     trace_config: TraceConfig,
+    streaming_handlers: Optional[List[Callable[[dict], Awaitable[None]]]] = None,
 ) -> str:
 
     # Set the Prompt Slug For Langfuse
     trace_config.prompt_slug = "SOPGeneration/v1"
 
     try:
-        # NOTE: Grab File Data If needed Here... + Streaming Somehow
-
-        generated_sop = await execute_step(
-            template=sop_generation_prompt,
-            input_data={
-                "agent_details": str(agent),
-                "process_details": process_details,
-                "output_format": get_output_format(GeneratedSOP),
-            },
-            llm_config=LLMConfig(force_select_model=LLM.GPT40.value),
-            response_type=GeneratedSOP,
-            trace_config=trace_config,
+        # NOTE: Grab File Data If needed Here...
+
+        # NOTE: Streaming Mode, Tokens are parsed incrementally & forwarded as SOP Text Chunks
+        sop_stream = SOPStreamHandler(streaming_handlers) if streaming_handlers else None
+        llm_attempts = []
+
+        async def _generate_sop(llm_config: LLMConfig) -> GeneratedSOP:
+            # Only the primary Request streams, Hedged & Fallback Requests run silently
+            stream_tokens = sop_stream is not None and not llm_attempts
+            llm_attempts.append(llm_config.force_select_model)
+
+            return await execute_step(
+                template=sop_generation_prompt,
+                input_data={
+                    "agent_details": str(agent),
+                    "process_details": process_details,
+                    "output_format": get_output_format(GeneratedSOP),
+                },
+                llm_config=llm_config,
+                response_type=GeneratedSOP,
+                trace_config=trace_config,
+                **(
+                    {"streaming_handlers": [sop_stream.on_chunk]}
+                    if stream_tokens
+                    else {}
+                ),
+            )
+
+        generated_sop = await execute_with_policy(
+            llm_call=_generate_sop,
+            policy=get_stage_llm_policy(AgentSetupStage.SOP_GENERATION),
         )
 
+        # The final SOP is always taken from the validated Response
+        if sop_stream:
+            await sop_stream.on_complete(generated_sop.standard_operating_procedure)
+
         return generated_sop.standard_operating_procedure
 
     except Exception as sop_generation_exc:
@@ -46,6 +46,7 @@ async def generate_agent_sop(
             process_details=agent_setup_session.process_instructions,
             agent_memory=agent_setup_state.agent_memory,
             trace_config=agent_setup_state.trace_config,
+            streaming_handlers=agent_setup_state.streaming_handlers,
         )
 
         agent_setup_session.agent_sop = generated_agent_sop
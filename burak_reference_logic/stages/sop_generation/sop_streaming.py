@@ -0,0 +1,247 @@
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.lib.modules.agents.agent_setup.models.agent_setup import AgentSetupStage
+
+logger = logging.getLogger("app")
+
+# Keys of the Token Text in LLM Streaming Chunks
+_CHUNK_TEXT_KEYS = ("content", "token", "text", "delta")
+
+_JSON_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class PartialJSONStringParser:
+    """
+    Incrementally parses a streamed JSON Object and yields the decoded Text of its
+    top level String Fields as soon as the Tokens arrive.
+    """
+
+    def __init__(self, fields: Optional[Set[str]] = None):
+        # Fields to emit, all String Fields are emitted if not set
+        self.fields = fields
+        self.values: Dict[str, str] = {}
+
+        self._state = "SEEK_OBJECT"
+        self._depth = 0
+        self._key: List[str] = []
+        self._current_key: Optional[str] = None
+        self._escape: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+        self._in_nested_string = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """Feeds a Token Chunk and returns the decoded (field, text) Deltas."""
+        deltas: List[Tuple[str, str]] = []
+        delta: List[str] = []
+
+        for char in chunk:
+            state = self._state
+
+            if state == "SEEK_OBJECT":
+                # Ignore Markdown Fences or Text before the JSON Object
+                if char == "{":
+                    self._state = "SEEK_KEY"
+
+            elif state == "SEEK_KEY":
+                if char == '"':
+                    self._key = []
+                    self._state = "IN_KEY"
+                elif char == "}":
+                    self._state = "DONE"
+
+            elif state == "IN_KEY":
+                if self._escape is not None:
+                    self._key.append(_JSON_ESCAPES.get(char, char))
+                    self._escape = None
+                elif char == "\\":
+                    self._escape = ""
+                elif char == '"':
+                    self._current_key = "".join(self._key)
+                    self._state = "SEEK_COLON"
+                else:
+                    self._key.append(char)
+
+            elif state == "SEEK_COLON":
+                if char == ":":
+                    self._state = "SEEK_VALUE"
+
+            elif state == "SEEK_VALUE":
+                if char == '"':
+                    self.values.setdefault(self._current_key, "")
+                    self._state = "IN_STRING"
+                elif char in "{[":
+                    self._depth = 1
+                    self._state = "IN_NESTED"
+                elif not char.isspace():
+                    self._state = "IN_LITERAL"
+
+            elif state == "IN_STRING":
+                text = self._read_string_char(char)
+                if text is None:
+                    # Closing Quote of the String Value
+                    self._flush(delta, deltas)
+                    self._state = "SEEK_KEY"
+                elif text:
+                    delta.append(text)
+
+            elif state == "IN_NESTED":
+                self._skip_nested_char(char)
+
+            elif state == "IN_LITERAL":
+                if char == ",":
+                    self._state = "SEEK_KEY"
+                elif char == "}":
+                    self._state = "DONE"
+
+        if self._state == "IN_STRING":
+            self._flush(delta, deltas)
+
+        return deltas
+
+    def _read_string_char(self, char: str) -> Optional[str]:
+        # Escape Sequences can be split across Token Chunks, so they are buffered
+        if self._escape is not None:
+            if not self._escape:
+                if char == "u":
+                    self._escape = "u"
+                    return ""
+                self._escape = None
+                return _JSON_ESCAPES.get(char, char)
+
+            self._escape += char
+            if len(self._escape) < 5:
+                return ""
+
+            code_point = int(self._escape[1:], 16)
+            self._escape = None
+
+            # Characters outside the BMP arrive as two escaped Surrogates
+            if 0xD800 <= code_point < 0xDC00:
+                self._high_surrogate = code_point
+                return ""
+            if 0xDC00 <= code_point < 0xE000 and self._high_surrogate:
+                code_point = 0x10000 + (
+                    (self._high_surrogate - 0xD800) << 10 | (code_point - 0xDC00)
+                )
+            self._high_surrogate = None
+
+            return chr(code_point)
+
+        if char == "\\":
+            self._escape = ""
+            return ""
+        if char == '"':
+            return None
+
+        return char
+
+    def _skip_nested_char(self, char: str) -> None:
+        if self._in_nested_string:
+            if self._escape is not None:
+                self._escape = None
+            elif char == "\\":
+                self._escape = ""
+            elif char == '"':
+                self._in_nested_string = False
+            return
+
+        if char == '"':
+            self._in_nested_string = True
+        elif char in "{[":
+            self._depth += 1
+        elif char in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                self._state = "SEEK_KEY"
+
+    def _flush(self, delta: List[str], deltas: List[Tuple[str, str]]) -> None:
+        if not delta:
+            return
+
+        text = "".join(delta)
+        delta.clear()
+
+        self.values[self._current_key] += text
+        if self.fields is None or self._current_key in self.fields:
+            deltas.append((self._current_key, text))
+
+
+class SOPStreamHandler:
+    """Forwards the streamed SOP Tokens as decoded Text Chunks to the Streaming Handlers."""
+
+    def __init__(self, streaming_handlers: List[Callable[[dict], Awaitable[None]]]):
+        self.streaming_handlers = streaming_handlers
+        self.parser = PartialJSONStringParser(
+            fields={"expert_reasoning", "standard_operating_procedure"}
+        )
+
+        self._start_time = time.perf_counter()
+        self.time_to_first_content: Optional[float] = None
+
+    async def on_chunk(self, chunk: Dict[str, Any]) -> None:
+        """Streaming Handler for ``execute_step``, forwards the Token Text of the Chunk."""
+        token = get_chunk_text(chunk)
+        if token:
+            await self.on_token(token)
+
+    async def on_token(self, token: str) -> None:
+        for field, content in self.parser.feed(token):
+            if self.time_to_first_content is None:
+                self.time_to_first_content = time.perf_counter() - self._start_time
+                logger.debug(
+                    f"SOP Generation || Time to First Content: {self.time_to_first_content:.3f}s"
+                )
+
+            await self.dispatch(
+                {
+                    "stage": AgentSetupStage.SOP_GENERATION.value,
+                    "type": "token",
+                    "field": field,
+                    "content": content,
+                }
+            )
+
+    async def on_complete(self, standard_operating_procedure: str) -> None:
+        await self.dispatch(
+            {
+                "stage": AgentSetupStage.SOP_GENERATION.value,
+                "type": "completed",
+                "field": "standard_operating_procedure",
+                "content": standard_operating_procedure,
+            }
+        )
+
+    async def dispatch(self, chunk: dict) -> None:
+        for streaming_handler in self.streaming_handlers:
+            try:
+                await streaming_handler(chunk)
+            except Exception as streaming_exc:
+                # A failing Streaming Handler must not fail the SOP Generation
+                logger.warning(f"SOP Streaming Handler failed: {streaming_exc}")
+
+
+def get_chunk_text(chunk: Any) -> Optional[str]:
+    """Returns the Token Text of a Streaming Chunk (Dict, Message Chunk or plain Text)."""
+    if isinstance(chunk, str):
+        return chunk
+
+    for key in _CHUNK_TEXT_KEYS:
+        value = chunk.get(key) if isinstance(chunk, dict) else getattr(chunk, key, None)
+        if isinstance(value, str):
+            return value
+        # Nested Deltas, e.g. {"delta": {"content": "..."}}
+        if isinstance(value, dict):
+            return get_chunk_text(value)
+
+    return None
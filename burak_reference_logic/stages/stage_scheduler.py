@@ -0,0 +1,273 @@
+import asyncio
+import logging
+from copy import deepcopy
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional
+
+from beam_ai_core.executor.errors import RateLimitExceededError
+from pydantic import BaseModel, Field
+
+from app.lib.modules.agents.agent_setup.models.agent_setup import (
+    AgentGraphCreationState,
+    AgentSetupStage,
+    AgentSetupState,
+    AgentSetupStatus,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_generation_handler import (
+    generate_agent_graph,
+)
+from app.lib.modules.agents.agent_setup.stages.sop_generation.sop_generation_handler import (
+    generate_agent_sop,
+)
+from app.lib.modules.agents.agent_setup.stages.tool_generation.tool_generation_handler import (
+    generate_agent_tools,
+)
+from app.lib.modules.agents.agent_setup.stages.tool_matching.tool_matching_handler import (
+    select_agent_tools,
+)
+from app.lib.modules.agents.agent_setup.utils.cancellation import run_cancellable
+from app.lib.modules.agents.agent_setup.utils.stage_deadlines import (
+    run_stage_with_deadline,
+)
+from app.lib.modules.graphs.graph_task_executor.models.node_interrupt import (
+    NodeInterrupt,
+)
+
+logger = logging.getLogger("app")
+
+
+class AgentSetupStageDefinition(BaseModel):
+    stage: AgentSetupStage
+    handler: Callable[[AgentGraphCreationState], Awaitable[AgentGraphCreationState]]
+    # AgentSetupSession Fields read by the Stage
+    inputs: List[str] = Field(default_factory=list)
+    # AgentSetupSession Fields written by the Stage
+    outputs: List[str] = Field(default_factory=list)
+
+
+# NOTE: Stages are listed in Pipeline Order, Independent Neighbouring Stages run Concurrently
+AGENT_SETUP_STAGES: List[AgentSetupStageDefinition] = [
+    AgentSetupStageDefinition(
+        stage=AgentSetupStage.SOP_GENERATION,
+        handler=generate_agent_sop,
+        inputs=["agent", "process_instructions"],
+        outputs=["agent_sop"],
+    ),
+    AgentSetupStageDefinition(
+        stage=AgentSetupStage.GRAPH_GENERATION,
+        handler=generate_agent_graph,
+        inputs=["agent", "agent_sop"],
+        outputs=["generated_graph", "graph_layout"],
+    ),
+    AgentSetupStageDefinition(
+        stage=AgentSetupStage.TOOL_MATCHING,
+        handler=select_agent_tools,
+        inputs=["agent", "generated_graph"],
+        outputs=["integration_tools"],
+    ),
+    AgentSetupStageDefinition(
+        stage=AgentSetupStage.TOOL_GENERATION,
+        handler=generate_agent_tools,
+        inputs=["generated_graph"],
+        outputs=["custom_tools"],
+    ),
+]
+
+
+def get_stage_definition(stage: AgentSetupStage) -> Optional[AgentSetupStageDefinition]:
+    return next(
+        (definition for definition in AGENT_SETUP_STAGES if definition.stage == stage),
+        None,
+    )
+
+
+def get_runnable_stages(stage: AgentSetupStage) -> List[AgentSetupStageDefinition]:
+    """Returns the given Stage and all following Stages which do not depend on each other."""
+    stage_index = next(
+        (
+            index
+            for index, definition in enumerate(AGENT_SETUP_STAGES)
+            if definition.stage == stage
+        ),
+        None,
+    )
+
+    # Stages without Definition (e.g. CONNECT_INTEGRATIONS) are not executed by the Pipeline
+    if stage_index is None:
+        return []
+
+    runnable_stages = [AGENT_SETUP_STAGES[stage_index]]
+    written_fields = set(AGENT_SETUP_STAGES[stage_index].outputs)
+    read_fields = set(AGENT_SETUP_STAGES[stage_index].inputs)
+
+    for definition in AGENT_SETUP_STAGES[stage_index + 1 :]:
+        # Stop at the first Stage reading or overwriting the Outputs of the current Batch
+        if written_fields & (set(definition.inputs) | set(definition.outputs)):
+            break
+        if read_fields & set(definition.outputs):
+            break
+
+        runnable_stages.append(definition)
+        written_fields.update(definition.outputs)
+        read_fields.update(definition.inputs)
+
+    return runnable_stages
+
+
+def get_pending_stages(setup_state: AgentSetupState) -> List[AgentSetupStageDefinition]:
+    """Runnable Stages from the next Stage, without the finished Stages of an interrupted Batch."""
+    return [
+        definition
+        for definition in get_runnable_stages(setup_state.next)
+        if definition.stage not in setup_state.finished_stages
+    ]
+
+
+def clear_finished_stages(setup_state: AgentSetupState) -> None:
+    setup_state.finished_stages = []
+    setup_state.finished_next = None
+    setup_state.finished_status = None
+
+
+async def run_stage(
+    definition: AgentSetupStageDefinition, agent_setup_state: AgentGraphCreationState
+) -> AgentGraphCreationState:
+    """Runs a Stage within its Deadline, as a Task cancelled with the Session."""
+    return await run_cancellable(
+        run_stage_with_deadline(definition.stage, definition.handler, agent_setup_state),
+        cancel_token=agent_setup_state.cancel_token,
+    )
+
+
+def _fork_stage_state(
+    agent_setup_state: AgentGraphCreationState, definition: AgentSetupStageDefinition
+) -> AgentGraphCreationState:
+    agent_setup_session = agent_setup_state.agent_setup_session
+
+    # Each Concurrent Stage records its Transitions in its own Setup State
+    # NOTE: Written Fields are deep-copied, so in-place Writes of a Stage stay in its Fork
+    stage_session = agent_setup_session.model_copy(
+        update={
+            "setup_state": AgentSetupState(next=definition.stage, stages=[]),
+            **{
+                output_field: deepcopy(getattr(agent_setup_session, output_field))
+                for output_field in definition.outputs
+            },
+        }
+    )
+
+    return agent_setup_state.model_copy(update={"agent_setup_session": stage_session})
+
+
+async def run_concurrent_stages(
+    agent_setup_state: AgentGraphCreationState,
+    stage_definitions: List[AgentSetupStageDefinition],
+) -> AgentGraphCreationState:
+    agent_setup_session = agent_setup_state.agent_setup_session
+    setup_state = agent_setup_session.setup_state
+    last_definition = stage_definitions[-1]
+
+    # NOTE: A resumed Batch only runs the Stages which did not finish before
+    finished_stages = [
+        definition.stage
+        for definition in stage_definitions
+        if definition.stage in setup_state.finished_stages
+    ]
+    stage_definitions = [
+        definition
+        for definition in stage_definitions
+        if definition.stage not in finished_stages
+    ]
+
+    logger.info(
+        f"Running Agent Setup Stages Concurrently: {[definition.stage.value for definition in stage_definitions]}, already finished: {[stage.value for stage in finished_stages]}"
+    )
+
+    stage_states = [
+        _fork_stage_state(agent_setup_state, definition)
+        for definition in stage_definitions
+    ]
+
+    stage_results = await asyncio.gather(
+        *[
+            run_stage(definition, stage_state)
+            for definition, stage_state in zip(stage_definitions, stage_states)
+        ],
+        return_exceptions=True,
+    )
+
+    failed_stage_state: Optional[AgentGraphCreationState] = None
+    unfinished_stage: Optional[AgentSetupStage] = None
+    stage_exception: Optional[BaseException] = None
+
+    # NOTE: Merge the declared Outputs & Stage History back into the Agent Setup Session
+    for definition, stage_state, stage_result in zip(
+        stage_definitions, stage_states, stage_results
+    ):
+        stage_session = stage_state.agent_setup_session
+        agent_setup_session.setup_state.stages.extend(stage_session.setup_state.stages)
+
+        stage_failed = (
+            isinstance(stage_result, BaseException)
+            or stage_session.status == AgentSetupStatus.FAILED
+        )
+
+        if stage_failed:
+            unfinished_stage = unfinished_stage or definition.stage
+
+            if stage_session.status == AgentSetupStatus.FAILED:
+                failed_stage_state = failed_stage_state or stage_state
+
+            # Rate Limits take precedence, as they are handled separately by the Pipeline
+            if isinstance(stage_result, RateLimitExceededError) or (
+                isinstance(stage_result, BaseException)
+                and not isinstance(stage_result, NodeInterrupt)
+                and stage_exception is None
+            ):
+                stage_exception = stage_result
+            continue
+
+        for output_field in definition.outputs:
+            setattr(agent_setup_session, output_field, getattr(stage_session, output_field))
+
+        finished_stages.append(definition.stage)
+        # The Transition of the last Stage is kept for the Resume of the Batch
+        if definition.stage == last_definition.stage:
+            setup_state.finished_next = stage_session.setup_state.next
+            setup_state.finished_status = stage_session.status
+
+    # Failed Stages are resumed from the first Stage which did not finish, finished Siblings are skipped
+    if unfinished_stage:
+        setup_state.next = unfinished_stage
+        setup_state.finished_stages = finished_stages
+
+        if failed_stage_state:
+            agent_setup_session.status = AgentSetupStatus.FAILED
+            agent_setup_session.end_time = (
+                failed_stage_state.agent_setup_session.end_time
+            )
+
+        if stage_exception:
+            raise stage_exception
+
+        raise NodeInterrupt(value=agent_setup_state)
+
+    # The last Stage of the Batch decides on the following Stage & Status
+    if stage_definitions and stage_definitions[-1].stage == last_definition.stage:
+        last_stage_session = stage_states[-1].agent_setup_session
+        setup_state.next = last_stage_session.setup_state.next
+        agent_setup_session.status = last_stage_session.status
+        agent_setup_session.end_time = last_stage_session.end_time
+    else:
+        # NOTE: The last Stage finished before the Resume, the Batch ends now with its Transition
+        setup_state.next = setup_state.finished_next
+        agent_setup_session.status = setup_state.finished_status
+        agent_setup_session.end_time = (
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if setup_state.finished_status == AgentSetupStatus.COMPLETED
+            else None
+        )
+
+    clear_finished_stages(setup_state)
+
+    return agent_setup_state
@@ -0,0 +1,231 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from app.lib.modules.agents.agent_setup.utils.text_embedding import LSHIndex, embed_text
+
+logger = logging.getLogger("app")
+
+
+class StoredCustomTool(BaseModel):
+    # Same Fields as the Tools created by create_custom_tool_prompt
+    title: str
+    tool_description: str
+    short_description: Optional[str] = None
+    prompt: Optional[str] = None
+
+
+class CustomToolTask(BaseModel):
+    # Task Prompt the Tool is created from
+    task: str
+    action_type: str
+    node_objective: str
+
+    @property
+    def embedding_text(self) -> str:
+        # NOTE: The shared Prompt Template & Context would make Tasks with different
+        # Actions look alike, only the Action Type & Objective are embedded
+        return f"{self.action_type} {self.node_objective}"
+
+
+class CustomToolMatch(BaseModel):
+    task: str
+    tool: StoredCustomTool
+    similarity: float
+    # Row Id of the stored Tool
+    item_id: Optional[int] = None
+
+
+class CustomToolLibrary:
+    """
+    Persistent Library of generated Custom Tools, shared across Agent Setup Sessions.
+
+    Tools are stored in SQLite with the Embedding of their Task, the Index is kept in Memory
+    per Action Type, so only Tools of the same Action Type are reused. Building the Index,
+    Embedding & SQLite Queries run in a Worker Thread, never on the Event Loop. Reuse Counts
+    are written once per Lookup Batch.
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        reuse_threshold: float = 0.92,
+        embedder: Callable[[str], List[float]] = embed_text,
+    ):
+        self.reuse_threshold = reuse_threshold
+        self.embedder = embedder
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(database_path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS custom_tools (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_hash TEXT UNIQUE NOT NULL,
+                task TEXT NOT NULL,
+                action_type TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                title TEXT NOT NULL,
+                tool_description TEXT NOT NULL,
+                short_description TEXT,
+                prompt TEXT,
+                reuse_count INTEGER NOT NULL DEFAULT 0,
+                created_at TEXT NOT NULL
+            )
+            """
+        )
+        self._connection.commit()
+
+        # Indexes by Action Type
+        self._indexes: Optional[Dict[str, LSHIndex]] = None
+
+    async def load(self) -> None:
+        """Builds the Indexes ahead of the first Lookup, e.g. at Worker Startup."""
+        await asyncio.to_thread(self._locked, self._load_indexes)
+
+    async def lookup(self, task: CustomToolTask) -> Optional[CustomToolMatch]:
+        return (await self.lookup_many([task]))[0]
+
+    async def lookup_many(
+        self, tasks: Sequence[CustomToolTask]
+    ) -> List[Optional[CustomToolMatch]]:
+        """Returns the reusable Tool of each Task, or None if no stored Tool is similar enough."""
+        if not tasks:
+            return []
+
+        return await asyncio.to_thread(self._locked, self._lookup_many, tasks)
+
+    async def add(self, task: CustomToolTask, tool: Any) -> None:
+        await self.add_many([(task, tool)])
+
+    async def add_many(self, task_tools: Sequence[Tuple[CustomToolTask, Any]]) -> None:
+        """Stores generated Tools by their Task, Tasks already in the Library are ignored."""
+        if not task_tools:
+            return
+
+        await asyncio.to_thread(self._locked, self._add_many, task_tools)
+
+    def _locked(self, function: Callable, *args: Any) -> Any:
+        with self._lock:
+            return function(*args)
+
+    def _load_indexes(self) -> Dict[str, LSHIndex]:
+        if self._indexes is None:
+            indexes: Dict[str, LSHIndex] = {}
+            for item_id, action_type, embedding in self._connection.execute(
+                "SELECT id, action_type, embedding FROM custom_tools"
+            ):
+                _get_index(indexes, action_type).add(item_id, array("f", embedding).tolist())
+            self._indexes = indexes
+
+        return self._indexes
+
+    def _lookup_many(
+        self, tasks: Sequence[CustomToolTask]
+    ) -> List[Optional[CustomToolMatch]]:
+        indexes = self._load_indexes()
+        matches: List[Optional[CustomToolMatch]] = []
+
+        for task in tasks:
+            index = indexes.get(task.action_type)
+            nearest_tools = (
+                index.query(self.embedder(task.embedding_text), top_k=1) if index else []
+            )
+
+            if not nearest_tools or nearest_tools[0][1] < self.reuse_threshold:
+                matches.append(None)
+                continue
+
+            item_id, similarity = nearest_tools[0]
+            stored_task, title, tool_description, short_description, prompt = (
+                self._connection.execute(
+                    "SELECT task, title, tool_description, short_description, prompt "
+                    "FROM custom_tools WHERE id = ?",
+                    (item_id,),
+                ).fetchone()
+            )
+            matches.append(
+                CustomToolMatch(
+                    task=stored_task,
+                    similarity=similarity,
+                    item_id=item_id,
+                    tool=StoredCustomTool(
+                        title=title,
+                        tool_description=tool_description,
+                        short_description=short_description,
+                        prompt=prompt,
+                    ),
+                )
+            )
+
+        # NOTE: Reuse Counts of the whole Batch are written in one Transaction
+        reused_ids = [(match.item_id,) for match in matches if match]
+        if reused_ids:
+            self._connection.executemany(
+                "UPDATE custom_tools SET reuse_count = reuse_count + 1 WHERE id = ?",
+                reused_ids,
+            )
+            self._connection.commit()
+
+        return matches
+
+    def _add_many(self, task_tools: Sequence[Tuple[CustomToolTask, Any]]) -> None:
+        indexes = self._load_indexes()
+        added_tools: List[Tuple[str, int, List[float]]] = []
+
+        for task, tool in task_tools:
+            embedding = self.embedder(task.embedding_text)
+            cursor = self._connection.execute(
+                "INSERT OR IGNORE INTO custom_tools "
+                "(task_hash, task, action_type, embedding, title, tool_description, short_description, prompt, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    hashlib.sha256(task.task.encode("utf-8")).hexdigest(),
+                    task.task,
+                    task.action_type,
+                    array("f", embedding).tobytes(),
+                    tool.title,
+                    tool.tool_description,
+                    tool.short_description,
+                    tool.prompt,
+                    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                ),
+            )
+            if cursor.rowcount:
+                added_tools.append((task.action_type, cursor.lastrowid, embedding))
+
+        self._connection.commit()
+
+        # Indexed after the Commit, so Lookups never return uncommitted Tools
+        for action_type, item_id, embedding in added_tools:
+            _get_index(indexes, action_type).add(item_id, embedding)
+
+
+def _get_index(indexes: Dict[str, LSHIndex], action_type: str) -> LSHIndex:
+    # NOTE: Created on Demand, building the Hyperplanes of an Index is expensive
+    if action_type not in indexes:
+        indexes[action_type] = LSHIndex()
+
+    return indexes[action_type]
+
+
+_custom_tool_library: Optional[CustomToolLibrary] = None
+
+
+def get_custom_tool_library() -> Optional[CustomToolLibrary]:
+    """Returns the shared Library, only enabled if AGENT_SETUP_TOOL_LIBRARY_PATH is set."""
+    global _custom_tool_library
+
+    database_path = os.environ.get("AGENT_SETUP_TOOL_LIBRARY_PATH")
+    if _custom_tool_library is None and database_path:
+        _custom_tool_library = CustomToolLibrary(database_path=database_path)
+
+    return _custom_tool_library
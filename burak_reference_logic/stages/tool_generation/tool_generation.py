@@ -1,10 +1,42 @@
-import asyncio
+import json
 import logging
-from typing import List
+import re
+from functools import partial
+from typing import Dict, List, Optional
 
+from beam_ai_core.executor.core import execute_step
+from beam_ai_core.executor.errors import RateLimitExceededError
+from beam_ai_core.executor.pydantic_utils import get_output_format
+from beam_ai_core.llm.llms import LLMConfig
 from beam_ai_core.tracing.langfuse import TraceConfig
 
-from app.lib.modules.agents.agent_setup.models.agent_setup import AgentGraphTool
+from app.lib.modules.agents.agent_setup.models.agent_setup import (
+    AgentGraphTool,
+    AgentSetupStage,
+)
+from app.lib.modules.agents.agent_setup.stages.tool_generation.custom_tool_library import (
+    CustomToolLibrary,
+    CustomToolTask,
+)
+from app.lib.modules.agents.agent_setup.stages.tool_generation.tool_generation_prompts import (
+    tool_generation_prompt,
+)
+from app.lib.modules.agents.agent_setup.stages.tool_generation.tool_generation_pydantic import (
+    GeneratedCustomTool,
+    GeneratedCustomTools,
+)
+from app.lib.modules.agents.agent_setup.utils.cancellation import (
+    CancelToken,
+    gather_cancellable,
+)
+from app.lib.modules.agents.agent_setup.utils.llm_execution_policy import (
+    execute_with_policy,
+    get_stage_llm_policy,
+)
+from app.lib.modules.agents.agent_setup.utils.singleflight import (
+    custom_tool_flight,
+    make_request_key,
+)
 from app.lib.modules.graphs.agent_graph.graph_creation.strategies.multi_node.generate_graph_pydantic import (
     GeneratedGraph,
 )
@@ -14,11 +46,221 @@ from app.lib.modules.tools.custom_tool.custom_tool_creator.custom_tool_creator i
 
 logger = logging.getLogger("app")
 
+# NOTE: Token Budget of one batched Tool Generation Request
+TOOL_BATCH_MAX_INPUT_TOKENS = 6000
+TOOL_BATCH_MAX_OUTPUT_TOKENS = 12000
+# Generated Tools are mostly their Prompt, estimated Output Tokens per Tool
+TOOL_BATCH_OUTPUT_TOKENS_PER_TOOL = 1200
+DEFAULT_TOOL_BATCH_SIZE = 8
+
+
+def build_tool_task(node) -> str:
+    return f"Prompt Type: {node.action_type}\n Main objective: {node.node_objective}. \n Required Context: {node.node_context}"
+
+
+def normalize_task_key(node) -> str:
+    task_text = f"{node.action_type} {node.node_objective} {node.node_context or ''}"
+
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", task_text.lower()).split())
+
+
+def _task_similarity(task_key: str, other_task_key: str) -> float:
+    # Jaccard Similarity over the Words of the normalized Tasks
+    task_words, other_task_words = set(task_key.split()), set(other_task_key.split())
+    if not task_words or not other_task_words:
+        return 0.0
+
+    return len(task_words & other_task_words) / len(task_words | other_task_words)
+
+
+def group_prompt_nodes(
+    prompt_nodes: List, similarity_threshold: Optional[float] = None
+) -> List[List]:
+    """
+    Groups equivalent Prompt Nodes by their normalized Task.
+
+    Nodes with the same normalized Task are always grouped. With a Similarity Threshold,
+    Nodes of the same Action Type with near-duplicate Tasks are grouped as well.
+    """
+    grouped_nodes: Dict[str, List] = {}
+
+    for node in prompt_nodes:
+        task_key = normalize_task_key(node)
+
+        if task_key not in grouped_nodes and similarity_threshold is not None:
+            task_key = next(
+                (
+                    group_key
+                    for group_key, group in grouped_nodes.items()
+                    if group[0].action_type == node.action_type
+                    and _task_similarity(task_key, group_key) >= similarity_threshold
+                ),
+                task_key,
+            )
+
+        grouped_nodes.setdefault(task_key, []).append(node)
+
+    return list(grouped_nodes.values())
+
+
+async def create_node_tool(task: str, trace_config: TraceConfig):
+    # NOTE: Identical concurrent Tasks across Sessions share one LLM Request
+    # create_custom_tool_prompt selects its own Model, it takes no LLM Config of an Execution Policy
+    return await custom_tool_flight.do(
+        make_request_key(task),
+        partial(create_custom_tool_prompt, task=task, trace_config=trace_config),
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough Estimate of ~4 Characters per Token, no Tokenizer needed for Budgeting
+    return len(text) // 4 + 1
+
+
+def split_tool_tasks(tool_tasks: List[str], max_batch_size: int) -> List[List[int]]:
+    """
+    Packs the Indices of Tool Tasks into Batches for batched Generation.
+
+    The Batch Size K adapts to the Token Budget: a Batch holds at most as many Tasks as
+    their Tools fit into the Output Budget, and as their Texts fit into the Input Budget.
+    """
+    batch_size = max(
+        1,
+        min(max_batch_size, TOOL_BATCH_MAX_OUTPUT_TOKENS // TOOL_BATCH_OUTPUT_TOKENS_PER_TOOL),
+    )
+
+    batches: List[List[int]] = []
+    batch_tokens = 0
+    for task_index, task in enumerate(tool_tasks):
+        task_tokens = estimate_tokens(task)
+
+        if (
+            not batches
+            or len(batches[-1]) >= batch_size
+            or batch_tokens + task_tokens > TOOL_BATCH_MAX_INPUT_TOKENS
+        ):
+            batches.append([])
+            batch_tokens = 0
+
+        batches[-1].append(task_index)
+        batch_tokens += task_tokens
+
+    return batches
+
+
+async def generate_tool_batch(
+    tasks: List[str], trace_config: TraceConfig
+) -> Dict[int, GeneratedCustomTool]:
+    """Generates the Tools of several Tasks in one structured Request, by Task Index."""
+    tool_tasks = json.dumps(
+        [{"task_id": str(task_index), "task": task} for task_index, task in enumerate(tasks)],
+        indent=2,
+    )
+
+    async def _generate_tools(llm_config: LLMConfig) -> GeneratedCustomTools:
+        return await execute_step(
+            template=tool_generation_prompt,
+            input_data={
+                "tool_tasks": tool_tasks,
+                "output_format": get_output_format(GeneratedCustomTools),
+            },
+            llm_config=llm_config,
+            response_type=GeneratedCustomTools,
+            trace_config=trace_config,
+        )
+
+    generated_tools = await execute_with_policy(
+        llm_call=_generate_tools,
+        policy=get_stage_llm_policy(AgentSetupStage.TOOL_GENERATION),
+    )
+
+    # NOTE: Unknown or duplicate Task Ids are dropped, their Tasks count as missing
+    tools_by_index: Dict[int, GeneratedCustomTool] = {}
+    for tool in generated_tools.tools:
+        task_id = tool.task_id.strip()
+        if task_id.isdigit() and int(task_id) < len(tasks):
+            tools_by_index.setdefault(int(task_id), tool)
+
+    return tools_by_index
+
+
+async def create_node_tools(
+    tasks: List[str],
+    trace_config: TraceConfig,
+    max_batch_size: int = DEFAULT_TOOL_BATCH_SIZE,
+    cancel_token: Optional[CancelToken] = None,
+) -> List:
+    """
+    Generates the Tools of all Tasks with batched Requests of up to K Tasks each.
+
+    Tasks missing from a Response (or of a failed Batch) are re-split into two halves
+    & retried, single Tasks fall back to the per-Task Generation. Failed Tasks are
+    returned as their Exception.
+    """
+    # Set the Prompt Slug For Langfuse
+    trace_config.prompt_slug = "BatchedToolGeneration/v1"
+
+    created_tools: List = [None] * len(tasks)
+
+    async def _create_batch(task_indices: List[int]) -> None:
+        if len(task_indices) == 1:
+            try:
+                created_tools[task_indices[0]] = await create_node_tool(
+                    task=tasks[task_indices[0]], trace_config=trace_config
+                )
+            except RateLimitExceededError:
+                raise
+            except Exception as tool_generation_exc:
+                created_tools[task_indices[0]] = tool_generation_exc
+            return
+
+        try:
+            batch_tools = await generate_tool_batch(
+                [tasks[task_index] for task_index in task_indices], trace_config
+            )
+        except RateLimitExceededError:
+            raise
+        except Exception as batch_generation_exc:
+            logger.warning(
+                f"Batched Tool Generation failed for {len(task_indices)} Tasks: {batch_generation_exc}"
+            )
+            batch_tools = {}
+
+        missing_indices = []
+        for batch_index, task_index in enumerate(task_indices):
+            if batch_index in batch_tools:
+                created_tools[task_index] = batch_tools[batch_index]
+            else:
+                missing_indices.append(task_index)
+
+        if missing_indices:
+            logger.debug(f"Re-splitting {len(missing_indices)} missing Tools of a Batch")
+            half = (len(missing_indices) + 1) // 2
+            await gather_cancellable(
+                *[
+                    _create_batch(missing_half)
+                    for missing_half in (missing_indices[:half], missing_indices[half:])
+                    if missing_half
+                ],
+                cancel_token=cancel_token,
+            )
+
+    await gather_cancellable(
+        *[_create_batch(batch) for batch in split_tool_tasks(tasks, max_batch_size)],
+        cancel_token=cancel_token,
+    )
+
+    return created_tools
+
 
 async def generate_custom_tools(
     generated_graph: GeneratedGraph,
-    integration_tools: List[AgentGraphTool],
     trace_config: TraceConfig,
+    integration_tools: Optional[List[AgentGraphTool]] = None,
+    similarity_threshold: Optional[float] = None,
+    tool_library: Optional[CustomToolLibrary] = None,
+    max_batch_size: Optional[int] = None,
+    cancel_token: Optional[CancelToken] = None,
 ) -> List[AgentGraphTool]:
     try:
         prompt_nodes = [
@@ -29,18 +271,80 @@ async def generate_custom_tools(
 
         # TODO: Use Input / Output Data From Integration Tools
 
-        tool_generation_tasks = [
-            create_custom_tool_prompt(
-                task=f"Prompt Type: {node.action_type}\n Main objective: {node.node_objective}. \n Required Context: {node.node_context}",
-                trace_config=trace_config,
+        # NOTE: Equivalent Prompt Nodes share a single generated Tool
+        prompt_node_groups = group_prompt_nodes(
+            prompt_nodes, similarity_threshold=similarity_threshold
+        )
+
+        logger.debug(
+            f"Generating {len(prompt_node_groups)} Custom Tools for {len(prompt_nodes)} Prompt Nodes"
+        )
+
+        tool_tasks = [build_tool_task(node_group[0]) for node_group in prompt_node_groups]
+        library_tasks = [
+            CustomToolTask(
+                task=task,
+                action_type=node_group[0].action_type,
+                node_objective=node_group[0].node_objective,
             )
-            for node in prompt_nodes
+            for task, node_group in zip(tool_tasks, prompt_node_groups)
         ]
 
-        generated_tools = await asyncio.gather(
-            *tool_generation_tasks, return_exceptions=True
+        # NOTE: Similar Tools generated in previous Sessions are reused from the Tool Library
+        library_matches = (
+            await tool_library.lookup_many(library_tasks)
+            if tool_library
+            else [None] * len(tool_tasks)
+        )
+
+        logger.debug(
+            f"Reusing {sum(1 for match in library_matches if match)} Custom Tools from the Tool Library"
         )
 
+        pending_tasks = [
+            task
+            for task, library_match in zip(tool_tasks, library_matches)
+            if not library_match
+        ]
+
+        # NOTE: Batched Mode packs K Tasks into one Request, instead of one Request per Task
+        if max_batch_size and max_batch_size > 1:
+            created_tools = iter(
+                await create_node_tools(
+                    pending_tasks,
+                    trace_config=trace_config,
+                    max_batch_size=max_batch_size,
+                    cancel_token=cancel_token,
+                )
+            )
+        else:
+            tool_generation_tasks = [
+                create_node_tool(task=task, trace_config=trace_config)
+                for task in pending_tasks
+            ]
+
+            created_tools = iter(
+                await gather_cancellable(
+                    *tool_generation_tasks, cancel_token=cancel_token, return_exceptions=True
+                )
+            )
+
+        generated_tools = [
+            library_match.tool if library_match else next(created_tools)
+            for library_match in library_matches
+        ]
+
+        if tool_library:
+            await tool_library.add_many(
+                [
+                    (library_task, tool)
+                    for library_task, tool, library_match in zip(
+                        library_tasks, generated_tools, library_matches
+                    )
+                    if tool and not library_match and not isinstance(tool, Exception)
+                ]
+            )
+
         prompt_tools = [
             AgentGraphTool(
                 node_id=node.node_id,
@@ -53,8 +357,9 @@ async def generate_custom_tools(
                 input_parameters=[],
                 output_parameters=[],
             )
-            for tool, node in zip(generated_tools, prompt_nodes)
-            if tool and not isinstance(tool, RuntimeError)
+            for tool, node_group in zip(generated_tools, prompt_node_groups)
+            if tool and not isinstance(tool, Exception)
+            for node in node_group
         ]
 
         return prompt_tools
@@ -5,13 +5,20 @@ from beam_ai_core.executor.errors import RateLimitExceededError
 from app.lib.modules.agents.agent_setup.models.agent_setup import (
     AgentGraphCreationState,
 )
+from app.lib.modules.agents.agent_setup.stages.tool_generation.custom_tool_library import (
+    get_custom_tool_library,
+)
 from app.lib.modules.agents.agent_setup.stages.tool_generation.tool_generation import (
+    DEFAULT_TOOL_BATCH_SIZE,
     generate_custom_tools,
 )
 from app.lib.modules.agents.agent_setup.utils.agent_setup_utils import (
     set_failed_agent_setup_state,
     set_finished_agent_setup_state,
 )
+from app.lib.modules.agents.agent_setup.utils.cancellation import (
+    SetupCancelledError,
+)
 from app.lib.modules.graphs.graph_task_executor.models.node_interrupt import (
     NodeInterrupt,
 )
@@ -39,10 +46,13 @@ async def generate_agent_tools(
 
     try:
         # NOTE: Generate Custom Tools for Prompt Type Nodes in the Generated Agent Graph
+        # Integration Tools are not passed, as Tool Matching runs concurrently to this Stage
         generated_agent_tools = await generate_custom_tools(
             generated_graph=agent_setup_session.generated_graph,
-            integration_tools=agent_setup_session.integration_tools,
             trace_config=agent_setup_state.trace_config,
+            tool_library=get_custom_tool_library(),
+            max_batch_size=DEFAULT_TOOL_BATCH_SIZE,
+            cancel_token=agent_setup_state.cancel_token,
         )
 
         agent_setup_session.custom_tools = generated_agent_tools
@@ -54,7 +64,7 @@ async def generate_agent_tools(
 
         return agent_setup_state
 
-    except RateLimitExceededError:
+    except (RateLimitExceededError, SetupCancelledError):
         raise
 
     except Exception as tools_generation_exc:
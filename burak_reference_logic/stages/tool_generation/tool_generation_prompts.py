@@ -0,0 +1,53 @@
+from langchain.prompts import (
+    ChatPromptTemplate,
+    HumanMessagePromptTemplate,
+    SystemMessagePromptTemplate,
+)
+
+#########################################################################################
+## Batched Custom Tool Generation Prompts
+#########################################################################################
+
+TOOL_GENERATION_SYSTEM_PROMPT = """# Primary Objective
+You are an expert Prompt Engineer. Your primary objective is to create a Custom GPT Tool for each given Task of an automated Workflow.
+Each Tool is executed by a Large Language Model as a single Step of the Workflow and must solve its Task completely on its own.
+
+# Custom GPT Tools
+Every Tool consists of the following components:
+- Task Id: The Id of the Task the Tool is created for, exactly as given.
+- Title: A short and descriptive Name of the Tool.
+- Tool Description: Detailed Description of what the Tool does, which Inputs it needs and which Output it produces.
+- Short Description: One Sentence summarizing the Tool.
+- Prompt: The complete Instructions for the Large Language Model executing the Tool. It states the Role, the Objective, the
+  expected Input Data, the Steps to follow, the Rules & Constraints and the exact Output Format.
+
+# Rules
+1. Create exactly one Tool for every given Task, never skip or merge Tasks.
+2. Tools are independent of each other, do not refer to other Tasks or Tools.
+3. Prompts must be generic enough to be reused for every Execution of the Step, do not include example Data as fixed Values.
+"""
+
+TOOL_GENERATION_HUMAN_PROMPT = """# Tool Tasks
+Description: The Tasks of the Workflow Steps, each with its Task Id, Prompt Type, Main Objective & Required Context.
+```
+{tool_tasks}
+```
+
+{output_format}
+"""
+
+tool_generation_system_prompt = SystemMessagePromptTemplate.from_template(
+    template=TOOL_GENERATION_SYSTEM_PROMPT,
+)
+
+tool_generation_human_prompt = HumanMessagePromptTemplate.from_template(
+    template=TOOL_GENERATION_HUMAN_PROMPT,
+)
+
+tool_generation_prompt = ChatPromptTemplate.from_messages(
+    messages=[
+        tool_generation_system_prompt,
+        tool_generation_human_prompt,
+    ],
+    template_format="jinja2",
+)
@@ -0,0 +1,23 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class GeneratedCustomTool(BaseModel):
+    task_id: str = Field(description="The Id of the Task the Tool is created for.")
+    title: str = Field(description="Short and descriptive Name of the Tool.")
+    tool_description: str = Field(
+        description="Detailed Description of what the Tool does, its Inputs & its Output."
+    )
+    short_description: Optional[str] = Field(
+        default=None, description="One Sentence summarizing the Tool."
+    )
+    prompt: str = Field(
+        description="The complete Instructions for the Large Language Model executing the Tool."
+    )
+
+
+class GeneratedCustomTools(BaseModel):
+    tools: List[GeneratedCustomTool] = Field(
+        description="One Custom GPT Tool for every given Task."
+    )
@@ -0,0 +1,274 @@
+"""
+Tool Category Classification
+
+Decides for every Node of a generated Graph whether an Integration Tool or a Prompt
+Tool performs it, instead of trusting the ``tool_category`` guessed by the Graph LLM.
+Keyword Rules over the Action Type & Objective and the known Integrations of the Tool
+Catalogue classify most Nodes locally. Only ambiguous Nodes are sent to the LLM, in one
+batched Request per Graph, and its Answers are cached by the normalized Node Text.
+"""
+
+import json
+import logging
+import re
+from collections import OrderedDict
+from enum import Enum
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from beam_ai_core.executor.core import execute_step
+from beam_ai_core.executor.errors import RateLimitExceededError
+from beam_ai_core.executor.pydantic_utils import get_output_format
+from beam_ai_core.llm.llms import LLMConfig
+from beam_ai_core.tracing.langfuse import TraceConfig
+from pydantic import BaseModel
+
+from app.lib.modules.agents.agent_setup.models.agent_setup import AgentSetupStage
+from app.lib.modules.agents.agent_setup.stages.tool_matching.tool_classification_prompts import (
+    tool_classification_prompt,
+)
+from app.lib.modules.agents.agent_setup.stages.tool_matching.tool_classification_pydantic import (
+    ClassifiedToolCategories,
+)
+from app.lib.modules.agents.agent_setup.utils.llm_execution_policy import (
+    execute_with_policy,
+    get_stage_llm_policy,
+)
+
+logger = logging.getLogger("app")
+
+# Words hinting at CRUD Operations against an external System
+INTEGRATION_KEYWORDS = {
+    "add", "api", "archive", "assign", "book", "create", "crud", "database", "delete",
+    "download", "fetch", "forward", "insert", "integration", "lookup", "notify", "post",
+    "read", "receive", "record", "retrieve", "save", "schedule", "send", "store",
+    "sync", "update", "upload",
+}
+# Words hinting at Content generated or analysed by an LLM
+PROMPT_KEYWORDS = {
+    "analyse", "analyze", "assess", "categorize", "classify", "compare", "compose",
+    "decide", "draft", "evaluate", "extract", "generate", "identify", "interpret",
+    "llm", "prompt", "rewrite", "score", "summarise", "summarize", "translate",
+}
+ACTION_TYPE_WEIGHT = 2
+OBJECTIVE_WEIGHT = 1
+INTEGRATION_MENTION_WEIGHT = 3
+# Nodes whose Rule Scores differ less are classified by the LLM
+MIN_SCORE_MARGIN = 2
+# Longest Integration Name in Words, which is matched in the Node Text
+MAX_INTEGRATION_NAME_WORDS = 3
+MAX_CACHED_CLASSIFICATIONS = 10000
+
+
+class ToolCategory(Enum):
+    INTEGRATION = "integration"
+    PROMPT = "prompt"
+
+
+class ClassificationSource(Enum):
+    RULES = "rules"
+    CACHE = "cache"
+    LLM = "llm"
+    # The Category generated with the Graph, if the LLM Fallback failed
+    GRAPH = "graph"
+
+
+class ToolClassification(BaseModel):
+    node_id: str
+    tool_category: ToolCategory
+    source: ClassificationSource
+
+
+LLMClassifier = Callable[[List], Awaitable[Dict[str, ToolCategory]]]
+
+# Categories decided by the LLM, by normalized Node Text
+_classification_cache: "OrderedDict[str, ToolCategory]" = OrderedDict()
+
+
+def normalize_node_text(node) -> str:
+    node_text = f"{node.action_type} {node.node_objective} {node.node_context or ''}"
+
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", node_text.lower()).split())
+
+
+def classify_with_rules(
+    node, integration_names: Optional[Set[str]] = None
+) -> Optional[ToolCategory]:
+    """
+    Keyword & Catalogue Rules, returns None for ambiguous Nodes.
+
+    ``integration_names`` are the normalized Names of the known Integrations.
+    """
+    integration_score, prompt_score = _score_words(
+        _words(node.action_type), ACTION_TYPE_WEIGHT
+    )
+    objective_scores = _score_words(_words(node.node_objective), OBJECTIVE_WEIGHT)
+    integration_score += objective_scores[0]
+    prompt_score += objective_scores[1]
+
+    # NOTE: Nodes naming a known Integration most likely call it
+    if integration_names and _word_ngrams(normalize_node_text(node)) & integration_names:
+        integration_score += INTEGRATION_MENTION_WEIGHT
+
+    if integration_score - prompt_score >= MIN_SCORE_MARGIN:
+        return ToolCategory.INTEGRATION
+    if prompt_score - integration_score >= MIN_SCORE_MARGIN:
+        return ToolCategory.PROMPT
+
+    return None
+
+
+async def classify_nodes(
+    nodes: List,
+    trace_config: TraceConfig,
+    integration_names: Iterable[str] = (),
+    llm_classifier: Optional[LLMClassifier] = None,
+) -> List[ToolClassification]:
+    """
+    Classifies the Tool Category of every Node, ambiguous Nodes in one batched LLM Call.
+
+    If the LLM Call fails, ambiguous Nodes keep the Category generated with the Graph.
+    """
+    integration_names = {
+        " ".join(re.sub(r"[^a-z0-9]+", " ", name.lower()).split())
+        for name in integration_names
+    }
+    llm_classifier = llm_classifier or (
+        lambda ambiguous_nodes: classify_with_llm(ambiguous_nodes, trace_config)
+    )
+
+    classifications: Dict[str, ToolClassification] = {}
+    ambiguous_nodes = []
+
+    for node in nodes:
+        tool_category = classify_with_rules(node, integration_names)
+        if tool_category is not None:
+            source = ClassificationSource.RULES
+        else:
+            tool_category = _get_cached_classification(normalize_node_text(node))
+            source = ClassificationSource.CACHE
+
+        if tool_category is None:
+            ambiguous_nodes.append(node)
+            continue
+
+        classifications[node.node_id] = ToolClassification(
+            node_id=node.node_id, tool_category=tool_category, source=source
+        )
+
+    llm_categories: Dict[str, ToolCategory] = {}
+    if ambiguous_nodes:
+        try:
+            llm_categories = await llm_classifier(ambiguous_nodes)
+        except RateLimitExceededError:
+            raise
+        except Exception as classification_exc:
+            logger.warning(
+                f"Tool Category Classification failed for {len(ambiguous_nodes)} Nodes: {classification_exc}"
+            )
+
+    for node in ambiguous_nodes:
+        tool_category = llm_categories.get(node.node_id)
+        if tool_category is not None:
+            _cache_classification(normalize_node_text(node), tool_category)
+            source = ClassificationSource.LLM
+        else:
+            tool_category = _get_graph_category(node)
+            source = ClassificationSource.GRAPH
+
+        classifications[node.node_id] = ToolClassification(
+            node_id=node.node_id, tool_category=tool_category, source=source
+        )
+
+    logger.debug(
+        f"Classified Tool Categories of {len(nodes)} Nodes, {len(ambiguous_nodes)} ambiguous Nodes sent to the LLM"
+    )
+
+    return [classifications[node.node_id] for node in nodes]
+
+
+async def classify_with_llm(nodes: List, trace_config: TraceConfig) -> Dict[str, ToolCategory]:
+    # Set the Prompt Slug For Langfuse
+    trace_config.prompt_slug = "ToolClassification/v1"
+
+    workflow_steps = json.dumps(
+        [
+            {
+                "step_id": node.node_id,
+                "action_type": node.action_type,
+                "objective": node.node_objective,
+                "required_context": node.node_context,
+            }
+            for node in nodes
+        ],
+        indent=2,
+    )
+
+    async def _classify(llm_config: LLMConfig) -> ClassifiedToolCategories:
+        return await execute_step(
+            template=tool_classification_prompt,
+            input_data={
+                "workflow_steps": workflow_steps,
+                "output_format": get_output_format(ClassifiedToolCategories),
+            },
+            llm_config=llm_config,
+            response_type=ClassifiedToolCategories,
+            trace_config=trace_config,
+        )
+
+    classified_categories = await execute_with_policy(
+        llm_call=_classify,
+        policy=get_stage_llm_policy(AgentSetupStage.TOOL_MATCHING),
+    )
+
+    return {
+        classified_step.step_id: ToolCategory(classified_step.tool_category)
+        for classified_step in classified_categories.classified_steps
+    }
+
+
+def clear_classification_cache() -> None:
+    _classification_cache.clear()
+
+
+def _words(text: Optional[str]) -> List[str]:
+    return re.sub(r"[^a-z]+", " ", (text or "").lower()).split()
+
+
+def _word_ngrams(text: str) -> Set[str]:
+    words = text.split()
+
+    return {
+        " ".join(words[start : start + length])
+        for length in range(1, MAX_INTEGRATION_NAME_WORDS + 1)
+        for start in range(len(words) - length + 1)
+    }
+
+
+def _score_words(words: List[str], weight: int) -> Tuple[int, int]:
+    integration_score = sum(weight for word in words if word in INTEGRATION_KEYWORDS)
+    prompt_score = sum(weight for word in words if word in PROMPT_KEYWORDS)
+
+    return integration_score, prompt_score
+
+
+def _get_graph_category(node) -> ToolCategory:
+    try:
+        return ToolCategory(node.tool_category)
+    except ValueError:
+        return ToolCategory.PROMPT
+
+
+def _get_cached_classification(node_text: str) -> Optional[ToolCategory]:
+    tool_category = _classification_cache.get(node_text)
+    if tool_category is not None:
+        _classification_cache.move_to_end(node_text)
+
+    return tool_category
+
+
+def _cache_classification(node_text: str, tool_category: ToolCategory) -> None:
+    _classification_cache[node_text] = tool_category
+    _classification_cache.move_to_end(node_text)
+
+    while len(_classification_cache) > MAX_CACHED_CLASSIFICATIONS:
+        _classification_cache.popitem(last=False)
@@ -0,0 +1,50 @@
+from langchain.prompts import (
+    ChatPromptTemplate,
+    HumanMessagePromptTemplate,
+    SystemMessagePromptTemplate,
+)
+
+#########################################################################################
+## Tool Category Classification Prompts
+#########################################################################################
+
+TOOL_CLASSIFICATION_SYSTEM_PROMPT = """# Primary Objective
+You are an expert in Business Process Automation. Your primary objective is to decide for every Step of an automated Workflow,
+which kind of Tool performs it.
+
+# Tool Categories
+- integration: The Step performs a CRUD Operation against a SaaS Application or internal System through its API, e.g. reading Emails,
+  creating a Ticket, updating a CRM Record, sending a Message or uploading a File.
+- prompt: The Step uses a Large Language Model to generate or analyse Content, e.g. drafting an Email, summarizing a Document,
+  classifying a Request, extracting Fields from a Text or making a Decision.
+
+# Rules
+1. Classify every given Step exactly once, using its Step Id.
+2. A Step which both generates and sends Content is an integration Step, the Content is generated by a separate prompt Step.
+3. Only answer with the Categories "integration" or "prompt".
+"""
+
+TOOL_CLASSIFICATION_HUMAN_PROMPT = """# Workflow Steps
+Description: The Steps which could not be classified by Rules, with their Action Type, Objective & Required Context.
+```
+{workflow_steps}
+```
+
+{output_format}
+"""
+
+tool_classification_system_prompt = SystemMessagePromptTemplate.from_template(
+    template=TOOL_CLASSIFICATION_SYSTEM_PROMPT,
+)
+
+tool_classification_human_prompt = HumanMessagePromptTemplate.from_template(
+    template=TOOL_CLASSIFICATION_HUMAN_PROMPT,
+)
+
+tool_classification_prompt = ChatPromptTemplate.from_messages(
+    messages=[
+        tool_classification_system_prompt,
+        tool_classification_human_prompt,
+    ],
+    template_format="jinja2",
+)
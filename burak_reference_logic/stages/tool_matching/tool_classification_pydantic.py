@@ -0,0 +1,16 @@
+from typing import List, Literal
+
+from pydantic import BaseModel, Field
+
+
+class ClassifiedWorkflowStep(BaseModel):
+    step_id: str = Field(description="The Id of the classified Workflow Step.")
+    tool_category: Literal["integration", "prompt"] = Field(
+        description="The Tool Category performing the Step."
+    )
+
+
+class ClassifiedToolCategories(BaseModel):
+    classified_steps: List[ClassifiedWorkflowStep] = Field(
+        description="The Tool Category of every given Workflow Step."
+    )
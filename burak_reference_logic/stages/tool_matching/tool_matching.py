@@ -1,6 +1,6 @@
-import asyncio
 import logging
-from typing import List
+from functools import partial
+from typing import List, Optional
 
 from beam_ai_core.tracing.langfuse import TraceConfig
 
@@ -9,13 +9,86 @@ from app.lib.modules.agents.agent_setup.models.agent_setup import AgentGraphTool
 from app.lib.modules.graphs.agent_graph.graph_creation.strategies.multi_node.generate_graph_pydantic import (
     GeneratedGraph,
 )
+from app.lib.modules.agents.agent_setup.stages.tool_matching.tool_classification import (
+    ToolClassification,
+    classify_nodes,
+)
+from app.lib.modules.agents.agent_setup.stages.tool_matching.tool_prefilter import (
+    ToolMetadata,
+    ToolPrefilter,
+)
+from app.lib.modules.agents.agent_setup.utils.cancellation import (
+    CancelToken,
+    gather_cancellable,
+)
+from app.lib.modules.agents.agent_setup.utils.singleflight import (
+    make_request_key,
+    tool_retrieval_flight,
+)
+from app.lib.modules.agents.agent_setup.utils.stage_deadlines import (
+    StageDeadlineExceededError,
+    wait_with_deadline,
+)
 from app.lib.modules.tools.tools import fetch_tools_v2
 
 logger = logging.getLogger("app")
 
 
+async def fetch_node_tools(
+    task_step: str,
+    workspace_id: str,
+    tool_database_top_k: int = 20,
+    workspace_id_database_top_k: int = 20,
+):
+    # NOTE: Identical concurrent Queries (e.g. Bulk Agent Creation) share one Backend Request
+    request_key = make_request_key(
+        task_step, workspace_id, tool_database_top_k, workspace_id_database_top_k
+    )
+
+    return await wait_with_deadline(
+        tool_retrieval_flight.do(
+            request_key,
+            partial(
+                fetch_tools_v2,
+                task_step=task_step,
+                workspace_id=workspace_id,
+                tool_database_top_k=tool_database_top_k,
+                workspace_id_database_top_k=workspace_id_database_top_k,
+            ),
+        )
+    )
+
+
+async def select_node_tool(
+    task_step: str,
+    action_type: str,
+    workspace_id: str,
+    tool_prefilter: Optional[ToolPrefilter] = None,
+):
+    # NOTE: The Prefilter only ranks the Tools of the connected Integrations with the right Access
+    if tool_prefilter:
+        tool_candidates = tool_prefilter.search(
+            task_step, workspace_id=workspace_id, action_type=action_type, top_k=1
+        )
+        if tool_candidates:
+            return tool_candidates[0].tool
+
+        # NOTE: The Vector Search is not restricted to the connected Integrations, Fallbacks are counted to monitor them
+        tool_prefilter.metrics.fallbacks += 1
+        logger.warning(
+            f"Tool Prefilter found no Tool for Action Type: {action_type} in Workspace: {workspace_id}, "
+            f"falling back to the unrestricted Tool Search ({tool_prefilter.metrics.fallbacks} of {tool_prefilter.metrics.searches} Searches)"
+        )
+
+    return await fetch_node_tools(task_step=task_step, workspace_id=workspace_id)
+
+
 async def select_integration_tools(
-    agent: Agent, generated_graph: GeneratedGraph, trace_config: TraceConfig
+    agent: Agent,
+    generated_graph: GeneratedGraph,
+    trace_config: TraceConfig,
+    tool_prefilter: Optional[ToolPrefilter] = None,
+    cancel_token: Optional[CancelToken] = None,
 ) -> List[AgentGraphTool]:
 
     try:
@@ -26,21 +99,36 @@ async def select_integration_tools(
         ]
 
         tool_selection_tasks = [
-            fetch_tools_v2(
+            select_node_tool(
                 task_step=f"Action Type: {node.action_type}\n Objective: {node.node_objective}. \n Required Context: {node.node_context}",
+                action_type=node.action_type,
                 workspace_id=agent.config.workspace_id,
-                tool_database_top_k=20,
-                workspace_id_database_top_k=20,
+                tool_prefilter=tool_prefilter,
             )
             for node in integration_nodes
         ]
 
-        selected_tools = await asyncio.gather(
-            *tool_selection_tasks, return_exceptions=True
+        # NOTE: Per-Node Requests are cancelled with the Session
+        selected_tools = await gather_cancellable(
+            *tool_selection_tasks, cancel_token=cancel_token, return_exceptions=True
         )
 
         logger.debug(f"Selected Tools: {selected_tools}")
 
+        # An expired Stage Deadline fails the whole Stage instead of dropping Tools
+        for selected_tool in selected_tools:
+            if isinstance(selected_tool, StageDeadlineExceededError):
+                raise selected_tool
+
+        # NOTE: Any failed Tool Request drops only its Node, not the whole Stage
+        failed_node_ids = [
+            node.node_id
+            for selected_tool, node in zip(selected_tools, integration_nodes)
+            if isinstance(selected_tool, Exception)
+        ]
+        if failed_node_ids:
+            logger.warning(f"Failed to Select Tools for Nodes: {failed_node_ids}")
+
         integration_tools = [
             AgentGraphTool(
                 node_id=node.node_id,
@@ -49,10 +137,14 @@ async def select_integration_tools(
                 tool_type="integration",
                 action_type=node.action_type,
                 input_parameters=tool.tool_parameters,
-                integration_name=tool.integration,
+                integration_name=(
+                    tool.integration_name
+                    if isinstance(tool, ToolMetadata)
+                    else tool.integration
+                ),
             )
             for tool, node in zip(selected_tools, integration_nodes)
-            if not isinstance(tool, RuntimeError)
+            if not isinstance(tool, Exception)
         ]
 
         logger.debug(f"Selected Integration Tools: {integration_tools}")
@@ -64,5 +156,28 @@ async def select_integration_tools(
         raise
 
 
-async def classify_tool_categories():
-    pass
+async def classify_tool_categories(
+    generated_graph: GeneratedGraph,
+    trace_config: TraceConfig,
+    tool_prefilter: Optional[ToolPrefilter] = None,
+) -> List[ToolClassification]:
+    """Classifies the Tool Category of every Node & updates the Graph Nodes in place."""
+    try:
+        classifications = await classify_nodes(
+            generated_graph.workflow_graph,
+            trace_config=trace_config,
+            integration_names=tool_prefilter.integration_names if tool_prefilter else [],
+        )
+
+        for node, classification in zip(generated_graph.workflow_graph, classifications):
+            if node.tool_category != classification.tool_category.value:
+                logger.debug(
+                    f"Tool Category of Node {node.node_id} changed from {node.tool_category} to {classification.tool_category.value}"
+                )
+                node.tool_category = classification.tool_category.value
+
+        return classifications
+
+    except Exception as tool_classification_exc:
+        logger.error(f"Failed to Classify Tool Categories: {tool_classification_exc}")
+        raise
@@ -10,10 +10,16 @@ from app.lib.modules.agents.agent_setup.models.agent_setup import (
 from app.lib.modules.agents.agent_setup.stages.tool_matching.tool_matching import (
     select_integration_tools,
 )
+from app.lib.modules.agents.agent_setup.stages.tool_matching.tool_prefilter import (
+    get_tool_prefilter,
+)
 from app.lib.modules.agents.agent_setup.utils.agent_setup_utils import (
     set_failed_agent_setup_state,
     set_next_agent_setup_state,
 )
+from app.lib.modules.agents.agent_setup.utils.cancellation import (
+    SetupCancelledError,
+)
 from app.lib.modules.graphs.graph_task_executor.models.node_interrupt import (
     NodeInterrupt,
 )
@@ -45,6 +51,8 @@ async def select_agent_tools(
             agent=agent_setup_session.agent,
             generated_graph=agent_setup_session.generated_graph,
             trace_config=agent_setup_state.trace_config,
+            tool_prefilter=get_tool_prefilter(),
+            cancel_token=agent_setup_state.cancel_token,
         )
 
         agent_setup_session.integration_tools = selected_integration_tools
@@ -58,7 +66,7 @@ async def select_agent_tools(
 
         return agent_setup_state
 
-    except RateLimitExceededError:
+    except (RateLimitExceededError, SetupCancelledError):
         raise
 
     except Exception as tool_matching_exc:
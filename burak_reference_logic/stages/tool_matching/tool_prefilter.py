@@ -0,0 +1,236 @@
+"""
+Structured Tool Prefilter
+
+First Stage of the two-stage Tool Retrieval. The Tool Catalogue is held in Memory,
+indexed by Integration, Access (read / write) & Consent, so a Node only competes
+against the Tools of the Integrations its Workspace has connected, with the Access
+its Action Type needs. The second Stage ranks the few surviving Candidates
+semantically. Nodes without a confident Match fall back to the Vector Search of
+``fetch_tools_v2``, which is not restricted to the connected Integrations, so the
+Fallbacks are counted in the Prefilter Metrics.
+"""
+
+import json
+import logging
+import os
+import re
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from pydantic import BaseModel, Field
+
+from app.lib.modules.agents.agent_setup.utils.text_embedding import (
+    cosine_similarity,
+    embed_text,
+)
+
+logger = logging.getLogger("app")
+
+# Leading Verbs of Action Types, by the Access the Action needs
+READ_ACTION_VERBS = {
+    "check", "download", "extract", "fetch", "find", "get", "list", "lookup",
+    "monitor", "query", "read", "retrieve", "search", "verify", "view",
+}
+WRITE_ACTION_VERBS = {
+    "add", "assign", "book", "cancel", "create", "delete", "email", "insert", "notify",
+    "post", "remove", "reply", "schedule", "send", "set", "submit", "update", "upload",
+    "write",
+}
+
+
+class ToolAccess(Enum):
+    READ = "read"
+    WRITE = "write"
+
+
+class ToolMetadata(BaseModel):
+    name: str
+    description: str
+    integration_name: str
+    # Access of the Tool, None if unknown
+    action_type: Optional[ToolAccess] = None
+    # Tool needs the User's Consent, i.e. a connected Integration Account
+    requires_consent: bool = True
+    tool_parameters: List[Dict[str, Any]] = Field(default_factory=list)
+
+
+class ToolPrefilterMetrics(BaseModel):
+    # Searches of the Prefilter
+    searches: int = 0
+    # Searches without a confident Candidate, answered by the unrestricted Vector Search
+    fallbacks: int = 0
+
+
+class ToolCandidate(BaseModel):
+    tool: ToolMetadata
+    similarity: float
+
+
+def infer_tool_access(action_type: Optional[str]) -> Optional[ToolAccess]:
+    """Access needed by a Node Action Type (e.g. "Send Email"), None if unknown."""
+    words = re.sub(r"[^a-z]+", " ", (action_type or "").lower()).split()
+
+    for word in words:
+        if word in READ_ACTION_VERBS:
+            return ToolAccess.READ
+        if word in WRITE_ACTION_VERBS:
+            return ToolAccess.WRITE
+
+    return None
+
+
+def _normalize_name(name: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name.lower()).split())
+
+
+class ToolPrefilter:
+    """
+    In-Memory Catalogue of Tool Metadata for the structured Prefilter.
+
+    Tool Embeddings are computed once, Searches only rank the Candidates of the
+    allowed Integrations.
+    """
+
+    def __init__(
+        self,
+        tools: List[ToolMetadata],
+        connected_integrations: Optional[Dict[str, Iterable[str]]] = None,
+        min_similarity: float = 0.15,
+        embedder: Callable[[str], List[float]] = embed_text,
+    ):
+        self.tools = tools
+        self.min_similarity = min_similarity
+        self.embedder = embedder
+        self.metrics = ToolPrefilterMetrics()
+        # Connected Integrations per Workspace Id
+        self.connected_integrations: Dict[str, Set[str]] = {
+            workspace_id: {_normalize_name(name) for name in integrations}
+            for workspace_id, integrations in (connected_integrations or {}).items()
+        }
+
+        self._tool_ids_by_integration: Dict[str, List[int]] = {}
+        self._embeddings: List[List[float]] = []
+        for tool_id, tool in enumerate(tools):
+            self._tool_ids_by_integration.setdefault(
+                _normalize_name(tool.integration_name), []
+            ).append(tool_id)
+            self._embeddings.append(self.embedder(f"{tool.name} {tool.description}"))
+
+        # Integrations with at least one Tool usable without Consent
+        self._consent_free_integrations = {
+            integration
+            for integration, tool_ids in self._tool_ids_by_integration.items()
+            if any(not tools[tool_id].requires_consent for tool_id in tool_ids)
+        }
+
+    @property
+    def integration_names(self) -> List[str]:
+        """Normalized Names of the Integrations in the Catalogue."""
+        return list(self._tool_ids_by_integration)
+
+    def filter(
+        self,
+        task: str,
+        workspace_id: Optional[str] = None,
+        action_type: Optional[str] = None,
+    ) -> List[int]:
+        """Ids of the Tools a Node may use, by Integration, Access & Consent."""
+        connected_integrations = self.connected_integrations.get(workspace_id)
+        if connected_integrations is None:
+            # NOTE: Unknown Workspaces are not restricted to their Connections
+            allowed_integrations = set(self._tool_ids_by_integration)
+        else:
+            allowed_integrations = (
+                connected_integrations | self._consent_free_integrations
+            ) & set(self._tool_ids_by_integration)
+
+        # Integrations named in the Task restrict the Search to themselves
+        normalized_task = f" {_normalize_name(task)} "
+        mentioned_integrations = {
+            integration
+            for integration in allowed_integrations
+            if f" {integration} " in normalized_task
+        }
+        if mentioned_integrations:
+            allowed_integrations = mentioned_integrations
+
+        access = infer_tool_access(action_type)
+
+        return [
+            tool_id
+            for integration in allowed_integrations
+            for tool_id in self._tool_ids_by_integration[integration]
+            if (
+                connected_integrations is None
+                or integration in connected_integrations
+                or not self.tools[tool_id].requires_consent
+            )
+            and (
+                access is None
+                or self.tools[tool_id].action_type is None
+                or self.tools[tool_id].action_type == access
+            )
+        ]
+
+    def rank(self, task: str, tool_ids: List[int], top_k: int = 5) -> List[ToolCandidate]:
+        """Ranks Candidates by Similarity to the Task, dropping unconfident Matches."""
+        task_embedding = self.embedder(task)
+
+        ranked_tool_ids = sorted(
+            (
+                (tool_id, cosine_similarity(task_embedding, self._embeddings[tool_id]))
+                for tool_id in tool_ids
+            ),
+            key=lambda candidate: candidate[1],
+            reverse=True,
+        )
+
+        return [
+            ToolCandidate(tool=self.tools[tool_id], similarity=similarity)
+            for tool_id, similarity in ranked_tool_ids[:top_k]
+            if similarity >= self.min_similarity
+        ]
+
+    def search(
+        self,
+        task: str,
+        workspace_id: Optional[str] = None,
+        action_type: Optional[str] = None,
+        top_k: int = 5,
+    ) -> List[ToolCandidate]:
+        self.metrics.searches += 1
+        candidate_ids = self.filter(task, workspace_id=workspace_id, action_type=action_type)
+
+        logger.debug(
+            f"Tool Prefilter: {len(candidate_ids)} of {len(self.tools)} Tools remain for Action Type: {action_type}"
+        )
+
+        return self.rank(task, candidate_ids, top_k=top_k)
+
+
+def load_tool_prefilter(catalogue_path: str) -> ToolPrefilter:
+    """
+    Loads a Tool Catalogue JSON File with the Keys ``tools`` (Tool Metadata) &
+    ``connected_integrations`` (Integration Names per Workspace Id).
+    """
+    with open(catalogue_path, "r", encoding="utf-8") as catalogue_file:
+        catalogue = json.load(catalogue_file)
+
+    return ToolPrefilter(
+        tools=[ToolMetadata.model_validate(tool) for tool in catalogue.get("tools", [])],
+        connected_integrations=catalogue.get("connected_integrations"),
+    )
+
+
+_tool_prefilter: Optional[ToolPrefilter] = None
+
+
+def get_tool_prefilter() -> Optional[ToolPrefilter]:
+    """Returns the shared Prefilter, only enabled if AGENT_SETUP_TOOL_CATALOGUE_PATH is set."""
+    global _tool_prefilter
+
+    catalogue_path = os.environ.get("AGENT_SETUP_TOOL_CATALOGUE_PATH")
+    if _tool_prefilter is None and catalogue_path:
+        _tool_prefilter = load_tool_prefilter(catalogue_path)
+
+    return _tool_prefilter
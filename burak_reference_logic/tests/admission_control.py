@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.lib.modules.agents.agent_setup import agent_setup_manager
+from app.lib.modules.agents.agent_setup.agent_setup_manager import AgentSetupManager
+from app.lib.modules.agents.agent_setup.models.agent_setup import (
+    AgentSetupStage,
+    AgentSetupState,
+)
+from app.lib.modules.agents.agent_setup.utils.admission_control import (
+    AdmissionController,
+    AdmissionDeferredError,
+    AdmissionRejectedError,
+    SetupCostEstimate,
+    StageCostEstimate,
+    estimate_setup_cost,
+)
+from app.lib.modules.agents.agent_setup.utils.cancellation import SetupCancelledError
+
+logger = logging.getLogger("app")
+
+
+def _session(process_instructions: str, next_stage=None, file_uploads=(), nodes=None):
+    return SimpleNamespace(
+        process_instructions=process_instructions,
+        file_uploads=list(file_uploads),
+        agent_sop=None,
+        generated_graph=SimpleNamespace(workflow_graph=nodes) if nodes else None,
+        setup_state=AgentSetupState(next=next_stage) if next_stage else None,
+    )
+
+
+def _estimate(tokens: int) -> SetupCostEstimate:
+    return SetupCostEstimate(
+        stages=[
+            StageCostEstimate(
+                stage=AgentSetupStage.SOP_GENERATION,
+                llm_calls=1,
+                input_tokens=tokens,
+                output_tokens=0,
+            )
+        ]
+    )
+
+
+def test_estimate_scales_with_input_and_remaining_stages():
+    small_estimate = estimate_setup_cost(_session("x" * 400))
+    large_estimate = estimate_setup_cost(_session("x" * 40000))
+    upload_estimate = estimate_setup_cost(_session("x" * 400, file_uploads=["invoice.pdf"]))
+
+    assert [stage.stage for stage in small_estimate.stages] == [
+        AgentSetupStage.SOP_GENERATION,
+        AgentSetupStage.GRAPH_GENERATION,
+        AgentSetupStage.TOOL_MATCHING,
+        AgentSetupStage.TOOL_GENERATION,
+    ]
+    assert small_estimate.total_tokens < upload_estimate.total_tokens < large_estimate.total_tokens
+    assert small_estimate.llm_calls < large_estimate.llm_calls
+
+    # Resumed Sessions only pay for the remaining Stages, by their actual Prompt Nodes
+    nodes = [SimpleNamespace(tool_category="prompt")] * 9 + [
+        SimpleNamespace(tool_category="integration")
+    ]
+    resumed_estimate = estimate_setup_cost(
+        _session("x" * 40000, next_stage=AgentSetupStage.TOOL_GENERATION, nodes=nodes)
+    )
+    assert [stage.stage for stage in resumed_estimate.stages] == [
+        AgentSetupStage.TOOL_GENERATION
+    ]
+    assert resumed_estimate.llm_calls == 2
+
+    finished_estimate = estimate_setup_cost(
+        _session("x", next_stage=AgentSetupStage.CONNECT_INTEGRATIONS)
+    )
+    assert finished_estimate.total_tokens == 0
+
+
+def test_jobs_queue_until_budget_refills():
+    """Tests that Jobs beyond the Budget wait in FIFO Order for the Refill"""
+    # 600 Tokens per Minute refill 10 Tokens per Second
+    admission_controller = AdmissionController(tokens_per_minute=600, max_queue_wait=10)
+    admitted_jobs = []
+
+    async def _admit(job_name: str, tokens: int):
+        await admission_controller.admit(_estimate(tokens))
+        admitted_jobs.append(job_name)
+
+    async def _run():
+        await _admit("first", 600)
+        await asyncio.gather(_admit("second", 3), _admit("third", 2))
+
+    start_time = time.monotonic()
+    asyncio.run(_run())
+    duration = time.monotonic() - start_time
+
+    assert admitted_jobs == ["first", "second", "third"]
+    assert 0.4 < duration < 2
+    assert admission_controller.metrics.admitted == 3
+    assert admission_controller.metrics.queue_depth == 0
+    assert admission_controller.metrics.max_queue_wait > 0.2
+
+
+def test_jobs_are_deferred_or_shed():
+    admission_controller = AdmissionController(
+        tokens_per_minute=600, max_job_tokens=10000, max_queue_wait=5
+    )
+
+    async def _run():
+        await admission_controller.admit(_estimate(600))
+
+        # The Budget refills 10 Tokens per Second, 600 Tokens take a Minute
+        with pytest.raises(AdmissionDeferredError) as deferred_exc:
+            await admission_controller.admit(_estimate(600))
+        assert deferred_exc.value.retry_after > 5
+
+        with pytest.raises(AdmissionRejectedError):
+            await admission_controller.admit(_estimate(20000))
+
+    asyncio.run(_run())
+
+    assert admission_controller.metrics.admitted == 1
+    assert admission_controller.metrics.deferred == 1
+    assert admission_controller.metrics.rejected == 1
+
+
+class _FakeAdmissionController:
+    def __init__(self, admissions):
+        self.admissions = list(admissions)
+
+    async def admit(self, estimate):
+        admission = self.admissions.pop(0)
+        if isinstance(admission, Exception):
+            raise admission
+        await asyncio.sleep(admission)
+
+
+def _manager(monkeypatch, admissions) -> AgentSetupManager:
+    async def _setup_agent(agent_setup, **kwargs):
+        return agent_setup
+
+    monkeypatch.setattr(agent_setup_manager, "setup_agent", _setup_agent)
+    manager = AgentSetupManager()
+    manager.set_admission_controller(_FakeAdmissionController(admissions))
+
+    return manager
+
+
+def test_manager_requeues_deferred_jobs(monkeypatch):
+    """Tests that a deferred Job is requeued after the Retry Delay, instead of failing"""
+    manager = _manager(
+        monkeypatch, [AdmissionDeferredError("Token Budget exhausted", retry_after=0.05)]
+    )
+    requeued_sessions = []
+
+    async def _requeue_session(task):
+        requeued_sessions.append(task)
+
+    manager.requeue_session = _requeue_session
+    task = _session("x" * 400)
+    task.id = "session_1"
+
+    async def _run():
+        assert await manager.run_once(task, trace_config=None, job=SimpleNamespace()) is task
+        assert requeued_sessions == []
+        assert "session_1" in manager.deferred_requeues
+
+        await asyncio.sleep(0.1)
+
+    asyncio.run(_run())
+
+    assert requeued_sessions == [task]
+    assert manager.deferred_requeues == {}
+    assert manager.active_runs == {}
+
+
+def test_newer_run_supersedes_queued_admission(monkeypatch):
+    manager = _manager(monkeypatch, [60, 0])
+    task = _session("x" * 400)
+    task.id = "session_1"
+
+    async def _run():
+        queued_run = asyncio.ensure_future(manager.run_once(task, trace_config=None))
+        await asyncio.sleep(0.05)
+
+        assert await manager.run_once(task, trace_config=None) is task
+        with pytest.raises(SetupCancelledError):
+            await queued_run
+
+    asyncio.run(_run())
+
+    assert manager.active_runs == {}
+
+
+def test_closing_manager_requeues_deferred_jobs(monkeypatch):
+    manager = _manager(
+        monkeypatch, [AdmissionDeferredError("Token Budget exhausted", retry_after=60)]
+    )
+    requeued_sessions = []
+
+    async def _requeue_session(task):
+        requeued_sessions.append(task)
+
+    manager.requeue_session = _requeue_session
+    task = _session("x" * 400)
+    task.id = "session_1"
+
+    async def _run():
+        await manager.run_once(task, trace_config=None, job=SimpleNamespace())
+        await asyncio.wait_for(manager.close(), timeout=1)
+
+    asyncio.run(_run())
+
+    assert requeued_sessions == [task]
+    assert manager.deferred_requeues == {}
@@ -0,0 +1,160 @@
+"""
+Microbenchmark of Validation & Serialization Cost per Agent Setup Session Size.
+
+Compares full Validation against the trusted Construction Path for the Models built
+inside the Setup Pipeline. Run with:
+
+    python -m app.lib.modules.agents.agent_setup.tests.benchmarks.session_validation_benchmark
+"""
+
+import timeit
+from datetime import datetime
+from typing import Callable, List
+
+from app.lib.modules.agents.agent.agent import Agent, AgentConfig, AgentType
+from app.lib.modules.agents.agent_setup.models.agent_setup import (
+    AgentGraphTool,
+    AgentSetupSession,
+    AgentSetupStage,
+    AgentSetupStageMetadata,
+    AgentSetupState,
+    AgentSetupStatus,
+)
+from app.lib.modules.agents.agent_setup.utils.model_construction import (
+    strict_validation,
+    trusted_construct,
+)
+
+SESSION_SIZES = [10, 100, 1000]
+REPEATS = 20
+
+
+def _tool_fields(index: int) -> dict:
+    return {
+        "node_id": f"step_{index}",
+        "tool_name": f"Generated Tool {index}",
+        "tool_description": "Generates the Acknowledgment Email for the Customer " * 4,
+        "short_description": "Acknowledgment Email",
+        "tool_type": "prompt",
+        "action_type": "generation",
+        "prompt": "You are a Customer Support Agent... " * 20,
+        "input_parameters": [],
+        "output_parameters": [],
+    }
+
+
+def _stage_fields(index: int) -> dict:
+    return {
+        "stage": AgentSetupStage.TOOL_GENERATION,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "success": True,
+        "output": f"Stage {index} completed successfully.",
+    }
+
+
+def build_session(session_size: int) -> AgentSetupSession:
+    return AgentSetupSession(
+        id="0e9fe28f-44b5-5bed-a858-a28353ba20b1",
+        user_id="86b1269e-46d0-5145-aaf5-8f70c14ed4b8",
+        thread_id="thread",
+        agent=Agent(
+            id="test-agent",
+            vector_db_id="f8f5c136-b4eb-5b3c-8466-e522902ac295",
+            type=AgentType.AGENT_OS_AGENT,
+            name="Invoice Processing Agent",
+            description="Processes Invoices",
+            config=AgentConfig(
+                agent_id="test-agent",
+                vector_db_id="f8f5c136-b4eb-5b3c-8466-e522902ac295",
+                workspace_id="b94a9558-07ab-5d3d-ba24-c318d782df1d",
+            ),
+        ),
+        status=AgentSetupStatus.IN_PROGRESS,
+        custom_tools=[AgentGraphTool(**_tool_fields(index)) for index in range(session_size)],
+        setup_state=AgentSetupState(
+            next=AgentSetupStage.TOOL_GENERATION,
+            stages=[
+                AgentSetupStageMetadata(**_stage_fields(index))
+                for index in range(session_size)
+            ],
+        ),
+    )
+
+
+def _measure(benchmark: Callable[[], object]) -> float:
+    # Milliseconds per Run, best of the Repeats
+    return min(timeit.repeat(benchmark, number=1, repeat=REPEATS)) * 1000
+
+
+def run_benchmark() -> List[dict]:
+    results = []
+
+    for session_size in SESSION_SIZES:
+        agent_setup = build_session(session_size)
+        session_dump = agent_setup.model_dump()
+        session_json = agent_setup.model_dump_json()
+        tool_fields = [_tool_fields(index) for index in range(session_size)]
+        stage_fields = [_stage_fields(index) for index in range(session_size)]
+        # Session Fields holding already built (validated) Models
+        session_fields = {
+            field: getattr(agent_setup, field) for field in AgentSetupSession.model_fields
+        }
+
+        with strict_validation(False):
+            trusted_tools_ms = _measure(
+                lambda: [trusted_construct(AgentGraphTool, **fields) for fields in tool_fields]
+            )
+            trusted_session_ms = _measure(
+                lambda: trusted_construct(AgentSetupSession, **session_fields)
+            )
+            trusted_stages_ms = _measure(
+                lambda: [
+                    trusted_construct(AgentSetupStageMetadata, **fields)
+                    for fields in stage_fields
+                ]
+            )
+
+        results.append(
+            {
+                "session_size": session_size,
+                "session_bytes": len(session_json),
+                "validated_tools_ms": _measure(
+                    lambda: [AgentGraphTool(**fields) for fields in tool_fields]
+                ),
+                "trusted_tools_ms": trusted_tools_ms,
+                "validated_stages_ms": _measure(
+                    lambda: [AgentSetupStageMetadata(**fields) for fields in stage_fields]
+                ),
+                "trusted_stages_ms": trusted_stages_ms,
+                "validated_session_ms": _measure(
+                    lambda: AgentSetupSession(**session_fields)
+                ),
+                "trusted_session_ms": trusted_session_ms,
+                "model_dump_ms": _measure(agent_setup.model_dump),
+                "model_dump_json_ms": _measure(agent_setup.model_dump_json),
+                "model_validate_ms": _measure(
+                    lambda: AgentSetupSession.model_validate(session_dump)
+                ),
+                "model_validate_json_ms": _measure(
+                    lambda: AgentSetupSession.model_validate_json(session_json)
+                ),
+            }
+        )
+
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_results = run_benchmark()
+
+    columns = list(benchmark_results[0].keys())
+    print(" | ".join(f"{column:>22}" for column in columns))
+    for result in benchmark_results:
+        print(
+            " | ".join(
+                f"{result[column]:>22.3f}"
+                if isinstance(result[column], float)
+                else f"{result[column]:>22}"
+                for column in columns
+            )
+        )
@@ -0,0 +1,286 @@
+"""
+Offline Benchmark of Tool Matching Quality against Retrieval Latency.
+
+Builds labelled Node Queries with their expected Tools from the stored Agent Graphs
+(``agent_graph_*/nodes/*.json`` ``toolConfiguration.originalTool``, Queries from
+``graph_concept.json``) and the Tool Samples in ``knowledge/``. Every Retriever
+Configuration searches a local Index of the Catalogue, padded with synthetic Tools to
+several Index Sizes, and reports Recall@k, MRR & p50 / p99 Latency. Run with:
+
+    python -m app.lib.modules.agents.agent_setup.tests.benchmarks.tool_matching_benchmark [DATA_DIR]
+
+``DATA_DIR`` holds the ``agent_graph_*`` & ``knowledge`` Directories.
+"""
+
+import glob
+import json
+import math
+import os
+import re
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+from app.lib.modules.agents.agent_setup.stages.tool_matching.tool_prefilter import (
+    ToolMetadata,
+    ToolPrefilter,
+    infer_tool_access,
+)
+from app.lib.modules.agents.agent_setup.utils.text_embedding import LSHIndex, embed_text
+
+DEFAULT_DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+# NOTE: select_integration_tools fetches 20 Tools per Query
+K_VALUES = [1, 3, 5, 10, 20]
+# Synthetic Tools added to the Catalogue
+INDEX_PADDINGS = [0, 1000, 5000]
+REPEATS = 5
+
+DISTRACTOR_VERBS = ["Create", "Get", "Update", "Delete", "List", "Send", "Search", "Upload"]
+DISTRACTOR_OBJECTS = [
+    "Contact", "Deal", "Email", "File", "Invoice", "Message", "Order", "Record",
+    "Task", "Ticket",
+]
+
+# Ranked Tool Names for a Case, at most k
+Retriever = Callable[["ToolMatchingCase", int], List[str]]
+
+
+class ToolMatchingCase(BaseModel):
+    query: str
+    action_type: Optional[str] = None
+    expected_tool: str
+    source: str
+
+
+def _read_json(path: str):
+    with open(path, "r", encoding="utf-8") as json_file:
+        return json.load(json_file)
+
+
+def _words_of(identifier: str) -> str:
+    return " ".join(re.sub(r"[^a-zA-Z0-9]+", " ", identifier).split())
+
+
+def _tool_metadata(tool: dict) -> ToolMetadata:
+    meta = tool.get("meta") or {}
+    descriptions = [meta.get("description") or tool.get("description") or ""]
+    descriptions += [
+        param.get("paramDescription", "") for param in tool.get("inputParams") or []
+    ]
+
+    return ToolMetadata(
+        name=tool["toolName"],
+        description=" ".join(description for description in descriptions if description),
+        integration_name=meta.get("integration_name")
+        or meta.get("integrationIdentifier")
+        or tool.get("integrationId")
+        or "unknown",
+        action_type=infer_tool_access(meta.get("action_type") or tool["toolName"]),
+        requires_consent=meta.get("requires_consent", True),
+    )
+
+
+def load_tool_matching_dataset(
+    data_dir: str = DEFAULT_DATA_DIR,
+) -> Tuple[List[ToolMetadata], List[ToolMatchingCase]]:
+    """
+    Tool Catalogue & labelled Cases. Only Integration (``beam_tool``) Nodes are labelled,
+    Prompt Tools are generated instead of retrieved.
+    """
+    tools_by_function: Dict[str, ToolMetadata] = {}
+    cases: List[ToolMatchingCase] = []
+
+    for graph_dir in sorted(glob.glob(os.path.join(data_dir, "agent_graph_*"))):
+        concept_path = os.path.join(graph_dir, "graph_concept.json")
+        concept_nodes = {}
+        if os.path.exists(concept_path):
+            concept_nodes = {
+                node["node_id"]: node
+                for node in _read_json(concept_path)["graph_concept"]["nodes"]
+            }
+
+        for node_path in sorted(glob.glob(os.path.join(graph_dir, "nodes", "*.json"))):
+            node = _read_json(node_path)
+            tool = (node.get("toolConfiguration") or {}).get("originalTool")
+            if not tool or tool.get("type") != "beam_tool":
+                continue
+
+            tools_by_function.setdefault(tool["toolFunctionName"], _tool_metadata(tool))
+
+            concept_node = concept_nodes.get(node["id"], {})
+            # NOTE: Without a Concept, the Node Id & Fallback describe the Step
+            query = concept_node.get("objective") or " ".join(
+                [_words_of(node["id"]), node.get("fallback_action", "")]
+            )
+            cases.append(
+                ToolMatchingCase(
+                    query=query,
+                    action_type=concept_node.get("action_type"),
+                    expected_tool=tool["toolName"],
+                    source=os.path.relpath(node_path, data_dir),
+                )
+            )
+
+    for tool_path in sorted(glob.glob(os.path.join(data_dir, "knowledge", "tools", "*.json"))):
+        for tool_sample in _read_json(tool_path):
+            tool = tool_sample["tool"]
+            tools_by_function.setdefault(tool["toolFunctionName"], _tool_metadata(tool))
+
+            query = (tool.get("meta") or {}).get("description_human_readable")
+            if query:
+                cases.append(
+                    ToolMatchingCase(
+                        query=query,
+                        action_type=query.split()[0],
+                        expected_tool=tool["toolName"],
+                        source=os.path.relpath(tool_path, data_dir),
+                    )
+                )
+
+    # Generic Beam Tool Samples only extend the Catalogue
+    for sample_path in sorted(glob.glob(os.path.join(data_dir, "knowledge", "examples", "*.json"))):
+        tool = _read_json(sample_path).get("sample") or {}
+        if tool.get("type") == "beam_tool":
+            tools_by_function.setdefault(tool["toolFunctionName"], _tool_metadata(tool))
+
+    return list(tools_by_function.values()), cases
+
+
+def build_distractor_tools(count: int) -> List[ToolMetadata]:
+    return [
+        ToolMetadata(
+            name=f"{DISTRACTOR_VERBS[number % len(DISTRACTOR_VERBS)]} "
+            f"{DISTRACTOR_OBJECTS[number // len(DISTRACTOR_VERBS) % len(DISTRACTOR_OBJECTS)]} "
+            f"in Integration {number}",
+            description=f"Performs action {number} of integration {number}",
+            integration_name=f"integration_{number}",
+            action_type=infer_tool_access(DISTRACTOR_VERBS[number % len(DISTRACTOR_VERBS)]),
+        )
+        for number in range(count)
+    ]
+
+
+def build_retrievers(tools: List[ToolMetadata]) -> Dict[str, Retriever]:
+    """Retriever Configurations over one Catalogue."""
+    exhaustive_prefilter = ToolPrefilter(tools=tools, min_similarity=0.0)
+    prefilter = ToolPrefilter(tools=tools)
+    all_tool_ids = list(range(len(tools)))
+
+    lsh_index = LSHIndex()
+    for tool_id, tool in enumerate(tools):
+        lsh_index.add(tool_id, embed_text(f"{tool.name} {tool.description}"))
+
+    return {
+        # Brute Force Similarity Search, the Reference for Recall
+        "exhaustive": lambda case, top_k: [
+            candidate.tool.name
+            for candidate in exhaustive_prefilter.rank(case.query, all_tool_ids, top_k=top_k)
+        ],
+        "lsh": lambda case, top_k: [
+            tools[tool_id].name
+            for tool_id, _ in lsh_index.query(embed_text(case.query), top_k=top_k)
+        ],
+        "prefilter": lambda case, top_k: [
+            candidate.tool.name
+            for candidate in prefilter.search(
+                case.query, action_type=case.action_type, top_k=top_k
+            )
+        ],
+        "prefilter_no_threshold": lambda case, top_k: [
+            candidate.tool.name
+            for candidate in exhaustive_prefilter.search(
+                case.query, action_type=case.action_type, top_k=top_k
+            )
+        ],
+    }
+
+
+def percentile(values: List[float], percent: float) -> float:
+    """Nearest-Rank Percentile."""
+    if not values:
+        return 0.0
+
+    sorted_values = sorted(values)
+    rank = math.ceil(percent / 100 * len(sorted_values))
+
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+def evaluate_retriever(
+    retriever: Retriever,
+    cases: List[ToolMatchingCase],
+    k_values: List[int] = K_VALUES,
+    repeats: int = REPEATS,
+) -> dict:
+    """
+    Recall@k & MRR of the Ranking up to the largest k, with p50 / p99 Latency per Query.
+
+    The Ranking is retrieved once at the largest k, as the local Index ranks all
+    Candidates regardless of k.
+    """
+    max_k = max(k_values)
+    hits = {top_k: 0 for top_k in k_values}
+    reciprocal_ranks = 0.0
+    latencies_ms: List[float] = []
+
+    for case in cases:
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            ranked_tools = retriever(case, max_k)
+            latencies_ms.append((time.perf_counter() - start_time) * 1000)
+
+        if case.expected_tool in ranked_tools:
+            rank = ranked_tools.index(case.expected_tool) + 1
+            reciprocal_ranks += 1 / rank
+            for top_k in k_values:
+                hits[top_k] += rank <= top_k
+
+    result = {f"recall@{top_k}": hits[top_k] / max(len(cases), 1) for top_k in k_values}
+    result["mrr"] = reciprocal_ranks / max(len(cases), 1)
+    result["p50_ms"] = percentile(latencies_ms, 50)
+    result["p99_ms"] = percentile(latencies_ms, 99)
+
+    return result
+
+
+def run_benchmark(
+    data_dir: str = DEFAULT_DATA_DIR,
+    index_paddings: List[int] = INDEX_PADDINGS,
+    k_values: List[int] = K_VALUES,
+    repeats: int = REPEATS,
+) -> List[dict]:
+    catalogue_tools, cases = load_tool_matching_dataset(data_dir)
+    results = []
+
+    for index_padding in index_paddings:
+        tools = catalogue_tools + build_distractor_tools(index_padding)
+
+        for retriever_name, retriever in build_retrievers(tools).items():
+            results.append(
+                {
+                    "retriever": retriever_name,
+                    "index_size": len(tools),
+                    "cases": len(cases),
+                    **evaluate_retriever(retriever, cases, k_values, repeats),
+                }
+            )
+
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_results = run_benchmark(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DATA_DIR)
+
+    columns = list(benchmark_results[0].keys())
+    print(" | ".join(f"{column:>22}" for column in columns))
+    for result in benchmark_results:
+        print(
+            " | ".join(
+                f"{result[column]:>22.3f}"
+                if isinstance(result[column], float)
+                else f"{result[column]:>22}"
+                for column in columns
+            )
+        )
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.lib.modules.agents.agent_setup import agent_setup_manager
+from app.lib.modules.agents.agent_setup.agent_setup_manager import AgentSetupManager
+from app.lib.modules.agents.agent_setup.models.agent_setup import AgentSetupStage
+from app.lib.modules.agents.agent_setup.stages.stage_scheduler import (
+    AgentSetupStageDefinition,
+    run_stage,
+)
+from app.lib.modules.agents.agent_setup.utils.cancellation import (
+    CancelToken,
+    SetupCancelledError,
+    gather_cancellable,
+    run_cancellable,
+)
+
+logger = logging.getLogger("app")
+
+
+def test_cancel_token_cancels_gathered_node_tasks():
+    """Tests that cancelling the Token cancels the per-Node Tasks of a running Stage"""
+    cancel_token = CancelToken()
+    cancelled_nodes = []
+
+    async def _node_call(node_id: str):
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled_nodes.append(node_id)
+            raise
+
+    async def _stage_handler(agent_setup_state):
+        await gather_cancellable(
+            *[_node_call(f"node_{index}") for index in range(5)],
+            cancel_token=agent_setup_state.cancel_token,
+            return_exceptions=True,
+        )
+        return agent_setup_state
+
+    agent_setup_state = SimpleNamespace(
+        cancel_token=cancel_token,
+        agent_setup_session=SimpleNamespace(process_instructions="Process"),
+    )
+    stage_definition = AgentSetupStageDefinition(
+        stage=AgentSetupStage.SOP_GENERATION, handler=_stage_handler
+    )
+
+    async def _run():
+        stage_run = asyncio.ensure_future(run_stage(stage_definition, agent_setup_state))
+        await asyncio.sleep(0.05)
+        cancel_token.cancel("Session abandoned")
+
+        with pytest.raises(SetupCancelledError):
+            await stage_run
+
+    start_time = time.monotonic()
+    asyncio.run(_run())
+
+    assert time.monotonic() - start_time < 5
+    assert sorted(cancelled_nodes) == [f"node_{index}" for index in range(5)]
+
+
+def test_cancelled_token_starts_no_work():
+    cancel_token = CancelToken()
+    cancel_token.cancel()
+    started = []
+
+    async def _call():
+        started.append(True)
+
+    with pytest.raises(SetupCancelledError):
+        asyncio.run(gather_cancellable(_call(), cancel_token=cancel_token))
+    assert started == []
+
+    # Without Token, Calls are gathered as usual
+    assert asyncio.run(gather_cancellable(asyncio.sleep(0, result=1))) == [1]
+
+
+def test_manager_supersedes_running_session(monkeypatch):
+    runs = []
+
+    async def _setup_agent(agent_setup, cancel_token, **kwargs):
+        runs.append(cancel_token)
+        # NOTE: Only the first Run hangs, until it is superseded
+        if len(runs) == 1:
+            await run_cancellable(asyncio.sleep(60), cancel_token)
+        return agent_setup
+
+    monkeypatch.setattr(agent_setup_manager, "setup_agent", _setup_agent)
+    manager = AgentSetupManager()
+    task = SimpleNamespace(id="session_1")
+
+    async def _run():
+        first_run = asyncio.ensure_future(manager.run_once(task, trace_config=None))
+        await asyncio.sleep(0.05)
+        assert "session_1" in manager.active_runs
+
+        assert await manager.run_once(task, trace_config=None) is task
+        with pytest.raises(SetupCancelledError):
+            await first_run
+
+    asyncio.run(_run())
+
+    assert runs[0].cancelled and not runs[1].cancelled
+    assert manager.active_runs == {}
+    assert manager.cancel_session("session_1") is False
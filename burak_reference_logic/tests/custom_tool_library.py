@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from app.lib.modules.agents.agent_setup.stages.tool_generation.custom_tool_library import (
+    CustomToolLibrary,
+    CustomToolTask,
+    StoredCustomTool,
+)
+
+logger = logging.getLogger("app")
+
+REFUND_CONTEXT = "The Customer requested a Refund of Order 4711 by Email, the Order was delivered damaged."
+
+
+def _task(node_objective: str, action_type: str = "generation", context: str = "") -> CustomToolTask:
+    return CustomToolTask(
+        task=f"Prompt Type: {action_type}\n Main objective: {node_objective}. \n Required Context: {context}",
+        action_type=action_type,
+        node_objective=node_objective,
+    )
+
+
+INVOICE_TASK = _task("Draft the Acknowledgment Email for a received Invoice.")
+
+
+def _tool(title: str) -> StoredCustomTool:
+    return StoredCustomTool(
+        title=title,
+        tool_description=f"{title} Description",
+        short_description=title,
+        prompt=f"You write the {title}.",
+    )
+
+
+def _reuse_counts(database_path: Path) -> list:
+    with sqlite3.connect(database_path) as connection:
+        return connection.execute(
+            "SELECT title, reuse_count FROM custom_tools ORDER BY id"
+        ).fetchall()
+
+
+@pytest.mark.asyncio()
+async def test_lookup_reuses_similar_tools_above_threshold(tmp_path: Path):
+    """Tests that only Tasks above the Reuse Threshold return the stored Tool"""
+    tool_library = CustomToolLibrary(database_path=str(tmp_path / "tools.db"))
+
+    assert await tool_library.lookup(INVOICE_TASK) is None
+
+    await tool_library.add(INVOICE_TASK, _tool("Acknowledgment Email"))
+
+    # Whitespace & Case do not change the Task Embedding
+    tool_match = await tool_library.lookup(
+        _task("DRAFT the  Acknowledgment Email for a received Invoice.", context="Other Context")
+    )
+    assert tool_match is not None
+    assert tool_match.tool.title == "Acknowledgment Email"
+    assert tool_match.similarity == pytest.approx(1.0, abs=1e-5)
+
+    assert await tool_library.lookup(_task("Extract the Line Items of a Purchase Order.", "extraction")) is None
+
+
+@pytest.mark.asyncio()
+async def test_tasks_sharing_context_with_other_actions_are_not_reused(tmp_path: Path):
+    """Tests that the shared Context does not make Tasks with different Actions match"""
+    tool_library = CustomToolLibrary(database_path=str(tmp_path / "tools.db"))
+    await tool_library.add(
+        _task("Draft the Email approving the Refund Request", context=REFUND_CONTEXT),
+        _tool("Refund Approval Email"),
+    )
+
+    assert await tool_library.lookup(
+        _task("Draft the Email rejecting the Refund Request", context=REFUND_CONTEXT)
+    ) is None
+    # The same Objective with another Action Type is not reused either
+    assert await tool_library.lookup(
+        _task("Draft the Email approving the Refund Request", "classification", REFUND_CONTEXT)
+    ) is None
+
+
+@pytest.mark.asyncio()
+async def test_library_persists_tools_and_batches_reuse_counts(tmp_path: Path):
+    database_path = tmp_path / "tools.db"
+    tool_library = CustomToolLibrary(database_path=str(database_path))
+    await tool_library.add_many(
+        [(INVOICE_TASK, _tool("Acknowledgment Email")), (INVOICE_TASK, _tool("Duplicate"))]
+    )
+
+    # A new Library (e.g. after a Worker Restart) loads the stored Tools into its Index
+    reloaded_library = CustomToolLibrary(database_path=str(database_path))
+    await reloaded_library.load()
+    tool_matches = await reloaded_library.lookup_many(
+        [INVOICE_TASK, INVOICE_TASK, _task("Unknown Task")]
+    )
+
+    assert [match.tool.title if match else None for match in tool_matches] == [
+        "Acknowledgment Email",
+        "Acknowledgment Email",
+        None,
+    ]
+    assert _reuse_counts(database_path) == [("Acknowledgment Email", 2)]
+
+
+@pytest.mark.asyncio()
+async def test_index_is_built_off_the_event_loop(tmp_path: Path):
+    database_path = str(tmp_path / "tools.db")
+    await CustomToolLibrary(database_path=database_path).add_many(
+        [
+            (_task(f"Draft the Acknowledgment Email Variant {index}"), _tool(f"Tool {index}"))
+            for index in range(300)
+        ]
+    )
+    tool_library = CustomToolLibrary(database_path=database_path)
+    ticks = []
+
+    async def _ticker():
+        while True:
+            ticks.append(True)
+            await asyncio.sleep(0.001)
+
+    ticker = asyncio.ensure_future(_ticker())
+    await tool_library.lookup(INVOICE_TASK)
+    ticker.cancel()
+
+    # The Event Loop kept running while the Index of 300 Tools was built
+    assert len(ticks) > 1
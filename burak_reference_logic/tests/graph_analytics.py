@@ -0,0 +1,98 @@
+import csv
+import json
+import logging
+from pathlib import Path
+
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_analytics import (
+    summarize_graph,
+    summarize_graph_files,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_display_utils import (
+    generate_graph_summary,
+)
+
+logger = logging.getLogger("app")
+
+
+def _linear_graph(graph_id: str, node_count: int) -> dict:
+    return {
+        "graph_id": graph_id,
+        "nodes": [
+            {"id": f"step_{index}", "type": "tool" if index % 2 else "process"}
+            for index in range(node_count)
+        ],
+        "edges": [
+            {"from": f"step_{index}", "to": f"step_{index + 1}"}
+            for index in range(node_count - 1)
+        ],
+    }
+
+
+def test_summarize_graph():
+    """Tests the Summary Row of a Graph with a Branch, a Merge & a Retry Loop"""
+    graph = {
+        "graph_id": "support-graph",
+        "nodes": [
+            {"id": "receive", "type": "trigger"},
+            {"id": "classify", "type": "decision"},
+            {"id": "reply", "type": "ai_agent"},
+            {"id": "escalate", "type": "human_loop"},
+            {"id": "close", "type": "end"},
+        ],
+        "edges": [
+            {"from": "receive", "to": "classify"},
+            {"from": "classify", "to": "reply"},
+            {"from": "classify", "to": "escalate"},
+            {"from": "reply", "to": "close"},
+            {"from": "escalate", "to": "close"},
+            {"from": "escalate", "to": "escalate"},
+        ],
+    }
+
+    summary_row = summarize_graph(graph, source="support-graph.json")
+
+    assert summary_row["node_count"] == 5
+    assert summary_row["max_depth"] == 4
+    assert summary_row["branch_nodes"] == 2
+    assert summary_row["merge_nodes"] == 2
+    assert summary_row["has_cycles"] is True
+    assert json.loads(summary_row["node_types"])["decision"] == 1
+
+
+def test_summary_row_matches_the_graph_summary():
+    """Tests that the Analytics count a Graph like the Graph Summary"""
+    graph = _linear_graph("linear-graph", 6)
+
+    summary_row = summarize_graph(graph)
+    complexity = generate_graph_summary(graph)["complexity"]
+
+    assert summary_row["node_count"] == complexity["total_nodes"] == 6
+    assert summary_row["edge_count"] == complexity["total_edges"] == 5
+    assert summary_row["complexity_ratio"] == complexity["complexity_ratio"]
+    assert json.loads(summary_row["node_types"]) == complexity["node_types"]
+
+
+def test_summarize_graph_files(tmp_path: Path):
+    """Tests the Batch Summary of JSON & JSONL Graph Files into a CSV Table"""
+    (tmp_path / "single_graph.json").write_text(json.dumps(_linear_graph("single", 4)))
+    (tmp_path / "broken_graph.json").write_text("{not json")
+    (tmp_path / "fleet.jsonl").write_text(
+        "\n".join(json.dumps(_linear_graph(f"fleet-{index}", 10)) for index in range(50))
+    )
+
+    report = summarize_graph_files(
+        sorted(tmp_path.glob("*.json*")),
+        output_path=tmp_path / "graph_summary.csv",
+        max_workers=2,
+        batch_size=1,
+    )
+
+    with open(report.output_path, newline="") as summary_file:
+        summary_rows = list(csv.DictReader(summary_file))
+
+    assert report.graph_count == 52
+    assert report.failed_count == 1
+    assert len(summary_rows) == 52
+    assert {row["max_depth"] for row in summary_rows if row["graph_id"].startswith("fleet")} == {
+        "10"
+    }
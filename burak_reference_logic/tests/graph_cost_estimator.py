@@ -0,0 +1,144 @@
+import logging
+import math
+import time
+from types import SimpleNamespace
+
+from app.lib.modules.agents.agent_setup.stages.graph_generation import graph_display_utils
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_cost_estimator import (
+    estimate_graph_cost,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_display_utils import (
+    generate_graph_summary,
+)
+
+logger = logging.getLogger("app")
+
+ESCALATION_GRAPH = {
+    "name": "Ticket Escalation",
+    "nodes": [
+        {"id": "receive_ticket", "type": "trigger"},
+        {"id": "assess_severity", "type": "decision"},
+        {"id": "draft_reply", "type": "process"},
+        {"id": "investigate", "type": "ai_agent"},
+        {"id": "close_ticket", "type": "end"},
+    ],
+    "edges": [
+        {"from": "receive_ticket", "to": "assess_severity"},
+        {
+            "from": "assess_severity",
+            "to": "draft_reply",
+            "condition": {"description": "Minor Issue", "probability": 0.8},
+        },
+        {
+            "from": "assess_severity",
+            "to": "investigate",
+            "condition": {"description": "Major Issue", "probability": 0.2},
+        },
+        {"from": "draft_reply", "to": "close_ticket"},
+        {"from": "investigate", "to": "close_ticket"},
+    ],
+}
+
+
+def test_estimate_branch_weighted_cost():
+    """Tests that exclusive Branches are weighted by their Probability"""
+    estimate = estimate_graph_cost(ESCALATION_GRAPH)
+
+    # Decision 2s, then 80% Reply (3s, 1 Call) or 20% Investigation (12s, 4 Calls)
+    assert math.isclose(estimate.expected_latency_seconds, 2 + 0.8 * 3 + 0.2 * 12)
+    assert math.isclose(estimate.expected_llm_calls, 1 + 0.8 * 1 + 0.2 * 4)
+    assert estimate.p95_latency_seconds > estimate.expected_latency_seconds
+    assert estimate.critical_path == [
+        "receive_ticket",
+        "assess_severity",
+        "investigate",
+        "close_ticket",
+    ]
+    assert estimate.execution_probabilities["close_ticket"] == 1.0
+
+    summary = generate_graph_summary(ESCALATION_GRAPH)
+    assert summary["performance"]["expected_llm_calls"] == 2.6
+
+
+def test_summary_omits_performance_when_estimate_fails(monkeypatch):
+    def _failing_estimate(graph):
+        raise ValueError("Malformed Branch Probability")
+
+    monkeypatch.setattr(graph_display_utils, "estimate_graph_cost", _failing_estimate)
+
+    summary = generate_graph_summary(ESCALATION_GRAPH)
+    assert "performance" not in summary
+    assert summary["complexity"]["total_nodes"] == len(ESCALATION_GRAPH["nodes"])
+
+
+def test_single_node_reproduces_profile():
+    graph = {
+        "nodes": [{"id": "start", "type": "trigger"}, {"id": "work", "type": "process"}],
+        "edges": [{"from": "start", "to": "work"}],
+    }
+
+    estimate = estimate_graph_cost(graph)
+    assert math.isclose(estimate.expected_latency_seconds, 3.0)
+    assert math.isclose(estimate.p95_latency_seconds, 8.0, rel_tol=1e-3)
+
+
+def test_agent_graph_with_parallel_branches_and_loop():
+    """Tests parallel Fan-outs, Tool Overrides & Loops of a nested Agent Graph"""
+    agent_graph = {
+        "graph": {
+            "nodes": [
+                {"id": "read_email", "nodes": ["lookup_crm", "summarize"], "isEntryNode": True},
+                {
+                    "id": "lookup_crm",
+                    "nodes": ["reply"],
+                    "toolConfiguration": {"originalTool": {"toolName": "CRM Lookup"}},
+                },
+                {"id": "summarize", "nodes": ["reply"]},
+                {"id": "reply", "nodes": ["read_email"], "isExitNode": True},
+            ]
+        }
+    }
+    tools = [
+        SimpleNamespace(
+            node_id="summarize", tool_type="prompt", action_type="Summarization"
+        )
+    ]
+
+    estimate = estimate_graph_cost(agent_graph, tools=tools)
+
+    assert estimate.has_cycles
+    # Trigger, slower parallel Branch (Summarization 5s), Reply (Prompt 4s)
+    assert math.isclose(estimate.expected_latency_seconds, 5 + 4)
+    assert estimate.critical_path == ["read_email", "summarize", "reply"]
+    # Both parallel Branches run, the Loop back to the Entry is counted once
+    assert math.isclose(estimate.expected_llm_calls, 3)
+
+
+def test_estimate_large_graph():
+    nodes, edges = [{"id": "start", "type": "trigger"}], []
+    previous_id = "start"
+
+    for decision in range(3000):
+        decision_id, merge_id = f"decision_{decision}", f"merge_{decision}"
+        nodes += [
+            {"id": decision_id, "type": "decision"},
+            {"id": f"yes_{decision}", "type": "tool"},
+            {"id": f"no_{decision}", "type": "process"},
+            {"id": merge_id, "type": "merge"},
+        ]
+        edges += [
+            {"from": previous_id, "to": decision_id},
+            {"from": decision_id, "to": f"yes_{decision}", "condition": "Yes"},
+            {"from": decision_id, "to": f"no_{decision}", "condition": "No"},
+            {"from": f"yes_{decision}", "to": merge_id},
+            {"from": f"no_{decision}", "to": merge_id},
+        ]
+        previous_id = merge_id
+
+    start_time = time.perf_counter()
+    estimate = estimate_graph_cost({"nodes": nodes, "edges": edges})
+    duration = time.perf_counter() - start_time
+    logger.info(f"Estimated {len(nodes)} Nodes in {duration:.2f}s")
+
+    assert math.isclose(estimate.expected_llm_calls, 3000 * 2)
+    assert duration < 5
@@ -0,0 +1,151 @@
+import logging
+import time
+
+from app.lib.modules.agents.agent_setup.stages.graph_generation import graph_display_utils
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_criticality import (
+    CriticalityLevel,
+    analyze_graph_criticality,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_display_utils import (
+    generate_enhanced_mermaid_graph,
+    generate_graph_summary,
+)
+
+logger = logging.getLogger("app")
+
+REFUND_GRAPH = {
+    "name": "Refund Request",
+    "nodes": [
+        {"id": "receive_request", "type": "trigger", "name": "Receive Request"},
+        {"id": "lookup_order", "type": "tool", "name": "Lookup Order"},
+        {"id": "check_policy", "type": "decision", "name": "Check Policy"},
+        {"id": "approve_refund", "type": "process", "name": "Approve Refund"},
+        {"id": "issue_refund", "type": "tool", "name": "Issue Refund"},
+        {"id": "notify_finance", "type": "process", "name": "Notify Finance"},
+        # NOTE: Marked by the LLM, but not critical for the Structure of the Graph
+        {
+            "id": "reject_refund",
+            "type": "process",
+            "name": "Reject Refund",
+            "performance": {"criticality": "critical"},
+        },
+        {"id": "send_reply", "type": "process", "name": "Send Reply"},
+        {"id": "done", "type": "end", "name": "Done"},
+    ],
+    "edges": [
+        {"from": "receive_request", "to": "lookup_order"},
+        {"from": "lookup_order", "to": "check_policy"},
+        {"from": "check_policy", "to": "approve_refund"},
+        {"from": "approve_refund", "to": "issue_refund"},
+        {"from": "issue_refund", "to": "notify_finance"},
+        {"from": "notify_finance", "to": "send_reply"},
+        {"from": "check_policy", "to": "reject_refund"},
+        {"from": "reject_refund", "to": "send_reply"},
+        {"from": "send_reply", "to": "done"},
+    ],
+}
+
+
+def test_analyze_graph_criticality():
+    """Tests the structurally critical Nodes & Blast Radii of a branching Graph"""
+    criticality = analyze_graph_criticality(REFUND_GRAPH)
+
+    structurally_critical = [
+        node_id
+        for node_id, node in criticality.nodes.items()
+        if node.is_structurally_critical
+    ]
+    assert structurally_critical == ["lookup_order", "check_policy", "send_reply"]
+
+    assert criticality.nodes["check_policy"].blast_radius == 6
+    assert criticality.nodes["approve_refund"].blast_radius == 2
+    assert criticality.nodes["approve_refund"].level == CriticalityLevel.HIGH
+    assert criticality.nodes["reject_refund"].blast_radius == 0
+    assert criticality.nodes["reject_refund"].level == CriticalityLevel.NORMAL
+    # Every Path of both Branches reaches the Exit through the Reply
+    assert criticality.nodes["send_reply"].post_dominated_count == 7
+
+    # NOTE: Entry & Exit Nodes lie on every Path by Definition
+    assert criticality.nodes["receive_request"].level == CriticalityLevel.NORMAL
+    assert criticality.nodes["done"].level == CriticalityLevel.NORMAL
+
+
+def test_summary_and_styling_use_analysis():
+    summary = generate_graph_summary(REFUND_GRAPH)
+    assert summary["structure"]["critical_nodes"] == [
+        "lookup_order",
+        "check_policy",
+        "approve_refund",
+        "send_reply",
+    ]
+    assert summary["structure"]["blast_radius"]["check_policy"] == 6
+
+    mermaid_graph = generate_enhanced_mermaid_graph(REFUND_GRAPH)
+    assert "    class check_policy criticalStyle" in mermaid_graph
+    assert "    class reject_refund criticalStyle" not in mermaid_graph
+    assert 'approve_refund["Approve Refund ⭐"]' in mermaid_graph
+
+
+def test_summary_falls_back_when_analysis_fails(monkeypatch):
+    """Tests that a failing Analysis falls back to the manual Criticality Field"""
+
+    def _failing_analysis(graph):
+        raise ValueError("Malformed Graph")
+
+    monkeypatch.setattr(graph_display_utils, "analyze_graph_criticality", _failing_analysis)
+
+    summary = generate_graph_summary(REFUND_GRAPH)
+    assert summary["structure"]["critical_nodes"] == ["reject_refund"]
+    assert summary["structure"]["blast_radius"] == {}
+
+
+def test_multiple_entries_and_unreachable_nodes():
+    graph = {
+        "nodes": [
+            {"id": "email", "type": "trigger"},
+            {"id": "chat", "type": "trigger"},
+            {"id": "triage", "type": "process"},
+            {"id": "orphan", "type": "process"},
+            {"id": "end", "type": "end"},
+        ],
+        "edges": [
+            {"from": "email", "to": "triage"},
+            {"from": "chat", "to": "triage"},
+            {"from": "triage", "to": "end"},
+        ],
+    }
+
+    criticality = analyze_graph_criticality(graph)
+    assert criticality.nodes["triage"].is_structurally_critical
+    assert criticality.nodes["orphan"].blast_radius == 0
+    assert criticality.nodes["orphan"].level == CriticalityLevel.NORMAL
+
+
+def test_criticality_of_large_graph():
+    """Tests that a Chain of 5000 Diamonds is analysed in near linear Time"""
+    nodes, edges = [{"id": "start", "type": "trigger"}], []
+    previous_id = "start"
+
+    for diamond in range(5000):
+        left_id, right_id, merge_id = f"left_{diamond}", f"right_{diamond}", f"merge_{diamond}"
+        nodes += [{"id": left_id}, {"id": right_id}, {"id": merge_id}]
+        edges += [
+            {"from": previous_id, "to": left_id},
+            {"from": previous_id, "to": right_id},
+            {"from": left_id, "to": merge_id},
+            {"from": right_id, "to": merge_id},
+        ]
+        previous_id = merge_id
+
+    nodes.append({"id": "end", "type": "end"})
+    edges.append({"from": previous_id, "to": "end"})
+
+    start_time = time.perf_counter()
+    criticality = analyze_graph_criticality({"nodes": nodes, "edges": edges})
+    duration = time.perf_counter() - start_time
+    logger.info(f"Analysed Criticality of {len(nodes)} Nodes in {duration:.2f}s")
+
+    assert criticality.nodes["merge_0"].is_structurally_critical
+    assert not criticality.nodes["left_0"].is_structurally_critical
+    assert criticality.nodes["merge_0"].blast_radius == len(nodes) - 4
+    assert duration < 5
@@ -0,0 +1,110 @@
+import asyncio
+import base64
+import io
+import json
+import logging
+import xml.etree.ElementTree as ElementTree
+
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_display_utils import (
+    generate_enhanced_mermaid_graph,
+    generate_mermaid_live_link,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_export import (
+    DiagramFormat,
+    emit_diagram,
+    emit_mermaid_live_link,
+    write_diagram,
+    write_diagram_async,
+)
+
+logger = logging.getLogger("app")
+
+SUPPORT_GRAPH = {
+    "name": "Customer Support",
+    "nodes": [
+        {"id": "receive_email", "type": "trigger", "name": "Receive \"Support\" Email"},
+        {
+            "id": "classify_issue",
+            "type": "decision",
+            "name": "Classify Issue",
+            "performance": {"criticality": "critical"},
+        },
+        {"id": "create_ticket", "type": "tool", "name": "Create Ticket ✅"},
+        {"id": "close_ticket", "type": "end", "name": "Close Ticket"},
+    ],
+    "edges": [
+        {"from": "receive_email", "to": "classify_issue"},
+        {
+            "from": "classify_issue",
+            "to": "create_ticket",
+            "condition": {"type": "conditional", "description": "Issue is a Bug"},
+        },
+        {"from": "classify_issue", "to": "close_ticket", "condition": "Otherwise"},
+        {"from": "create_ticket", "to": "close_ticket"},
+    ],
+}
+
+
+class _AsyncStream:
+    def __init__(self):
+        self.chunks = []
+        self.drains = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.chunks.append(chunk)
+
+    async def drain(self) -> None:
+        self.drains += 1
+
+
+def test_streamed_mermaid_matches_enhanced_mermaid():
+    """Tests that the streamed Mermaid Diagram & Live Link equal the joined Versions"""
+    output = io.StringIO()
+    write_diagram(emit_diagram(SUPPORT_GRAPH, DiagramFormat.MERMAID), output)
+
+    mermaid_graph = generate_enhanced_mermaid_graph(SUPPORT_GRAPH)
+    assert output.getvalue() == mermaid_graph
+
+    live_link = "".join(emit_mermaid_live_link(SUPPORT_GRAPH))
+    assert live_link == generate_mermaid_live_link(mermaid_graph)
+
+    encoded_document = live_link.split("#base64:", 1)[1]
+    assert json.loads(base64.b64decode(encoded_document))["code"] == mermaid_graph
+
+
+def test_export_dot_and_graphml():
+    """Tests the DOT & GraphML Exports of a nested Agent Graph"""
+    agent_graph = {
+        "graph": {
+            "nodes": [
+                {"id": "read_email", "nodes": ["lookup_customer"], "isEntryNode": True},
+                {
+                    "id": "lookup_customer",
+                    "nodes": [],
+                    "isExitNode": True,
+                    "condition": "Customer exists",
+                },
+            ]
+        }
+    }
+
+    dot_diagram = "".join(emit_diagram(agent_graph, DiagramFormat.DOT))
+    assert '"read_email" -> "lookup_customer" [label="Customer exists"];' in dot_diagram
+
+    graphml_root = ElementTree.fromstring(
+        "".join(emit_diagram(agent_graph, DiagramFormat.GRAPHML))
+    )
+    namespace = {"graphml": "http://graphml.graphdrawing.org/xmlns"}
+    assert len(graphml_root.findall(".//graphml:node", namespace)) == 2
+    assert len(graphml_root.findall(".//graphml:edge", namespace)) == 1
+
+
+def test_write_diagram_async():
+    stream = _AsyncStream()
+    written_characters = asyncio.run(
+        write_diagram_async(emit_diagram(SUPPORT_GRAPH, DiagramFormat.DOT), stream)
+    )
+
+    assert b"".join(stream.chunks).decode().startswith('digraph "Customer Support"')
+    assert written_characters == len(b"".join(stream.chunks).decode())
+    assert stream.drains == len(stream.chunks)
@@ -0,0 +1,99 @@
+import logging
+import time
+from typing import Any, Dict
+
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_layout import (
+    GraphLayoutConfig,
+    apply_graph_layout,
+)
+
+logger = logging.getLogger("app")
+
+
+def _branching_graph(node_count: int) -> Dict[str, Any]:
+    # Every Node branches into 3 Children, Leaves merge back into a shared End Node
+    nodes = [{"id": f"step_{index}", "type": "process"} for index in range(node_count)]
+    edges = [
+        {"from": f"step_{(index - 1) // 3}", "to": f"step_{index}"}
+        for index in range(1, node_count)
+    ]
+    edges += [
+        {"from": f"step_{index}", "to": f"step_{node_count - 1}"}
+        for index in range(node_count // 2, node_count - 1, 7)
+    ]
+
+    return {"nodes": nodes, "edges": edges}
+
+
+def test_layout_agent_graph_nodes():
+    """Tests that every nested Agent Graph Node gets Coordinates, Children below their Parents"""
+    agent_graph = {
+        "graph": {
+            "nodes": [
+                {"id": "read_email", "nodes": ["classify"], "isEntryNode": True},
+                {"id": "classify", "nodes": ["create_ticket", "escalate"]},
+                {"id": "create_ticket", "nodes": ["read_email"], "isExitNode": True},
+                {"id": "escalate", "nodes": [], "isExitNode": True},
+            ]
+        }
+    }
+
+    graph_layout = apply_graph_layout(agent_graph)
+    nodes = {node["id"]: node for node in agent_graph["graph"]["nodes"]}
+
+    assert graph_layout.reversed_edges == [("create_ticket", "read_email")]
+    assert nodes["read_email"]["yCoordinate"] < nodes["classify"]["yCoordinate"]
+    assert nodes["classify"]["yCoordinate"] < nodes["escalate"]["yCoordinate"]
+    assert nodes["create_ticket"]["yCoordinate"] == nodes["escalate"]["yCoordinate"]
+    assert (
+        abs(nodes["create_ticket"]["xCoordinate"] - nodes["escalate"]["xCoordinate"])
+        >= GraphLayoutConfig().node_spacing
+    )
+
+
+def test_layout_large_graph():
+    """Tests the Layout of a 1000 Node Graph, Nodes of a Layer must not overlap"""
+    graph = _branching_graph(1000)
+
+    start_time = time.perf_counter()
+    graph_layout = apply_graph_layout(graph)
+    layout_seconds = time.perf_counter() - start_time
+
+    logger.info(f"Layout of 1000 Nodes took {layout_seconds:.3f}s")
+    assert layout_seconds < 1
+    assert len(graph_layout.positions) == 1000
+
+    layers: Dict[int, list] = {}
+    for node in graph["nodes"]:
+        layers.setdefault(node["yCoordinate"], []).append(node["xCoordinate"])
+
+    for x_coordinates in layers.values():
+        x_coordinates.sort()
+        assert all(
+            right - left >= GraphLayoutConfig().node_spacing - 1
+            for left, right in zip(x_coordinates, x_coordinates[1:])
+        )
+
+
+def test_layout_long_edges_into_shared_sink():
+    """Tests that Long Edges of a 1000 Node Chain into one Escalation Node share their Dummy Nodes"""
+    nodes = [{"id": f"step_{index}", "type": "process"} for index in range(1000)]
+    nodes.append({"id": "escalate", "type": "end"})
+    edges = [
+        {"from": f"step_{index - 1}", "to": f"step_{index}"} for index in range(1, 1000)
+    ]
+    edges += [{"from": f"step_{index}", "to": "escalate"} for index in range(1000)]
+    graph = {"nodes": nodes, "edges": edges}
+
+    start_time = time.perf_counter()
+    graph_layout = apply_graph_layout(graph)
+    layout_seconds = time.perf_counter() - start_time
+
+    logger.info(f"Layout of 1000 Edges into a shared Sink took {layout_seconds:.3f}s")
+    assert layout_seconds < 1
+    assert graph_layout.layer_count == 1001
+    assert graph_layout.positions["escalate"][1] > graph_layout.positions["step_999"][1]
+
+
+def test_layout_unknown_graph_format():
+    assert apply_graph_layout({"workflow": []}) is None
@@ -0,0 +1,96 @@
+import logging
+import re
+
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_dominators import (
+    compute_immediate_dominators,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_level_of_detail import (
+    ClusterStrategy,
+    generate_cluster_mermaid,
+    generate_level_of_detail_mermaid,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_structure import (
+    build_graph_structure,
+)
+
+logger = logging.getLogger("app")
+
+
+def _decision_tree_graph(decision_count: int, branch_length: int) -> dict:
+    # A Chain of Decisions, each Decision branches into two Paths merging again
+    nodes, edges = [{"id": "start", "type": "trigger", "name": "Start"}], []
+    previous_id = "start"
+
+    for decision in range(decision_count):
+        decision_id = f"decision_{decision}"
+        merge_id = f"merge_{decision}"
+        nodes += [
+            {"id": decision_id, "type": "decision", "name": f"Decision {decision}"},
+            {"id": merge_id, "type": "merge", "name": f"Merge {decision}"},
+        ]
+        edges.append({"from": previous_id, "to": decision_id})
+
+        for branch in ("approve", "reject"):
+            branch_previous_id = decision_id
+            for step in range(branch_length):
+                step_id = f"{branch}_{decision}_{step}"
+                nodes.append({"id": step_id, "type": "process", "name": step_id})
+                edges.append({"from": branch_previous_id, "to": step_id})
+                branch_previous_id = step_id
+            edges.append({"from": branch_previous_id, "to": merge_id})
+
+        previous_id = merge_id
+
+    return {"name": "Approval Workflow", "nodes": nodes, "edges": edges}
+
+
+def _count_rendered_nodes(mermaid_diagram: str) -> int:
+    return len(re.findall(r'^\s+\w+[\[\(\{>]+"', mermaid_diagram, flags=re.MULTILINE))
+
+
+def test_immediate_dominators():
+    """Tests that Merge Nodes are dominated by their Decision, not by either Branch"""
+    structure = build_graph_structure(_decision_tree_graph(2, 2))
+    immediate_dominators = compute_immediate_dominators(structure)
+
+    assert immediate_dominators["start"] is None
+    assert immediate_dominators["merge_0"] == "decision_0"
+    assert immediate_dominators["approve_0_1"] == "approve_0_0"
+    assert immediate_dominators["decision_1"] == "merge_0"
+
+
+def test_level_of_detail_within_budget():
+    """Tests that the Overview & every Cluster Diagram stay within the Node Budget"""
+    graph = _decision_tree_graph(40, 10)
+    node_budget = 60
+
+    for strategy in (ClusterStrategy.BRANCH, ClusterStrategy.DOMINATOR):
+        level_of_detail = generate_level_of_detail_mermaid(
+            graph, node_budget=node_budget, strategy=strategy
+        )
+
+        assert _count_rendered_nodes(level_of_detail.overview_diagram) <= node_budget
+        assert sum(len(cluster.node_ids) for cluster in level_of_detail.clusters) == len(
+            graph["nodes"]
+        )
+
+        for cluster in level_of_detail.clusters:
+            cluster_diagram = generate_cluster_mermaid(
+                graph, level_of_detail, cluster.cluster_id
+            )
+            assert _count_rendered_nodes(cluster_diagram) <= 2 * node_budget
+
+
+def test_level_of_detail_by_section():
+    """Tests the Clustering by SOP Section"""
+    graph = _decision_tree_graph(10, 5)
+    for node in graph["nodes"]:
+        node["sop_section"] = "Review" if node["id"].startswith("reject") else "Approval"
+
+    level_of_detail = generate_level_of_detail_mermaid(graph, node_budget=80)
+
+    assert level_of_detail.strategy == ClusterStrategy.SECTION
+    assert [cluster.label for cluster in level_of_detail.clusters] == [
+        "Approval",
+        "Review",
+    ]
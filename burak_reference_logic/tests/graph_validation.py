@@ -0,0 +1,141 @@
+import logging
+import time
+
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_validation import (
+    GraphValidationIssueType,
+    validate_workflow_graph,
+)
+from app.lib.modules.graphs.agent_graph.graph_creation.strategies.multi_node.generate_graph_pydantic import (
+    GeneratedGraph,
+    GeneratedNode,
+)
+
+logger = logging.getLogger("app")
+
+
+def test_validate_display_graph():
+    """Tests the Detection of Structural Defects in a Display Graph"""
+    graph = {
+        "nodes": [
+            {"id": "receive_email", "type": "trigger"},
+            {"id": "classify_issue", "type": "decision"},
+            {"id": "create_ticket", "type": "tool"},
+            {"id": "draft_reply", "type": "ai_agent"},
+            {"id": "archive_email", "type": "process"},
+            {"id": "close_ticket", "type": "end"},
+        ],
+        "edges": [
+            {"from": "receive_email", "to": "classify_issue"},
+            {"from": "classify_issue", "to": "create_ticket"},
+            {"from": "classify_issue", "to": "draft_reply"},
+            {"from": "create_ticket", "to": "close_ticket"},
+            {"from": "create_ticket", "to": "notify_team"},
+            {"from": "archive_email", "to": "close_ticket"},
+        ],
+    }
+
+    validation_result = validate_workflow_graph(graph)
+
+    assert not validation_result.is_valid
+    assert [
+        issue.target_id
+        for issue in validation_result.get_issues(
+            GraphValidationIssueType.UNKNOWN_EDGE_TARGET
+        )
+    ] == ["notify_team"]
+    assert [
+        issue.node_id
+        for issue in validation_result.get_issues(GraphValidationIssueType.DEAD_END)
+    ] == ["draft_reply"]
+    assert [
+        issue.node_id
+        for issue in validation_result.get_issues(
+            GraphValidationIssueType.UNREACHABLE_NODE
+        )
+    ] == ["archive_email"]
+
+
+def test_validate_agent_graph():
+    """Tests the nested Agent Graph Format, including Entry Nodes trapped in a Loop"""
+    agent_graph = {
+        "graph": {
+            "nodes": [
+                {"id": "read_email", "nodes": ["lookup_customer"], "isEntryNode": True},
+                {"id": "lookup_customer", "nodes": ["read_email"]},
+                {"id": "send_reply", "nodes": [], "isExitNode": True},
+                {
+                    "id": "update_crm",
+                    "nodes": ["send_reply"],
+                    "parentAgentGraphNodeId": "deleted_node",
+                },
+            ]
+        }
+    }
+
+    validation_result = validate_workflow_graph(agent_graph)
+    issue_types = {issue.issue_type for issue in validation_result.issues}
+
+    assert validation_result.entry_nodes == ["read_email"]
+    assert issue_types == {
+        GraphValidationIssueType.ENTRY_CANNOT_REACH_EXIT,
+        GraphValidationIssueType.NO_PATH_TO_EXIT,
+        GraphValidationIssueType.UNKNOWN_PARENT_NODE,
+        GraphValidationIssueType.UNREACHABLE_NODE,
+    }
+
+
+def test_validate_generated_graph():
+    """Tests that Generated Graphs are validated along the Links of their Steps"""
+    generated_graph = GeneratedGraph(
+        workflow_graph=[
+            GeneratedNode(
+                node_id=node_id,
+                tool_category="prompt",
+                action_type="generation",
+                node_objective=f"Objective of {node_id}",
+                node_context="",
+            )
+            for node_id in ["read_invoice", "extract_line_items", "send_confirmation"]
+        ]
+    )
+
+    # NOTE: Steps without Links have no Structure, their Order is not taken for Edges
+    assert validate_workflow_graph(generated_graph.model_dump()) is None
+
+    linked_graph = generated_graph.model_dump()
+    read_invoice, extract_line_items, send_confirmation = linked_graph["workflow_graph"]
+    read_invoice["branches"] = [
+        {"node_id": "extract_line_items", "condition": "Invoice is readable"},
+        {"node_id": "send_confirmation", "condition": "Invoice is unreadable"},
+    ]
+    extract_line_items["successors"] = ["send_confirmation"]
+    send_confirmation["successors"] = []
+
+    validation_result = validate_workflow_graph(linked_graph)
+
+    assert validation_result.is_valid
+    assert validation_result.score == 100
+    assert validation_result.node_count == 3
+    assert validation_result.edge_count == 3
+    assert validation_result.entry_nodes == ["read_invoice"]
+    assert validation_result.exit_nodes == ["send_confirmation"]
+
+
+def test_validate_large_graph():
+    """Tests that Validation stays linear for large valid Graphs"""
+    graph = {
+        "nodes": [{"id": f"step_{index}"} for index in range(10000)],
+        "edges": [
+            {"from": f"step_{index}", "to": f"step_{index + 1}"}
+            for index in range(9999)
+        ],
+    }
+
+    start_time = time.perf_counter()
+    validation_result = validate_workflow_graph(graph)
+    validation_seconds = time.perf_counter() - start_time
+
+    logger.info(f"Validation of 10000 Nodes took {validation_seconds:.3f}s")
+    assert validation_result.is_valid
+    assert validation_result.score == 100
+    assert validation_seconds < 1
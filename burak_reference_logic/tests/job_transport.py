@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.lib.modules.agents.agent_setup.agent_setup_manager import AgentSetupManager
+from app.lib.modules.agents.agent_setup.models.agent_setup import AgentSetupStatus
+from app.lib.modules.agents.agent_setup.utils.job_transport import (
+    InMemoryBroker,
+    JobTransport,
+)
+
+logger = logging.getLogger("app")
+
+
+def test_jobs_of_a_session_are_delivered_in_order():
+    """Tests that pipelined Batches keep the Publishing Order of each Session"""
+    broker = InMemoryBroker(round_trip_latency=0.01)
+    transport = JobTransport(broker, max_batch_size=7, max_in_flight_batches=8)
+    sessions = [f"session_{index}" for index in range(5)]
+
+    async def _run():
+        deliveries = [
+            transport.publish((session_id, sequence), ordering_key=session_id)
+            for sequence in range(50)
+            for session_id in sessions
+        ]
+        await transport.flush()
+        assert all(delivery.done() for delivery in deliveries)
+
+        return {
+            session_id: [broker.queues[session_id].get_nowait() for _ in range(50)]
+            for session_id in sessions
+        }
+
+    delivered = asyncio.run(_run())
+
+    for session_id in sessions:
+        assert delivered[session_id] == [(session_id, sequence) for sequence in range(50)]
+    assert transport.metrics.published_jobs == 250
+    assert transport.metrics.max_batch_size == 7
+
+
+def test_batches_reduce_round_trips():
+    broker = InMemoryBroker(round_trip_latency=0.005)
+    transport = JobTransport(broker, max_batch_size=100, max_in_flight_batches=4)
+
+    async def _run():
+        for index in range(1000):
+            transport.publish(index, ordering_key=f"session_{index % 20}")
+            # Publishers yield between Jobs, the Flush Interval collects them
+            if index % 50 == 0:
+                await asyncio.sleep(0)
+        await transport.close()
+
+    start_time = time.monotonic()
+    asyncio.run(_run())
+    elapsed = time.monotonic() - start_time
+
+    # One Round Trip per Job would take at least 5 Seconds
+    assert broker.round_trips <= 20
+    assert elapsed < 1
+    assert len(broker.published) == 1000
+
+
+def test_failed_batch_fails_its_deliveries():
+    class _FailingBroker(InMemoryBroker):
+        async def publish_batch(self, jobs):
+            if any(outgoing_job.job == "poison" for outgoing_job in jobs):
+                raise ConnectionError("Broker unavailable")
+            await super().publish_batch(jobs)
+
+    broker = _FailingBroker()
+    transport = JobTransport(broker, max_batch_size=2)
+
+    async def _run():
+        failed_deliveries = [transport.publish("poison", "session"), transport.publish("job", "session")]
+        # The later Job of the Session must not overtake the lost Jobs, other Sessions are delivered
+        failed_deliveries.append(transport.publish("later", "session"))
+        other_delivery = transport.publish("other", "other_session")
+        await transport.flush()
+
+        for delivery in failed_deliveries:
+            with pytest.raises(ConnectionError):
+                await delivery
+        await other_delivery
+
+        # Once the Failure is delivered, new Jobs of the Session are published again
+        await transport.publish("retry", "session")
+
+    asyncio.run(_run())
+
+    assert [outgoing_job.job for outgoing_job in broker.published] == ["other", "retry"]
+    assert transport.metrics.failed_batches == 1
+
+
+def _manager_task(status: AgentSetupStatus) -> SimpleNamespace:
+    return SimpleNamespace(id="session_1", status=status, model_dump=lambda: {"id": "session_1"})
+
+
+def test_manager_dispatches_through_job_transport():
+    broker = InMemoryBroker()
+    manager = AgentSetupManager()
+    job = SimpleNamespace(data=SimpleNamespace(), endJob=False)
+
+    async def _run():
+        manager.set_job_transport(JobTransport(broker, flush_interval=0.01))
+        await manager.queue_task(task=_manager_task(AgentSetupStatus.IN_PROGRESS), job=job)
+        # The Job is buffered, not yet published
+        assert broker.published == []
+
+        await manager.close()
+
+    asyncio.run(_run())
+
+    assert [outgoing_job.job for outgoing_job in broker.published] == [job]
+    assert broker.published[0].ordering_key == "session_1"
+    assert job.endJob is False
+
+
+def test_manager_awaits_delivery_of_terminal_jobs():
+    """Tests that the last Job of a Session is delivered, or its Failure is raised"""
+
+    class _FailingBroker(InMemoryBroker):
+        async def publish_batch(self, jobs):
+            raise ConnectionError("Broker unavailable")
+
+    async def _queue_terminal_job(broker):
+        manager = AgentSetupManager()
+        manager.set_job_transport(JobTransport(broker, flush_interval=0.01))
+        job = SimpleNamespace(data=SimpleNamespace(), endJob=False)
+
+        await manager.queue_task(task=_manager_task(AgentSetupStatus.COMPLETED), job=job)
+        assert job.endJob is True
+
+    broker = InMemoryBroker()
+    asyncio.run(_queue_terminal_job(broker))
+    assert len(broker.published) == 1
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(_queue_terminal_job(_FailingBroker()))
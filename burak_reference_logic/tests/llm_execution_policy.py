@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+
+import pytest
+from beam_ai_core.llm.llms import LLM
+from pydantic import ValidationError
+
+from app.lib.modules.agents.agent_setup.utils import llm_execution_policy
+from app.lib.modules.agents.agent_setup.utils.llm_execution_policy import (
+    STAGE_LLM_POLICIES,
+    CircuitState,
+    LLMExecutionPolicy,
+    execute_with_policy,
+    get_circuit_breaker,
+)
+
+logger = logging.getLogger("app")
+
+
+@pytest.fixture(autouse=True)
+def circuit_breakers(monkeypatch):
+    monkeypatch.setattr(llm_execution_policy, "_circuit_breakers", {})
+    monkeypatch.setattr(llm_execution_policy, "_latency_trackers", {})
+
+
+def _policy(**kwargs) -> LLMExecutionPolicy:
+    return LLMExecutionPolicy(
+        models=["primary", "secondary"],
+        default_hedge_delay=0.05,
+        min_hedge_delay=0.01,
+        failure_threshold=2,
+        recovery_timeout=0.05,
+        **kwargs,
+    )
+
+
+def _llm_call(latencies: dict, failing_models=(), requested_models=None):
+    async def _call(llm_config):
+        model = llm_config.force_select_model
+        if requested_models is not None:
+            requested_models.append(model)
+        await asyncio.sleep(latencies.get(model, 0))
+        if model in failing_models:
+            raise ConnectionError(f"{model} unavailable")
+        return model
+
+    return _call
+
+
+def test_slow_primary_is_hedged_with_secondary_model():
+    """Tests that a Hedge goes to the next Model & the first Response is returned"""
+    requested_models = []
+    llm_call = _llm_call({"primary": 1, "secondary": 0}, requested_models=requested_models)
+
+    start_time = time.monotonic()
+    assert asyncio.run(execute_with_policy(llm_call, _policy())) == "secondary"
+
+    assert time.monotonic() - start_time < 0.5
+    assert requested_models == ["primary", "secondary"]
+
+
+def test_failing_model_opens_its_circuit_and_recovers():
+    policy = _policy()
+    requested_models = []
+    llm_call = _llm_call({}, failing_models={"primary"}, requested_models=requested_models)
+
+    # Failures fall back to the secondary Model, until the primary Circuit opens
+    for _ in range(3):
+        assert asyncio.run(execute_with_policy(llm_call, policy)) == "secondary"
+    assert requested_models == ["primary", "secondary"] * 2 + ["secondary"]
+    assert get_circuit_breaker("primary", policy).state == CircuitState.OPEN
+
+    # After the Recovery Timeout a Probe Request closes the Circuit again
+    time.sleep(0.06)
+    recovered_call = _llm_call({})
+    assert asyncio.run(execute_with_policy(recovered_call, policy)) == "primary"
+    assert get_circuit_breaker("primary", policy).state == CircuitState.CLOSED
+
+
+def test_unused_and_cancelled_probes_release_the_circuit():
+    """Tests that a recovered Fallback Circuit does not stay half-open without a Probe Outcome"""
+    policy = _policy()
+    fallback_breaker = get_circuit_breaker("secondary", policy)
+    for _ in range(policy.failure_threshold):
+        fallback_breaker.record_failure()
+    time.sleep(0.06)
+
+    # The primary Model answers in Time, the Fallback Circuit is never asked
+    assert asyncio.run(execute_with_policy(_llm_call({}), policy)) == "primary"
+    assert fallback_breaker.state == CircuitState.OPEN
+    assert fallback_breaker.allow_request()
+    fallback_breaker.release_probe()
+
+    # The Fallback probes as Hedge, but loses against the primary Response
+    llm_call = _llm_call({"primary": 0.1, "secondary": 1})
+    assert asyncio.run(execute_with_policy(llm_call, policy)) == "primary"
+    assert fallback_breaker.state == CircuitState.OPEN
+    assert fallback_breaker.allow_request()
+
+
+def test_policy_models_must_be_distinct():
+    with pytest.raises(ValidationError):
+        LLMExecutionPolicy(models=["primary", "primary"])
+
+
+def test_stage_policies_use_known_models():
+    known_models = {llm.value for llm in LLM}
+
+    for policy in STAGE_LLM_POLICIES.values():
+        assert set(policy.models) <= known_models
@@ -0,0 +1,200 @@
+import logging
+from datetime import datetime
+
+import pytest
+
+from app.lib.modules.agents.agent.agent import Agent, AgentConfig, AgentType
+from app.lib.modules.agents.agent_setup.models.agent_setup import (
+    AgentSetupSession,
+    AgentSetupStage,
+    AgentSetupStageMetadata,
+    AgentSetupState,
+    AgentSetupStatus,
+)
+from app.lib.modules.agents.agent_setup.models.agent_setup_events import (
+    AgentSetupEventType,
+)
+from app.lib.modules.agents.agent_setup.session_store.session_event_log import (
+    SessionEventLog,
+    SessionEventRecorder,
+)
+from app.lib.modules.agents.agent_setup.stages.graph_generation.graph_layout import (
+    GraphLayout,
+)
+
+logger = logging.getLogger("app")
+
+
+@pytest.fixture()
+def event_log() -> SessionEventLog:
+    return SessionEventLog(database_path=":memory:", snapshot_every=3)
+
+
+@pytest.fixture()
+def agent_setup_session() -> AgentSetupSession:
+    return AgentSetupSession(
+        id="0e9fe28f-44b5-5bed-a858-a28353ba20b1",
+        user_id="86b1269e-46d0-5145-aaf5-8f70c14ed4b8",
+        thread_id="thread",
+        agent=Agent(
+            id="test-agent",
+            vector_db_id="f8f5c136-b4eb-5b3c-8466-e522902ac295",
+            type=AgentType.AGENT_OS_AGENT,
+            name="Invoice Processing Agent",
+            description="Processes Invoices",
+            config=AgentConfig(
+                agent_id="test-agent",
+                vector_db_id="f8f5c136-b4eb-5b3c-8466-e522902ac295",
+                workspace_id="b94a9558-07ab-5d3d-ba24-c318d782df1d",
+            ),
+        ),
+        status=AgentSetupStatus.IN_PROGRESS,
+        setup_state=AgentSetupState(next=AgentSetupStage.SOP_GENERATION),
+    )
+
+
+@pytest.mark.asyncio()
+async def test_rebuild_session_from_events(
+    event_log: SessionEventLog, agent_setup_session: AgentSetupSession
+):
+    """Tests that replaying the recorded Events rebuilds the current Session State"""
+    event_recorder = SessionEventRecorder(
+        event_log=event_log, agent_setup=agent_setup_session
+    )
+    await event_recorder.record_session_created()
+
+    await event_recorder.record_stages_started([AgentSetupStage.SOP_GENERATION])
+    agent_setup_session.agent_sop = "1. Read the Invoice\n2. Book the Invoice"
+    agent_setup_session.setup_state.stages.append(
+        AgentSetupStageMetadata(
+            stage=AgentSetupStage.SOP_GENERATION,
+            success=True,
+            timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            output="SOP Generation completed successfully.",
+        )
+    )
+    agent_setup_session.setup_state.next = AgentSetupStage.GRAPH_GENERATION
+    await event_recorder.record_changes()
+
+    events = await event_log.list_events(agent_setup_session.id)
+    assert [event.event_type for event in events] == [
+        AgentSetupEventType.SESSION_CREATED,
+        AgentSetupEventType.STAGE_STARTED,
+        AgentSetupEventType.SOP_PRODUCED,
+        AgentSetupEventType.STAGE_FINISHED,
+    ]
+
+    rebuilt_session = await event_log.rebuild_session(agent_setup_session.id)
+    assert rebuilt_session.agent_sop == agent_setup_session.agent_sop
+    assert rebuilt_session.setup_state.next == AgentSetupStage.GRAPH_GENERATION
+    assert len(rebuilt_session.setup_state.stages) == 1
+
+    # Point-in-Time Replay, before the SOP was produced
+    replayed_session = await event_log.rebuild_session(agent_setup_session.id, until_sequence=2)
+    assert replayed_session.agent_sop is None
+    assert replayed_session.setup_state.stages == []
+
+
+@pytest.mark.asyncio()
+async def test_rebuild_graph_layout_from_events(
+    event_log: SessionEventLog, agent_setup_session: AgentSetupSession
+):
+    event_recorder = SessionEventRecorder(
+        event_log=event_log, agent_setup=agent_setup_session
+    )
+    await event_recorder.record_session_created()
+
+    agent_setup_session.graph_layout = GraphLayout(
+        positions={"read_invoice": (0, 0), "book_invoice": (0, 150)}, layer_count=2
+    )
+    await event_recorder.record_changes()
+
+    rebuilt_session = await event_log.rebuild_session(agent_setup_session.id)
+    assert rebuilt_session.graph_layout == agent_setup_session.graph_layout
+    assert rebuilt_session.generated_graph is None
+
+
+@pytest.mark.asyncio()
+async def test_snapshot_compaction(
+    event_log: SessionEventLog, agent_setup_session: AgentSetupSession
+):
+    """Tests that only the latest Snapshots are kept while all Events remain"""
+    event_recorder = SessionEventRecorder(
+        event_log=event_log, agent_setup=agent_setup_session
+    )
+    await event_recorder.record_session_created()
+
+    for _ in range(11):
+        await event_recorder.record_stages_started([AgentSetupStage.SOP_GENERATION])
+
+    snapshots = event_log._connection.execute(
+        "SELECT sequence FROM agent_setup_snapshots WHERE session_id = ? ORDER BY sequence",
+        (agent_setup_session.id,),
+    ).fetchall()
+
+    assert snapshots == [(9,), (12,)]
+    assert len(await event_log.list_events(agent_setup_session.id)) == 12
+
+    rebuilt_session = await event_log.rebuild_session(agent_setup_session.id)
+    assert rebuilt_session.id == agent_setup_session.id
+    assert rebuilt_session.status == AgentSetupStatus.IN_PROGRESS
+
+
+@pytest.mark.asyncio()
+async def test_snapshots_only_replay_events_since_the_previous_snapshot(
+    event_log: SessionEventLog, agent_setup_session: AgentSetupSession
+):
+    """Tests that a Snapshot is taken at the appended Event without loading all Events"""
+    event_recorder = SessionEventRecorder(
+        event_log=event_log, agent_setup=agent_setup_session
+    )
+    await event_recorder.record_session_created()
+
+    list_events = event_log._list_events
+    listed_ranges = []
+
+    def _list_events(session_id, after_sequence=0, until_sequence=None):
+        listed_ranges.append((after_sequence, until_sequence))
+        return list_events(session_id, after_sequence, until_sequence)
+
+    event_log._list_events = _list_events
+
+    for _ in range(8):
+        await event_recorder.record_stages_started([AgentSetupStage.SOP_GENERATION])
+
+    # Snapshots at Sequence 3, 6 & 9, each replaying the Events after the previous one
+    assert listed_ranges == [(0, 3), (3, 6), (6, 9)]
+
+
+@pytest.mark.asyncio()
+async def test_session_keeps_only_latest_stages(agent_setup_session: AgentSetupSession):
+    """Tests that the Stage History is bounded in the Session but complete in the Log"""
+    event_log = SessionEventLog(database_path=":memory:", max_session_stages=2)
+    event_recorder = SessionEventRecorder(
+        event_log=event_log, agent_setup=agent_setup_session
+    )
+    await event_recorder.record_session_created()
+
+    for index in range(5):
+        agent_setup_session.setup_state.stages.append(
+            AgentSetupStageMetadata(
+                stage=AgentSetupStage.SOP_GENERATION,
+                success=False,
+                timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                output=f"Attempt {index} failed.",
+            )
+        )
+        await event_recorder.record_changes()
+
+    assert [stage.output for stage in agent_setup_session.setup_state.stages] == [
+        "Attempt 3 failed.",
+        "Attempt 4 failed.",
+    ]
+
+    events = await event_log.list_events(agent_setup_session.id)
+    assert [event.payload.get("output") for event in events[1:]] == [
+        f"Attempt {index} failed." for index in range(5)
+    ]
+
+    rebuilt_session = await event_log.rebuild_session(agent_setup_session.id)
+    assert rebuilt_session.setup_state.stages == agent_setup_session.setup_state.stages
@@ -0,0 +1,220 @@
+import asyncio
+import logging
+from typing import List
+
+import pytest
+
+from app.lib.modules.agents.agent.agent import Agent, AgentConfig, AgentType
+from app.lib.modules.agents.agent_setup import agent_setup_manager
+from app.lib.modules.agents.agent_setup.agent_setup_manager import AgentSetupManager
+from app.lib.modules.agents.agent_setup.models.agent_setup import (
+    AgentSetupSession,
+    AgentSetupStage,
+    AgentSetupState,
+    AgentSetupStatus,
+)
+from app.lib.modules.agents.agent_setup.session_store.session_recovery import (
+    SessionRecoverySweeper,
+)
+from app.lib.modules.agents.agent_setup.session_store.session_store import (
+    SessionLeaseError,
+)
+from app.lib.modules.agents.agent_setup.session_store.sqlite_session_store import (
+    SQLiteSessionStore,
+)
+from app.lib.modules.agents.agent_setup.utils.cancellation import (
+    SetupCancelledError,
+    run_cancellable,
+)
+
+logger = logging.getLogger("app")
+
+
+@pytest.fixture()
+def session_store() -> SQLiteSessionStore:
+    return SQLiteSessionStore(database_path=":memory:")
+
+
+@pytest.fixture()
+def agent_setup_sessions() -> List[AgentSetupSession]:
+    return [
+        AgentSetupSession(
+            id=f"agent-setup-{index}",
+            user_id="86b1269e-46d0-5145-aaf5-8f70c14ed4b8",
+            thread_id=f"thread-{index}",
+            agent=Agent(
+                id="test-agent",
+                vector_db_id="f8f5c136-b4eb-5b3c-8466-e522902ac295",
+                type=AgentType.AGENT_OS_AGENT,
+                name="Invoice Processing Agent",
+                description="Processes Invoices",
+                config=AgentConfig(
+                    agent_id="test-agent",
+                    vector_db_id="f8f5c136-b4eb-5b3c-8466-e522902ac295",
+                    workspace_id=f"workspace-{index % 2}",
+                ),
+            ),
+            status=AgentSetupStatus.IN_PROGRESS,
+            setup_state=AgentSetupState(next=AgentSetupStage.TOOL_MATCHING),
+        )
+        for index in range(4)
+    ]
+
+
+@pytest.mark.asyncio()
+async def test_list_sessions_by_workspace(
+    session_store: SQLiteSessionStore, agent_setup_sessions: List[AgentSetupSession]
+):
+    """Tests the indexed Lookup of all in-progress Setups of a Workspace"""
+    for agent_setup in agent_setup_sessions:
+        await session_store.save_session(agent_setup)
+
+    workspace_sessions = await session_store.list_sessions(
+        status=AgentSetupStatus.IN_PROGRESS, workspace_id="workspace-0"
+    )
+
+    assert {agent_setup.id for agent_setup in workspace_sessions} == {
+        "agent-setup-0",
+        "agent-setup-2",
+    }
+
+
+@pytest.mark.asyncio()
+async def test_recover_expired_leases(
+    session_store: SQLiteSessionStore, agent_setup_sessions: List[AgentSetupSession]
+):
+    """Tests that Sessions of crashed Workers are re-enqueued exactly once"""
+    for agent_setup in agent_setup_sessions:
+        await session_store.save_session(agent_setup)
+
+    assert await session_store.acquire_lease("agent-setup-0", "crashed-worker", 0.01)
+    assert await session_store.acquire_lease("agent-setup-1", "live-worker", 60)
+    assert not await session_store.acquire_lease("agent-setup-1", "other-worker", 60)
+
+    await asyncio.sleep(0.05)
+
+    requeued_sessions = []
+
+    async def requeue_session(agent_setup: AgentSetupSession):
+        requeued_sessions.append(agent_setup.id)
+
+    sweeper = SessionRecoverySweeper(
+        session_store=session_store,
+        requeue_session=requeue_session,
+        owner="sweeper",
+    )
+
+    assert await sweeper.sweep_once() == 1
+    assert await sweeper.sweep_once() == 0
+    assert requeued_sessions == ["agent-setup-0"]
+
+
+@pytest.mark.asyncio()
+async def test_failed_requeues_are_retried_by_the_next_sweep(
+    session_store: SQLiteSessionStore, agent_setup_sessions: List[AgentSetupSession]
+):
+    """Tests that the Lease of a Session stays expired until its Requeue succeeded"""
+    await session_store.save_session(agent_setup_sessions[0])
+    assert await session_store.acquire_lease("agent-setup-0", "crashed-worker", 0.01)
+    await asyncio.sleep(0.05)
+
+    requeue_attempts = []
+
+    async def requeue_session(agent_setup: AgentSetupSession):
+        requeue_attempts.append(agent_setup.id)
+        if len(requeue_attempts) == 1:
+            raise ConnectionError("Job Queue unavailable")
+
+    sweeper = SessionRecoverySweeper(
+        session_store=session_store,
+        requeue_session=requeue_session,
+        owner="sweeper",
+    )
+
+    assert await sweeper.sweep_once() == 0
+    await asyncio.sleep(0.01)
+    assert await sweeper.sweep_once() == 1
+    assert await sweeper.sweep_once() == 0
+    assert requeue_attempts == ["agent-setup-0", "agent-setup-0"]
+
+
+@pytest.mark.asyncio()
+async def test_manager_skips_sessions_leased_by_another_worker(
+    monkeypatch,
+    session_store: SQLiteSessionStore,
+    agent_setup_sessions: List[AgentSetupSession],
+):
+    """Tests that a Session run by another Worker is neither overwritten nor run twice"""
+    runs = []
+
+    async def _setup_agent(agent_setup, **kwargs):
+        runs.append(agent_setup.id)
+        return agent_setup
+
+    monkeypatch.setattr(agent_setup_manager, "setup_agent", _setup_agent)
+    manager = AgentSetupManager()
+    manager.set_session_store(session_store, enable_recovery=False)
+
+    leased_session, new_session = agent_setup_sessions[0], agent_setup_sessions[1]
+    await session_store.save_session(leased_session)
+    assert await session_store.acquire_lease(leased_session.id, "other-worker", 60)
+
+    edited_session = leased_session.model_copy(update={"process_instructions": "Edited"})
+    with pytest.raises(SessionLeaseError):
+        await manager.run_once(edited_session, trace_config=None)
+    await manager.handle_task_failure(edited_session, job=None)
+
+    stored_session = await session_store.get_session(leased_session.id)
+    assert stored_session.process_instructions is None
+    assert stored_session.status == AgentSetupStatus.IN_PROGRESS
+
+    # Sessions not yet stored are stored & leased by the Run
+    assert await manager.run_once(new_session, trace_config=None) is new_session
+    assert runs == [new_session.id]
+    assert await session_store.get_session(new_session.id) is not None
+    assert await session_store.acquire_lease(new_session.id, "other-worker", 60)
+
+
+@pytest.mark.asyncio()
+async def test_superseded_run_leaves_session_to_newer_run(
+    monkeypatch,
+    session_store: SQLiteSessionStore,
+    agent_setup_sessions: List[AgentSetupSession],
+):
+    """Tests that a superseded Run neither overwrites nor releases the Session of the newer Run"""
+    newer_run_started = asyncio.Event()
+    finish_newer_run = asyncio.Event()
+
+    async def _setup_agent(agent_setup, cancel_token, **kwargs):
+        if agent_setup.process_instructions is None:
+            await run_cancellable(asyncio.sleep(60), cancel_token)
+        else:
+            newer_run_started.set()
+            await finish_newer_run.wait()
+        return agent_setup
+
+    monkeypatch.setattr(agent_setup_manager, "setup_agent", _setup_agent)
+    manager = AgentSetupManager()
+    manager.set_session_store(session_store, enable_recovery=False)
+
+    session = agent_setup_sessions[0]
+    edited_session = session.model_copy(update={"process_instructions": "Edited"})
+
+    superseded_run = asyncio.ensure_future(manager.run_once(session, trace_config=None))
+    await asyncio.sleep(0.05)
+    newer_run = asyncio.ensure_future(manager.run_once(edited_session, trace_config=None))
+
+    with pytest.raises(SetupCancelledError):
+        await superseded_run
+    await newer_run_started.wait()
+
+    # The newer Run holds the Lease under its own Owner, other Workers can not take it
+    assert not await session_store.acquire_lease(session.id, "other-worker", 60)
+
+    finish_newer_run.set()
+    assert await newer_run is edited_session
+
+    stored_session = await session_store.get_session(session.id)
+    assert stored_session.process_instructions == "Edited"
+    assert manager.lease_owners == {}
+    assert await session_store.acquire_lease(session.id, "other-worker", 60)
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+
+import pytest
+
+from app.lib.modules.agents.agent_setup.utils.singleflight import (
+    SingleFlight,
+    make_request_key,
+)
+
+logger = logging.getLogger("app")
+
+
+def test_identical_concurrent_calls_share_one_execution():
+    """Tests that concurrent Duplicates await one in-flight Call & share its Result"""
+    flight = SingleFlight(name="test")
+    executions = []
+
+    async def _call():
+        executions.append(True)
+        await asyncio.sleep(0.01)
+        return ["tool"]
+
+    async def _run():
+        key = make_request_key("Send  the Invoice\n")
+        results = await asyncio.gather(*[flight.do(key, _call) for _ in range(5)])
+        # Nothing is cached once the Call finished
+        await flight.do(key, _call)
+        return results
+
+    results = asyncio.run(_run())
+
+    assert results == [["tool"]] * 5
+    assert len(executions) == 2
+    assert flight.total.calls == 6
+    assert flight.total.executions == 2
+    assert flight.total.shared == 4
+    assert make_request_key("Send  the Invoice\n") == make_request_key("Send the Invoice")
+
+
+def test_failures_are_shared_and_counted():
+    flight = SingleFlight(name="test")
+
+    async def _failing_call():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("Backend unavailable")
+
+    async def _run():
+        return await asyncio.gather(
+            *[flight.do("key", _failing_call) for _ in range(3)],
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(_run())
+
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert flight.metrics["key"].executions == 1
+    assert flight.metrics["key"].failures == 1
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(flight.do("key", _failing_call))
+
+
+def test_call_is_cancelled_with_its_last_caller():
+    """Tests that cancelled Callers leave the Call to the others, the last one cancels it"""
+    flight = SingleFlight(name="test")
+    cancelled_calls = []
+
+    async def _call():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled_calls.append(True)
+            raise
+
+    async def _run():
+        callers = [asyncio.ensure_future(flight.do("key", _call)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+
+        callers[0].cancel()
+        await asyncio.sleep(0.01)
+        assert cancelled_calls == []
+        assert "key" in flight._in_flight
+
+        callers[1].cancel()
+        await asyncio.sleep(0.01)
+        assert all(caller.cancelled() for caller in callers)
+
+    asyncio.run(_run())
+
+    assert cancelled_calls == [True]
+    assert flight._in_flight == {}
+    assert flight._waiters == {}
+    assert flight.metrics["key"].failures == 1
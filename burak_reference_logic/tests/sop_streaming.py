@@ -0,0 +1,85 @@
+import json
+import logging
+
+import pytest
+
+from app.lib.modules.agents.agent_setup.stages.sop_generation.sop_streaming import (
+    PartialJSONStringParser,
+    SOPStreamHandler,
+    get_chunk_text,
+)
+
+logger = logging.getLogger("app")
+
+
+@pytest.fixture()
+def generated_sop() -> dict:
+    return {
+        "expert_reasoning": 'The Process has "two" Branches \\ escalations\tand é 😀',
+        "standard_operating_procedure": "## Trigger Events\n1. Invoice received",
+    }
+
+
+@pytest.fixture()
+def streamed_response(generated_sop: dict) -> str:
+    # LLM Responses are often wrapped in Markdown Fences
+    return f"```json\n{json.dumps(generated_sop, ensure_ascii=True)}\n```"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+def test_partial_json_string_parser(
+    generated_sop: dict, streamed_response: str, chunk_size: int
+):
+    """Tests that split Tokens and Escape Sequences are decoded into the original Text"""
+    parser = PartialJSONStringParser()
+    streamed_fields = {}
+
+    for index in range(0, len(streamed_response), chunk_size):
+        for field, content in parser.feed(streamed_response[index : index + chunk_size]):
+            streamed_fields[field] = streamed_fields.get(field, "") + content
+
+    assert streamed_fields == generated_sop
+
+
+@pytest.mark.asyncio()
+async def test_sop_stream_handler(streamed_response: str):
+    """Tests that Chunks are forwarded to the Streaming Handlers before Completion"""
+    chunks = []
+
+    async def streaming_handler(chunk: dict):
+        chunks.append(chunk)
+
+    sop_stream = SOPStreamHandler([streaming_handler])
+
+    await sop_stream.on_token(streamed_response[:40])
+    assert chunks and chunks[0]["field"] == "expert_reasoning"
+
+    await sop_stream.on_token(streamed_response[40:])
+    await sop_stream.on_complete("## Trigger Events\n1. Invoice received")
+
+    assert chunks[-1]["type"] == "completed"
+    assert sop_stream.time_to_first_content is not None
+
+
+@pytest.mark.asyncio()
+async def test_sop_stream_handler_accepts_streaming_chunks(streamed_response: str):
+    """Tests that the Handler passed to execute_step takes Chunk Dicts like other Handlers"""
+    chunks = []
+
+    async def streaming_handler(chunk: dict):
+        chunks.append(chunk)
+
+    sop_stream = SOPStreamHandler([streaming_handler])
+
+    for index in range(0, len(streamed_response), 16):
+        await sop_stream.on_chunk({"content": streamed_response[index : index + 16]})
+    # Chunks without Token Text (e.g. Usage Metadata) are skipped
+    await sop_stream.on_chunk({"usage": {"output_tokens": 42}})
+
+    streamed_sop = "".join(
+        chunk["content"]
+        for chunk in chunks
+        if chunk["field"] == "standard_operating_procedure"
+    )
+    assert streamed_sop == "## Trigger Events\n1. Invoice received"
+    assert get_chunk_text({"delta": {"content": "Token"}}) == "Token"
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.lib.modules.agents.agent_setup.models.agent_setup import (
+    AgentSetupStage,
+    AgentSetupState,
+    AgentSetupStatus,
+)
+from app.lib.modules.agents.agent_setup.utils import stage_deadlines
+from app.lib.modules.agents.agent_setup.utils.llm_execution_policy import (
+    LLMExecutionPolicy,
+    execute_with_policy,
+)
+from app.lib.modules.agents.agent_setup.utils.stage_deadlines import (
+    StageDeadlineExceededError,
+    StageDeadlinePolicy,
+    deadline_scope,
+    get_remaining_time,
+    get_stage_budget,
+    record_stage_latency,
+    run_stage_with_deadline,
+    wait_with_deadline,
+)
+from app.lib.modules.graphs.graph_task_executor.models.node_interrupt import (
+    NodeInterrupt,
+)
+
+logger = logging.getLogger("app")
+
+
+@pytest.fixture(autouse=True)
+def stage_policies(monkeypatch):
+    monkeypatch.setattr(stage_deadlines, "STAGE_DEADLINE_POLICIES", {})
+    monkeypatch.setattr(stage_deadlines, "_stage_histograms", {})
+
+
+def _agent_setup_state(process_instructions: str = "Process") -> SimpleNamespace:
+    return SimpleNamespace(
+        agent_setup_session=SimpleNamespace(
+            process_instructions=process_instructions,
+            status=AgentSetupStatus.IN_PROGRESS,
+            end_time=None,
+            setup_state=AgentSetupState(next=AgentSetupStage.SOP_GENERATION),
+        )
+    )
+
+
+def test_stage_budget_adapts_to_latency_and_input_size():
+    stage_deadlines.set_stage_deadline_policy(
+        AgentSetupStage.SOP_GENERATION,
+        StageDeadlinePolicy(default_budget=100, min_budget=1, input_unit=1000),
+    )
+
+    # Without History, the Default Budget is scaled by the Input Size
+    assert get_stage_budget(AgentSetupStage.SOP_GENERATION, 0) == 100
+    assert get_stage_budget(AgentSetupStage.SOP_GENERATION, 1000) == 200
+
+    # 10s for small & 20s for large Inputs, i.e. 10s per Work Unit
+    for _ in range(10):
+        record_stage_latency(AgentSetupStage.SOP_GENERATION, 10, 0)
+        record_stage_latency(AgentSetupStage.SOP_GENERATION, 20, 1000)
+
+    assert get_stage_budget(AgentSetupStage.SOP_GENERATION, 0) == 15
+    assert get_stage_budget(AgentSetupStage.SOP_GENERATION, 3000) == 60
+
+
+def test_nested_deadlines_never_extend():
+    assert get_remaining_time() is None
+
+    with deadline_scope(10):
+        with deadline_scope(100):
+            assert get_remaining_time() <= 10
+        with deadline_scope(None):
+            assert get_remaining_time() <= 10
+
+    assert get_remaining_time() is None
+
+
+def test_expired_stage_fails_resumable():
+    """Tests that a hanging Stage fails at its Budget & stays on the Stage for a Resume"""
+    stage_deadlines.set_stage_deadline_policy(
+        AgentSetupStage.SOP_GENERATION,
+        StageDeadlinePolicy(default_budget=0.05, min_budget=0.05),
+    )
+    agent_setup_state = _agent_setup_state()
+
+    async def _hanging_handler(state):
+        await asyncio.sleep(60)
+        return state
+
+    start_time = time.monotonic()
+    with pytest.raises(NodeInterrupt):
+        asyncio.run(
+            run_stage_with_deadline(
+                AgentSetupStage.SOP_GENERATION, _hanging_handler, agent_setup_state
+            )
+        )
+
+    assert time.monotonic() - start_time < 5
+    agent_setup_session = agent_setup_state.agent_setup_session
+    assert agent_setup_session.status == AgentSetupStatus.FAILED
+    assert agent_setup_session.setup_state.next == AgentSetupStage.SOP_GENERATION
+    assert agent_setup_session.setup_state.stages[-1].success is False
+
+
+def test_handler_timeouts_within_the_budget_are_not_deadline_expiries():
+    """Tests that a Timeout raised by the Handler itself is re-raised, not turned into an Expiry"""
+    agent_setup_state = _agent_setup_state()
+
+    async def _timing_out_handler(state):
+        raise asyncio.TimeoutError("Tool Request timed out")
+
+    with pytest.raises(asyncio.TimeoutError) as exc_info:
+        asyncio.run(
+            run_stage_with_deadline(
+                AgentSetupStage.SOP_GENERATION, _timing_out_handler, agent_setup_state
+            )
+        )
+
+    assert not isinstance(exc_info.value, NodeInterrupt)
+    assert agent_setup_state.agent_setup_session.status == AgentSetupStatus.IN_PROGRESS
+
+
+def test_deadline_caps_llm_and_tool_calls():
+    async def _hanging_call(*_):
+        await asyncio.sleep(60)
+
+    async def _run():
+        with deadline_scope(0.05):
+            with pytest.raises(TimeoutError):
+                await execute_with_policy(
+                    llm_call=_hanging_call,
+                    policy=LLMExecutionPolicy(models=["model"], timeout=300),
+                )
+
+            with pytest.raises(StageDeadlineExceededError):
+                await wait_with_deadline(_hanging_call())
+
+            # Calls started after the Deadline fail directly
+            with pytest.raises(StageDeadlineExceededError):
+                await wait_with_deadline(_hanging_call())
+
+    start_time = time.monotonic()
+    asyncio.run(_run())
+    assert time.monotonic() - start_time < 5
@@ -0,0 +1,220 @@
+import asyncio
+import logging
+
+import pytest
+
+from app.lib.modules.agents.agent.agent import Agent, AgentConfig, AgentType
+from app.lib.modules.agents.agent_setup.models.agent_setup import (
+    AgentGraphCreationState,
+    AgentGraphTool,
+    AgentSetupSession,
+    AgentSetupStage,
+    AgentSetupState,
+    AgentSetupStatus,
+)
+from app.lib.modules.agents.agent_setup.stages.stage_scheduler import (
+    AgentSetupStageDefinition,
+    run_concurrent_stages,
+)
+from app.lib.modules.agents.agent_setup.utils.agent_setup_utils import (
+    initialize_agent_setup,
+    set_failed_agent_setup_state,
+    set_finished_agent_setup_state,
+    set_next_agent_setup_state,
+)
+from app.lib.modules.agents.agent_setup.utils.cancellation import CancelToken
+from app.lib.modules.agents.agent_setup.utils.model_construction import (
+    trusted_construct,
+)
+from app.lib.modules.graphs.graph_task_executor.models.node_interrupt import (
+    NodeInterrupt,
+)
+
+logger = logging.getLogger("app")
+
+
+def _tool(node_id: str) -> AgentGraphTool:
+    return AgentGraphTool(
+        node_id=node_id,
+        tool_name=f"Tool {node_id}",
+        tool_description="Generated Tool",
+        short_description="Generated Tool",
+        tool_type="prompt",
+        action_type="generation",
+        prompt="Prompt",
+        input_parameters=[],
+        output_parameters=[],
+    )
+
+
+def _agent_setup_state() -> AgentGraphCreationState:
+    agent_setup_session = AgentSetupSession(
+        id="0e9fe28f-44b5-5bed-a858-a28353ba20b1",
+        user_id="86b1269e-46d0-5145-aaf5-8f70c14ed4b8",
+        thread_id="thread",
+        agent=Agent(
+            id="test-agent",
+            vector_db_id="f8f5c136-b4eb-5b3c-8466-e522902ac295",
+            type=AgentType.AGENT_OS_AGENT,
+            name="Invoice Processing Agent",
+            description="Processes Invoices",
+            config=AgentConfig(
+                agent_id="test-agent",
+                vector_db_id="f8f5c136-b4eb-5b3c-8466-e522902ac295",
+                workspace_id="b94a9558-07ab-5d3d-ba24-c318d782df1d",
+            ),
+        ),
+        status=AgentSetupStatus.IN_PROGRESS,
+        integration_tools=[_tool("existing")],
+        setup_state=AgentSetupState(next=AgentSetupStage.TOOL_MATCHING),
+    )
+
+    return trusted_construct(
+        AgentGraphCreationState,
+        agent_setup_session=agent_setup_session,
+        agent_memory=None,
+        streaming_handlers=[],
+        trace_config=None,
+        cancel_token=CancelToken(),
+    )
+
+
+async def _match_tools(agent_setup_state):
+    await asyncio.sleep(0.01)
+    agent_setup_session = agent_setup_state.agent_setup_session
+    # NOTE: Written in Place, the Fork must not share the List with the Session
+    agent_setup_session.integration_tools.append(_tool("matched"))
+    set_next_agent_setup_state(
+        output="Tool Matching completed.",
+        stage=AgentSetupStage.TOOL_GENERATION,
+        agent_setup=agent_setup_session,
+    )
+    return agent_setup_state
+
+
+async def _generate_tools(agent_setup_state):
+    agent_setup_session = agent_setup_state.agent_setup_session
+    agent_setup_session.custom_tools = [_tool("generated")]
+    set_finished_agent_setup_state(agent_setup=agent_setup_session)
+    return agent_setup_state
+
+
+async def _fail_tool_generation(agent_setup_state):
+    agent_setup_session = agent_setup_state.agent_setup_session
+    agent_setup_session.custom_tools.append(_tool("partial"))
+    set_failed_agent_setup_state(error="boom", agent_setup=agent_setup_session)
+    raise NodeInterrupt(value=agent_setup_state)
+
+
+def _stage_definitions(tool_generation_handler) -> list:
+    return [
+        AgentSetupStageDefinition(
+            stage=AgentSetupStage.TOOL_MATCHING,
+            handler=_match_tools,
+            inputs=["agent", "generated_graph"],
+            outputs=["integration_tools"],
+        ),
+        AgentSetupStageDefinition(
+            stage=AgentSetupStage.TOOL_GENERATION,
+            handler=tool_generation_handler,
+            inputs=["generated_graph"],
+            outputs=["custom_tools"],
+        ),
+    ]
+
+
+def test_concurrent_stages_merge_declared_outputs():
+    """Tests that the Outputs & Stage History of both Stages are merged into the Session"""
+    agent_setup_state = _agent_setup_state()
+
+    asyncio.run(
+        run_concurrent_stages(agent_setup_state, _stage_definitions(_generate_tools))
+    )
+
+    agent_setup_session = agent_setup_state.agent_setup_session
+    assert [tool.node_id for tool in agent_setup_session.integration_tools] == [
+        "existing",
+        "matched",
+    ]
+    assert [tool.node_id for tool in agent_setup_session.custom_tools] == ["generated"]
+    assert [stage.stage for stage in agent_setup_session.setup_state.stages] == [
+        AgentSetupStage.TOOL_MATCHING,
+        AgentSetupStage.TOOL_GENERATION,
+    ]
+    assert agent_setup_session.status == AgentSetupStatus.COMPLETED
+    assert agent_setup_session.setup_state.next == AgentSetupStage.CONNECT_INTEGRATIONS
+
+
+def test_failing_stage_fails_the_run():
+    agent_setup_state = _agent_setup_state()
+
+    with pytest.raises(NodeInterrupt):
+        asyncio.run(
+            run_concurrent_stages(
+                agent_setup_state, _stage_definitions(_fail_tool_generation)
+            )
+        )
+
+    agent_setup_session = agent_setup_state.agent_setup_session
+    assert agent_setup_session.status == AgentSetupStatus.FAILED
+    assert agent_setup_session.setup_state.next == AgentSetupStage.TOOL_GENERATION
+    # Outputs of finished Stages are kept, partial Writes of the failed Stage are not
+    assert [tool.node_id for tool in agent_setup_session.integration_tools] == [
+        "existing",
+        "matched",
+    ]
+    assert agent_setup_session.custom_tools == []
+    assert [
+        (stage.stage, stage.success) for stage in agent_setup_session.setup_state.stages
+    ] == [(AgentSetupStage.TOOL_MATCHING, True), (AgentSetupStage.TOOL_GENERATION, False)]
+
+
+def test_resume_only_runs_the_failed_stage():
+    """Tests that a finished Sibling of a failed Stage keeps its Outputs & is not run again"""
+    agent_setup_state = _agent_setup_state()
+    tool_generations = []
+
+    async def _fail_tool_matching(agent_setup_state):
+        agent_setup_session = agent_setup_state.agent_setup_session
+        set_failed_agent_setup_state(error="boom", agent_setup=agent_setup_session)
+        raise NodeInterrupt(value=agent_setup_state)
+
+    async def _count_tool_generations(agent_setup_state):
+        tool_generations.append(True)
+        return await _generate_tools(agent_setup_state)
+
+    stage_definitions = _stage_definitions(_count_tool_generations)
+    failing_definitions = [
+        stage_definitions[0].model_copy(update={"handler": _fail_tool_matching}),
+        stage_definitions[1],
+    ]
+
+    with pytest.raises(NodeInterrupt):
+        asyncio.run(run_concurrent_stages(agent_setup_state, failing_definitions))
+
+    agent_setup_session = agent_setup_state.agent_setup_session
+    setup_state = agent_setup_session.setup_state
+    assert agent_setup_session.status == AgentSetupStatus.FAILED
+    assert setup_state.next == AgentSetupStage.TOOL_MATCHING
+    assert setup_state.finished_stages == [AgentSetupStage.TOOL_GENERATION]
+    assert [tool.node_id for tool in agent_setup_session.custom_tools] == ["generated"]
+
+    # The Resume runs Tool Matching only, with the Transition of the finished Tool Generation
+    initialize_agent_setup(agent_setup_session)
+    asyncio.run(run_concurrent_stages(agent_setup_state, stage_definitions))
+
+    assert len(tool_generations) == 1
+    assert [tool.node_id for tool in agent_setup_session.integration_tools] == [
+        "existing",
+        "matched",
+    ]
+    assert [tool.node_id for tool in agent_setup_session.custom_tools] == ["generated"]
+    assert agent_setup_session.status == AgentSetupStatus.COMPLETED
+    assert agent_setup_session.end_time is not None
+    assert setup_state.next == AgentSetupStage.CONNECT_INTEGRATIONS
+    assert setup_state.finished_stages == []
+    assert [(stage.stage, stage.success) for stage in setup_state.stages] == [
+        (AgentSetupStage.TOOL_MATCHING, False),
+        (AgentSetupStage.TOOL_GENERATION, True),
+        (AgentSetupStage.TOOL_MATCHING, True),
+    ]
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import time
+from types import SimpleNamespace
+
+from app.lib.modules.agents.agent_setup.stages.tool_matching.tool_classification import (
+    ClassificationSource,
+    ToolCategory,
+    classify_nodes,
+    classify_with_rules,
+    clear_classification_cache,
+)
+
+logger = logging.getLogger("app")
+
+
+def _node(node_id: str, action_type: str, node_objective: str, tool_category="prompt"):
+    return SimpleNamespace(
+        node_id=node_id,
+        action_type=action_type,
+        node_objective=node_objective,
+        node_context=None,
+        tool_category=tool_category,
+    )
+
+
+class _FakeLLMClassifier:
+    def __init__(self, fail: bool = False):
+        self.calls = []
+        self.fail = fail
+
+    async def __call__(self, nodes):
+        self.calls.append([node.node_id for node in nodes])
+        if self.fail:
+            raise RuntimeError("LLM unavailable")
+
+        return {node.node_id: ToolCategory.INTEGRATION for node in nodes}
+
+
+def test_classify_with_rules():
+    assert (
+        classify_with_rules(_node("1", "Send Email", "Send the reply to the customer"))
+        == ToolCategory.INTEGRATION
+    )
+    assert (
+        classify_with_rules(_node("2", "Summarize", "Summarize the support ticket"))
+        == ToolCategory.PROMPT
+    )
+    # Known Integrations of the Catalogue decide otherwise ambiguous Nodes
+    handle_node = _node("3", "Handle Request", "Handle the request in Zendesk")
+    assert classify_with_rules(handle_node) is None
+    assert classify_with_rules(handle_node, {"zendesk"}) == ToolCategory.INTEGRATION
+
+
+def test_ambiguous_nodes_share_one_cached_llm_call():
+    """Tests that ambiguous Nodes are classified in one batched LLM Call & cached"""
+    clear_classification_cache()
+    nodes = [
+        _node("read_email", "Read Email", "Read the new email from the inbox"),
+        _node("draft_reply", "Generate Text", "Draft a reply to the customer"),
+        _node("handle_a", "Handle Request", "Handle the refund request"),
+        _node("handle_b", "Process Order", "Process the order of the customer"),
+    ]
+    llm_classifier = _FakeLLMClassifier()
+
+    classifications = asyncio.run(
+        classify_nodes(nodes, trace_config=None, llm_classifier=llm_classifier)
+    )
+
+    assert llm_classifier.calls == [["handle_a", "handle_b"]]
+    assert [classification.tool_category for classification in classifications] == [
+        ToolCategory.INTEGRATION,
+        ToolCategory.PROMPT,
+        ToolCategory.INTEGRATION,
+        ToolCategory.INTEGRATION,
+    ]
+    assert classifications[2].source == ClassificationSource.LLM
+
+    # The second Graph is classified from the Cache, without an LLM Call
+    classifications = asyncio.run(
+        classify_nodes(nodes, trace_config=None, llm_classifier=llm_classifier)
+    )
+    assert len(llm_classifier.calls) == 1
+    assert classifications[3].source == ClassificationSource.CACHE
+
+
+def test_failed_llm_call_keeps_graph_category():
+    clear_classification_cache()
+    nodes = [_node("handle", "Handle Request", "Handle the request", "integration")]
+
+    classifications = asyncio.run(
+        classify_nodes(
+            nodes, trace_config=None, llm_classifier=_FakeLLMClassifier(fail=True)
+        )
+    )
+
+    assert classifications[0].tool_category == ToolCategory.INTEGRATION
+    assert classifications[0].source == ClassificationSource.GRAPH
+
+
+def test_rules_classify_in_microseconds():
+    nodes = [
+        _node(str(node_number), "Update Record", "Update the CRM record of the lead")
+        for node_number in range(10000)
+    ]
+    integration_names = {f"integration {number}" for number in range(500)}
+
+    start_time = time.perf_counter()
+    for node in nodes:
+        classify_with_rules(node, integration_names)
+    duration = time.perf_counter() - start_time
+    logger.info(f"Classified {len(nodes)} Nodes by Rules in {duration:.3f}s")
+
+    assert duration / len(nodes) < 1e-3
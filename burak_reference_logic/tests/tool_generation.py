@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from app.lib.modules.agents.agent_setup.stages.tool_generation import tool_generation
+from app.lib.modules.agents.agent_setup.stages.tool_generation.tool_generation import (
+    TOOL_BATCH_MAX_INPUT_TOKENS,
+    create_node_tools,
+    generate_custom_tools,
+    split_tool_tasks,
+)
+from app.lib.modules.agents.agent_setup.stages.tool_generation.tool_generation_pydantic import (
+    GeneratedCustomTool,
+)
+from app.lib.modules.graphs.agent_graph.graph_creation.strategies.multi_node.generate_graph_pydantic import (
+    GeneratedGraph,
+    GeneratedNode,
+)
+
+logger = logging.getLogger("app")
+
+
+def _generated_tool(task_id: str, task: str) -> GeneratedCustomTool:
+    return GeneratedCustomTool(
+        task_id=task_id, title=task, tool_description=task, prompt=f"Solve: {task}"
+    )
+
+
+def test_split_tool_tasks_within_token_budget():
+    """Tests that Batches hold at most K Tasks & fit into the Input Token Budget"""
+    tasks = [f"Task {task_number}" for task_number in range(20)]
+    assert [len(batch) for batch in split_tool_tasks(tasks, max_batch_size=8)] == [8, 8, 4]
+
+    # Each long Task fills more than half of the Input Budget
+    long_tasks = ["x" * (TOOL_BATCH_MAX_INPUT_TOKENS * 3)] * 3
+    assert split_tool_tasks(long_tasks, max_batch_size=8) == [[0], [1], [2]]
+
+
+def test_missing_tools_are_resplit(monkeypatch):
+    """Tests that Tools missing from a batched Response are re-split & retried"""
+    batch_requests = []
+    single_requests = []
+
+    async def _generate_tool_batch(tasks, trace_config):
+        batch_requests.append(list(tasks))
+        # NOTE: The LLM drops the Tool of "Task 3" in every Batch
+        return {
+            task_index: _generated_tool(str(task_index), task)
+            for task_index, task in enumerate(tasks)
+            if task != "Task 3"
+        }
+
+    async def _create_node_tool(task, trace_config):
+        single_requests.append(task)
+        if task == "Task 3":
+            raise RuntimeError("Tool Generation failed")
+        return _generated_tool("0", task)
+
+    monkeypatch.setattr(tool_generation, "generate_tool_batch", _generate_tool_batch)
+    monkeypatch.setattr(tool_generation, "create_node_tool", _create_node_tool)
+
+    tasks = [f"Task {task_number}" for task_number in range(10)]
+    created_tools = asyncio.run(
+        create_node_tools(tasks, trace_config=SimpleNamespace(), max_batch_size=8)
+    )
+
+    # 2 Batches for 10 Tasks, the missing Tool is retried alone at last
+    assert batch_requests[:2] == [tasks[:8], tasks[8:]]
+    assert single_requests == ["Task 3"]
+    assert [tool.title for tool in created_tools if not isinstance(tool, Exception)] == [
+        task for task in tasks if task != "Task 3"
+    ]
+    assert isinstance(created_tools[3], RuntimeError)
+
+
+def test_failed_tools_are_skipped(monkeypatch):
+    """Tests that any failed Tool Request is skipped, not only RuntimeErrors"""
+
+    async def _create_node_tool(task, trace_config):
+        if "Extract" in task:
+            raise ValueError("Malformed Tool Response")
+        return _generated_tool("0", task)
+
+    monkeypatch.setattr(tool_generation, "create_node_tool", _create_node_tool)
+
+    generated_graph = GeneratedGraph(
+        workflow_graph=[
+            GeneratedNode(
+                node_id=node_id,
+                tool_category="prompt",
+                action_type="generation",
+                node_objective=node_objective,
+                node_context="",
+            )
+            for node_id, node_objective in [
+                ("extract_line_items", "Extract the Line Items of the Invoice"),
+                ("draft_reply", "Draft the Reply to the Customer"),
+            ]
+        ]
+    )
+
+    prompt_tools = asyncio.run(
+        generate_custom_tools(generated_graph, trace_config=SimpleNamespace())
+    )
+
+    assert [tool.node_id for tool in prompt_tools] == ["draft_reply"]
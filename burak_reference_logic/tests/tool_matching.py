@@ -0,0 +1,49 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from app.lib.modules.agents.agent_setup.stages.tool_matching import tool_matching
+from app.lib.modules.agents.agent_setup.stages.tool_matching.tool_prefilter import (
+    ToolMetadata,
+)
+
+logger = logging.getLogger("app")
+
+
+def _node(node_id: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        node_id=node_id,
+        tool_category="integration",
+        action_type="Send Email",
+        node_objective=f"Objective of {node_id}",
+        node_context="",
+    )
+
+
+def test_failed_tool_requests_only_drop_their_nodes(monkeypatch, caplog):
+    """Tests that any failed Tool Request drops its Node & is logged with the Node Id"""
+
+    async def _select_node_tool(task_step, action_type, workspace_id, tool_prefilter):
+        if "node_2" in task_step:
+            raise ValueError("Malformed Tool Response")
+        if "node_3" in task_step:
+            raise KeyError("integration")
+        return ToolMetadata(
+            name="Send Gmail Email", description="Sends an email", integration_name="Gmail"
+        )
+
+    monkeypatch.setattr(tool_matching, "select_node_tool", _select_node_tool)
+
+    with caplog.at_level(logging.WARNING, logger="app"):
+        integration_tools = asyncio.run(
+            tool_matching.select_integration_tools(
+                agent=SimpleNamespace(config=SimpleNamespace(workspace_id="workspace_1")),
+                generated_graph=SimpleNamespace(
+                    workflow_graph=[_node("node_1"), _node("node_2"), _node("node_3")]
+                ),
+                trace_config=None,
+            )
+        )
+
+    assert [tool.node_id for tool in integration_tools] == ["node_1"]
+    assert "['node_2', 'node_3']" in caplog.text
@@ -0,0 +1,139 @@
+import json
+import logging
+
+from app.lib.modules.agents.agent_setup.tests.benchmarks.tool_matching_benchmark import (
+    ToolMatchingCase,
+    evaluate_retriever,
+    load_tool_matching_dataset,
+    percentile,
+    run_benchmark,
+)
+
+logger = logging.getLogger("app")
+
+
+def _write_json(path, content) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(content))
+
+
+def _beam_tool(function_name: str, tool_name: str, action_type: str) -> dict:
+    return {
+        "toolFunctionName": function_name,
+        "toolName": tool_name,
+        "type": "beam_tool",
+        "meta": {"action_type": action_type, "integration_name": "email_system"},
+        "inputParams": [{"paramDescription": "Email address of the customer"}],
+    }
+
+
+def _data_dir(tmp_path):
+    graph_dir = tmp_path / "agent_graph_1"
+    _write_json(
+        graph_dir / "graph_concept.json",
+        {
+            "graph_concept": {
+                "nodes": [
+                    {"node_id": "step_1_read", "objective": "Read the customer email", "action_type": "read"}
+                ]
+            }
+        },
+    )
+    _write_json(
+        graph_dir / "nodes" / "step_1_read.json",
+        {
+            "id": "step_1_read",
+            "toolConfiguration": {
+                "originalTool": _beam_tool("email_read", "Email Message Reader", "read")
+            },
+        },
+    )
+    _write_json(
+        graph_dir / "nodes" / "step_2_send_reply.json",
+        {
+            "id": "step_2_send_reply",
+            "fallback_action": "Manual reply sending required",
+            "toolConfiguration": {
+                "originalTool": _beam_tool("email_send", "Email Message Sender", "create")
+            },
+        },
+    )
+    # Prompt Tools are not labelled
+    _write_json(
+        graph_dir / "nodes" / "step_3_draft.json",
+        {
+            "id": "step_3_draft",
+            "toolConfiguration": {
+                "originalTool": {"toolFunctionName": "draft", "toolName": "Draft", "type": "custom_tool"}
+            },
+        },
+    )
+    _write_json(
+        tmp_path / "knowledge" / "tools" / "hubspot_create_deal.json",
+        [
+            {
+                "tool": {
+                    "toolFunctionName": "HubspotAction_DealCreate",
+                    "toolName": "Create New Deal",
+                    "type": "beam_tool",
+                    "meta": {
+                        "description": "Add a HubSpot deal by name",
+                        "description_human_readable": "Create Deal in Hubspot",
+                        "integrationIdentifier": "hubspot",
+                    },
+                }
+            }
+        ],
+    )
+
+    return str(tmp_path)
+
+
+def test_load_tool_matching_dataset(tmp_path):
+    tools, cases = load_tool_matching_dataset(_data_dir(tmp_path))
+
+    assert [tool.name for tool in tools] == [
+        "Email Message Reader",
+        "Email Message Sender",
+        "Create New Deal",
+    ]
+    assert [(case.query, case.expected_tool) for case in cases] == [
+        ("Read the customer email", "Email Message Reader"),
+        ("step 2 send reply Manual reply sending required", "Email Message Sender"),
+        ("Create Deal in Hubspot", "Create New Deal"),
+    ]
+
+
+def test_evaluate_retriever_metrics():
+    cases = [
+        ToolMatchingCase(query="a", expected_tool="A", source="test"),
+        ToolMatchingCase(query="b", expected_tool="B", source="test"),
+        ToolMatchingCase(query="c", expected_tool="C", source="test"),
+    ]
+    rankings = {"a": ["A", "X"], "b": ["X", "Y", "B"], "c": ["X"]}
+
+    result = evaluate_retriever(
+        lambda case, top_k: rankings[case.query][:top_k], cases, k_values=[1, 3], repeats=1
+    )
+
+    assert result["recall@1"] == 1 / 3
+    assert result["recall@3"] == 2 / 3
+    assert abs(result["mrr"] - (1 + 1 / 3) / 3) < 1e-9
+    assert percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.0
+    assert percentile([4.0, 1.0, 3.0, 2.0], 99) == 4.0
+
+
+def test_run_benchmark(tmp_path):
+    results = run_benchmark(_data_dir(tmp_path), index_paddings=[0, 50], repeats=1)
+    logger.info(results)
+
+    assert {result["retriever"] for result in results} == {
+        "exhaustive",
+        "lsh",
+        "prefilter",
+        "prefilter_no_threshold",
+    }
+    # The Brute Force Search finds every Tool of the small Catalogue
+    exhaustive = next(result for result in results if result["retriever"] == "exhaustive")
+    assert exhaustive["index_size"] == 3
+    assert exhaustive["recall@20"] == 1.0
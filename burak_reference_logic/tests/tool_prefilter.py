@@ -0,0 +1,175 @@
+import json
+import logging
+import time
+
+import pytest
+
+from app.lib.modules.agents.agent_setup.stages.tool_matching import tool_matching
+from app.lib.modules.agents.agent_setup.stages.tool_matching.tool_prefilter import (
+    ToolAccess,
+    ToolMetadata,
+    ToolPrefilter,
+    ToolPrefilterMetrics,
+    infer_tool_access,
+    load_tool_prefilter,
+)
+
+logger = logging.getLogger("app")
+
+CATALOGUE_TOOLS = [
+    ToolMetadata(
+        name="Send Gmail Email",
+        description="Sends an email message to a recipient",
+        integration_name="Gmail",
+        action_type=ToolAccess.WRITE,
+    ),
+    ToolMetadata(
+        name="Search Gmail Emails",
+        description="Searches the inbox for email messages",
+        integration_name="Gmail",
+        action_type=ToolAccess.READ,
+    ),
+    ToolMetadata(
+        name="Send Outlook Email",
+        description="Sends an email message to a recipient",
+        integration_name="Outlook",
+        action_type=ToolAccess.WRITE,
+    ),
+    ToolMetadata(
+        name="Post Slack Message",
+        description="Posts a message to a Slack channel",
+        integration_name="Slack",
+        action_type=ToolAccess.WRITE,
+    ),
+    ToolMetadata(
+        name="Get Exchange Rate",
+        description="Gets the current exchange rate of a currency",
+        integration_name="Currency API",
+        action_type=ToolAccess.READ,
+        requires_consent=False,
+    ),
+]
+
+
+def _prefilter() -> ToolPrefilter:
+    return ToolPrefilter(
+        tools=CATALOGUE_TOOLS,
+        connected_integrations={"workspace_1": ["Gmail", "Slack"]},
+    )
+
+
+def test_infer_tool_access():
+    assert infer_tool_access("Send Email") == ToolAccess.WRITE
+    assert infer_tool_access("fetch_customer_record") == ToolAccess.READ
+    assert infer_tool_access("Reasoning") is None
+
+
+def test_prefilter_by_connection_and_access():
+    """Tests that only connected or consent-free Tools with the right Access are ranked"""
+    prefilter = _prefilter()
+
+    candidate_names = [
+        prefilter.tools[tool_id].name
+        for tool_id in prefilter.filter(
+            "Send the confirmation email to the customer",
+            workspace_id="workspace_1",
+            action_type="Send Email",
+        )
+    ]
+    # Outlook is not connected & Reading Tools do not fit a sending Action
+    assert sorted(candidate_names) == ["Post Slack Message", "Send Gmail Email"]
+
+    tool_candidates = prefilter.search(
+        "Send the confirmation email to the customer",
+        workspace_id="workspace_1",
+        action_type="Send Email",
+    )
+    assert tool_candidates[0].tool.name == "Send Gmail Email"
+
+    # Consent-free Tools are available without a Connection
+    tool_candidates = prefilter.search(
+        "Get the exchange rate of the invoice currency",
+        workspace_id="workspace_1",
+        action_type="Get Data",
+    )
+    assert tool_candidates[0].tool.integration_name == "Currency API"
+
+
+def test_prefilter_mentioned_integration_and_unknown_workspace(tmp_path):
+    catalogue_path = tmp_path / "tool_catalogue.json"
+    catalogue_path.write_text(
+        json.dumps(
+            {
+                "tools": [tool.model_dump(mode="json") for tool in CATALOGUE_TOOLS],
+                "connected_integrations": {"workspace_1": ["Gmail", "Slack"]},
+            }
+        )
+    )
+    prefilter = load_tool_prefilter(str(catalogue_path))
+
+    # Integrations named in the Task restrict the Candidates to themselves
+    tool_ids = prefilter.filter(
+        "Notify the team in Slack", workspace_id="workspace_1", action_type="Notify"
+    )
+    assert [prefilter.tools[tool_id].name for tool_id in tool_ids] == ["Post Slack Message"]
+
+    # Unknown Workspaces search the whole Catalogue
+    tool_ids = prefilter.filter(
+        "Send an Outlook email", workspace_id="workspace_2", action_type="Send Email"
+    )
+    assert [prefilter.tools[tool_id].name for tool_id in tool_ids] == ["Send Outlook Email"]
+
+    # Unrelated Tasks have no confident Match & fall back to the Vector Search
+    assert prefilter.search("zzz qqq", workspace_id="workspace_1") == []
+
+
+def test_prefilter_large_catalogue():
+    tools = [
+        ToolMetadata(
+            name=f"Action {tool_number} of Integration {tool_number % 500}",
+            description=f"Performs action {tool_number}",
+            integration_name=f"integration_{tool_number % 500}",
+            action_type=ToolAccess.READ if tool_number % 2 else ToolAccess.WRITE,
+        )
+        for tool_number in range(10000)
+    ]
+    prefilter = ToolPrefilter(
+        tools=tools,
+        connected_integrations={"workspace_1": ["integration_1", "integration_3"]},
+    )
+
+    start_time = time.perf_counter()
+    for _ in range(100):
+        tool_ids = prefilter.filter(
+            "Performs action 1", workspace_id="workspace_1", action_type="Get Data"
+        )
+        prefilter.rank("Performs action 1", tool_ids)
+    duration = time.perf_counter() - start_time
+    logger.info(f"100 Prefilter Searches over {len(tools)} Tools in {duration:.2f}s")
+
+    assert len(tool_ids) == 40
+    assert duration < 5
+
+
+@pytest.mark.asyncio()
+async def test_unmatched_nodes_fall_back_to_the_counted_tool_search(monkeypatch):
+    """Tests that Nodes without a Prefilter Candidate use the Vector Search & are counted"""
+    prefilter = _prefilter()
+    fallback_tool = object()
+
+    async def _fetch_node_tools(task_step: str, workspace_id: str):
+        return fallback_tool
+
+    monkeypatch.setattr(tool_matching, "fetch_node_tools", _fetch_node_tools)
+
+    selected_tool = await tool_matching.select_node_tool(
+        "Send an email to the customer", "Send Email", "workspace_1", prefilter
+    )
+    assert selected_tool.name == "Send Gmail Email"
+    assert prefilter.metrics.fallbacks == 0
+
+    selected_tool = await tool_matching.select_node_tool(
+        "zzz qqq", "Send Email", "workspace_1", prefilter
+    )
+    assert selected_tool is fallback_tool
+    assert prefilter.metrics == ToolPrefilterMetrics(searches=2, fallbacks=1)
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+from app.lib.modules.agents.agent_setup.agent_setup_manager import AgentSetupManager
+from app.lib.modules.agents.agent_setup.models.agent_setup import AgentSetupStatus
+from app.lib.modules.agents.agent_setup.utils.update_publisher import (
+    SessionUpdatePublisher,
+)
+
+logger = logging.getLogger("app")
+
+
+class _Session:
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.status = AgentSetupStatus.IN_PROGRESS
+        self.progress = 0
+
+    def model_dump(self) -> dict:
+        return {"id": self.id, "status": self.status.value, "progress": self.progress}
+
+
+class _RecordingBroker:
+    def __init__(self):
+        self.updates = []
+
+    async def publish(self, update: dict) -> None:
+        await asyncio.sleep(0)
+        self.updates.append(update)
+
+
+def test_updates_are_coalesced_per_session():
+    """Tests that a Burst of Updates publishes only the latest State per Session"""
+    broker = _RecordingBroker()
+    publisher = SessionUpdatePublisher(publish=broker.publish, debounce_seconds=0.05)
+    first_session, second_session = _Session("first"), _Session("second")
+
+    async def _run():
+        for progress in range(10):
+            first_session.progress = progress
+            await publisher.submit(first_session)
+            await publisher.submit(second_session)
+
+        await asyncio.sleep(0.2)
+
+    asyncio.run(_run())
+
+    published_states = [
+        (update["task"]["id"], update["task"]["progress"]) for update in broker.updates
+    ]
+    assert sorted(published_states) == [("first", 9), ("second", 0)]
+    assert publisher.metrics.submitted == 20
+    assert publisher.metrics.published == 2
+    assert publisher.metrics.coalesced == 18
+
+
+def test_terminal_states_flush_at_once():
+    broker = _RecordingBroker()
+    publisher = SessionUpdatePublisher(publish=broker.publish, debounce_seconds=60)
+    session = _Session("session")
+
+    async def _run():
+        await publisher.submit(session)
+        assert broker.updates == []
+
+        session.status = AgentSetupStatus.FAILED
+        await publisher.submit(session)
+
+    asyncio.run(_run())
+
+    # The pending Update is replaced by the terminal State, published without Delay
+    assert [update["task"]["status"] for update in broker.updates] == ["FAILED"]
+
+
+def test_continuous_updates_publish_within_max_delay():
+    broker = _RecordingBroker()
+    publisher = SessionUpdatePublisher(
+        publish=broker.publish, debounce_seconds=0.05, max_delay=0.1, send_diffs=True
+    )
+    session = _Session("session")
+
+    async def _run():
+        # An Update every 20ms never leaves a quiet Debounce Window
+        for progress in range(25):
+            session.progress = progress
+            await publisher.submit(session)
+            await asyncio.sleep(0.02)
+
+        session.status = AgentSetupStatus.COMPLETED
+        await publisher.submit(session)
+
+    asyncio.run(_run())
+
+    assert 2 <= len(broker.updates) < 25
+    assert "task" in broker.updates[0]
+    # Later Updates only carry the changed Fields
+    assert set(broker.updates[1]["task_changes"]) == {"progress"}
+    assert broker.updates[-1]["task_changes"]["status"] == "COMPLETED"
+
+
+def test_manager_publishes_task_states_through_the_publisher():
+    """Tests that Task States of the Manager are submitted to the Update Publisher"""
+    manager = AgentSetupManager()
+    broker = _RecordingBroker()
+    manager.publish_task_update = broker.publish
+    session = _Session("session")
+
+    async def _run():
+        manager.set_update_publisher(debounce_seconds=60)
+        await manager.update_task_state(task=session, job=SimpleNamespace())
+        assert broker.updates == []
+
+        session.status = AgentSetupStatus.COMPLETED
+        await manager.update_task_state(task=session, job=SimpleNamespace())
+        await manager.close()
+
+    asyncio.run(_run())
+
+    assert [update["task"]["status"] for update in broker.updates] == ["COMPLETED"]
+    assert manager.update_publisher.metrics.submitted == 2
+
+
+def test_run_until_complete_stops_at_terminal_states():
+    manager = AgentSetupManager()
+    session = _Session("session")
+    runs = []
+
+    async def _run_once(task, trace_config, enable_notifications=True, **kwargs):
+        runs.append(task.id)
+        if len(runs) == 2:
+            task.status = AgentSetupStatus.COMPLETED
+        return task
+
+    manager.run_once = _run_once
+
+    assert asyncio.run(manager.run_until_complete(task=session, trace_config=None)) is session
+    assert runs == ["session", "session"]
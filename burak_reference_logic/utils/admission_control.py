@@ -0,0 +1,273 @@
+"""
+Pre-flight Cost Estimation & Admission Control
+
+Before a Setup Run starts, the LLM Calls & Tokens of its remaining Stages are estimated
+from the Process Instructions, File Uploads and, once generated, the SOP & Graph. The
+Admission Controller charges the Estimate against a global Tokens-per-Minute Budget shared
+by all Sessions of the Worker: Jobs wait in a FIFO Queue while the Budget refills, are
+deferred if the expected Wait is too long, and shed if they could never fit.
+"""
+
+import asyncio
+import logging
+import math
+import time
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from app.lib.modules.agents.agent_setup.models.agent_setup import (
+    AgentSetupSession,
+    AgentSetupStage,
+)
+from app.lib.modules.agents.agent_setup.stages.tool_generation.tool_generation import (
+    DEFAULT_TOOL_BATCH_SIZE,
+    TOOL_BATCH_OUTPUT_TOKENS_PER_TOOL,
+    estimate_tokens,
+)
+
+logger = logging.getLogger("app")
+
+# Tokens of the Prompt Templates sent with every Call
+PROMPT_OVERHEAD_TOKENS = 1500
+# NOTE: Upload Contents are unknown before the Run, each File is budgeted alike
+FILE_UPLOAD_TOKENS = 4000
+# The SOP is roughly as long as the Process it describes, within Bounds
+MIN_SOP_TOKENS = 1000
+MAX_SOP_TOKENS = 8000
+# SOP Tokens per generated Node & Output Tokens per Node of the Graph
+SOP_TOKENS_PER_NODE = 150
+GRAPH_TOKENS_PER_NODE = 250
+MIN_NODES = 3
+MAX_NODES = 60
+# Share of Nodes performed by generated Prompt Tools, until the Graph exists
+PROMPT_NODE_SHARE = 0.5
+CLASSIFICATION_TOKENS_PER_NODE = 60
+
+STAGE_ORDER = [
+    AgentSetupStage.SOP_GENERATION,
+    AgentSetupStage.GRAPH_GENERATION,
+    AgentSetupStage.TOOL_MATCHING,
+    AgentSetupStage.TOOL_GENERATION,
+]
+
+
+class AdmissionError(Exception):
+    pass
+
+
+class AdmissionDeferredError(AdmissionError):
+    """The Budget is exhausted for longer than a Job may wait, retry later."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionRejectedError(AdmissionError):
+    """The Job is shed, as it exceeds the Job Limit or the Queue is full."""
+
+
+class StageCostEstimate(BaseModel):
+    stage: AgentSetupStage
+    llm_calls: int
+    input_tokens: int
+    output_tokens: int
+
+
+class SetupCostEstimate(BaseModel):
+    stages: List[StageCostEstimate]
+
+    @property
+    def llm_calls(self) -> int:
+        return sum(stage.llm_calls for stage in self.stages)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(stage.input_tokens + stage.output_tokens for stage in self.stages)
+
+
+def estimate_setup_cost(agent_setup: AgentSetupSession) -> SetupCostEstimate:
+    """Estimates the LLM Calls & Tokens of the Stages the Session has not finished yet."""
+    next_stage = (
+        agent_setup.setup_state.next
+        if agent_setup.setup_state
+        else AgentSetupStage.SOP_GENERATION
+    )
+    if next_stage not in STAGE_ORDER:
+        return SetupCostEstimate(stages=[])
+
+    process_tokens = estimate_tokens(agent_setup.process_instructions or "") + (
+        len(agent_setup.file_uploads) * FILE_UPLOAD_TOKENS
+    )
+
+    if agent_setup.agent_sop:
+        sop_tokens = estimate_tokens(agent_setup.agent_sop)
+    else:
+        sop_tokens = min(max(process_tokens, MIN_SOP_TOKENS), MAX_SOP_TOKENS)
+
+    if agent_setup.generated_graph:
+        nodes = agent_setup.generated_graph.workflow_graph
+        node_count = len(nodes)
+        prompt_node_count = sum(1 for node in nodes if node.tool_category == "prompt")
+    else:
+        node_count = min(max(sop_tokens // SOP_TOKENS_PER_NODE, MIN_NODES), MAX_NODES)
+        prompt_node_count = math.ceil(node_count * PROMPT_NODE_SHARE)
+
+    stage_estimates = {
+        AgentSetupStage.SOP_GENERATION: StageCostEstimate(
+            stage=AgentSetupStage.SOP_GENERATION,
+            llm_calls=1,
+            input_tokens=PROMPT_OVERHEAD_TOKENS + process_tokens,
+            output_tokens=sop_tokens,
+        ),
+        # Graph Generation & the Tool Category Classification of its Nodes
+        AgentSetupStage.GRAPH_GENERATION: StageCostEstimate(
+            stage=AgentSetupStage.GRAPH_GENERATION,
+            llm_calls=2,
+            input_tokens=2 * PROMPT_OVERHEAD_TOKENS
+            + sop_tokens
+            + node_count * GRAPH_TOKENS_PER_NODE,
+            output_tokens=node_count * (GRAPH_TOKENS_PER_NODE + CLASSIFICATION_TOKENS_PER_NODE),
+        ),
+        # NOTE: Tool Matching searches the Tool Index without LLM Calls
+        AgentSetupStage.TOOL_MATCHING: StageCostEstimate(
+            stage=AgentSetupStage.TOOL_MATCHING,
+            llm_calls=0,
+            input_tokens=0,
+            output_tokens=0,
+        ),
+        AgentSetupStage.TOOL_GENERATION: StageCostEstimate(
+            stage=AgentSetupStage.TOOL_GENERATION,
+            llm_calls=math.ceil(prompt_node_count / DEFAULT_TOOL_BATCH_SIZE),
+            input_tokens=math.ceil(prompt_node_count / DEFAULT_TOOL_BATCH_SIZE)
+            * PROMPT_OVERHEAD_TOKENS
+            + prompt_node_count * GRAPH_TOKENS_PER_NODE,
+            output_tokens=prompt_node_count * TOOL_BATCH_OUTPUT_TOKENS_PER_TOOL,
+        ),
+    }
+
+    return SetupCostEstimate(
+        stages=[
+            stage_estimates[stage]
+            for stage in STAGE_ORDER[STAGE_ORDER.index(next_stage) :]
+        ]
+    )
+
+
+class AdmissionMetrics(BaseModel):
+    admitted: int = 0
+    # Jobs told to retry later, as the Budget would not refill in time
+    deferred: int = 0
+    # Jobs shed, too large or with a full Queue
+    rejected: int = 0
+    # Jobs currently waiting for the Budget
+    queue_depth: int = 0
+    total_queue_wait: float = 0.0
+    max_queue_wait: float = 0.0
+    admitted_tokens: int = 0
+
+
+class AdmissionController:
+    """
+    Global Token Bucket of LLM Tokens per Minute, with a FIFO Queue of waiting Jobs.
+
+    The Bucket holds at most one Minute of Tokens. Jobs larger than the Bucket are
+    admitted once it is full and leave it in Debt, so they are not starved.
+    """
+
+    def __init__(
+        self,
+        tokens_per_minute: int,
+        max_job_tokens: Optional[int] = None,
+        max_queue_size: int = 100,
+        max_queue_wait: float = 120.0,
+    ):
+        self.tokens_per_minute = tokens_per_minute
+        self.max_job_tokens = max_job_tokens
+        self.max_queue_size = max_queue_size
+        self.max_queue_wait = max_queue_wait
+        self.metrics = AdmissionMetrics()
+
+        self._available_tokens = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        # Tokens of the Jobs waiting in the Queue
+        self._queued_tokens = 0
+        # NOTE: asyncio.Lock wakes its Waiters in FIFO Order
+        self._queue_lock = asyncio.Lock()
+
+    @property
+    def refill_rate(self) -> float:
+        return self.tokens_per_minute / 60
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._available_tokens = min(
+            self._available_tokens + (now - self._refilled_at) * self.refill_rate,
+            float(self.tokens_per_minute),
+        )
+        self._refilled_at = now
+
+    def _required_tokens(self, tokens: int) -> float:
+        return min(tokens, self.tokens_per_minute)
+
+    def estimate_wait(self, tokens: int) -> float:
+        """Seconds until a Job of the given Tokens would be admitted behind the Queue."""
+        self._refill()
+        missing_tokens = (
+            self._queued_tokens + self._required_tokens(tokens) - self._available_tokens
+        )
+
+        return max(missing_tokens, 0) / self.refill_rate
+
+    async def admit(self, estimate: SetupCostEstimate) -> None:
+        """Waits until the Budget covers the Estimate, or defers / sheds the Job."""
+        tokens = estimate.total_tokens
+
+        if self.max_job_tokens and tokens > self.max_job_tokens:
+            self.metrics.rejected += 1
+            raise AdmissionRejectedError(
+                f"Estimated {tokens} Tokens exceed the Job Limit of {self.max_job_tokens} Tokens"
+            )
+        if self.metrics.queue_depth >= self.max_queue_size:
+            self.metrics.rejected += 1
+            raise AdmissionRejectedError(
+                f"Admission Queue is full with {self.metrics.queue_depth} Jobs"
+            )
+
+        expected_wait = self.estimate_wait(tokens)
+        if expected_wait > self.max_queue_wait:
+            self.metrics.deferred += 1
+            raise AdmissionDeferredError(
+                f"Token Budget exhausted for {expected_wait:.0f}s", retry_after=expected_wait
+            )
+
+        start_time = time.monotonic()
+        queued_tokens = int(self._required_tokens(tokens))
+        self._queued_tokens += queued_tokens
+        self.metrics.queue_depth += 1
+
+        try:
+            async with self._queue_lock:
+                self._refill()
+                while self._available_tokens < self._required_tokens(tokens):
+                    await asyncio.sleep(
+                        (self._required_tokens(tokens) - self._available_tokens)
+                        / self.refill_rate
+                    )
+                    self._refill()
+
+                self._available_tokens -= tokens
+        finally:
+            self._queued_tokens -= queued_tokens
+            self.metrics.queue_depth -= 1
+
+        queue_wait = time.monotonic() - start_time
+        self.metrics.admitted += 1
+        self.metrics.admitted_tokens += tokens
+        self.metrics.total_queue_wait += queue_wait
+        self.metrics.max_queue_wait = max(self.metrics.max_queue_wait, queue_wait)
+
+        logger.debug(
+            f"Admission Control || Admitted Job of {tokens} Tokens ({estimate.llm_calls} LLM Calls) after {queue_wait:.2f}s"
+        )
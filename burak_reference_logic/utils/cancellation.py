@@ -0,0 +1,100 @@
+"""
+Cooperative Cancellation of Setup Runs
+
+A Cancel Token is held by the running Setup (``AgentGraphCreationState.cancel_token``)
+and checked between Stages. Stage Handlers and their per-Node Fan-outs run as Tasks
+tracked by the Token, so cancelling it (Session abandoned, or superseded by a newer
+Run) actually cancels the in-flight LLM & Tool Calls instead of paying for them.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, List, Optional, Set, TypeVar
+
+logger = logging.getLogger("app")
+
+T = TypeVar("T")
+
+
+class SetupCancelledError(Exception):
+    pass
+
+
+class CancelToken:
+    """Cancellation Flag of a Setup Run, cancelling the Tasks it tracks."""
+
+    def __init__(self):
+        self.reason: Optional[str] = None
+        self._tasks: Set[asyncio.Future] = set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    def cancel(self, reason: str = "Agent Setup cancelled") -> None:
+        if self.cancelled:
+            return
+
+        self.reason = reason
+        logger.info(f"Cancelling {len(self._tasks)} running Tasks of the Agent Setup: {reason}")
+
+        for task in list(self._tasks):
+            task.cancel()
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise SetupCancelledError(self.reason)
+
+    def track(self, task: asyncio.Future) -> None:
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+async def gather_cancellable(
+    *awaitables: Awaitable[Any],
+    cancel_token: Optional[CancelToken] = None,
+    return_exceptions: bool = False,
+) -> List[Any]:
+    """``asyncio.gather`` whose Tasks are cancelled with the Cancel Token."""
+    if cancel_token is None:
+        return await asyncio.gather(*awaitables, return_exceptions=return_exceptions)
+
+    if cancel_token.cancelled:
+        for awaitable in awaitables:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+        cancel_token.raise_if_cancelled()
+
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    for task in tasks:
+        cancel_token.track(task)
+
+    try:
+        results = await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+    except asyncio.CancelledError:
+        if cancel_token.cancelled and not _is_cancelling():
+            raise SetupCancelledError(cancel_token.reason)
+        raise
+
+    # Cancelled Tasks are returned as Results with return_exceptions
+    if cancel_token.cancelled and _is_cancelling():
+        raise asyncio.CancelledError()
+    cancel_token.raise_if_cancelled()
+
+    return results
+
+
+async def run_cancellable(awaitable: Awaitable[T], cancel_token: Optional[CancelToken]) -> T:
+    """Runs a single Call (e.g. a Stage Handler) as a Task cancelled with the Token."""
+    results = await gather_cancellable(awaitable, cancel_token=cancel_token)
+
+    return results[0]
+
+
+def _is_cancelling() -> bool:
+    # NOTE: Only the outermost tracking Call turns the Cancellation into a Setup
+    # Cancellation, cancelled Callers (e.g. tracked Stages) stay cancelled
+    current_task = asyncio.current_task()
+
+    return bool(current_task and current_task.cancelling())
+
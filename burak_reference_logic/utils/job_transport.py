@@ -0,0 +1,212 @@
+"""
+Batched & pipelined Job Publishing
+
+Outgoing Jobs of all Sessions of a Worker are buffered and published in Batches, one
+Broker Round Trip per Batch (e.g. a Redis Pipeline), once a Batch is full or the Flush
+Interval passed. Several Batches are in flight at once; a Batch only waits for earlier
+in-flight Batches holding Jobs of the same Session, so Jobs of a Session are delivered
+in the Order they were published. If an earlier Batch of a Session failed, the Jobs of
+the Session in the waiting Batches fail too instead of overtaking the lost Jobs.
+``publish`` returns a Future of the Delivery.
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+from pydantic import BaseModel, ConfigDict, Field
+
+logger = logging.getLogger("app")
+
+
+class OutgoingJob(BaseModel):
+    job: Any
+    # Jobs with the same Key (e.g. the Session Id) are delivered in Order
+    ordering_key: Optional[str] = None
+    # Broker specific Options (e.g. clear_from_cache)
+    options: Dict[str, Any] = Field(default_factory=dict)
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+
+class JobBroker(ABC):
+    @abstractmethod
+    async def publish_batch(self, jobs: List[OutgoingJob]) -> None:
+        """Publishes the Jobs in one Round Trip, in the given Order."""
+
+
+class InMemoryBroker(JobBroker):
+    """Local Broker Stand-in, e.g. for Throughput Tests without Redis."""
+
+    def __init__(self, round_trip_latency: float = 0.0):
+        self.round_trip_latency = round_trip_latency
+        self.round_trips = 0
+        self.published: List[OutgoingJob] = []
+        self.queues: Dict[Optional[str], asyncio.Queue] = defaultdict(asyncio.Queue)
+
+    async def publish_batch(self, jobs: List[OutgoingJob]) -> None:
+        self.round_trips += 1
+        await asyncio.sleep(self.round_trip_latency)
+
+        for outgoing_job in jobs:
+            self.published.append(outgoing_job)
+            self.queues[outgoing_job.ordering_key].put_nowait(outgoing_job.job)
+
+    async def consume(self, ordering_key: Optional[str] = None) -> Any:
+        return await self.queues[ordering_key].get()
+
+
+class JobTransportMetrics(BaseModel):
+    published_jobs: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    max_batch_size: int = 0
+
+
+class JobTransport:
+    """Buffers outgoing Jobs & flushes them in pipelined Batches."""
+
+    def __init__(
+        self,
+        broker: JobBroker,
+        max_batch_size: int = 100,
+        flush_interval: float = 0.01,
+        max_in_flight_batches: int = 4,
+    ):
+        self.broker = broker
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.metrics = JobTransportMetrics()
+
+        self._buffer: List[OutgoingJob] = []
+        self._buffer_futures: List[asyncio.Future] = []
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight_slots = asyncio.Semaphore(max_in_flight_batches)
+        self._in_flight_batches: Set[asyncio.Task] = set()
+        # Last in-flight Batch per Ordering Key, later Batches of the Key wait for it
+        self._last_batches: Dict[str, asyncio.Task] = {}
+
+    def publish(
+        self, job: Any, ordering_key: Optional[str] = None, **options: Any
+    ) -> asyncio.Future:
+        """Buffers a Job, the returned Future resolves once its Batch is delivered."""
+        delivery = asyncio.get_running_loop().create_future()
+        # NOTE: Failed Batches are logged, unawaited Deliveries must not warn again
+        delivery.add_done_callback(_retrieve_delivery_error)
+        self._buffer.append(
+            OutgoingJob(job=job, ordering_key=ordering_key, options=options)
+        )
+        self._buffer_futures.append(delivery)
+
+        if len(self._buffer) >= self.max_batch_size:
+            self._flush_buffer()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._flush_buffer
+            )
+
+        return delivery
+
+    async def flush(self) -> None:
+        """Sends the buffered Jobs & waits until every in-flight Batch is delivered."""
+        self._flush_buffer()
+
+        while self._in_flight_batches:
+            await asyncio.gather(*self._in_flight_batches, return_exceptions=True)
+
+    async def close(self) -> None:
+        await self.flush()
+
+    def _flush_buffer(self) -> None:
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+
+        if not self._buffer:
+            return
+
+        jobs, deliveries = self._buffer, self._buffer_futures
+        self._buffer, self._buffer_futures = [], []
+
+        ordering_keys = {job.ordering_key for job in jobs if job.ordering_key is not None}
+        previous_batches = {
+            self._last_batches[key] for key in ordering_keys if key in self._last_batches
+        }
+
+        batch_task = asyncio.ensure_future(
+            self._send_batch(jobs, deliveries, previous_batches)
+        )
+        self._in_flight_batches.add(batch_task)
+        batch_task.add_done_callback(self._finish_batch)
+
+        for key in ordering_keys:
+            self._last_batches[key] = batch_task
+
+    async def _send_batch(
+        self,
+        jobs: List[OutgoingJob],
+        deliveries: List[asyncio.Future],
+        previous_batches: Set[asyncio.Task],
+    ) -> Dict[str, BaseException]:
+        """Publishes the Batch, returns the Errors of the Ordering Keys left undelivered."""
+        # NOTE: Earlier Batches of the same Sessions are delivered first, failed or not
+        failed_keys: Dict[str, BaseException] = {}
+        if previous_batches:
+            for previous_failed_keys in await asyncio.gather(
+                *previous_batches, return_exceptions=True
+            ):
+                if isinstance(previous_failed_keys, dict):
+                    failed_keys.update(previous_failed_keys)
+
+        # Jobs of Keys with lost earlier Jobs are failed, instead of being delivered out of Order
+        ordering_keys = {job.ordering_key for job in jobs if job.ordering_key is not None}
+        failed_keys = {key: failed_keys[key] for key in ordering_keys & failed_keys.keys()}
+        if failed_keys:
+            logger.error(
+                f"Job Transport || Failing Jobs of Keys with a failed earlier Batch: {sorted(failed_keys)}"
+            )
+            sent_jobs, sent_deliveries = [], []
+            for outgoing_job, delivery in zip(jobs, deliveries):
+                if outgoing_job.ordering_key not in failed_keys:
+                    sent_jobs.append(outgoing_job)
+                    sent_deliveries.append(delivery)
+                elif not delivery.done():
+                    delivery.set_exception(failed_keys[outgoing_job.ordering_key])
+
+            jobs, deliveries = sent_jobs, sent_deliveries
+            if not jobs:
+                return failed_keys
+
+        async with self._in_flight_slots:
+            try:
+                await self.broker.publish_batch(jobs)
+            except Exception as publish_exc:
+                self.metrics.failed_batches += 1
+                logger.error(f"Job Transport || Publishing Batch of {len(jobs)} Jobs failed: {publish_exc}")
+                for delivery in deliveries:
+                    if not delivery.done():
+                        delivery.set_exception(publish_exc)
+                return {key: publish_exc for key in ordering_keys}
+
+        self.metrics.batches += 1
+        self.metrics.published_jobs += len(jobs)
+        self.metrics.max_batch_size = max(self.metrics.max_batch_size, len(jobs))
+
+        for delivery in deliveries:
+            if not delivery.done():
+                delivery.set_result(None)
+
+        return failed_keys
+
+    def _finish_batch(self, batch_task: asyncio.Task) -> None:
+        self._in_flight_batches.discard(batch_task)
+
+        for key in [key for key, task in self._last_batches.items() if task is batch_task]:
+            del self._last_batches[key]
+
+
+def _retrieve_delivery_error(delivery: asyncio.Future) -> None:
+    if not delivery.cancelled():
+        delivery.exception()
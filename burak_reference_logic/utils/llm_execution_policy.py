@@ -0,0 +1,283 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set, TypeVar
+
+from beam_ai_core.executor.errors import RateLimitExceededError
+from beam_ai_core.llm.llms import LLM, LLMConfig
+from pydantic import BaseModel, Field, field_validator
+
+from app.lib.modules.agents.agent_setup.models.agent_setup import AgentSetupStage
+from app.lib.modules.agents.agent_setup.utils.stage_deadlines import cap_timeout
+
+logger = logging.getLogger("app")
+
+T = TypeVar("T")
+
+
+class LLMExecutionPolicy(BaseModel):
+    # Ordered Models, later Models are used as Hedges & Fallbacks
+    models: List[str]
+    # Timeout per LLM Request in Seconds
+    timeout: Optional[float] = None
+    # Latency Percentile of the running Model after which a Hedged Request is fired
+    hedge_percentile: float = Field(default=0.95, gt=0, le=1)
+    # Hedge Delay used until enough Latencies are recorded for a Model
+    default_hedge_delay: float = 60.0
+    min_hedge_delay: float = 1.0
+    # Consecutive Failures after which the Circuit Breaker of a Model opens
+    failure_threshold: int = 3
+    # Seconds until an open Circuit Breaker lets a Probe Request through
+    recovery_timeout: float = 30.0
+
+    @field_validator("models")
+    @classmethod
+    def validate_distinct_models(cls, models: List[str]) -> List[str]:
+        # Hedging or falling back to the same Model shares its Outage
+        if len(set(models)) != len(models):
+            raise ValueError(f"Models of an LLM Execution Policy must be distinct: {models}")
+
+        return models
+
+
+class CircuitState(Enum):
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitBreaker:
+    """Per Model Circuit Breaker, skipping a Model after consecutive Failures."""
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow_request(self) -> bool:
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self.opened_at < self.recovery_timeout:
+                return False
+            # Let a single Probe Request through after the Recovery Timeout
+            self.state = CircuitState.HALF_OPEN
+            return True
+
+        return self.state == CircuitState.CLOSED
+
+    def release_probe(self) -> None:
+        """Re-opens a Breaker whose Probe was cancelled, so the next Request probes again."""
+        if self.state == CircuitState.HALF_OPEN:
+            self.state = CircuitState.OPEN
+
+    def record_success(self) -> None:
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if (
+            self.state == CircuitState.HALF_OPEN
+            or self.failures >= self.failure_threshold
+        ):
+            self.state = CircuitState.OPEN
+            self.opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling Window of successful Request Latencies for a Model."""
+
+    MIN_SAMPLES = 20
+
+    def __init__(self, window_size: int = 200):
+        self.latencies: Deque[float] = deque(maxlen=window_size)
+
+    def record(self, latency: float) -> None:
+        self.latencies.append(latency)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        if len(self.latencies) < self.MIN_SAMPLES:
+            return None
+
+        ordered_latencies = sorted(self.latencies)
+        index = min(int(percentile * len(ordered_latencies)), len(ordered_latencies) - 1)
+
+        return ordered_latencies[index]
+
+
+_circuit_breakers: Dict[str, CircuitBreaker] = {}
+_latency_trackers: Dict[str, LatencyTracker] = {}
+
+
+def get_circuit_breaker(model: str, policy: LLMExecutionPolicy) -> CircuitBreaker:
+    if model not in _circuit_breakers:
+        _circuit_breakers[model] = CircuitBreaker(
+            failure_threshold=policy.failure_threshold,
+            recovery_timeout=policy.recovery_timeout,
+        )
+
+    return _circuit_breakers[model]
+
+
+def get_latency_tracker(model: str) -> LatencyTracker:
+    if model not in _latency_trackers:
+        _latency_trackers[model] = LatencyTracker()
+
+    return _latency_trackers[model]
+
+
+def get_hedge_delay(model: str, policy: LLMExecutionPolicy) -> float:
+    hedge_delay = get_latency_tracker(model).percentile(policy.hedge_percentile)
+
+    if hedge_delay is None:
+        return policy.default_hedge_delay
+
+    return max(hedge_delay, policy.min_hedge_delay)
+
+
+# NOTE: Default Policies per Setup Stage, the secondary Model is used as Hedge & Fallback.
+# Models are looked up in the LLM Enum, so an unknown Model fails at Import, not at the first Fallback
+STAGE_LLM_POLICIES: Dict[AgentSetupStage, LLMExecutionPolicy] = {
+    AgentSetupStage.SOP_GENERATION: LLMExecutionPolicy(
+        models=[LLM.GPT40.value, LLM("gpt-4.1").value],
+        timeout=300.0,
+    ),
+    AgentSetupStage.GRAPH_GENERATION: LLMExecutionPolicy(
+        models=[LLM.GPT40.value, LLM("gpt-4.1").value],
+        timeout=300.0,
+    ),
+    # Small structured Requests, a smaller Model is good enough as Fallback
+    AgentSetupStage.TOOL_MATCHING: LLMExecutionPolicy(
+        models=[LLM.GPT40.value, LLM("gpt-4o-mini").value],
+        timeout=60.0,
+    ),
+    AgentSetupStage.TOOL_GENERATION: LLMExecutionPolicy(
+        models=[LLM.GPT40.value, LLM("gpt-4.1-mini").value],
+        timeout=120.0,
+    ),
+}
+
+
+def get_stage_llm_policy(stage: AgentSetupStage) -> LLMExecutionPolicy:
+    return STAGE_LLM_POLICIES.get(
+        stage, LLMExecutionPolicy(models=[LLM.GPT40.value])
+    )
+
+
+def set_stage_llm_policy(stage: AgentSetupStage, policy: LLMExecutionPolicy) -> None:
+    STAGE_LLM_POLICIES[stage] = policy
+
+
+async def execute_with_policy(
+    llm_call: Callable[[LLMConfig], Awaitable[T]],
+    policy: LLMExecutionPolicy,
+) -> T:
+    """
+    Executes an LLM Call with the ordered Models of the Policy.
+
+    The first Model is requested immediately. If it does not respond within its
+    Hedge Delay, the next Model is requested in parallel and the first valid Response
+    is returned. Failed Requests fall back to the next Model. Models with an open
+    Circuit Breaker are skipped.
+    """
+    models = list(policy.models)
+    pending_requests: Dict[asyncio.Task, str] = {}
+    request_start_times: Dict[asyncio.Task, float] = {}
+    # Requests probing a half-open Circuit Breaker
+    probe_requests: Set[asyncio.Task] = set()
+    errors: List[BaseException] = []
+
+    def start_request() -> bool:
+        # NOTE: Breakers are only asked when a Request of the Model is actually started
+        is_probe = False
+        while models:
+            model = models.pop(0)
+            circuit_breaker = get_circuit_breaker(model, policy)
+            if circuit_breaker.allow_request():
+                is_probe = circuit_breaker.state == CircuitState.HALF_OPEN
+                break
+        else:
+            if pending_requests or errors:
+                return False
+            # With every Circuit open, the primary Model is still tried instead of failing directly
+            logger.warning("LLM Execution || All Circuit Breakers are open, using primary Model")
+            model = policy.models[0]
+
+        # NOTE: Requests never outlive the Deadline of the running Stage
+        timeout = cap_timeout(policy.timeout)
+        llm_request = llm_call(LLMConfig(force_select_model=model))
+
+        if timeout:
+            llm_request = asyncio.wait_for(llm_request, timeout=timeout)
+
+        request_task = asyncio.ensure_future(llm_request)
+        pending_requests[request_task] = model
+        request_start_times[request_task] = time.monotonic()
+        if is_probe:
+            probe_requests.add(request_task)
+
+        return True
+
+    start_request()
+
+    try:
+        while pending_requests:
+            # Only wait for the Hedge Delay while there are Models left to hedge with
+            hedge_delay = None
+            if models:
+                latest_model = list(pending_requests.values())[-1]
+                hedge_delay = get_hedge_delay(latest_model, policy)
+
+            finished_requests, _ = await asyncio.wait(
+                pending_requests.keys(),
+                timeout=hedge_delay,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+
+            if not finished_requests:
+                logger.info(
+                    f"LLM Execution || No Response after {hedge_delay:.1f}s, hedging with the next Model"
+                )
+                if not start_request():
+                    # Every remaining Model has an open Circuit, keep waiting for the running Requests
+                    models.clear()
+                continue
+
+            for request_task in finished_requests:
+                model = pending_requests.pop(request_task)
+                probe_requests.discard(request_task)
+                circuit_breaker = get_circuit_breaker(model, policy)
+
+                if request_task.exception() is None:
+                    circuit_breaker.record_success()
+                    get_latency_tracker(model).record(
+                        time.monotonic() - request_start_times[request_task]
+                    )
+                    return request_task.result()
+
+                request_exc = request_task.exception()
+                circuit_breaker.record_failure()
+                errors.append(request_exc)
+                logger.warning(f"LLM Execution || Model {model} failed: {request_exc!r}")
+
+            # Fall back to the next Model once every running Request failed
+            if not pending_requests and models:
+                start_request()
+
+    finally:
+        for request_task, model in pending_requests.items():
+            request_task.cancel()
+            # A cancelled Probe has no Outcome, the Breaker must not stay half-open
+            if request_task in probe_requests:
+                get_circuit_breaker(model, policy).release_probe()
+
+    # Rate Limits are only surfaced if every Model was rate limited
+    if all(isinstance(error, RateLimitExceededError) for error in errors):
+        raise errors[-1]
+
+    raise next(
+        error for error in reversed(errors) if not isinstance(error, RateLimitExceededError)
+    )
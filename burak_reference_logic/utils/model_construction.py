@@ -0,0 +1,50 @@
+import os
+from contextlib import contextmanager
+from typing import Any, Iterator, Type, TypeVar
+
+from pydantic import BaseModel
+
+M = TypeVar("M", bound=BaseModel)
+
+# NOTE: Debug Switch, re-enables full Validation for Models built from trusted Data (e.g. in Tests)
+_strict_validation = os.environ.get("AGENT_SETUP_STRICT_VALIDATION", "").lower() in (
+    "1",
+    "true",
+)
+
+
+def set_strict_validation(enabled: bool) -> None:
+    global _strict_validation
+    _strict_validation = enabled
+
+
+def is_strict_validation() -> bool:
+    return _strict_validation
+
+
+@contextmanager
+def strict_validation(enabled: bool = True) -> Iterator[None]:
+    previous_strict_validation = _strict_validation
+    set_strict_validation(enabled)
+
+    try:
+        yield
+    finally:
+        set_strict_validation(previous_strict_validation)
+
+
+def trusted_construct(model: Type[M], **fields: Any) -> M:
+    """
+    Builds a Model from Data already validated by our own Code, skipping Validation.
+
+    Must only be used inside the Setup Pipeline, external Data (Job Payloads, API
+    Requests) is validated at the Boundary. Defaults are still applied.
+
+    Only pays off for composite Models holding already built Models (e.g. the
+    AgentSetupSession), flat Models validate faster in pydantic-core than they are
+    constructed in Python. See tests/benchmarks/session_validation_benchmark.py.
+    """
+    if _strict_validation:
+        return model(**fields)
+
+    return model.model_construct(**fields)
@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+from pydantic import BaseModel
+
+logger = logging.getLogger("app")
+
+T = TypeVar("T")
+
+
+class SingleFlightMetrics(BaseModel):
+    # Requests received for the Key
+    calls: int = 0
+    # Requests actually executed against the Backend
+    executions: int = 0
+    # Requests which awaited an already in-flight Request
+    shared: int = 0
+    failures: int = 0
+
+
+def make_request_key(*args: Any, **kwargs: Any) -> str:
+    """Builds a stable Key for a Request, ignoring Whitespace differences in Texts."""
+
+    def _normalize(value: Any) -> Any:
+        if isinstance(value, str):
+            return re.sub(r"\s+", " ", value).strip()
+        if isinstance(value, dict):
+            return {key: _normalize(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [_normalize(item) for item in value]
+        return value
+
+    request = json.dumps(
+        [_normalize(list(args)), _normalize(kwargs)], sort_keys=True, default=str
+    )
+
+    return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent Requests into a single in-flight Call.
+
+    Results are only shared while the Call is running, nothing is cached afterwards.
+    A cancelled Caller leaves the Call running for the other Callers, the Call is only
+    cancelled with its last Caller.
+    """
+
+    MAX_TRACKED_KEYS = 1000
+
+    def __init__(self, name: str):
+        self.name = name
+        self.total = SingleFlightMetrics()
+        self.metrics: "OrderedDict[str, SingleFlightMetrics]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        # Callers awaiting each in-flight Call
+        self._waiters: Dict[asyncio.Future, int] = {}
+
+    def _key_metrics(self, key: str) -> SingleFlightMetrics:
+        if key not in self.metrics:
+            self.metrics[key] = SingleFlightMetrics()
+            # Only keep the Metrics of the most recent Keys
+            if len(self.metrics) > self.MAX_TRACKED_KEYS:
+                self.metrics.popitem(last=False)
+        else:
+            self.metrics.move_to_end(key)
+
+        return self.metrics[key]
+
+    def _record(self, key: str, metric: str) -> None:
+        for metrics in (self.total, self._key_metrics(key)):
+            setattr(metrics, metric, getattr(metrics, metric) + 1)
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        self._record(key, "calls")
+
+        in_flight_call = self._in_flight.get(key)
+        if in_flight_call is not None:
+            self._record(key, "shared")
+            logger.debug(f"SingleFlight[{self.name}] || Sharing in-flight Request: {key}")
+        else:
+            self._record(key, "executions")
+            in_flight_call = asyncio.ensure_future(call())
+            self._in_flight[key] = in_flight_call
+            in_flight_call.add_done_callback(
+                lambda finished_call: self._finish(key, finished_call)
+            )
+
+        self._waiters[in_flight_call] = self._waiters.get(in_flight_call, 0) + 1
+        try:
+            # Shielded, so a cancelled Caller does not cancel the Call for the others
+            return await asyncio.shield(in_flight_call)
+        except asyncio.CancelledError:
+            if self._waiters[in_flight_call] == 1 and not in_flight_call.done():
+                logger.debug(f"SingleFlight[{self.name}] || Cancelling Request without Callers: {key}")
+                in_flight_call.cancel()
+            raise
+        finally:
+            self._waiters[in_flight_call] -= 1
+            if not self._waiters[in_flight_call]:
+                del self._waiters[in_flight_call]
+
+    def _finish(self, key: str, finished_call: asyncio.Future) -> None:
+        if self._in_flight.get(key) is finished_call:
+            del self._in_flight[key]
+
+        if finished_call.cancelled() or finished_call.exception() is not None:
+            self._record(key, "failures")
+
+
+# NOTE: Process wide Flights, shared by all Agent Setup Sessions of the Worker
+tool_retrieval_flight = SingleFlight(name="fetch_tools_v2")
+custom_tool_flight = SingleFlight(name="create_custom_tool_prompt")
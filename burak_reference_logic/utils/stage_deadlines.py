@@ -0,0 +1,265 @@
+"""
+Adaptive Stage Deadlines
+
+Every Setup Stage runs under a Deadline derived from a rolling Latency Histogram of the
+Stage, scaled by the Size of its Input (Process Text Length, Node Count). The Deadline is
+propagated through a Context Variable, so LLM & Tool Calls within the Stage are capped
+by the Time remaining. An expired Stage fails cleanly with ``setup_state.next`` left on
+the Stage, so the Session can be resumed from it.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Deque, Dict, Iterator, Optional, TypeVar
+
+from pydantic import BaseModel, Field
+
+from app.lib.modules.agents.agent_setup.models.agent_setup import (
+    AgentGraphCreationState,
+    AgentSetupSession,
+    AgentSetupStage,
+)
+from app.lib.modules.agents.agent_setup.utils.agent_setup_utils import (
+    set_failed_agent_setup_state,
+)
+from app.lib.modules.graphs.graph_task_executor.models.node_interrupt import (
+    NodeInterrupt,
+)
+
+logger = logging.getLogger("app")
+
+T = TypeVar("T")
+
+# Absolute Deadline (time.monotonic) of the running Setup, None if unbounded
+_deadline: ContextVar[Optional[float]] = ContextVar("agent_setup_deadline", default=None)
+
+
+class StageDeadlineExceededError(TimeoutError):
+    pass
+
+
+class StageDeadlinePolicy(BaseModel):
+    # Budget in Seconds until enough Latencies are recorded, for an Input of one Unit
+    default_budget: float
+    min_budget: float = 30.0
+    max_budget: float = 1800.0
+    # Input Size (Characters or Nodes) counted as one Unit of Work
+    input_unit: float = Field(default=1.0, gt=0)
+    # Latency Percentile of the Stage the Budget is derived from
+    percentile: float = Field(default=0.99, gt=0, le=1)
+    # Headroom on top of the Percentile
+    safety_factor: float = Field(default=1.5, ge=1)
+
+
+class StageLatencyHistogram:
+    """Rolling Window of Stage Latencies, normalized by the Input Size of each Run."""
+
+    MIN_SAMPLES = 10
+
+    def __init__(self, window_size: int = 200):
+        # Seconds per Work Unit, see get_work_units
+        self.unit_latencies: Deque[float] = deque(maxlen=window_size)
+
+    def record(self, latency: float, work_units: float) -> None:
+        self.unit_latencies.append(latency / work_units)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        if len(self.unit_latencies) < self.MIN_SAMPLES:
+            return None
+
+        ordered_latencies = sorted(self.unit_latencies)
+        index = min(int(percentile * len(ordered_latencies)), len(ordered_latencies) - 1)
+
+        return ordered_latencies[index]
+
+
+# NOTE: SOP & Graph Generation scale with their Input Text, Tool Stages with the Node Count
+STAGE_DEADLINE_POLICIES: Dict[AgentSetupStage, StageDeadlinePolicy] = {
+    AgentSetupStage.SOP_GENERATION: StageDeadlinePolicy(
+        default_budget=600.0, input_unit=8000
+    ),
+    AgentSetupStage.GRAPH_GENERATION: StageDeadlinePolicy(
+        default_budget=600.0, input_unit=8000
+    ),
+    AgentSetupStage.TOOL_MATCHING: StageDeadlinePolicy(
+        default_budget=300.0, input_unit=20
+    ),
+    AgentSetupStage.TOOL_GENERATION: StageDeadlinePolicy(
+        default_budget=600.0, input_unit=20
+    ),
+}
+
+_stage_histograms: Dict[AgentSetupStage, StageLatencyHistogram] = {}
+
+
+def get_stage_deadline_policy(stage: AgentSetupStage) -> StageDeadlinePolicy:
+    return STAGE_DEADLINE_POLICIES.get(stage, StageDeadlinePolicy(default_budget=600.0))
+
+
+def set_stage_deadline_policy(stage: AgentSetupStage, policy: StageDeadlinePolicy) -> None:
+    STAGE_DEADLINE_POLICIES[stage] = policy
+
+
+def get_stage_histogram(stage: AgentSetupStage) -> StageLatencyHistogram:
+    if stage not in _stage_histograms:
+        _stage_histograms[stage] = StageLatencyHistogram()
+
+    return _stage_histograms[stage]
+
+
+def get_stage_input_size(stage: AgentSetupStage, agent_setup: AgentSetupSession) -> int:
+    """Size of the Stage Input, Characters for Text Stages & Nodes for Tool Stages."""
+    match stage:
+        case AgentSetupStage.SOP_GENERATION:
+            return len(agent_setup.process_instructions or "")
+        case AgentSetupStage.GRAPH_GENERATION:
+            return len(agent_setup.agent_sop or "")
+        case AgentSetupStage.TOOL_MATCHING | AgentSetupStage.TOOL_GENERATION:
+            if not agent_setup.generated_graph:
+                return 0
+            return len(agent_setup.generated_graph.workflow_graph)
+
+    return 0
+
+
+def get_work_units(input_size: int, policy: StageDeadlinePolicy) -> float:
+    # NOTE: One Unit of fixed Overhead, so small Inputs still get a Budget
+    return 1 + input_size / policy.input_unit
+
+
+def get_stage_budget(stage: AgentSetupStage, input_size: int) -> float:
+    """Seconds the Stage may take for an Input of the given Size."""
+    policy = get_stage_deadline_policy(stage)
+    work_units = get_work_units(input_size, policy)
+
+    unit_latency = get_stage_histogram(stage).percentile(policy.percentile)
+    if unit_latency is None:
+        budget = policy.default_budget * work_units
+    else:
+        budget = unit_latency * work_units * policy.safety_factor
+
+    return min(max(budget, policy.min_budget), policy.max_budget)
+
+
+def record_stage_latency(stage: AgentSetupStage, latency: float, input_size: int) -> None:
+    policy = get_stage_deadline_policy(stage)
+    get_stage_histogram(stage).record(latency, get_work_units(input_size, policy))
+
+
+def get_remaining_time() -> Optional[float]:
+    """Seconds until the current Deadline, None without Deadline."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+
+    return deadline - time.monotonic()
+
+
+def check_deadline() -> None:
+    remaining_time = get_remaining_time()
+    if remaining_time is not None and remaining_time <= 0:
+        raise StageDeadlineExceededError("Agent Setup Deadline exceeded")
+
+
+def cap_timeout(timeout: Optional[float]) -> Optional[float]:
+    """Caps a Timeout by the current Deadline, raises if the Deadline passed."""
+    check_deadline()
+
+    remaining_time = get_remaining_time()
+    if remaining_time is None:
+        return timeout
+    if timeout is None:
+        return remaining_time
+
+    return min(timeout, remaining_time)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[Optional[float]]:
+    """
+    Sets a Deadline in the given Seconds for the Scope. Nested Scopes never extend
+    the Deadline of the enclosing Scope.
+    """
+    deadline = _deadline.get()
+    if seconds is not None:
+        scope_deadline = time.monotonic() + seconds
+        deadline = scope_deadline if deadline is None else min(deadline, scope_deadline)
+
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+async def wait_with_deadline(awaitable: Awaitable[T]) -> T:
+    """Awaits a Call (e.g. a Tool Request), failing once the current Deadline passes."""
+    try:
+        timeout = cap_timeout(None)
+    except StageDeadlineExceededError:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise
+
+    try:
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+    except asyncio.TimeoutError as timeout_exc:
+        # Timeouts of the Call itself are not turned into Deadline Errors
+        if timeout is None or get_remaining_time() > 0:
+            raise
+        raise StageDeadlineExceededError("Agent Setup Deadline exceeded") from timeout_exc
+
+
+async def run_stage_with_deadline(
+    stage: AgentSetupStage,
+    handler: Callable[[AgentGraphCreationState], Awaitable[AgentGraphCreationState]],
+    agent_setup_state: AgentGraphCreationState,
+) -> AgentGraphCreationState:
+    """
+    Runs a Stage Handler within its adaptive Budget & the Deadline of the Setup.
+
+    An expired Stage is set to failed and interrupted, its ``setup_state.next`` stays on
+    the Stage so the Session can be resumed.
+    """
+    agent_setup_session = agent_setup_state.agent_setup_session
+    input_size = get_stage_input_size(stage, agent_setup_session)
+    budget = get_stage_budget(stage, input_size)
+
+    with deadline_scope(budget) as deadline:
+        remaining_time = deadline - time.monotonic()
+        start_time = time.monotonic()
+
+        try:
+            if remaining_time <= 0:
+                raise StageDeadlineExceededError("Agent Setup Deadline exceeded")
+
+            agent_setup_state = await asyncio.wait_for(
+                handler(agent_setup_state), timeout=remaining_time
+            )
+
+        except asyncio.TimeoutError:
+            # NOTE: Timeouts raised within the Handler are only Deadline Expiries once the Deadline passed
+            if get_remaining_time() > 0:
+                raise
+
+            latency = time.monotonic() - start_time
+            # NOTE: Expired Runs are recorded too, so Budgets grow for slow Stages
+            if latency >= budget:
+                record_stage_latency(stage, latency, input_size)
+
+            logger.warning(
+                f"Agent Setup Stage {stage.value} exceeded its Deadline after {latency:.1f}s (Budget: {budget:.1f}s, Input Size: {input_size})"
+            )
+            set_failed_agent_setup_state(
+                error=f"{stage.value} exceeded its Deadline after {latency:.0f}s, the Stage can be resumed.",
+                agent_setup=agent_setup_session,
+            )
+            raise NodeInterrupt(value=agent_setup_state)
+
+    record_stage_latency(stage, time.monotonic() - start_time, input_size)
+
+    return agent_setup_state
@@ -0,0 +1,96 @@
+"""
+Local Text Embeddings
+
+Hashed Bag-of-Words Embeddings & an approximate Nearest Neighbour Index, shared by the
+Custom Tool Library (Tool Generation) & the Tool Prefilter (Tool Matching). Embeddings
+are computed locally, so Similarity Searches need no Embedding Backend.
+"""
+
+import hashlib
+import math
+import random
+import re
+from typing import Dict, List, Set, Tuple
+
+EMBEDDING_DIMENSIONS = 256
+
+
+def embed_text(text: str, dimensions: int = EMBEDDING_DIMENSIONS) -> List[float]:
+    """Local hashed Bag-of-Words Embedding (Words & Word Bigrams) of a Text."""
+    words = re.sub(r"[^a-z0-9]+", " ", text.lower()).split()
+    features = words + [f"{word} {next_word}" for word, next_word in zip(words, words[1:])]
+
+    embedding = [0.0] * dimensions
+    for feature in features:
+        feature_hash = int.from_bytes(
+            hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little"
+        )
+        # The Hash Sign spreads Collisions evenly around Zero
+        embedding[feature_hash % dimensions] += 1.0 if feature_hash >> 63 else -1.0
+
+    norm = math.sqrt(sum(value * value for value in embedding))
+    if not norm:
+        return embedding
+
+    return [value / norm for value in embedding]
+
+
+def cosine_similarity(embedding: List[float], other_embedding: List[float]) -> float:
+    # Embeddings are normalized, so the Dot Product is the Cosine Similarity
+    return sum(value * other_value for value, other_value in zip(embedding, other_embedding))
+
+
+class LSHIndex:
+    """Approximate Nearest Neighbour Index using random Hyperplane Hashing."""
+
+    def __init__(
+        self,
+        dimensions: int = EMBEDDING_DIMENSIONS,
+        num_tables: int = 8,
+        num_bits: int = 8,
+        seed: int = 7,
+    ):
+        generator = random.Random(seed)
+        self.hyperplanes = [
+            [
+                [generator.gauss(0, 1) for _ in range(dimensions)]
+                for _ in range(num_bits)
+            ]
+            for _ in range(num_tables)
+        ]
+        self.tables: List[Dict[int, List[int]]] = [{} for _ in range(num_tables)]
+        self.embeddings: Dict[int, List[float]] = {}
+
+    def _signatures(self, embedding: List[float]) -> List[int]:
+        signatures = []
+        for table_hyperplanes in self.hyperplanes:
+            signature = 0
+            for hyperplane in table_hyperplanes:
+                signature = (signature << 1) | (
+                    cosine_similarity(hyperplane, embedding) >= 0
+                )
+            signatures.append(signature)
+
+        return signatures
+
+    def add(self, item_id: int, embedding: List[float]) -> None:
+        self.embeddings[item_id] = embedding
+        for table, signature in zip(self.tables, self._signatures(embedding)):
+            table.setdefault(signature, []).append(item_id)
+
+    def query(self, embedding: List[float], top_k: int = 1) -> List[Tuple[int, float]]:
+        candidates: Set[int] = set()
+        for table, signature in zip(self.tables, self._signatures(embedding)):
+            candidates.update(table.get(signature, []))
+
+        # Exact Re-Ranking of the Candidates sharing a Bucket
+        ranked_candidates = sorted(
+            (
+                (item_id, cosine_similarity(embedding, self.embeddings[item_id]))
+                for item_id in candidates
+            ),
+            key=lambda candidate: candidate[1],
+            reverse=True,
+        )
+
+        return ranked_candidates[:top_k]
@@ -0,0 +1,162 @@
+"""
+Debounced Session Update Publishing
+
+Session Updates for the Beam API are coalesced per Session: an Update is held for a
+short Debounce Window and replaced by newer Updates of the same Session, so only the
+latest State is published. Continuous Updates are still published at least every
+``max_delay`` Seconds, and terminal States (Completed, Failed, User Input) are flushed
+at once. Optionally only the changed Session Fields are sent after the first Update.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from pydantic import BaseModel
+
+from app.lib.modules.agents.agent_setup.models.agent_setup import (
+    AgentSetupSession,
+    AgentSetupStatus,
+)
+
+logger = logging.getLogger("app")
+
+TERMINAL_UPDATE_STATES = [
+    AgentSetupStatus.COMPLETED,
+    AgentSetupStatus.FAILED,
+    AgentSetupStatus.USER_INPUT_REQUIRED,
+]
+
+
+class UpdatePublisherMetrics(BaseModel):
+    submitted: int = 0
+    published: int = 0
+    # Updates replaced by a newer Update of the same Session before Publishing
+    coalesced: int = 0
+    # Updates published as a Field Diff instead of the full Session
+    diffs: int = 0
+
+
+class _PendingUpdate:
+    def __init__(self, task: AgentSetupSession):
+        self.task = task
+        self.first_submitted_at = time.monotonic()
+        self.flush_timer: Optional[asyncio.Task] = None
+
+
+class SessionUpdatePublisher:
+    """
+    Coalesces the Updates of each Session within a Debounce Window.
+
+    ``publish`` receives the Update Payload, either ``{"task": <Session>}`` or, with
+    ``send_diffs``, ``{"task_id": <Session Id>, "task_changes": <changed Fields>}``.
+    """
+
+    def __init__(
+        self,
+        publish: Callable[[Dict[str, Any]], Awaitable[None]],
+        debounce_seconds: float = 0.5,
+        max_delay: float = 2.0,
+        send_diffs: bool = False,
+    ):
+        self.publish = publish
+        self.debounce_seconds = debounce_seconds
+        self.max_delay = max_delay
+        self.send_diffs = send_diffs
+        self.metrics = UpdatePublisherMetrics()
+
+        self._pending_updates: Dict[str, _PendingUpdate] = {}
+        # Last published Session Dump, the Base of the next Diff
+        self._published_states: Dict[str, Dict[str, Any]] = {}
+        # NOTE: Publishes of a Session are serialized, so Updates never overtake each other
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+
+    async def submit(self, task: AgentSetupSession) -> None:
+        """Schedules the Update of a Session, terminal States are published directly."""
+        self.metrics.submitted += 1
+
+        pending_update = self._pending_updates.get(task.id)
+        if pending_update:
+            self.metrics.coalesced += 1
+            # The Session is dumped when published, so the latest State is sent
+            pending_update.task = task
+        else:
+            pending_update = _PendingUpdate(task)
+            self._pending_updates[task.id] = pending_update
+
+        if task.status in TERMINAL_UPDATE_STATES:
+            await self.flush(task.id)
+            return
+
+        # Trailing Debounce, bounded by the maximum Delay of the first pending Update
+        delay = min(
+            self.debounce_seconds,
+            pending_update.first_submitted_at + self.max_delay - time.monotonic(),
+        )
+        if pending_update.flush_timer:
+            pending_update.flush_timer.cancel()
+        pending_update.flush_timer = asyncio.ensure_future(
+            self._flush_after(task.id, max(delay, 0))
+        )
+
+    async def flush(self, session_id: Optional[str] = None) -> None:
+        """Publishes the pending Update of a Session, or of all Sessions."""
+        if session_id is None:
+            for pending_session_id in list(self._pending_updates):
+                await self.flush(pending_session_id)
+            return
+
+        session_lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+        async with session_lock:
+            pending_update = self._pending_updates.pop(session_id, None)
+            if pending_update is None:
+                return
+
+            if (
+                pending_update.flush_timer
+                and pending_update.flush_timer is not asyncio.current_task()
+            ):
+                pending_update.flush_timer.cancel()
+
+            await self._publish(pending_update.task)
+
+        # Sessions in a terminal State receive no further Updates
+        if pending_update.task.status in TERMINAL_UPDATE_STATES:
+            self._published_states.pop(session_id, None)
+            if session_id not in self._pending_updates:
+                self._session_locks.pop(session_id, None)
+
+    async def close(self) -> None:
+        await self.flush()
+
+    async def _flush_after(self, session_id: str, delay: float) -> None:
+        await asyncio.sleep(delay)
+
+        try:
+            await self.flush(session_id)
+        except Exception as publish_exc:
+            logger.error(f"Publishing Agent Setup Update failed for Session {session_id}: {publish_exc}")
+
+    async def _publish(self, task: AgentSetupSession) -> None:
+        task_state = task.model_dump()
+        published_state = self._published_states.get(task.id)
+
+        if self.send_diffs and published_state is not None:
+            update = {
+                "task_id": task.id,
+                "task_changes": {
+                    field: value
+                    for field, value in task_state.items()
+                    if published_state.get(field) != value
+                },
+            }
+            self.metrics.diffs += 1
+        else:
+            update = {"task": task_state}
+
+        await self.publish(update)
+
+        self.metrics.published += 1
+        if self.send_diffs:
+            self._published_states[task.id] = task_state